@@ -42,6 +42,10 @@ export type RiskSummaryItem = {
   nivel: string;
   factores_json: string | null;
   creado_en: string;
+  probabilidad_modelo: number | null;
+  nivel_modelo: string | null;
+  version_modelo: string | null;
+  factores_modelo: DropoutFactors | null;
 };
 
 export type ProgramItem = {
@@ -159,6 +163,20 @@ export type DropoutPredictionResult = {
   prediccion: number;
   probabilidad: number;
   nivel: string;
+  version: string;
+  factores?: DropoutFactors | null;
+};
+
+export type DropoutFactor = {
+  feature: string;
+  valor: number;
+  aporte: number;
+};
+
+export type DropoutFactors = {
+  base: number;
+  suben: DropoutFactor[];
+  bajan: DropoutFactor[];
 };
 
 export type StudentMatricula = {
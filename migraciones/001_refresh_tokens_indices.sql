@@ -0,0 +1,10 @@
+-- ============================================================
+-- 001 — Índices para el barrido de refresh_tokens
+-- El barrido en segundo plano (app/refresh_store.py) elimina por lotes
+-- los tokens expirados y los revocados antiguos. Sin estos índices cada
+-- lote recorre la tabla completa.
+-- ============================================================
+
+ALTER TABLE `refresh_tokens`
+  ADD KEY `ix_refresh_expiracion` (`expiracion`),
+  ADD KEY `ix_refresh_revocado` (`revocado`, `creado_en`);
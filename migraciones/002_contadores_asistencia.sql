@@ -0,0 +1,163 @@
+-- ============================================================
+-- 002 — Contadores de asistencia (sesiones, presentes)
+-- v_asistencia_periodo (usada por sp_recalcular_riesgo_periodo,
+-- sp_generar_alertas_periodo y vw_dataset_modelo) hacía
+-- SUM(presente)/COUNT(*) sobre todo el detalle de `asistencias` en
+-- cada llamada. Con estos contadores el porcentaje se lee en O(1):
+--   - contadores_asistencia_matricula: por id_matricula
+--     (lo usa la ingesta para refrescar asistencias_periodo_curso)
+--   - contadores_asistencia_periodo:   por (id_estudiante, id_periodo)
+--     (una fila por cada estudiante matriculado en el periodo)
+-- Los triggers los mantienen en cada INSERT / upsert (ON DUPLICATE KEY
+-- UPDATE dispara el trigger de UPDATE) / DELETE de asistencias.
+-- Los borrados en cascada desde matriculas NO disparan triggers en
+-- MySQL: por eso el BEFORE DELETE de matriculas descuenta lo suyo.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS `contadores_asistencia_matricula` (
+  `id_matricula` bigint NOT NULL,
+  `sesiones` int NOT NULL DEFAULT '0',
+  `presentes` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`id_matricula`),
+  CONSTRAINT `fk_cont_asis_mat` FOREIGN KEY (`id_matricula`) REFERENCES `matriculas` (`id_matricula`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `contadores_asistencia_periodo` (
+  `id_estudiante` bigint NOT NULL,
+  `id_periodo` int NOT NULL,
+  `sesiones` int NOT NULL DEFAULT '0',
+  `presentes` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`id_estudiante`, `id_periodo`),
+  KEY `ix_cont_asis_per_periodo` (`id_periodo`),
+  CONSTRAINT `fk_cont_asis_per_est` FOREIGN KEY (`id_estudiante`) REFERENCES `estudiantes` (`id_estudiante`) ON DELETE RESTRICT,
+  CONSTRAINT `fk_cont_asis_per_per` FOREIGN KEY (`id_periodo`) REFERENCES `periodos_academicos` (`id_periodo`) ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ------------------------------------------------------------
+-- Triggers
+-- ------------------------------------------------------------
+DROP TRIGGER IF EXISTS `tr_asistencias_ai`;
+DROP TRIGGER IF EXISTS `tr_asistencias_au`;
+DROP TRIGGER IF EXISTS `tr_asistencias_ad`;
+DROP TRIGGER IF EXISTS `tr_matriculas_ai`;
+DROP TRIGGER IF EXISTS `tr_matriculas_bd`;
+
+DELIMITER ;;
+
+CREATE TRIGGER `tr_asistencias_ai` AFTER INSERT ON `asistencias` FOR EACH ROW
+BEGIN
+  INSERT INTO contadores_asistencia_matricula (id_matricula, sesiones, presentes)
+  VALUES (NEW.id_matricula, 1, NEW.presente)
+  ON DUPLICATE KEY UPDATE sesiones = sesiones + 1, presentes = presentes + NEW.presente;
+
+  INSERT INTO contadores_asistencia_periodo (id_estudiante, id_periodo, sesiones, presentes)
+  SELECT m.id_estudiante, m.id_periodo, 1, NEW.presente
+  FROM matriculas m WHERE m.id_matricula = NEW.id_matricula
+  ON DUPLICATE KEY UPDATE sesiones = sesiones + 1, presentes = presentes + NEW.presente;
+END ;;
+
+CREATE TRIGGER `tr_asistencias_au` AFTER UPDATE ON `asistencias` FOR EACH ROW
+BEGIN
+  IF NEW.id_matricula = OLD.id_matricula THEN
+    IF NEW.presente <> OLD.presente THEN
+      UPDATE contadores_asistencia_matricula
+      SET presentes = presentes + NEW.presente - OLD.presente
+      WHERE id_matricula = NEW.id_matricula;
+
+      UPDATE contadores_asistencia_periodo c
+      JOIN matriculas m ON m.id_estudiante = c.id_estudiante AND m.id_periodo = c.id_periodo
+      SET c.presentes = c.presentes + NEW.presente - OLD.presente
+      WHERE m.id_matricula = NEW.id_matricula;
+    END IF;
+  ELSE
+    -- Cambio de matrícula (raro): se mueve la sesión de un contador al otro
+    UPDATE contadores_asistencia_matricula
+    SET sesiones = sesiones - 1, presentes = presentes - OLD.presente
+    WHERE id_matricula = OLD.id_matricula;
+
+    UPDATE contadores_asistencia_periodo c
+    JOIN matriculas m ON m.id_estudiante = c.id_estudiante AND m.id_periodo = c.id_periodo
+    SET c.sesiones = c.sesiones - 1, c.presentes = c.presentes - OLD.presente
+    WHERE m.id_matricula = OLD.id_matricula;
+
+    INSERT INTO contadores_asistencia_matricula (id_matricula, sesiones, presentes)
+    VALUES (NEW.id_matricula, 1, NEW.presente)
+    ON DUPLICATE KEY UPDATE sesiones = sesiones + 1, presentes = presentes + NEW.presente;
+
+    INSERT INTO contadores_asistencia_periodo (id_estudiante, id_periodo, sesiones, presentes)
+    SELECT m.id_estudiante, m.id_periodo, 1, NEW.presente
+    FROM matriculas m WHERE m.id_matricula = NEW.id_matricula
+    ON DUPLICATE KEY UPDATE sesiones = sesiones + 1, presentes = presentes + NEW.presente;
+  END IF;
+END ;;
+
+CREATE TRIGGER `tr_asistencias_ad` AFTER DELETE ON `asistencias` FOR EACH ROW
+BEGIN
+  UPDATE contadores_asistencia_matricula
+  SET sesiones = sesiones - 1, presentes = presentes - OLD.presente
+  WHERE id_matricula = OLD.id_matricula;
+
+  UPDATE contadores_asistencia_periodo c
+  JOIN matriculas m ON m.id_estudiante = c.id_estudiante AND m.id_periodo = c.id_periodo
+  SET c.sesiones = c.sesiones - 1, c.presentes = c.presentes - OLD.presente
+  WHERE m.id_matricula = OLD.id_matricula;
+END ;;
+
+-- Fila del periodo desde la primera matrícula (la vista lista a todo matriculado)
+CREATE TRIGGER `tr_matriculas_ai` AFTER INSERT ON `matriculas` FOR EACH ROW
+BEGIN
+  INSERT IGNORE INTO contadores_asistencia_periodo (id_estudiante, id_periodo, sesiones, presentes)
+  VALUES (NEW.id_estudiante, NEW.id_periodo, 0, 0);
+END ;;
+
+CREATE TRIGGER `tr_matriculas_bd` BEFORE DELETE ON `matriculas` FOR EACH ROW
+BEGIN
+  UPDATE contadores_asistencia_periodo c
+  JOIN contadores_asistencia_matricula cm ON cm.id_matricula = OLD.id_matricula
+  SET c.sesiones = c.sesiones - cm.sesiones, c.presentes = c.presentes - cm.presentes
+  WHERE c.id_estudiante = OLD.id_estudiante AND c.id_periodo = OLD.id_periodo;
+
+  IF NOT EXISTS (
+    SELECT 1 FROM matriculas
+    WHERE id_estudiante = OLD.id_estudiante AND id_periodo = OLD.id_periodo
+      AND id_matricula <> OLD.id_matricula
+  ) THEN
+    DELETE FROM contadores_asistencia_periodo
+    WHERE id_estudiante = OLD.id_estudiante AND id_periodo = OLD.id_periodo;
+  END IF;
+END ;;
+
+DELIMITER ;
+
+-- ------------------------------------------------------------
+-- Carga inicial (una sola vez, con los triggers ya activos:
+-- correr en una ventana sin ingesta de asistencias)
+-- ------------------------------------------------------------
+INSERT INTO contadores_asistencia_matricula (id_matricula, sesiones, presentes)
+SELECT a.id_matricula, COUNT(*), SUM(a.presente)
+FROM asistencias a
+GROUP BY a.id_matricula
+ON DUPLICATE KEY UPDATE sesiones = VALUES(sesiones), presentes = VALUES(presentes);
+
+INSERT INTO contadores_asistencia_periodo (id_estudiante, id_periodo, sesiones, presentes)
+SELECT m.id_estudiante, m.id_periodo, COALESCE(SUM(cm.sesiones), 0), COALESCE(SUM(cm.presentes), 0)
+FROM matriculas m
+LEFT JOIN contadores_asistencia_matricula cm ON cm.id_matricula = m.id_matricula
+GROUP BY m.id_estudiante, m.id_periodo
+ON DUPLICATE KEY UPDATE sesiones = VALUES(sesiones), presentes = VALUES(presentes);
+
+-- ------------------------------------------------------------
+-- Vista: misma salida (y mismo respaldo por promedio sin sesiones),
+-- sin recorrer `asistencias`
+-- ------------------------------------------------------------
+CREATE OR REPLACE ALGORITHM=UNDEFINED SQL SECURITY DEFINER VIEW `v_asistencia_periodo` AS
+SELECT
+  c.id_estudiante,
+  c.id_periodo,
+  CASE
+    WHEN c.sesiones > 0 THEN (100.0 * c.presentes) / c.sesiones
+    ELSE CASE WHEN vp.promedio IS NULL THEN 100 ELSE ROUND((vp.promedio / 20) * 100, 1) END
+  END AS asistencia_pct
+FROM contadores_asistencia_periodo c
+LEFT JOIN v_promedio_periodo vp
+  ON vp.id_estudiante = c.id_estudiante AND vp.id_periodo = c.id_periodo;
@@ -0,0 +1,65 @@
+-- ============================================================
+-- 003 — Resumen de calificaciones por (estudiante, periodo)
+-- Lo mantiene la carga de calificaciones (app/ingesta_calificaciones.py)
+-- para los estudiantes que toca. Lo leen /academico/{id}/calificaciones,
+-- /mi/calificaciones y v_promedio_periodo (SPs de riesgo y alertas),
+-- así ninguno re-agrega las notas por curso.
+-- promedio: ponderado por créditos sobre los cursos con nota final
+-- (antes v_promedio_periodo usaba la media simple y /mi la media
+-- simple de los cursos listados; ahora todos ven el mismo número).
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS `resumen_calificaciones_periodo` (
+  `id_estudiante` bigint NOT NULL,
+  `id_periodo` int NOT NULL,
+  `cursos` smallint NOT NULL DEFAULT '0',
+  `aprobados` smallint NOT NULL DEFAULT '0',
+  `desaprobados` smallint NOT NULL DEFAULT '0',
+  `pendientes` smallint NOT NULL DEFAULT '0',
+  `creditos_calificados` smallint NOT NULL DEFAULT '0',
+  `suma_ponderada` decimal(10,2) NOT NULL DEFAULT '0.00',
+  `promedio` decimal(5,2) DEFAULT NULL,
+  `actualizado_en` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id_estudiante`, `id_periodo`),
+  KEY `ix_resumen_calif_periodo` (`id_periodo`),
+  CONSTRAINT `fk_resumen_calif_est` FOREIGN KEY (`id_estudiante`) REFERENCES `estudiantes` (`id_estudiante`) ON DELETE RESTRICT,
+  CONSTRAINT `fk_resumen_calif_per` FOREIGN KEY (`id_periodo`) REFERENCES `periodos_academicos` (`id_periodo`) ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ------------------------------------------------------------
+-- Carga inicial (misma agregación que calificaciones.refrescar_resumen)
+-- ------------------------------------------------------------
+INSERT INTO resumen_calificaciones_periodo
+  (id_estudiante, id_periodo, cursos, aprobados, desaprobados, pendientes,
+   creditos_calificados, suma_ponderada, promedio)
+SELECT
+  m.id_estudiante,
+  m.id_periodo,
+  COUNT(*),
+  SUM(CASE WHEN cal.nota_final >= 11 THEN 1 ELSE 0 END),
+  SUM(CASE WHEN cal.nota_final <  11 THEN 1 ELSE 0 END),
+  SUM(CASE WHEN cal.nota_final IS NULL THEN 1 ELSE 0 END),
+  SUM(CASE WHEN cal.nota_final IS NOT NULL THEN c.creditos ELSE 0 END),
+  COALESCE(SUM(cal.nota_final * c.creditos), 0),
+  ROUND(SUM(cal.nota_final * c.creditos)
+        / NULLIF(SUM(CASE WHEN cal.nota_final IS NOT NULL THEN c.creditos ELSE 0 END), 0), 2)
+FROM matriculas m
+JOIN cursos c                ON c.id_curso = m.id_curso
+LEFT JOIN calificaciones cal ON cal.id_matricula = m.id_matricula
+GROUP BY m.id_estudiante, m.id_periodo
+ON DUPLICATE KEY UPDATE
+  cursos               = VALUES(cursos),
+  aprobados            = VALUES(aprobados),
+  desaprobados         = VALUES(desaprobados),
+  pendientes           = VALUES(pendientes),
+  creditos_calificados = VALUES(creditos_calificados),
+  suma_ponderada       = VALUES(suma_ponderada),
+  promedio             = VALUES(promedio);
+
+-- ------------------------------------------------------------
+-- Vista: mismas columnas, leída del resumen
+-- ------------------------------------------------------------
+CREATE OR REPLACE ALGORITHM=UNDEFINED SQL SECURITY DEFINER VIEW `v_promedio_periodo` AS
+SELECT r.id_estudiante, r.id_periodo, r.promedio
+FROM resumen_calificaciones_periodo r
+WHERE r.promedio IS NOT NULL;
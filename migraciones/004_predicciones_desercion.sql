@@ -0,0 +1,28 @@
+-- ============================================================
+-- 004 — Predicciones del modelo de deserción por (estudiante, periodo)
+-- Las escribe el puntaje por lotes (app/prediccion_lotes.py, cron
+-- nocturno) con la versión activa del registro de modelos; los
+-- tableros las leen en vez de invocar el modelo en cada vista.
+-- Tabla propia y no puntajes_riesgo: uq_puntaje (estudiante,
+-- periodo) admite un solo método, y ahí vive el puntaje por reglas.
+-- Se guardan también las features usadas (monitoreo de drift).
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS `predicciones_desercion` (
+  `id_estudiante` bigint NOT NULL,
+  `id_periodo` int NOT NULL,
+  `version_modelo` varchar(64) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `probabilidad` decimal(6,5) NOT NULL,
+  `prediccion` tinyint NOT NULL,
+  `id_nivel_riesgo` tinyint NOT NULL,
+  `promedio` decimal(5,2) NOT NULL,
+  `asistencia` decimal(5,2) NOT NULL,
+  `cursos_matriculados` smallint NOT NULL,
+  `cursos_desaprobados` smallint NOT NULL,
+  `calculado_en` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id_estudiante`, `id_periodo`),
+  KEY `ix_pred_periodo_nivel` (`id_periodo`, `id_nivel_riesgo`),
+  CONSTRAINT `fk_pred_est` FOREIGN KEY (`id_estudiante`) REFERENCES `estudiantes` (`id_estudiante`) ON DELETE RESTRICT,
+  CONSTRAINT `fk_pred_per` FOREIGN KEY (`id_periodo`) REFERENCES `periodos_academicos` (`id_periodo`) ON DELETE RESTRICT,
+  CONSTRAINT `fk_pred_nivel` FOREIGN KEY (`id_nivel_riesgo`) REFERENCES `niveles_riesgo` (`id_nivel_riesgo`) ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,22 @@
+-- ============================================================
+-- 005 — Monitoreo del modelo de deserción por periodo
+-- Lo escribe app/monitoreo.py a partir de predicciones_desercion:
+-- histogramas de features y de probabilidad (perfil_json) y su drift
+-- (PSI / KS) contra el perfil de entrenamiento del modelo o, si el
+-- modelo no lo trae, contra un periodo de referencia (drift_json).
+-- Lo lee GET /api/modelo/monitoreo.
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS `monitoreo_modelo` (
+  `id_periodo` int NOT NULL,
+  `version_modelo` varchar(64) COLLATE utf8mb4_unicode_ci NOT NULL,
+  `estudiantes` int NOT NULL,
+  `referencia` varchar(40) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `psi_max` decimal(8,4) DEFAULT NULL,
+  `estado` varchar(20) COLLATE utf8mb4_unicode_ci DEFAULT NULL,
+  `perfil_json` json NOT NULL,
+  `drift_json` json DEFAULT NULL,
+  `calculado_en` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id_periodo`, `version_modelo`),
+  CONSTRAINT `fk_monitoreo_per` FOREIGN KEY (`id_periodo`) REFERENCES `periodos_academicos` (`id_periodo`) ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,10 @@
+-- ============================================================
+-- 006 — Factores del modelo por predicción
+-- El puntaje por lotes (app/prediccion_lotes.py) guarda, junto con
+-- la probabilidad, las features que más suben y bajan el riesgo de
+-- cada estudiante (pred_contribs de XGBoost, app/explicacion.py).
+-- NULL si la versión del modelo no da aportes.
+-- ============================================================
+
+ALTER TABLE `predicciones_desercion`
+  ADD COLUMN `factores_json` json DEFAULT NULL;
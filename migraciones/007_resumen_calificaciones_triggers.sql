@@ -0,0 +1,160 @@
+-- ============================================================
+-- 007 — Triggers de resumen_calificaciones_periodo
+-- 003 dejó el resumen a cargo de la carga de calificaciones; una nota
+-- escrita por otra vía o una matrícula nueva / anulada lo dejaba
+-- desactualizado o sin fila, y todos sus lectores (v_promedio_periodo,
+-- /mi, /academico, puntaje por lotes, dataset) confían solo en él.
+-- Como en 002, los triggers lo mantienen en cada cambio:
+--   - calificaciones: INSERT / UPDATE de nota_final / DELETE
+--   - matriculas:     INSERT / UPDATE de la clave o del curso / DELETE
+-- Cada cambio recalcula la fila (estudiante, periodo) con la misma
+-- agregación que SQL_REFRESCAR_RESUMEN: son pocos cursos por estudiante
+-- y el promedio ponderado no se puede llevar con deltas sin redondeo.
+-- Si el estudiante ya no tiene matrículas en el periodo, la fila se borra.
+-- Es el ÚNICO camino que escribe el resumen: la carga de calificaciones
+-- (app/ingesta_calificaciones.py) y el puntaje por lotes ya no lo
+-- recalculan aparte, como la ingesta de asistencias confía en los
+-- contadores de 002. Cada nota cargada cuesta un recálculo de su fila
+-- (un estudiante, unos pocos cursos por índice); un recálculo por lotes
+-- después de la carga repetía ese trabajo.
+-- Los borrados en cascada de calificaciones (desde matriculas) no
+-- disparan triggers en MySQL: los cubre el AFTER DELETE de matriculas.
+-- ============================================================
+
+DROP PROCEDURE IF EXISTS `sp_refrescar_resumen_calificaciones`;
+DROP PROCEDURE IF EXISTS `sp_refrescar_resumen_matricula`;
+DROP TRIGGER IF EXISTS `tr_calificaciones_ai`;
+DROP TRIGGER IF EXISTS `tr_calificaciones_au`;
+DROP TRIGGER IF EXISTS `tr_calificaciones_ad`;
+DROP TRIGGER IF EXISTS `tr_matriculas_ai_resumen`;
+DROP TRIGGER IF EXISTS `tr_matriculas_au_resumen`;
+DROP TRIGGER IF EXISTS `tr_matriculas_ad_resumen`;
+
+DELIMITER ;;
+
+CREATE PROCEDURE `sp_refrescar_resumen_calificaciones`(IN p_est bigint, IN p_per int)
+BEGIN
+  IF EXISTS (SELECT 1 FROM matriculas WHERE id_estudiante = p_est AND id_periodo = p_per) THEN
+    INSERT INTO resumen_calificaciones_periodo
+      (id_estudiante, id_periodo, cursos, aprobados, desaprobados, pendientes,
+       creditos_calificados, suma_ponderada, promedio)
+    SELECT
+      m.id_estudiante,
+      m.id_periodo,
+      COUNT(*),
+      SUM(CASE WHEN cal.nota_final >= 11 THEN 1 ELSE 0 END),
+      SUM(CASE WHEN cal.nota_final <  11 THEN 1 ELSE 0 END),
+      SUM(CASE WHEN cal.nota_final IS NULL THEN 1 ELSE 0 END),
+      SUM(CASE WHEN cal.nota_final IS NOT NULL THEN c.creditos ELSE 0 END),
+      COALESCE(SUM(cal.nota_final * c.creditos), 0),
+      ROUND(SUM(cal.nota_final * c.creditos)
+            / NULLIF(SUM(CASE WHEN cal.nota_final IS NOT NULL THEN c.creditos ELSE 0 END), 0), 2)
+    FROM matriculas m
+    JOIN cursos c                ON c.id_curso = m.id_curso
+    LEFT JOIN calificaciones cal ON cal.id_matricula = m.id_matricula
+    WHERE m.id_estudiante = p_est AND m.id_periodo = p_per
+    GROUP BY m.id_estudiante, m.id_periodo
+    ON DUPLICATE KEY UPDATE
+      cursos               = VALUES(cursos),
+      aprobados            = VALUES(aprobados),
+      desaprobados         = VALUES(desaprobados),
+      pendientes           = VALUES(pendientes),
+      creditos_calificados = VALUES(creditos_calificados),
+      suma_ponderada       = VALUES(suma_ponderada),
+      promedio             = VALUES(promedio);
+  ELSE
+    DELETE FROM resumen_calificaciones_periodo
+    WHERE id_estudiante = p_est AND id_periodo = p_per;
+  END IF;
+END ;;
+
+CREATE PROCEDURE `sp_refrescar_resumen_matricula`(IN p_mat bigint)
+BEGIN
+  DECLARE v_est bigint DEFAULT NULL;
+  DECLARE v_per int DEFAULT NULL;
+  SELECT id_estudiante, id_periodo INTO v_est, v_per
+  FROM matriculas WHERE id_matricula = p_mat;
+  IF v_est IS NOT NULL THEN
+    CALL sp_refrescar_resumen_calificaciones(v_est, v_per);
+  END IF;
+END ;;
+
+CREATE TRIGGER `tr_calificaciones_ai` AFTER INSERT ON `calificaciones` FOR EACH ROW
+BEGIN
+  CALL sp_refrescar_resumen_matricula(NEW.id_matricula);
+END ;;
+
+-- Solo nota_final entra en el resumen (un upsert que solo trae el parcial no recalcula)
+CREATE TRIGGER `tr_calificaciones_au` AFTER UPDATE ON `calificaciones` FOR EACH ROW
+BEGIN
+  IF NEW.id_matricula <> OLD.id_matricula THEN
+    CALL sp_refrescar_resumen_matricula(OLD.id_matricula);
+    CALL sp_refrescar_resumen_matricula(NEW.id_matricula);
+  ELSEIF NOT (NEW.nota_final <=> OLD.nota_final) THEN
+    CALL sp_refrescar_resumen_matricula(NEW.id_matricula);
+  END IF;
+END ;;
+
+CREATE TRIGGER `tr_calificaciones_ad` AFTER DELETE ON `calificaciones` FOR EACH ROW
+BEGIN
+  CALL sp_refrescar_resumen_matricula(OLD.id_matricula);
+END ;;
+
+-- Matrícula nueva: el curso cuenta como pendiente desde ya
+CREATE TRIGGER `tr_matriculas_ai_resumen` AFTER INSERT ON `matriculas` FOR EACH ROW FOLLOWS `tr_matriculas_ai`
+BEGIN
+  CALL sp_refrescar_resumen_calificaciones(NEW.id_estudiante, NEW.id_periodo);
+END ;;
+
+CREATE TRIGGER `tr_matriculas_au_resumen` AFTER UPDATE ON `matriculas` FOR EACH ROW
+BEGIN
+  IF NEW.id_estudiante <> OLD.id_estudiante OR NEW.id_periodo <> OLD.id_periodo THEN
+    CALL sp_refrescar_resumen_calificaciones(OLD.id_estudiante, OLD.id_periodo);
+    CALL sp_refrescar_resumen_calificaciones(NEW.id_estudiante, NEW.id_periodo);
+  ELSEIF NEW.id_curso <> OLD.id_curso THEN
+    CALL sp_refrescar_resumen_calificaciones(NEW.id_estudiante, NEW.id_periodo);
+  END IF;
+END ;;
+
+-- AFTER: las calificaciones de la matrícula ya se borraron en cascada
+CREATE TRIGGER `tr_matriculas_ad_resumen` AFTER DELETE ON `matriculas` FOR EACH ROW
+BEGIN
+  CALL sp_refrescar_resumen_calificaciones(OLD.id_estudiante, OLD.id_periodo);
+END ;;
+
+DELIMITER ;
+
+-- ------------------------------------------------------------
+-- Puesta al día (una sola vez, con los triggers ya activos): filas
+-- que quedaron desactualizadas desde 003 y estudiantes sin fila
+-- ------------------------------------------------------------
+INSERT INTO resumen_calificaciones_periodo
+  (id_estudiante, id_periodo, cursos, aprobados, desaprobados, pendientes,
+   creditos_calificados, suma_ponderada, promedio)
+SELECT
+  m.id_estudiante,
+  m.id_periodo,
+  COUNT(*),
+  SUM(CASE WHEN cal.nota_final >= 11 THEN 1 ELSE 0 END),
+  SUM(CASE WHEN cal.nota_final <  11 THEN 1 ELSE 0 END),
+  SUM(CASE WHEN cal.nota_final IS NULL THEN 1 ELSE 0 END),
+  SUM(CASE WHEN cal.nota_final IS NOT NULL THEN c.creditos ELSE 0 END),
+  COALESCE(SUM(cal.nota_final * c.creditos), 0),
+  ROUND(SUM(cal.nota_final * c.creditos)
+        / NULLIF(SUM(CASE WHEN cal.nota_final IS NOT NULL THEN c.creditos ELSE 0 END), 0), 2)
+FROM matriculas m
+JOIN cursos c                ON c.id_curso = m.id_curso
+LEFT JOIN calificaciones cal ON cal.id_matricula = m.id_matricula
+GROUP BY m.id_estudiante, m.id_periodo
+ON DUPLICATE KEY UPDATE
+  cursos               = VALUES(cursos),
+  aprobados            = VALUES(aprobados),
+  desaprobados         = VALUES(desaprobados),
+  pendientes           = VALUES(pendientes),
+  creditos_calificados = VALUES(creditos_calificados),
+  suma_ponderada       = VALUES(suma_ponderada),
+  promedio             = VALUES(promedio);
+
+DELETE r FROM resumen_calificaciones_periodo r
+LEFT JOIN matriculas m ON m.id_estudiante = r.id_estudiante AND m.id_periodo = r.id_periodo
+WHERE m.id_matricula IS NULL;
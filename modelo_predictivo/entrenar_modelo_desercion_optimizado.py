@@ -1,21 +1,61 @@
-import pymysql
-import pandas as pd
-from decimal import Decimal
-import numpy as np
+"""
+Entrenamiento del modelo de deserción (XGBoost), sin interacción.
+
+    python entrenar_modelo_desercion_optimizado.py --workers 4 --salida salida/
+
+1. El dataset (v_dataset_desercion_simple) se lee con un cursor del lado del
+   servidor, por bloques, directo a columnas NumPy tipadas, y se guarda en
+   cache/dataset_<hash>.parquet. El hash sale de la consulta y de un
+   "fingerprint" barato de las tablas de origen: si los datos no cambiaron, la
+   siguiente corrida no vuelve a la BD (--sin-cache para forzarlo).
+   Con --dataset se usa en cambio el Parquet por periodo que arma
+   generar_dataset_desercion.py (sin tocar la BD).
+2. Búsqueda aleatoria de hiperparámetros con early stopping contra un conjunto
+   de validación fijo (n_estimators deja de ser un hiperparámetro) y un
+   presupuesto explícito de procesos: --workers candidatos en paralelo, cada
+   XGBoost con 1 hilo (sin sobre-suscripción).
+3. Métricas (JSON y texto) y gráficos (PNG) van a --salida; nunca se abre una
+   ventana. Ahí también quedan modelo.ubj + meta.json en el formato del
+   registro de la API (sia-api/app/modelos/<version>/) y, con --pickle, el
+   XGBClassifier en joblib.
+"""
 
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
-from sklearn.metrics import confusion_matrix, classification_report, roc_auc_score
-from xgboost import XGBClassifier, plot_importance
-import joblib
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")       # sin display: los gráficos solo se guardan
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pymysql
+import pymysql.cursors
+from dotenv import load_dotenv
+from sklearn.metrics import (
+    auc, classification_report, confusion_matrix, precision_recall_curve, roc_auc_score, roc_curve,
+)
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
+from xgboost import XGBClassifier
 
-import seaborn as sns
-from sklearn.metrics import roc_curve, auc, precision_recall_curve
+load_dotenv()
 
+BASE_DIR = Path(__file__).resolve().parent
 
-# -------------------------------------------------------
-# 1. Cargar datos desde MySQL
-# -------------------------------------------------------
+# Features compartidas con la API y el puntaje por lotes (sia-api/app/features.py)
+sys.path.insert(0, str(BASE_DIR.parent / "sia-api"))
+from app import drift  # noqa: E402
+from app.features import FEATURES, matriz  # noqa: E402
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = int(os.getenv("DB_PORT", "3306"))
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
+DB_NAME = os.getenv("DB_NAME", "sia_unasam")
 
 QUERY = """
 SELECT
@@ -26,129 +66,29 @@ SELECT
     cursos_matriculados,
     cursos_desaprobados,
     deserta
-FROM v_dataset_desercion_simple;
+FROM v_dataset_desercion_simple
 """
 
-print("Conectando a MySQL...")
-conn = pymysql.connect(
-    host="localhost",
-    user="root",
-    password="root",
-    database="sia_unasam",
-    cursorclass=pymysql.cursors.DictCursor
-)
-
-with conn:
-    cur = conn.cursor()
-    cur.execute(QUERY)
-    rows = cur.fetchall()
-
-print("Filas obtenidas:", len(rows))
-
-def conv(x):
-    return float(x) if isinstance(x, Decimal) else x
-
-rows = [{k: conv(v) for k, v in r.items()} for r in rows]
-df = pd.DataFrame(rows)
-
-print("\nPrimeras filas:")
-print(df.head())
-
-print("\nDistribución de 'deserta':")
-print(df["deserta"].value_counts())
-
-# -------------------------------------------------------
-# 2. Limpiar y asegurar tipos
-# -------------------------------------------------------
-
-num_cols = [
-    "id_estudiante","id_periodo",
-    "promedio","asistencia",
-    "cursos_matriculados","cursos_desaprobados",
-    "deserta"
-]
-for col in num_cols:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
-
-df = df.dropna(subset=["promedio","asistencia","cursos_matriculados",
-                       "cursos_desaprobados","deserta"])
-df["deserta"] = df["deserta"].astype(int)
-
-print("\nDescripción estadística:")
-print(df.describe())
-
-# -------------------------------------------------------
-# 3. Ingeniería de características (solo con datos reales)
-# -------------------------------------------------------
-
-df["carga_baja"] = (df["cursos_matriculados"] <= 2).astype(int)
-df["cursos_aprobados"] = df["cursos_matriculados"] - df["cursos_desaprobados"]
-
-df["tasa_desaprob"] = df["cursos_desaprobados"] / df["cursos_matriculados"].replace(0,1)
-df["tasa_desaprob"] = df["tasa_desaprob"].clip(0,1)  # por seguridad
-
-df["sin_desaprob"] = (df["cursos_desaprobados"] == 0).astype(int)
-
-df["rendimiento_global"] = df["promedio"] * (df["asistencia"] / 100.0)
-df["carga_x_rend"] = df["cursos_matriculados"] * df["promedio"]
-
-# -------------------------------------------------------
-# 4. Definir X e y
-# -------------------------------------------------------
+# Columnas de la consulta y su tipo en memoria / Parquet
+COLUMNAS = {
+    "id_estudiante": np.int64,
+    "id_periodo": np.int32,
+    "promedio": np.float64,
+    "asistencia": np.float64,
+    "cursos_matriculados": np.float64,
+    "cursos_desaprobados": np.float64,
+    "deserta": np.float64,          # float mientras puede venir NULL; luego int8
+}
 
-features = [
-    "promedio",
-    "asistencia",
-    "cursos_matriculados",
-    "cursos_desaprobados",
-    "carga_baja",
-    "cursos_aprobados",
-    "tasa_desaprob",
-    "sin_desaprob",
-    "rendimiento_global",
-    "carga_x_rend",
+# Cambia si cambian los datos de origen de la vista; barato de calcular
+FINGERPRINT = [
+    "SELECT COUNT(*), MAX(id_matricula) FROM matriculas",
+    "SELECT COUNT(*), MAX(actualizado_en), SUM(suma_ponderada) FROM resumen_calificaciones_periodo",
+    "SELECT COUNT(*), SUM(sesiones), SUM(presentes) FROM contadores_asistencia_periodo",
+    "SELECT COUNT(*), MAX(id_periodo) FROM periodos_academicos",
 ]
 
-X = df[features]
-y = df["deserta"]
-
-print("\nTamaño X:", X.shape, " y:", y.shape)
-
-# -------------------------------------------------------
-# 5. Train/Test split (sin SMOTE)
-# -------------------------------------------------------
-
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.20,
-    random_state=42,
-    stratify=y
-)
-
-print("\nClases en train:")
-print(y_train.value_counts())
-print("\nClases en test:")
-print(y_test.value_counts())
-
-# scale_pos_weight = #negativos / #positivos
-num_neg = (y_train == 0).sum()
-num_pos = (y_train == 1).sum()
-scale_pos_weight = num_neg / num_pos
-print(f"\nscale_pos_weight calculado: {scale_pos_weight:.3f}")
-
-# -------------------------------------------------------
-# 6. Búsqueda aleatoria de hiperparámetros
-# -------------------------------------------------------
-
-base_model = XGBClassifier(
-    eval_metric="logloss",
-    use_label_encoder=False,
-    n_jobs=-1,
-    scale_pos_weight=scale_pos_weight
-)
-
-param_dist = {
-    "n_estimators":     [200, 300, 400, 500],
+PARAM_DIST = {
     "learning_rate":    [0.01, 0.03, 0.05, 0.1],
     "max_depth":        [3, 4, 5, 6, 7],
     "subsample":        [0.7, 0.8, 0.9, 1.0],
@@ -158,114 +98,280 @@ param_dist = {
     "reg_lambda":       [1, 1.5, 2],
 }
 
-print("\nIniciando búsqueda de hiperparámetros (RandomizedSearchCV)...")
-search = RandomizedSearchCV(
-    estimator=base_model,
-    param_distributions=param_dist,
-    n_iter=30,
-    scoring="roc_auc",
-    cv=3,
-    verbose=1,
-    random_state=42,
-    n_jobs=-1
-)
-
-search.fit(X_train, y_train)
 
-print("\nMejores hiperparámetros encontrados:")
-print(search.best_params_)
-print("Mejor AUC-ROC (CV):", search.best_score_)
+def _conectar(**extra):
+    return pymysql.connect(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD,
+                           database=DB_NAME, **extra)
 
-best_model = search.best_estimator_
 
 # -------------------------------------------------------
-# 7. Evaluación final en test
+# 1. Dataset (streaming + caché Parquet)
 # -------------------------------------------------------
 
-y_pred = best_model.predict(X_test)
-y_prob = best_model.predict_proba(X_test)[:,1]
-
-print("\nMatriz de confusión (test):")
-print(confusion_matrix(y_test, y_pred))
+def version_datos(conn) -> str:
+    h = hashlib.sha256(QUERY.encode())
+    with conn.cursor() as cur:
+        for sql in FINGERPRINT:
+            cur.execute(sql)
+            h.update(repr(cur.fetchone()).encode())
+    return h.hexdigest()[:16]
+
+
+def leer_dataset(conn, bloque: int) -> pd.DataFrame:
+    """Cursor del lado del servidor: nunca se materializa la lista completa de filas en Python."""
+    partes = {c: [] for c in COLUMNAS}
+    filas = 0
+    with conn.cursor(pymysql.cursors.SSCursor) as cur:
+        cur.execute(QUERY)
+        while True:
+            lote = cur.fetchmany(bloque)
+            if not lote:
+                break
+            # Decimal / None -> float64 (NaN) en una sola conversión por bloque
+            arr = np.array(lote, dtype=np.float64)
+            for i, (col, tipo) in enumerate(COLUMNAS.items()):
+                partes[col].append(arr[:, i].astype(tipo) if tipo is not np.float64 else arr[:, i])
+            filas += len(lote)
+            print(f"  {filas:,} filas leídas", end="\r")
+    print()
+    return pd.DataFrame({c: (np.concatenate(p) if p else np.array([], dtype=COLUMNAS[c]))
+                         for c, p in partes.items()})
+
+
+def leer_dataset_particionado(ruta: Path) -> tuple:
+    """Salida de generar_dataset_desercion.py; la versión es la de su manifiesto."""
+    manifiesto = (ruta / "_manifiesto.json").read_bytes()
+    df = pd.read_parquet(ruta)
+    df["id_periodo"] = df["id_periodo"].astype(np.int32)          # viene como partición (categoría)
+    df["deserta"] = df["deserta"].astype(np.float64)
+    print(f"Dataset particionado {ruta}: {len(df):,} filas")
+    return df, hashlib.sha256(manifiesto).hexdigest()[:16]
+
+
+def cargar_dataset(cache_dir: Path, usar_cache: bool, bloque: int) -> tuple:
+    print("Conectando a MySQL...")
+    with _conectar() as conn:
+        version = version_datos(conn)
+        ruta = cache_dir / f"dataset_{version}.parquet"
+        if usar_cache and ruta.exists():
+            print(f"Dataset sin cambios (versión {version}): {ruta}")
+            return pd.read_parquet(ruta), version
+        t0 = time.perf_counter()
+        df = leer_dataset(conn, bloque)
+    print(f"Filas obtenidas: {len(df):,} ({time.perf_counter() - t0:.1f} s)")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(ruta, index=False)
+    return df, version
 
-print("\nReporte de clasificación (test):")
-print(classification_report(y_test, y_pred))
-
-auc_test = roc_auc_score(y_test, y_prob)
-print("\nAUC-ROC en test:", auc_test)
 
 # -------------------------------------------------------
-# 8. Importancia de variables
+# 2. Limpieza e ingeniería de características
 # -------------------------------------------------------
 
-importances = best_model.feature_importances_
-
-plt.figure(figsize=(7,5))
-plt.barh(features, importances)
-plt.title("Importancia de características - Modelo Optimizado")
-plt.tight_layout()
-plt.show()
+def preparar(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.dropna(subset=["promedio", "asistencia", "cursos_matriculados",
+                           "cursos_desaprobados", "deserta"]).copy()
+    df["deserta"] = df["deserta"].astype(np.int8)
 
-for feat, imp in sorted(zip(features, importances), key=lambda x: -x[1]):
-    print(f"{feat}: {imp:.4f}")
+    X = matriz(df["promedio"].to_numpy(), df["asistencia"].to_numpy(),
+               df["cursos_matriculados"].to_numpy(), df["cursos_desaprobados"].to_numpy())
+    for i, nombre in enumerate(FEATURES):
+        df[nombre] = X[:, i]
+    return df
 
 
 # -------------------------------------------------------
-# Generar gráficos
+# 3. Búsqueda de hiperparámetros con early stopping
 # -------------------------------------------------------
 
-# Matriz de confusión
-
-cm = confusion_matrix(y_test, y_pred)
-
-plt.figure(figsize=(6,4))
-sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
-plt.xlabel("Predicción")
-plt.ylabel("Valor real")
-plt.title("Matriz de Confusión")
-plt.show()
+def entrenar(X_train, y_train, args):
+    # Validación fija para early stopping, separada de los folds de la búsqueda
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=0.15, random_state=args.semilla, stratify=y_train,
+    )
+    num_neg = int((y_fit == 0).sum())
+    num_pos = int((y_fit == 1).sum())
+    scale_pos_weight = num_neg / max(num_pos, 1)
+    print(f"\nscale_pos_weight calculado: {scale_pos_weight:.3f}")
+
+    base_model = XGBClassifier(
+        n_estimators=args.max_arboles,
+        early_stopping_rounds=args.paciencia,
+        eval_metric="logloss",
+        tree_method="hist",
+        n_jobs=1,                       # el paralelismo lo pone la búsqueda (--workers)
+        scale_pos_weight=scale_pos_weight,
+        random_state=args.semilla,
+    )
+    search = RandomizedSearchCV(
+        estimator=base_model,
+        param_distributions=PARAM_DIST,
+        n_iter=args.iteraciones,
+        scoring="roc_auc",
+        cv=args.cv,
+        verbose=1,
+        random_state=args.semilla,
+        n_jobs=args.workers,
+        refit=True,
+    )
+    print(f"\nBúsqueda: {args.iteraciones} candidatos x {args.cv} folds, {args.workers} procesos...")
+    t0 = time.perf_counter()
+    search.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    segundos = time.perf_counter() - t0
+
+    best_model = search.best_estimator_
+    print("\nMejores hiperparámetros encontrados:", search.best_params_)
+    print("Mejor AUC-ROC (CV):", search.best_score_)
+    print(f"Árboles tras early stopping: {best_model.best_iteration + 1} ({segundos:.1f} s)")
+    return search, best_model, segundos
 
-# Curva ROC
 
-y_proba = best_model.predict_proba(X_test)[:,1]
-
-fpr, tpr, thresholds = roc_curve(y_test, y_proba)
-roc_auc = auc(fpr, tpr)
-
-plt.figure()
-plt.plot(fpr, tpr, label=f'AUC = {roc_auc:.2f}')
-plt.plot([0, 1], [0, 1], 'k--')
-plt.xlabel("False Positive Rate")
-plt.ylabel("True Positive Rate")
-plt.title("Curva ROC")
-plt.legend()
-plt.show()
-
-# Curva Precision–Recall
-
-precision, recall, thresholds = precision_recall_curve(y_test, y_proba)
-
-plt.figure(figsize=(6,4))
-plt.plot(recall, precision)
-plt.xlabel("Recall")
-plt.ylabel("Precision")
-plt.title("Curva Precision–Recall")
-plt.show()
-
-# Importancia de variables (Feature Importance)
+# -------------------------------------------------------
+# 4. Evaluación y gráficos (a archivos)
+# -------------------------------------------------------
 
-plt.figure(figsize=(7,5))
-plot_importance(best_model)
-plt.title("Importancia de Variables")
-plt.show()
+def _guardar(fig, ruta: Path) -> None:
+    fig.tight_layout()
+    fig.savefig(ruta, dpi=120)
+    plt.close(fig)
+
+
+def graficos(salida: Path, best_model, df, y_test, y_pred, y_prob) -> None:
+    fig, ax = plt.subplots(figsize=(7, 5))
+    ax.barh(FEATURES, best_model.feature_importances_)
+    ax.set_title("Importancia de características")
+    _guardar(fig, salida / "importancia.png")
+
+    cm = confusion_matrix(y_test, y_pred)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.imshow(cm, cmap="Blues")
+    for (i, j), v in np.ndenumerate(cm):
+        ax.text(j, i, str(v), ha="center", va="center")
+    ax.set_xlabel("Predicción")
+    ax.set_ylabel("Valor real")
+    ax.set_title("Matriz de Confusión")
+    _guardar(fig, salida / "matriz_confusion.png")
+
+    fpr, tpr, _ = roc_curve(y_test, y_prob)
+    fig, ax = plt.subplots()
+    ax.plot(fpr, tpr, label=f"AUC = {auc(fpr, tpr):.2f}")
+    ax.plot([0, 1], [0, 1], "k--")
+    ax.set_xlabel("False Positive Rate")
+    ax.set_ylabel("True Positive Rate")
+    ax.set_title("Curva ROC")
+    ax.legend()
+    _guardar(fig, salida / "roc.png")
+
+    precision, recall, _ = precision_recall_curve(y_test, y_prob)
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.plot(recall, precision)
+    ax.set_xlabel("Recall")
+    ax.set_ylabel("Precision")
+    ax.set_title("Curva Precision–Recall")
+    _guardar(fig, salida / "precision_recall.png")
+
+    fig, ax = plt.subplots()
+    ax.hist(df["promedio"], bins=20)
+    ax.set_title("Distribución del promedio")
+    _guardar(fig, salida / "distribucion_promedio.png")
 
-plt.hist(df['promedio'], bins=20)
-plt.title("Distribución del promedio")
-plt.show()
 
 # -------------------------------------------------------
-# 9. Guardar modelo
+# 5. Main
 # -------------------------------------------------------
 
-# joblib.dump(best_model, "modelo_desercion_optimizado.pkl")
-#print("\n✔ Modelo guardado como modelo_desercion_optimizado.pkl")
+def main(args) -> None:
+    salida = Path(args.salida)
+    salida.mkdir(parents=True, exist_ok=True)
+
+    if args.dataset:
+        df, version_dataset = leer_dataset_particionado(Path(args.dataset))
+    else:
+        df, version_dataset = cargar_dataset(Path(args.cache), not args.sin_cache, args.bloque)
+    df = preparar(df)
+    print("\nDistribución de 'deserta':")
+    print(df["deserta"].value_counts())
+
+    X = df[list(FEATURES)]
+    y = df["deserta"]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.20, random_state=args.semilla, stratify=y,
+    )
+
+    search, best_model, segundos = entrenar(X_train, y_train, args)
+
+    y_pred = best_model.predict(X_test)
+    y_prob = best_model.predict_proba(X_test)[:, 1]
+    auc_test = roc_auc_score(y_test, y_prob)
+    reporte = classification_report(y_test, y_pred)
+    print("\nMatriz de confusión (test):")
+    print(confusion_matrix(y_test, y_pred))
+    print("\nReporte de clasificación (test):")
+    print(reporte)
+    print("AUC-ROC en test:", auc_test)
+
+    graficos(salida, best_model, df, y_test, y_pred, y_prob)
+
+    metricas = {
+        "auc_cv": float(search.best_score_),
+        "auc_test": float(auc_test),
+        "filas": int(len(df)),
+        "positivos": int(y.sum()),
+        "arboles": int(best_model.best_iteration + 1),
+        "segundos_busqueda": round(segundos, 1),
+    }
+    (salida / "metricas.json").write_text(json.dumps({
+        **metricas,
+        "version_dataset": version_dataset,
+        "hiperparametros": search.best_params_,
+        "matriz_confusion": confusion_matrix(y_test, y_pred).tolist(),
+        "importancias": dict(zip(FEATURES, map(float, best_model.feature_importances_))),
+    }, ensure_ascii=False, indent=2, default=float), encoding="utf-8")
+    (salida / "reporte.txt").write_text(reporte, encoding="utf-8")
+
+    # Perfil de entrenamiento: referencia del monitoreo de drift (python -m app.monitoreo)
+    perfil = drift.perfil({
+        "promedio": X_train["promedio"].to_numpy(),
+        "asistencia": X_train["asistencia"].to_numpy(),
+        "cursos_desaprobados": X_train["cursos_desaprobados"].to_numpy(),
+        "probabilidad": best_model.predict_proba(X_train)[:, 1],
+    })
+
+    # Booster nativo + meta.json con el formato del registro de la API
+    best_model.get_booster().save_model(str(salida / "modelo.ubj"))
+    (salida / "meta.json").write_text(json.dumps({
+        "formato": "xgboost",
+        "archivo": "modelo.ubj",
+        "origen": "modelo_predictivo/entrenar_modelo_desercion_optimizado.py",
+        "features": list(FEATURES),
+        "umbrales": {"medio": 0.4, "alto": 0.7},
+        "metricas": metricas,
+        "version_dataset": version_dataset,
+        "hiperparametros": search.best_params_,
+        "perfil": perfil,
+    }, ensure_ascii=False, indent=2, default=float), encoding="utf-8")
+    if args.pickle:
+        import joblib
+        joblib.dump(best_model, salida / "modelo_desercion_optimizado.pkl")
+
+    print(f"\n✔ Modelo, métricas y gráficos en {salida}/")
+    print("  Para publicarlo: copiar modelo.ubj y meta.json a sia-api/app/modelos/<version>/ "
+          "y activar con POST /api/modelo/versiones/<version>/activar")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrenamiento del modelo de deserción")
+    parser.add_argument("--salida", default=str(BASE_DIR / "salida"))
+    parser.add_argument("--cache", default=str(BASE_DIR / "cache"), help="directorio de datasets Parquet")
+    parser.add_argument("--dataset", help="directorio de generar_dataset_desercion.py (en vez de la vista)")
+    parser.add_argument("--sin-cache", action="store_true", help="releer el dataset aunque no haya cambiado")
+    parser.add_argument("--bloque", type=int, default=50_000, help="filas por fetchmany")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="candidatos entrenados en paralelo (cada uno con 1 hilo)")
+    parser.add_argument("--iteraciones", type=int, default=30)
+    parser.add_argument("--cv", type=int, default=3)
+    parser.add_argument("--max-arboles", type=int, default=1000)
+    parser.add_argument("--paciencia", type=int, default=50, help="rondas sin mejora antes de cortar")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--pickle", action="store_true", help="guardar también el XGBClassifier en joblib")
+    main(parser.parse_args())
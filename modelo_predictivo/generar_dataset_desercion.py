@@ -1,110 +1,191 @@
+"""
+Dataset de deserción por (estudiante, periodo), en Parquet particionado por periodo.
+
+    python generar_dataset_desercion.py --salida dataset/
+    python generar_dataset_desercion.py --periodos 8,9 --forzar
+
+Antes: estudiantes × matriculas unido a tres vistas y colapsado con
+GROUP BY e.id_estudiante, m.id_periodo, es decir, cada vista evaluada una vez
+por curso matriculado. Ahora se parte de tablas que ya tienen una fila por
+(estudiante, periodo):
+
+- contadores_asistencia_periodo (migraciones/002, mantenida por triggers desde
+  matriculas): qué estudiantes cursan el periodo y su asistencia.
+- resumen_calificaciones_periodo (migraciones/003): promedio, cursos,
+  desaprobados.
+- Etiqueta: labels_periodo.y si existe; si no, la misma regla que
+  v_desercion_academica (sin matrícula en el periodo siguiente), resuelta con
+  un LEFT JOIN al periodo siguiente en lugar de una subconsulta por fila. El
+  último periodo no tiene siguiente: queda sin etiqueta (NULL) salvo en
+  labels_periodo.
+
+Incremental: cada periodo tiene una huella (conteos y sumas de sus datos, de
+sus etiquetas y del conjunto de matriculados del periodo siguiente: conteo,
+suma y XOR de CRC32 de id_estudiante) guardada en
+<salida>/_manifiesto.json; solo se reescriben los periodos cuya huella cambió.
+Salida: <salida>/id_periodo=<n>/datos.parquet (pd.read_parquet(<salida>) los
+lee todos).
+"""
+
+import argparse
+import hashlib
+import json
 import os
+import time
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import pymysql
-from decimal import Decimal
+import pymysql.cursors
 from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = Path(__file__).resolve().parent
+
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = int(os.getenv("DB_PORT", "3306"))
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
 DB_NAME = os.getenv("DB_NAME", "sia_unasam")
 
-QUERY = """
-SELECT 
-    e.id_estudiante,
-    m.id_periodo,
-    COALESCE(vp.promedio, 0)        AS promedio,
-    COALESCE(va.asistencia_pct, 0)  AS asistencia,
-    vd.deserta                      AS deserta
-FROM estudiantes e
-JOIN matriculas m 
-      ON m.id_estudiante = e.id_estudiante
-LEFT JOIN v_promedio_periodo vp 
-      ON vp.id_estudiante = e.id_estudiante 
-     AND vp.id_periodo    = m.id_periodo
-LEFT JOIN v_asistencia_periodo va 
-      ON va.id_estudiante = e.id_estudiante
-     AND va.id_periodo    = m.id_periodo
-LEFT JOIN v_desercion_academica vd
-      ON vd.id_estudiante = e.id_estudiante
-     AND vd.id_periodo    = m.id_periodo
-GROUP BY e.id_estudiante, m.id_periodo;
+PERIODOS = "SELECT id_periodo FROM periodos_academicos ORDER BY id_periodo"
+
+# Los 3 primeros valores identifican el conjunto de matriculados (un cambio de un
+# estudiante por otro deja igual el conteo, no la suma ni el XOR de CRC32)
+HUELLA_DATOS = """
+SELECT c.id_periodo, COUNT(*), SUM(c.id_estudiante), BIT_XOR(CRC32(c.id_estudiante)),
+       SUM(c.sesiones), SUM(c.presentes),
+       SUM(r.cursos), SUM(r.desaprobados), SUM(r.suma_ponderada), MAX(r.actualizado_en)
+FROM contadores_asistencia_periodo c
+LEFT JOIN resumen_calificaciones_periodo r
+       ON r.id_estudiante = c.id_estudiante AND r.id_periodo = c.id_periodo
+GROUP BY c.id_periodo
 """
 
-def main():
-    print("Conectando a la base de datos...")
-    conn = pymysql.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        cursorclass=pymysql.cursors.DictCursor,  # 👉 filas como diccionarios
-    )
-
-    try:
-        with conn.cursor() as cur:
-            # Solo para confirmar
-            cur.execute("SELECT DATABASE()")
-            print("Base de datos actual:", cur.fetchone())
-
-            print("\nEjecutando consulta completa para generar dataset...")
-            cur.execute(QUERY)
-            rows = cur.fetchall()
-            print(f"Filas obtenidas: {len(rows)}")
-
-        if not rows:
-            print("❌ No se obtuvieron filas. Revisa la consulta o la BD.")
-            return
-
-        # Convertir Decimals a float y armar el DataFrame
-        def conv(x):
-            return float(x) if isinstance(x, Decimal) else x
-
-        rows_conv = [
-            {k: conv(v) for k, v in row.items()}
-            for row in rows
-        ]
-
-        df = pd.DataFrame(rows_conv)
-
-        print("\nPrimeras filas del dataset crudo:")
-        print(df.head())
-
-        print("\nTipos de datos iniciales:")
-        print(df.dtypes)
-
-        # Asegurar tipos numéricos
-        num_cols = ["id_estudiante", "id_periodo", "promedio", "asistencia", "deserta"]
-        for col in num_cols:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        # Eliminar filas con deserta nulo
-        antes = len(df)
-        df = df.dropna(subset=["deserta"])
-        despues = len(df)
-        if despues < antes:
-            print(f"\nSe eliminaron {antes - despues} filas sin etiqueta de deserción.")
-
-        if df.empty:
-            print("\n❌ Después de limpiar, el dataset quedó vacío.")
-            return
-
-        df["deserta"] = df["deserta"].astype(int)
+HUELLA_LABELS = """
+SELECT id_periodo, COUNT(*), SUM(y), MAX(fecha_corte)
+FROM labels_periodo
+GROUP BY id_periodo
+"""
 
-        print("\nDistribución de la variable deserta:")
-        print(df["deserta"].value_counts())
+# asistencia: misma regla que v_asistencia_periodo (sin sesiones -> estimada del promedio)
+QUERY_PERIODO = """
+SELECT
+    c.id_estudiante,
+    COALESCE(r.promedio, 0) AS promedio,
+    CASE
+      WHEN c.sesiones > 0 THEN (100.0 * c.presentes) / c.sesiones
+      WHEN r.promedio IS NULL THEN 100
+      ELSE ROUND((r.promedio / 20) * 100, 1)
+    END AS asistencia,
+    r.cursos       AS cursos_matriculados,
+    r.desaprobados AS cursos_desaprobados,
+    COALESCE(lp.y, CASE
+      WHEN %(siguiente)s IS NULL THEN NULL
+      WHEN sig.id_estudiante IS NULL THEN 1
+      ELSE 0
+    END) AS deserta
+FROM contadores_asistencia_periodo c
+LEFT JOIN resumen_calificaciones_periodo r
+       ON r.id_estudiante = c.id_estudiante AND r.id_periodo = c.id_periodo
+LEFT JOIN labels_periodo lp
+       ON lp.id_estudiante = c.id_estudiante AND lp.id_periodo = c.id_periodo
+LEFT JOIN contadores_asistencia_periodo sig
+       ON sig.id_estudiante = c.id_estudiante AND sig.id_periodo = %(siguiente)s
+WHERE c.id_periodo = %(per)s
+"""
 
-        output_path = "dataset_desercion_promedios.csv"
-        df.to_csv(output_path, index=False, encoding="utf-8-sig")
-        print(f"\n✅ Dataset guardado en: {output_path}")
+COLUMNAS = ["id_estudiante", "promedio", "asistencia", "cursos_matriculados", "cursos_desaprobados", "deserta"]
+
+
+def _conectar():
+    return pymysql.connect(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD, database=DB_NAME)
+
+
+def huellas(cur, periodos: list) -> dict:
+    """id_periodo -> hash de todo lo que determina sus filas."""
+    cur.execute(HUELLA_DATOS)
+    datos = {int(r[0]): r[1:] for r in cur.fetchall()}
+    cur.execute(HUELLA_LABELS)
+    labels = {int(r[0]): r[1:] for r in cur.fetchall()}
+    resultado = {}
+    for i, per in enumerate(periodos):
+        siguiente = periodos[i + 1] if i + 1 < len(periodos) else None
+        h = hashlib.sha256(QUERY_PERIODO.encode())
+        matricula_siguiente = datos.get(siguiente, (0, 0, 0))[:3]       # define la etiqueta deserta
+        h.update(repr((datos.get(per), labels.get(per), siguiente, matricula_siguiente)).encode())
+        resultado[per] = h.hexdigest()[:16]
+    return resultado
+
+
+def leer_periodo(conn, per: int, siguiente, bloque: int) -> pd.DataFrame:
+    partes = []
+    with conn.cursor(pymysql.cursors.SSCursor) as cur:
+        cur.execute(QUERY_PERIODO, {"per": per, "siguiente": siguiente})
+        while True:
+            lote = cur.fetchmany(bloque)
+            if not lote:
+                break
+            partes.append(np.array(lote, dtype=np.float64))     # Decimal / NULL -> float / NaN
+    arr = np.concatenate(partes) if partes else np.empty((0, len(COLUMNAS)))
+    df = pd.DataFrame(arr, columns=COLUMNAS)
+    df["id_estudiante"] = df["id_estudiante"].astype(np.int64)
+    df["deserta"] = df["deserta"].astype("Int8")              # nullable: el último periodo no tiene etiqueta
+    return df
+
+
+def _escribir(df: pd.DataFrame, destino: Path) -> None:
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destino.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, destino)
+
+
+def main(args) -> None:
+    salida = Path(args.salida)
+    manifiesto_path = salida / "_manifiesto.json"
+    manifiesto = json.loads(manifiesto_path.read_text(encoding="utf-8")) if manifiesto_path.exists() else {}
 
+    print("Conectando a la base de datos...")
+    conn = _conectar()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(PERIODOS)
+            periodos = [int(r[0]) for r in cur.fetchall()]
+            actuales = huellas(cur, periodos)
+
+        pedidos = set(args.periodos) if args.periodos else set(periodos)
+        escritos = 0
+        for i, per in enumerate(periodos):
+            if per not in pedidos:
+                continue
+            destino = salida / f"id_periodo={per}" / "datos.parquet"
+            if not args.forzar and manifiesto.get(str(per)) == actuales[per] and destino.exists():
+                continue
+            siguiente = periodos[i + 1] if i + 1 < len(periodos) else None
+            t0 = time.perf_counter()
+            df = leer_periodo(conn, per, siguiente, args.bloque)
+            _escribir(df, destino)
+            manifiesto[str(per)] = actuales[per]
+            # Se guarda tras cada periodo: una corrida cortada no rehace lo ya escrito
+            manifiesto_path.write_text(json.dumps(manifiesto, indent=2), encoding="utf-8")
+            escritos += 1
+            etiquetados = int(df["deserta"].notna().sum())
+            print(f"  periodo {per}: {len(df):,} filas, {etiquetados:,} con etiqueta, "
+                  f"{int(df['deserta'].sum()):,} deserciones ({time.perf_counter() - t0:.2f} s)")
     finally:
         conn.close()
-        print("\nConexión cerrada.")
+
+    print(f"\n✅ {escritos} periodo(s) regenerado(s), {len(pedidos) - escritos} sin cambios; dataset en {salida}/")
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Dataset de deserción (Parquet por periodo, incremental)")
+    parser.add_argument("--salida", default=str(BASE_DIR / "dataset"))
+    parser.add_argument("--periodos", type=lambda s: [int(x) for x in s.split(",") if x],
+                        help="ids de periodo a considerar (por defecto, todos)")
+    parser.add_argument("--forzar", action="store_true", help="regenerar aunque la huella no haya cambiado")
+    parser.add_argument("--bloque", type=int, default=50_000, help="filas por fetchmany")
+    main(parser.parse_args())
@@ -1,30 +1,17 @@
+import sys
+from pathlib import Path
+
 import joblib
-import numpy as np
+
+# Features compartidas con la API y el entrenamiento (sia-api/app/features.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sia-api"))
+from app.features import fila  # noqa: E402
 
 # Cargar modelo
 model = joblib.load("modelo_desercion_optimizado.pkl")
 
 def predecir_desercion(promedio, asistencia, cursos_matriculados, cursos_desaprobados):
-    carga_baja = 1 if cursos_matriculados <= 2 else 0
-    cursos_aprobados = cursos_matriculados - cursos_desaprobados
-    tasa_desaprob = cursos_desaprobados / (cursos_matriculados if cursos_matriculados > 0 else 1)
-    tasa_desaprob = max(0, min(1, tasa_desaprob))
-    sin_desaprob = 1 if cursos_desaprobados == 0 else 0
-    rendimiento_global = promedio * (asistencia / 100.0)
-    carga_x_rend = cursos_matriculados * promedio
-
-    X_nuevo = np.array([[
-        promedio,
-        asistencia,
-        cursos_matriculados,
-        cursos_desaprobados,
-        carga_baja,
-        cursos_aprobados,
-        tasa_desaprob,
-        sin_desaprob,
-        rendimiento_global,
-        carga_x_rend,
-    ]])
+    X_nuevo = fila(promedio, asistencia, cursos_matriculados, cursos_desaprobados)
 
     prob = model.predict_proba(X_nuevo)[0,1]
     pred = int(prob >= 0.7)
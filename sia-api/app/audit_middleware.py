@@ -0,0 +1,247 @@
+# app/audit_middleware.py
+"""
+Bitácora de auditoría sin costo en el request.
+
+- AuditMiddleware: al terminar un request de escritura auditado (ver _ACCIONES)
+  arma la entrada (actor, acción, entidad, id, metadatos) y la encola con
+  put_nowait; nunca espera a la BD.
+- La cola es acotada (AUDIT_QUEUE_MAX): si se llena, la entrada se descarta y se
+  cuenta en `descartadas` (backpressure sin bloquear requests).
+- flusher_loop: tarea de fondo que escribe en bitacora_auditoria por lotes
+  multi-fila cada AUDIT_FLUSH_INTERVAL_S o apenas se junta AUDIT_BATCH_SIZE.
+
+Los endpoints pueden enriquecer su entrada con anotar(request, ...), p. ej. el
+login anota el id_usuario autenticado (el request no trae token).
+"""
+
+from __future__ import annotations
+import asyncio, json, os, time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import SessionLocal
+from .queries import consulta
+from .security import decode_token
+
+# ==========================
+# CONFIG
+# ==========================
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "true").lower() == "true"
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL_S = float(os.getenv("AUDIT_FLUSH_INTERVAL_S", "2"))
+
+# (método, plantilla de ruta) -> (acción, entidad, path param con el id de la entidad)
+_ACCIONES: Dict[Tuple[str, str], Tuple[str, str, Optional[str]]] = {
+    ("POST", "/api/auth/login"): ("auth.login", "usuarios", None),
+    ("POST", "/api/auth/refresh"): ("auth.refresh", "refresh_tokens", None),
+    ("POST", "/api/auth/logout"): ("auth.logout", "refresh_tokens", None),
+    ("POST", "/api/auth/logout_all"): ("auth.logout_all", "refresh_tokens", None),
+    ("POST", "/api/tutorias/"): ("tutoria.registrar", "tutorias", None),
+    ("POST", "/api/tutorias/tutores/asignar"): ("asignacion.registrar", "asignaciones_tutoria", None),
+    ("PATCH", "/api/alertas/{id_alerta}"): ("alerta.actualizar", "alertas", "id_alerta"),
+    ("POST", "/api/riesgo/alertas"): ("alertas.generar", "alertas", None),
+    ("POST", "/api/riesgo/recalcular"): ("riesgo.recalcular", "puntajes_riesgo", None),
+    ("POST", "/api/fse/{id_estudiante}/nueva"): ("fse.crear", "fichas_socioeconomicas", None),
+    ("POST", "/api/fse/{id_ficha}/respuestas"): ("fse.respuestas", "fichas_socioeconomicas", "id_ficha"),
+    ("POST", "/api/ingesta/asistencias"): ("asistencias.ingesta", "trabajos_sincronizacion", None),
+    ("POST", "/api/ingesta/calificaciones"): ("calificaciones.ingesta", "trabajos_sincronizacion", None),
+    ("POST", "/api/modelo/versiones/{version}/activar"): ("modelo.activar", "modelos", None),
+    ("POST", "/api/modelo/predicciones/recalcular"): ("modelo.predicciones", "predicciones_desercion", None),
+}
+
+SQL_INSERT_BITACORA = consulta("auditoria.insert", """
+    INSERT INTO bitacora_auditoria (id_usuario, accion, entidad, id_entidad, metadatos_json)
+    VALUES (:uid, :accion, :entidad, :id_entidad, :meta)
+""")
+
+
+class _Estado:
+    def __init__(self) -> None:
+        self.cola: Optional[asyncio.Queue] = None
+        self.encoladas = 0
+        self.escritas = 0
+        self.descartadas = 0      # cola llena
+        self.fallidas = 0         # error de BD al escribir
+        self.lotes = 0
+        self.ultimo_lote_ms = 0.0
+
+
+_estado = _Estado()
+
+
+def _cola() -> asyncio.Queue:
+    if _estado.cola is None:
+        _estado.cola = asyncio.Queue(maxsize=AUDIT_QUEUE_MAX)
+    return _estado.cola
+
+
+def anotar(request, **campos: Any) -> None:
+    """
+    Completa la entrada de auditoría del request actual.
+    Claves especiales: id_usuario, id_entidad; el resto va a metadatos_json.
+    """
+    actual = getattr(request.state, "auditoria", None) or {}
+    actual.update(campos)
+    request.state.auditoria = actual
+
+
+def _actor(scope) -> Optional[int]:
+    for nombre, valor in scope.get("headers") or ():
+        if nombre == b"authorization":
+            auth = valor.decode("latin-1")
+            if auth.lower().startswith("bearer "):
+                payload = decode_token(auth[7:].strip())
+                try:
+                    return int(payload["sub"]) if payload else None
+                except (KeyError, TypeError, ValueError):
+                    return None
+    return None
+
+
+def _encolar(entrada: dict) -> None:
+    try:
+        _cola().put_nowait(entrada)
+        _estado.encoladas += 1
+    except asyncio.QueueFull:
+        _estado.descartadas += 1
+
+
+# ==========================
+# Middleware
+# ==========================
+class AuditMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not AUDIT_ENABLED or scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})
+        status_code = 500
+        t0 = time.perf_counter()
+
+        async def _send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            # El router deja la ruta resuelta y los path params en el mismo scope
+            route = scope.get("route")
+            regla = _ACCIONES.get((scope["method"], getattr(route, "path", None)))
+            if regla is not None:
+                accion, entidad, param_id = regla
+                extra = dict(scope["state"].get("auditoria") or {})
+                path_params = scope.get("path_params") or {}
+                id_entidad = extra.pop("id_entidad", None)
+                if id_entidad is None and param_id:
+                    id_entidad = path_params.get(param_id)
+                cliente = scope.get("client")
+                _encolar({
+                    "uid": extra.pop("id_usuario", None) or _actor(scope),
+                    "accion": accion,
+                    "entidad": entidad,
+                    "id_entidad": id_entidad,
+                    "meta": {
+                        "status": status_code,
+                        "ip": cliente[0] if cliente else None,
+                        "duracion_ms": round((time.perf_counter() - t0) * 1000, 1),
+                        "path_params": path_params or None,
+                        **extra,
+                    },
+                })
+
+
+# ==========================
+# Escritura por lotes
+# ==========================
+def _fila(entrada: dict) -> dict:
+    return {**entrada, "meta": json.dumps(entrada["meta"], ensure_ascii=False, default=str)}
+
+
+async def _escribir(lote: List[dict]) -> None:
+    t0 = time.perf_counter()
+    filas = [_fila(e) for e in lote]
+    try:
+        async with SessionLocal() as s:
+            # executemany: aiomysql lo reescribe como un INSERT multi-fila
+            await s.execute(SQL_INSERT_BITACORA, filas)
+            await s.commit()
+        _estado.escritas += len(filas)
+    except Exception as exc:
+        # Reintento fila a fila para aislar la que falla (p. ej. FK a un usuario eliminado)
+        print(f"[WARN] Auditoría: lote de {len(filas)} falló ({exc}); reintentando por fila")
+        async with SessionLocal() as s:
+            for fila in filas:
+                try:
+                    await s.execute(SQL_INSERT_BITACORA, fila)
+                    await s.commit()
+                    _estado.escritas += 1
+                except Exception:
+                    await s.rollback()
+                    _estado.fallidas += 1
+    _estado.lotes += 1
+    _estado.ultimo_lote_ms = round((time.perf_counter() - t0) * 1000, 2)
+
+
+async def _juntar_lote(cola: asyncio.Queue, intervalo_s: float, tam: int) -> List[dict]:
+    """Espera hasta `intervalo_s` por la primera entrada y luego junta hasta `tam` sin esperar."""
+    try:
+        lote = [await asyncio.wait_for(cola.get(), timeout=intervalo_s)]
+    except asyncio.TimeoutError:
+        return []
+    limite = time.monotonic() + intervalo_s
+    while len(lote) < tam:
+        try:
+            lote.append(cola.get_nowait())
+        except asyncio.QueueEmpty:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(cola.get(), timeout=restante))
+            except asyncio.TimeoutError:
+                break
+    return lote
+
+
+async def flush_pendientes() -> None:
+    """Escribe todo lo encolado (se usa al apagar la aplicación)."""
+    cola = _cola()
+    while not cola.empty():
+        lote = []
+        while len(lote) < AUDIT_BATCH_SIZE and not cola.empty():
+            lote.append(cola.get_nowait())
+        await _escribir(lote)
+
+
+async def flusher_loop(intervalo_s: float = AUDIT_FLUSH_INTERVAL_S, tam: int = AUDIT_BATCH_SIZE) -> None:
+    cola = _cola()
+    while True:
+        try:
+            lote = await _juntar_lote(cola, intervalo_s, tam)
+            if lote:
+                await _escribir(lote)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"[WARN] Flusher de auditoría: {exc}")
+
+
+def stats() -> dict:
+    return {
+        "habilitada": AUDIT_ENABLED,
+        "en_cola": _estado.cola.qsize() if _estado.cola is not None else 0,
+        "capacidad": AUDIT_QUEUE_MAX,
+        "encoladas": _estado.encoladas,
+        "escritas": _estado.escritas,
+        "descartadas": _estado.descartadas,
+        "fallidas": _estado.fallidas,
+        "lotes": _estado.lotes,
+        "ultimo_lote_ms": _estado.ultimo_lote_ms,
+    }
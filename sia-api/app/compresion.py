@@ -0,0 +1,164 @@
+# app/compresion.py
+"""
+Compresión de respuestas (Brotli / GZip) como middleware ASGI.
+
+- Se elige por Accept-Encoding: br si el paquete `brotli` está instalado y el
+  cliente lo acepta, si no gzip; q=0 descarta la codificación.
+- Respuesta de un solo bloque (todas las JSON de la API): se comprime solo si
+  supera COMPRESION_MIN_BYTES; debajo de eso el costo de CPU no se recupera
+  en bytes. Se reescriben Content-Length y Vary.
+- Respuesta en streaming (more_body): se comprime bloque a bloque con un
+  compresor incremental y cada bloque se vacía (Z_SYNC_FLUSH / flush de
+  Brotli), así el cliente recibe cada parte sin esperar el final.
+- Solo tipos de texto (COMPRESION_TIPOS); nunca si la respuesta ya trae
+  Content-Encoding.
+"""
+
+from __future__ import annotations
+import os, zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:        # opcional: sin el paquete se ofrece solo gzip
+    brotli = None
+
+# ==========================
+# CONFIG
+# ==========================
+COMPRESION_HABILITADA = os.getenv("COMPRESION_HABILITADA", "1") == "1"
+COMPRESION_MIN_BYTES = int(os.getenv("COMPRESION_MIN_BYTES", "1024"))
+COMPRESION_GZIP_NIVEL = int(os.getenv("COMPRESION_GZIP_NIVEL", "6"))        # 1..9
+COMPRESION_BROTLI_NIVEL = int(os.getenv("COMPRESION_BROTLI_NIVEL", "4"))    # 0..11
+COMPRESION_TIPOS = tuple(
+    t.strip() for t in os.getenv("COMPRESION_TIPOS", "application/json,text/").split(",") if t.strip()
+)
+
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """'br', 'gzip' o None según Accept-Encoding (respeta q=0)."""
+    aceptadas = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, params = parte.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if nombre:
+            aceptadas[nombre.strip()] = q
+    comodin = aceptadas.get("*", 0.0)
+    if brotli is not None and aceptadas.get("br", comodin) > 0:
+        return "br"
+    if aceptadas.get("gzip", comodin) > 0:
+        return "gzip"
+    return None
+
+
+class _Compresor:
+    """Compresor incremental: agregar() devuelve lo ya comprimido de cada bloque."""
+
+    def __init__(self, codificacion: str, gzip_nivel: int, brotli_nivel: int):
+        self.br = codificacion == "br"
+        if self.br:
+            self._c = brotli.Compressor(quality=brotli_nivel)
+        else:
+            self._c = zlib.compressobj(gzip_nivel, zlib.DEFLATED, 31)     # 31 = cabecera gzip
+
+    def agregar(self, datos: bytes, final: bool) -> bytes:
+        if self.br:
+            salida = self._c.process(datos)
+            return salida + (self._c.finish() if final else self._c.flush())
+        salida = self._c.compress(datos)
+        return salida + self._c.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def comprimir(datos: bytes, codificacion: str,
+              gzip_nivel: int = COMPRESION_GZIP_NIVEL, brotli_nivel: int = COMPRESION_BROTLI_NIVEL) -> bytes:
+    return _Compresor(codificacion, gzip_nivel, brotli_nivel).agregar(datos, final=True)
+
+
+def _sin(headers: List[Tuple[bytes, bytes]], *nombres: bytes) -> List[Tuple[bytes, bytes]]:
+    return [(k, v) for k, v in headers if k.lower() not in nombres]
+
+
+def _vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    actual = [v for k, v in headers if k.lower() == b"vary"]
+    if actual and b"accept-encoding" in actual[0].lower():
+        return headers
+    valor = (actual[0] + b", Accept-Encoding") if actual else b"Accept-Encoding"
+    return _sin(headers, b"vary") + [(b"vary", valor)]
+
+
+class CompresionMiddleware:
+    def __init__(self, app, minimo: int = COMPRESION_MIN_BYTES,
+                 gzip_nivel: int = COMPRESION_GZIP_NIVEL, brotli_nivel: int = COMPRESION_BROTLI_NIVEL):
+        self.app = app
+        self.minimo = minimo
+        self.gzip_nivel = gzip_nivel
+        self.brotli_nivel = brotli_nivel
+
+    async def __call__(self, scope, receive, send):
+        if not COMPRESION_HABILITADA or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = b""
+        for k, v in scope.get("headers") or ():
+            if k == b"accept-encoding":
+                accept = v
+                break
+        codificacion = elegir_codificacion(accept.decode("latin-1")) if accept else None
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None              # http.response.start retenido hasta ver el primer bloque
+        compresor: Optional[_Compresor] = None
+        directo = False            # sin comprimir: tipo no aplicable, ya codificada o muy chica
+
+        async def _send(message):
+            nonlocal inicio, compresor, directo
+            tipo = message["type"]
+            if tipo == "http.response.start":
+                headers = list(message.get("headers") or [])
+                content_type = next((v for k, v in headers if k.lower() == b"content-type"), b"").decode("latin-1")
+                ya_codificada = any(k.lower() == b"content-encoding" for k, _ in headers)
+                if ya_codificada or message["status"] in (204, 304) or not content_type.startswith(COMPRESION_TIPOS):
+                    directo = True
+                    await send(message)
+                    return
+                inicio = {**message, "headers": headers}
+                return
+            if tipo != "http.response.body" or directo:
+                await send(message)
+                return
+
+            cuerpo = message.get("body", b"")
+            mas = message.get("more_body", False)
+            if inicio is not None:
+                headers = inicio["headers"]
+                if not mas and len(cuerpo) < self.minimo:
+                    directo = True
+                    await send(inicio)
+                    inicio = None
+                    await send(message)
+                    return
+                compresor = _Compresor(codificacion, self.gzip_nivel, self.brotli_nivel)
+                headers = _vary(_sin(headers, b"content-length"))
+                headers.append((b"content-encoding", codificacion.encode()))
+                if not mas:
+                    comprimido = compresor.agregar(cuerpo, final=True)
+                    headers.append((b"content-length", str(len(comprimido)).encode()))
+                    await send({**inicio, "headers": headers})
+                    inicio = None
+                    await send({"type": "http.response.body", "body": comprimido, "more_body": False})
+                    return
+                # Streaming: sin Content-Length (chunked), cada bloque se vacía al cliente
+                await send({**inicio, "headers": headers})
+                inicio = None
+            await send({"type": "http.response.body", "body": compresor.agregar(cuerpo, final=not mas),
+                        "more_body": mas})
+
+        await self.app(scope, receive, _send)
@@ -1,15 +1,21 @@
 # app/db.py
-import os
-from typing import AsyncIterator
+import os, time
+from typing import AsyncIterator, Dict, Optional
 
 from dotenv import load_dotenv
+from fastapi import Depends, Request
+from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy import text
+from sqlalchemy import event, text
+
+from .metrics import install_db_request_metrics
+from .pool_metrics import MeteredPool, install_idle_pre_ping, install_pool_listeners
+from .queries import consulta, install_query_profiling
 
 # Carga variables del .env
 load_dotenv()
@@ -20,41 +26,214 @@ DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASS = os.getenv("DB_PASS")
 
-# URL de conexión asíncrona (driver aiomysql)
-DATABASE_URL = (
+# URL de conexión asíncrona (driver aiomysql). DATABASE_URL, si existe, tiene prioridad.
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"mysql+aiomysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     "?charset=utf8mb4"
 )
 
+# Pool de conexiones
+# - DB_POOL_SIZE / DB_MAX_OVERFLOW: conexiones persistentes / extra bajo carga
+# - DB_POOL_TIMEOUT: segundos máximos esperando una conexión libre
+# - DB_POOL_RECYCLE: recicla conexiones con más de N segundos (evita 'MySQL server has gone away')
+# - DB_PRE_PING: always = ping en cada checkout (un round trip extra)
+#                idle   = ping solo si la conexión estuvo inactiva > DB_PRE_PING_IDLE_S
+#                never  = sin ping (confía en pool_recycle)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+DB_PRE_PING = os.getenv("DB_PRE_PING", "idle").strip().lower()
+DB_PRE_PING_IDLE_S = float(os.getenv("DB_PRE_PING_IDLE_S", "30"))
+
+# Réplica de lectura (opcional). Sin DATABASE_READ_URL todo va al primario.
+# - DB_READ_STICKY_S: tras un commit del usuario, sus lecturas van al primario N segundos
+#                     (evita leer datos viejos por el retraso de replicación; 0 = deshabilitado)
+# - DB_READ_COOLDOWN_S: si la réplica falla, se deja de usar durante N segundos
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+DB_READ_STICKY_S = float(os.getenv("DB_READ_STICKY_S", "5"))
+DB_READ_COOLDOWN_S = float(os.getenv("DB_READ_COOLDOWN_S", "30"))
+
+
+def crear_engine(
+    url: str,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+    pool_recycle: int = DB_POOL_RECYCLE,
+    pre_ping: str = DB_PRE_PING,
+    pre_ping_idle_s: float = DB_PRE_PING_IDLE_S,
+) -> AsyncEngine:
+    """Crea un motor asíncrono con pool medido (ver app/pool_metrics.py)."""
+    eng = create_async_engine(
+        url,
+        echo=False,                 # pon True si quieres ver SQL en consola (modo debug)
+        poolclass=MeteredPool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=(pre_ping == "always"),
+    )
+    install_pool_listeners(eng)
+    install_query_profiling(eng)
+    install_db_request_metrics(eng)
+    if pre_ping == "idle":
+        install_idle_pre_ping(eng, pre_ping_idle_s)
+    return eng
+
+
 # Motor asíncrono (pool de conexiones)
-# - pool_pre_ping: verifica conexiones antes de usarlas (evita 'MySQL server has gone away')
-# - pool_recycle: recicla conexiones inactivas (segundos)
-engine: AsyncEngine = create_async_engine(
-    DATABASE_URL,
-    echo=False,                 # pon True si quieres ver SQL en consola (modo debug)
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    # future=True  # (en 2.0 ya es el comportamiento por defecto)
+engine: AsyncEngine = crear_engine(DATABASE_URL)
+
+# Motor de la réplica (None si no está configurada)
+read_engine: Optional[AsyncEngine] = (
+    crear_engine(DATABASE_READ_URL, pool_size=DB_READ_POOL_SIZE, max_overflow=DB_READ_MAX_OVERFLOW)
+    if DATABASE_READ_URL else None
 )
 
+
+class PrimarySession(Session):
+    """Sesión síncrona subyacente de SessionLocal (permite detectar commits en el primario)."""
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _marcar_commit(session: Session) -> None:
+    session.info["hubo_commit"] = True
+
+
 # Fábrica de sesiones asíncronas
 SessionLocal = async_sessionmaker(
     bind=engine,
     expire_on_commit=False,     # no expira objetos al hacer commit (más cómodo para APIs)
     autoflush=False,
     class_=AsyncSession,
+    sync_session_class=PrimarySession,
 )
 
-async def get_session() -> AsyncIterator[AsyncSession]:
+# Sesiones de solo lectura contra la réplica
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    expire_on_commit=False,
+    autoflush=False,
+    class_=AsyncSession,
+) if read_engine is not None else None
+
+
+# ==========================
+# Enrutamiento de lecturas (réplica / primario)
+# ==========================
+_escrituras_recientes: Dict[int, float] = {}   # id_usuario -> monotonic del último commit
+_replica_caida_hasta = 0.0
+_ruteo = {"replica": 0, "primario": 0, "sticky": 0, "failovers": 0}
+
+
+def _usuario_del_request(request: Request) -> Optional[int]:
+    """id_usuario del bearer token (sin validar roles); None si no hay token válido."""
+    from .security import decode_token  # import diferido: security no depende de db
+
+    auth = request.headers.get("authorization") or ""
+    if not auth.lower().startswith("bearer "):
+        return None
+    payload = decode_token(auth[7:].strip())
+    try:
+        return int(payload["sub"]) if payload else None
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _registrar_escritura(request: Request) -> None:
+    if read_engine is None or DB_READ_STICKY_S <= 0:
+        return
+    uid = _usuario_del_request(request)
+    if uid is None:
+        return
+    ahora = time.monotonic()
+    _escrituras_recientes[uid] = ahora
+    # Limpieza perezosa para que el dict no crezca sin límite
+    if len(_escrituras_recientes) > 10000:
+        for k in [k for k, t in _escrituras_recientes.items() if ahora - t > DB_READ_STICKY_S]:
+            del _escrituras_recientes[k]
+
+
+def _escribio_hace_poco(request: Request) -> bool:
+    if DB_READ_STICKY_S <= 0 or not _escrituras_recientes:
+        return False
+    uid = _usuario_del_request(request)
+    t = _escrituras_recientes.get(uid) if uid is not None else None
+    return t is not None and time.monotonic() - t < DB_READ_STICKY_S
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
     """
     Dependencia para FastAPI.
     Abre una sesión por request y la cierra al finalizar.
+    Si la sesión hizo commit, las lecturas de ese usuario van al primario por DB_READ_STICKY_S.
     """
     async with SessionLocal() as session:
         yield session
+        if session.sync_session.info.get("hubo_commit"):
+            _registrar_escritura(request)
+
+
+async def get_read_session(
+    request: Request,
+    primario: AsyncSession = Depends(get_session),
+) -> AsyncIterator[AsyncSession]:
+    """
+    Dependencia para endpoints de solo lectura.
+    Usa la réplica si está configurada y disponible; si no, el primario:
+      - el usuario hizo commit hace menos de DB_READ_STICKY_S  -> primario
+      - la réplica falló hace menos de DB_READ_COOLDOWN_S      -> primario
+      - no se pudo obtener conexión de la réplica              -> primario (failover)
+    El primario es la misma sesión de get_session (FastAPI la cachea por request):
+    un endpoint con `db` + `rdb` nunca retiene dos conexiones del mismo pool, lo que
+    bajo carga agotaba el pool (cada request con una conexión esperando la segunda).
+    """
+    global _replica_caida_hasta
+
+    if ReadSessionLocal is None:
+        yield primario
+        return
+
+    if _escribio_hace_poco(request):
+        _ruteo["sticky"] += 1
+    elif time.monotonic() >= _replica_caida_hasta:
+        session = ReadSessionLocal()
+        try:
+            await session.connection()   # checkout anticipado: detecta réplica caída antes de consultar
+        except Exception as exc:
+            await session.close()
+            _replica_caida_hasta = time.monotonic() + DB_READ_COOLDOWN_S
+            _ruteo["failovers"] += 1
+            print(f"[WARN] Réplica de lectura no disponible, usando primario {DB_READ_COOLDOWN_S:.0f}s: {exc}")
+        else:
+            _ruteo["replica"] += 1
+            try:
+                yield session
+            finally:
+                await session.close()
+            return
+
+    _ruteo["primario"] += 1
+    yield primario
+
+
+def read_routing_stats() -> dict:
+    return {
+        "replica_configurada": read_engine is not None,
+        "replica_disponible": read_engine is not None and time.monotonic() >= _replica_caida_hasta,
+        "sticky_s": DB_READ_STICKY_S,
+        "cooldown_s": DB_READ_COOLDOWN_S,
+        **_ruteo,
+    }
 
 # ---------- Utilidades opcionales -----------
 
+SQL_PING = consulta("db.ping", "SELECT 1")
+
 async def db_healthcheck() -> bool:
     """
     Ejecuta un 'SELECT 1' para verificar que la conexión funciona.
@@ -62,7 +241,7 @@ async def db_healthcheck() -> bool:
     """
     try:
         async with SessionLocal() as s:
-            await s.execute(text("SELECT 1"))
+            await s.execute(SQL_PING)
         return True
     except Exception:
         return False
@@ -0,0 +1,81 @@
+# app/drift.py
+"""
+Distribuciones y drift del modelo de deserción (solo NumPy).
+
+Un "perfil" son los conteos por bin de las features monitoreadas y de la
+probabilidad, con bordes fijos (BORDES): así el perfil del entrenamiento
+(meta.json del modelo) y el de cada periodo se comparan bin a bin, y los
+conteos de varios bloques se suman sin volver a leer los datos.
+
+- PSI: sum((a - r) * ln(a / r)) sobre proporciones. < 0.1 estable,
+  0.1–0.25 moderado, > 0.25 significativo (conviene reentrenar).
+- KS: máxima diferencia entre las distribuciones acumuladas (sobre los bins).
+"""
+
+from __future__ import annotations
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+
+BORDES: Dict[str, np.ndarray] = {
+    "promedio": np.linspace(0, 20, 21),
+    "asistencia": np.linspace(0, 100, 21),
+    "cursos_desaprobados": np.arange(-0.5, 11),      # 0..10 (10 = 10 o más)
+    "probabilidad": np.linspace(0, 1, 21),
+}
+
+PSI_MODERADO = 0.1
+PSI_SIGNIFICATIVO = 0.25
+_EPS = 1e-4
+
+
+def conteos(nombre: str, valores) -> np.ndarray:
+    bordes = BORDES[nombre]
+    v = np.asarray(valores, dtype=np.float64)
+    v = np.clip(v[~np.isnan(v)], bordes[0], bordes[-1])    # fuera de rango -> bin extremo
+    return np.histogram(v, bins=bordes)[0].astype(np.int64)
+
+
+def perfil(columnas: Mapping[str, object]) -> dict:
+    """{"n", "conteos": {nombre: [..]}} para las columnas presentes en BORDES."""
+    cont = {n: conteos(n, v) for n, v in columnas.items() if n in BORDES}
+    n = int(max((c.sum() for c in cont.values()), default=0))
+    return {"n": n, "conteos": {k: c.tolist() for k, c in cont.items()}}
+
+
+def _proporciones(c) -> np.ndarray:
+    c = np.asarray(c, dtype=np.float64)
+    total = c.sum()
+    return c / total if total else c
+
+
+def psi(referencia, actual) -> float:
+    r = np.maximum(_proporciones(referencia), _EPS)
+    a = np.maximum(_proporciones(actual), _EPS)
+    return float(np.sum((a - r) * np.log(a / r)))
+
+
+def ks(referencia, actual) -> float:
+    return float(np.max(np.abs(np.cumsum(_proporciones(referencia)) - np.cumsum(_proporciones(actual)))))
+
+
+def estado(valor_psi: float) -> str:
+    if valor_psi > PSI_SIGNIFICATIVO:
+        return "significativo"
+    if valor_psi > PSI_MODERADO:
+        return "moderado"
+    return "estable"
+
+
+def comparar(referencia: Optional[dict], actual: dict) -> Dict[str, dict]:
+    """Drift por columna de `actual` contra `referencia` (perfiles); vacío si no hay referencia."""
+    if not referencia:
+        return {}
+    resultado = {}
+    for nombre, cont in actual["conteos"].items():
+        ref = referencia.get("conteos", {}).get(nombre)
+        if ref is None or len(ref) != len(cont) or not sum(cont) or not sum(ref):
+            continue
+        valor = psi(ref, cont)
+        resultado[nombre] = {"psi": round(valor, 4), "ks": round(ks(ref, cont), 4), "estado": estado(valor)}
+    return resultado
@@ -0,0 +1,57 @@
+# app/explicacion.py
+"""
+Factores del modelo de deserción por estudiante (aportes por feature).
+
+- Los aportes salen de pred_contribs de XGBoost (modelo.contribuciones, ver
+  app/modelo_registro.py): una sola llamada por bloque de filas, en log-odds;
+  base + suma de aportes = logit(probabilidad).
+- factores() se queda, por fila, con las EXPLICACION_TOP features que más
+  suben el riesgo y las que más lo bajan (selección vectorizada con argsort).
+- El puntaje por lotes guarda el resultado en predicciones_desercion.factores_json
+  junto con la probabilidad: los tableros lo leen, no se recalcula en cada vista.
+"""
+
+from __future__ import annotations
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from .features import FEATURES
+from .modelo_registro import ModeloCargado
+
+# ==========================
+# CONFIG
+# ==========================
+EXPLICACION_TOP = int(os.getenv("EXPLICACION_TOP", "3"))
+
+
+def factores(X: np.ndarray, contribuciones: np.ndarray, k: int = EXPLICACION_TOP) -> List[dict]:
+    """Por fila: {"base", "suben": [{feature, valor, aporte}], "bajan": [...]}, k de cada lado."""
+    C = np.asarray(contribuciones, dtype=np.float64)
+    aportes, base = C[:, :-1], C[:, -1]
+    k = min(k, aportes.shape[1])
+    orden = np.argsort(-aportes, axis=1, kind="stable")
+    suben, bajan = orden[:, :k], orden[:, ::-1][:, :k]
+    a_suben = np.take_along_axis(aportes, suben, axis=1)
+    a_bajan = np.take_along_axis(aportes, bajan, axis=1)
+
+    def _lista(i, idx, valores, signo) -> list:
+        return [
+            {"feature": FEATURES[j], "valor": round(float(X[i, j]), 4), "aporte": round(float(a), 4)}
+            for j, a in zip(idx, valores) if a * signo > 0
+        ]
+
+    return [
+        {"base": round(float(base[i]), 4),
+         "suben": _lista(i, suben[i], a_suben[i], 1),
+         "bajan": _lista(i, bajan[i], a_bajan[i], -1)}
+        for i in range(C.shape[0])
+    ]
+
+
+def explicar(modelo: ModeloCargado, X: np.ndarray, k: int = EXPLICACION_TOP) -> Optional[List[dict]]:
+    """factores() de cada fila de X con el modelo dado; None si el modelo no da aportes."""
+    if modelo.contribuciones is None:
+        return None
+    return factores(X, modelo.contribuciones(X), k)
@@ -0,0 +1,81 @@
+# app/features.py
+"""
+Features del modelo de deserción: una sola definición para el entrenamiento
+(modelo_predictivo/), la API (POST /modelo/modelo-desercion), el puntaje por
+lotes y las simulaciones.
+
+- matriz(): NumPy vectorizado, cualquier cantidad de filas (acepta escalares).
+- fila(): una sola fila con aritmética de Python; evita ~10 ufuncs sobre
+  arreglos de largo 1 en la ruta caliente de la API. Da los mismos valores que
+  matriz().
+- validar(): el orden de FEATURES debe coincidir con el meta.json del modelo
+  (el registro lo verifica al cargar una versión).
+
+Solo depende de NumPy: los scripts de entrenamiento lo importan agregando
+sia-api/ al sys.path.
+"""
+
+from __future__ import annotations
+from typing import Sequence
+
+import numpy as np
+
+BASE = ("promedio", "asistencia", "cursos_matriculados", "cursos_desaprobados")
+
+FEATURES = (
+    "promedio",
+    "asistencia",
+    "cursos_matriculados",
+    "cursos_desaprobados",
+    "carga_baja",
+    "cursos_aprobados",
+    "tasa_desaprob",
+    "sin_desaprob",
+    "rendimiento_global",
+    "carga_x_rend",
+)
+
+
+def matriz(promedio, asistencia, cursos_matriculados, cursos_desaprobados) -> np.ndarray:
+    """(n, len(FEATURES)) float64, en el orden de FEATURES."""
+    promedio = np.asarray(promedio, dtype=np.float64).reshape(-1)
+    asistencia = np.asarray(asistencia, dtype=np.float64).reshape(-1)
+    matric = np.asarray(cursos_matriculados, dtype=np.float64).reshape(-1)
+    desaprob = np.asarray(cursos_desaprobados, dtype=np.float64).reshape(-1)
+
+    X = np.empty((promedio.shape[0], len(FEATURES)), dtype=np.float64)
+    X[:, 0] = promedio
+    X[:, 1] = asistencia
+    X[:, 2] = matric
+    X[:, 3] = desaprob
+    X[:, 4] = matric <= 2                                             # carga_baja
+    np.subtract(matric, desaprob, out=X[:, 5])                        # cursos_aprobados
+    np.divide(desaprob, np.where(matric > 0, matric, 1), out=X[:, 6])
+    np.clip(X[:, 6], 0, 1, out=X[:, 6])                               # tasa_desaprob
+    X[:, 7] = desaprob == 0                                           # sin_desaprob
+    np.multiply(promedio, asistencia / 100.0, out=X[:, 8])            # rendimiento_global
+    np.multiply(matric, promedio, out=X[:, 9])                        # carga_x_rend
+    return X
+
+
+def fila(promedio: float, asistencia: float, cursos_matriculados: int, cursos_desaprobados: int) -> np.ndarray:
+    """(1, len(FEATURES)) para una predicción suelta; mismos valores que matriz()."""
+    p, a = float(promedio), float(asistencia)
+    m, d = float(cursos_matriculados), float(cursos_desaprobados)
+    tasa = min(1.0, max(0.0, d / (m if m > 0 else 1.0)))
+    return np.array([[
+        p, a, m, d,
+        1.0 if m <= 2 else 0.0,
+        m - d,
+        tasa,
+        1.0 if d == 0 else 0.0,
+        p * (a / 100.0),
+        m * p,
+    ]])
+
+
+def validar(features_modelo: Sequence[str]) -> None:
+    """ValueError si el modelo espera otras features u otro orden."""
+    esperadas = tuple(features_modelo)
+    if esperadas != FEATURES:
+        raise ValueError(f"El modelo espera las features {list(esperadas)}; app.features produce {list(FEATURES)}")
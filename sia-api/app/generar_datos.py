@@ -0,0 +1,552 @@
+# app/generar_datos.py
+"""
+Generador de datos sintéticos a escala universitaria (p. ej. 50k estudiantes × 40 periodos)
+para pruebas de carga y de volumen antes de cada semestre.
+
+Uso (desde sia-api/, con el esquema de BD_Final.sql cargado):
+    python -m app.generar_datos --estudiantes 50000 --periodos 40 --sesiones 32
+    python -m app.generar_datos --modo infile --workers 8      # LOAD DATA LOCAL INFILE
+    python -m app.generar_datos --estudiantes 2000 --usuarios   # con cuenta por estudiante
+
+- Determinista: cada estudiante usa su propio RNG derivado de (semilla, número), así el
+  resultado no depende del tamaño de lote ni del orden en que terminan los workers.
+- Por lotes: los procesos generan las filas de cada lote de estudiantes (CPU) y los
+  workers async las escriben en paralelo, cada uno con su conexión, con INSERT
+  multi-fila (executemany) o LOAD DATA LOCAL INFILE (--modo infile).
+- Ids explícitos a partir del máximo existente en cada tabla: se puede sumar volumen
+  sobre una BD con datos reales sin colisiones.
+- También siembra la BD de benchmarks/bench_carga.py (datos_sinteticos.sembrar, en
+  SQLite o MySQL): un solo generador para volumen y carga.
+
+Distribuciones: cohortes que ingresan en cualquier periodo y cursan hasta 10
+semestres; notas alrededor de una habilidad por estudiante (gauss) menos la
+dificultad del curso; asistencia por sesión con probabilidad propia del estudiante,
+que cae en el semestre en que deserta; la deserción por periodo crece con notas y
+asistencia bajas. Puntajes de riesgo con la fórmula de sp_recalcular_riesgo_periodo y
+alertas con los umbrales de sp_generar_alertas_periodo.
+"""
+
+from __future__ import annotations
+import argparse, asyncio, csv, multiprocessing, os, random, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from .ingesta_calificaciones import resumen_periodo
+
+load_dotenv()
+
+SEMESTRES_CARRERA = 10
+DOMINIO_CORREO = "sintetico.unasam.edu.pe"
+
+APELLIDOS = (
+    "QUISPE", "HUAMAN", "MAMANI", "FLORES", "RAMIREZ", "SANCHEZ", "GARCIA", "ROJAS", "TORRES",
+    "CHAVEZ", "MENDOZA", "VASQUEZ", "CASTILLO", "DIAZ", "LOPEZ", "VARGAS", "JIMENEZ", "ALVARADO",
+    "CRUZ", "ROMERO", "HUERTA", "VILLANUEVA", "LEON", "ESPINOZA", "SOTO", "PAREDES", "OBREGON",
+)
+NOMBRES = (
+    "JUAN", "MARIA", "JOSE", "ROSA", "LUIS", "ANA", "CARLOS", "LUZ", "JORGE", "CARMEN",
+    "MIGUEL", "ELENA", "PEDRO", "SOFIA", "DIEGO", "VALERIA", "ANGEL", "LUCIA", "RUTH", "CESAR",
+)
+
+# Columnas en el orden en que _generar_lote arma las tuplas (también orden de escritura: FKs)
+COLUMNAS: Dict[str, Tuple[str, ...]] = {
+    "personas": ("id_persona", "dni", "apellido_paterno", "apellido_materno", "nombres",
+                 "id_genero", "fecha_nacimiento"),
+    "usuarios": ("id_usuario", "id_persona", "correo", "contrasenia_hash", "id_estado_usuario"),
+    "usuarios_roles": ("id_usuario", "id_rol"),
+    "estudiantes": ("id_estudiante", "id_persona", "id_programa", "anio_ingreso",
+                    "id_estado_academico", "codigo_alumno"),
+    "matriculas": ("id_matricula", "id_estudiante", "id_curso", "id_periodo", "id_estado_matricula",
+                   "fecha_matricula"),
+    "calificaciones": ("id_matricula", "nota_parcial", "nota_final"),
+    "resumen_calificaciones_periodo": ("id_estudiante", "id_periodo", "cursos", "aprobados", "desaprobados",
+                                       "pendientes", "creditos_calificados", "suma_ponderada", "promedio"),
+    "asistencias": ("id_matricula", "fecha", "presente", "id_fuente_asistencia"),
+    "asistencias_periodo_curso": ("id_estudiante", "id_curso", "id_periodo", "asistencia_pct"),
+    "fichas_socioeconomicas": ("id_estudiante", "id_periodo", "total_puntos", "estado"),
+    "puntajes_riesgo": ("id_estudiante", "id_periodo", "puntaje", "id_nivel_riesgo", "id_metodo_riesgo"),
+    "alertas": ("id_estudiante", "id_periodo", "id_tipo_alerta", "id_severidad", "mensaje", "leida"),
+    "asignaciones_tutoria": ("id_tutor", "id_estudiante", "id_periodo"),
+    "tutorias": ("id_estudiante", "id_periodo", "id_tutor", "fecha_hora", "id_modalidad_tutoria", "tema"),
+}
+
+# En MySQL las llenan los triggers de migraciones/007 al insertar matrículas y notas
+MANTENIDAS_POR_TRIGGERS = ("resumen_calificaciones_periodo",)
+
+# Catálogos que usan los SPs y routers (se crean los nombres que falten; luego se leen por nombre)
+CATALOGOS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "estados_usuario": ("id_estado_usuario", ("activo", "bloqueado")),
+    "roles": ("id_rol", ("admin", "autoridad", "tutor", "docente", "estudiante")),
+    "generos": ("id_genero", ("masculino", "femenino")),
+    "estados_academicos": ("id_estado_academico", ("regular", "retirado", "egresado")),
+    "estados_matricula": ("id_estado_matricula", ("matriculado", "retirado")),
+    "niveles_riesgo": ("id_nivel_riesgo", ("bajo", "medio", "alto")),
+    "metodos_riesgo": ("id_metodo_riesgo", ("reglas", "formula_normalizada")),
+    "tipos_alerta": ("id_tipo_alerta", ("asistencia", "nota", "combinado", "falta_tutoria")),
+    "severidades": ("id_severidad", ("baja", "media", "alta")),
+    "modalidades_tutoria": ("id_modalidad_tutoria", ("presencial", "virtual")),
+    "fuentes_asistencia": ("id_fuente_asistencia", ("scraping_sga", "manual")),
+}
+
+
+@dataclass
+class Config:
+    estudiantes: int = 50000
+    periodos: int = 40
+    cursos: int = 6                 # cursos por estudiante y periodo
+    sesiones: int = 32              # asistencias por matrícula (días de clase del curso)
+    tutores: int = 300
+    programas: int = 20
+    semilla: int = 42
+    usuarios: bool = False          # cuenta (rol estudiante) por cada estudiante
+    lote: int = 500                 # estudiantes por lote
+    workers: int = 4                # escrituras en paralelo (conexiones)
+    procesos: int = min(4, os.cpu_count() or 1)   # 0 = generar en el mismo proceso
+    modo: str = "insert"            # insert | infile
+    filas_por_insert: int = 1000
+
+
+@dataclass
+class Bases:
+    """Máximos existentes (los ids nuevos empiezan después) + ids de catálogos/estructura."""
+    persona: int
+    usuario: int
+    estudiante: int
+    matricula: int
+    tutor: int
+    catalogos: Dict[str, Dict[str, int]]
+    periodos: List[int]
+    programas: List[int]
+    cursos: Dict[int, List[int]]    # id_programa -> cursos (SEMESTRES_CARRERA × cfg.cursos)
+    creditos: Dict[int, int]        # id_curso -> créditos
+    tutores: List[int]
+
+
+# Código y correos derivados del id: una segunda corrida agrega sin chocar con la primera
+def codigo_alumno(id_estudiante: int) -> str:
+    return f"S{id_estudiante:08d}"
+
+
+def correo_estudiante(id_estudiante: int) -> str:
+    return f"{codigo_alumno(id_estudiante).lower()}@{DOMINIO_CORREO}"
+
+
+def correo_tutor(id_tutor: int) -> str:
+    return f"tutor{id_tutor:05d}@{DOMINIO_CORREO}"
+
+
+def nombre_periodo(i: int, total: int) -> str:
+    """Periodos semestrales que terminan en el año actual (i = 0 es el más antiguo)."""
+    anio_fin = date.today().year
+    anio = anio_fin - (total - 1 - i) // 2
+    return f"{anio}-{2 - (total - 1 - i) % 2}"
+
+
+def _inicio_periodo(nombre: str) -> date:
+    anio, sem = nombre.split("-")
+    return date(int(anio), 3 if sem == "1" else 8, 15)
+
+
+def _clip(x: float, lo: float, hi: float) -> float:
+    return lo if x < lo else hi if x > hi else x
+
+
+def _puntaje_riesgo(promedio: float, asistencia: float, fse: Optional[int]) -> float:
+    """Misma fórmula normalizada que sp_recalcular_riesgo_periodo."""
+    prom_norm = (promedio - 1) / 16 * 100
+    fse_norm = ((fse if fse is not None else 130) - 130) / 50 * 100
+    return round(_clip(prom_norm * 0.5 + asistencia * 0.3 + fse_norm * 0.2, 0, 100), 2)
+
+
+# ==========================
+# Generación (CPU, en procesos)
+# ==========================
+def _generar_lote(cfg: Config, b: Bases, nombres_periodo: List[str], password_hash: str,
+                  desde: int, hasta: int) -> Dict[str, List[tuple]]:
+    """Filas de los estudiantes desde..hasta-1 (numeración 1..N, independiente de los ids base)."""
+    filas: Dict[str, List[tuple]] = {t: [] for t in COLUMNAS}
+    cat = b.catalogos
+    rol_est = cat["roles"]["estudiante"]
+    niv = cat["niveles_riesgo"]
+    tipo = cat["tipos_alerta"]
+    sev = cat["severidades"]
+    modalidades = list(cat["modalidades_tutoria"].values())
+    fuente = cat["fuentes_asistencia"]["scraping_sga"]
+    metodo = cat["metodos_riesgo"]["formula_normalizada"]
+    est_matriculado = cat["estados_matricula"]["matriculado"]
+    estados = cat["estados_academicos"]
+    n_per = len(b.periodos)
+    max_mat = SEMESTRES_CARRERA * cfg.cursos
+    dias_periodo = 112   # 16 semanas de clases
+
+    for n in range(desde, hasta):
+        rng = random.Random(cfg.semilla * 1_000_003 + n)
+        pid = b.persona + n
+        est = b.estudiante + n
+        filas["personas"].append((
+            pid, f"{70000000 + pid}", rng.choice(APELLIDOS), rng.choice(APELLIDOS), rng.choice(NOMBRES),
+            rng.choice((cat["generos"]["masculino"], cat["generos"]["femenino"])),
+            date(1998, 1, 1) + timedelta(days=rng.randint(0, 3650)),
+        ))
+        if cfg.usuarios:
+            uid = b.usuario + n
+            filas["usuarios"].append((uid, pid, correo_estudiante(est), password_hash, cat["estados_usuario"]["activo"]))
+            filas["usuarios_roles"].append((uid, rol_est))
+
+        habilidad = _clip(rng.gauss(12.5, 2.8), 4, 19)
+        asis_base = _clip(rng.gauss(0.86, 0.09), 0.35, 0.99)
+        # Riesgo base de abandono por semestre (mayor con notas/asistencia bajas y al inicio)
+        riesgo_base = 0.015 + 0.08 * (habilidad < 10) + 0.05 * (asis_base < 0.7)
+        prog_idx = rng.randrange(len(b.programas))
+        id_programa = b.programas[prog_idx]
+        cursos_prog = b.cursos[id_programa]
+        p0 = rng.randrange(n_per)
+        tutor = b.tutores[(n - 1) % len(b.tutores)] if b.tutores else None
+        estado = estados["regular"]
+        local = 0
+
+        for semestre, p in enumerate(range(p0, min(n_per, p0 + SEMESTRES_CARRERA))):
+            id_periodo = b.periodos[p]
+            inicio = _inicio_periodo(nombres_periodo[p])
+            deserta = rng.random() < riesgo_base * (1.6 if semestre < 2 else 1.0)
+            asis_sem = asis_base * (0.6 if deserta else 1.0)
+            finales: List[Tuple[Optional[float], int]] = []
+            presentes = total = 0
+            for k in range(cfg.cursos):
+                local += 1
+                id_mat = b.matricula + (n - 1) * max_mat + local
+                id_curso = cursos_prog[semestre * cfg.cursos + k]
+                dificultad = (id_curso % 7) * 0.35
+                filas["matriculas"].append((
+                    id_mat, est, id_curso, id_periodo, est_matriculado,
+                    datetime.combine(inicio - timedelta(days=rng.randint(5, 20)), datetime.min.time()),
+                ))
+                nota = round(_clip(rng.gauss(habilidad - dificultad, 2.2) - (3 if deserta else 0), 0, 20), 2)
+                parcial = round(_clip(nota + rng.gauss(0, 1.5), 0, 20), 2)
+                final = None if deserta and rng.random() < 0.5 else nota
+                filas["calificaciones"].append((id_mat, parcial, final))
+                finales.append((final, b.creditos[id_curso]))
+                pres_curso = 0
+                for s in range(cfg.sesiones):
+                    presente = 1 if rng.random() < asis_sem else 0
+                    pres_curso += presente
+                    filas["asistencias"].append((
+                        id_mat, inicio + timedelta(days=s * dias_periodo // max(1, cfg.sesiones)), presente, fuente,
+                    ))
+                presentes += pres_curso
+                total += cfg.sesiones
+                pct = round(100.0 * pres_curso / cfg.sesiones, 2) if cfg.sesiones else 100.0
+                filas["asistencias_periodo_curso"].append((est, id_curso, id_periodo, pct))
+
+            res_cal = resumen_periodo(finales)
+            filas["resumen_calificaciones_periodo"].append((est, id_periodo, *res_cal.values()))
+            promedio = res_cal["promedio"]       # lo que verá v_promedio_periodo (ponderado, solo finales)
+            asistencia = 100.0 * presentes / total if total else 100.0
+            fse = None
+            if semestre % 2 == 0:
+                fse = rng.randint(130, 180)
+                filas["fichas_socioeconomicas"].append((est, id_periodo, fse, "activa"))
+            puntaje = _puntaje_riesgo(promedio or 0.0, asistencia, fse)
+            nivel = niv["bajo"] if puntaje >= 70 else niv["medio"] if puntaje >= 50 else niv["alto"]
+            filas["puntajes_riesgo"].append((est, id_periodo, puntaje, nivel, metodo))
+
+            if asistencia < 70:
+                s_id = sev["alta"] if asistencia < 50 else sev["media"] if asistencia < 60 else sev["baja"]
+                filas["alertas"].append((est, id_periodo, tipo["asistencia"], s_id,
+                                         f"Asistencia baja: {asistencia:.1f}%", 0))
+            if promedio is not None and promedio < 11:
+                s_id = sev["alta"] if promedio < 8 else sev["media"] if promedio < 10 else sev["baja"]
+                filas["alertas"].append((est, id_periodo, tipo["nota"], s_id, f"Promedio bajo: {promedio:.2f}", 0))
+            if puntaje < 50:
+                filas["alertas"].append((est, id_periodo, tipo["combinado"], sev["alta"],
+                                         f"Riesgo alto: score {puntaje}", 0))
+
+            if tutor is not None:
+                filas["asignaciones_tutoria"].append((tutor, est, id_periodo))
+                sesiones_tut = rng.randint(1, 3) if nivel != niv["bajo"] and rng.random() < 0.6 else 0
+                for _ in range(sesiones_tut):
+                    filas["tutorias"].append((
+                        est, id_periodo, tutor,
+                        datetime.combine(inicio, datetime.min.time()) + timedelta(hours=rng.randint(24, 24 * 100)),
+                        rng.choice(modalidades), "Seguimiento académico",
+                    ))
+
+            if deserta:
+                estado = estados["retirado"]
+                break
+        else:
+            if p0 + SEMESTRES_CARRERA <= n_per:
+                estado = estados["egresado"]
+
+        anio_ingreso = int(nombres_periodo[p0][:4])
+        filas["estudiantes"].append((est, pid, id_programa, anio_ingreso, estado, codigo_alumno(est)))
+
+    # estudiantes antes que sus matrículas: el orden de COLUMNAS ya lo respeta
+    return filas
+
+
+# ==========================
+# Escritura
+# ==========================
+def _insert_ignore(engine: AsyncEngine) -> str:
+    return "INSERT OR IGNORE" if engine.dialect.name == "sqlite" else "INSERT IGNORE"
+
+
+def _placeholders(engine: AsyncEngine, n: int) -> str:
+    marca = "?" if engine.dialect.paramstyle == "qmark" else "%s"
+    return ", ".join([marca] * n)
+
+
+async def _escribir_insert(conn, engine: AsyncEngine, tabla: str, filas: Sequence[tuple], por_insert: int) -> None:
+    cols = COLUMNAS[tabla]
+    sql = f"INSERT INTO {tabla} ({', '.join(cols)}) VALUES ({_placeholders(engine, len(cols))})"
+    for i in range(0, len(filas), por_insert):
+        # executemany: aiomysql lo reescribe como un INSERT multi-fila
+        await conn.exec_driver_sql(sql, list(filas[i:i + por_insert]))
+
+
+def _valor_tsv(v) -> str:
+    if v is None:
+        return "\\N"
+    return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+async def _escribir_infile(conn, tabla: str, filas: Sequence[tuple]) -> None:
+    cols = COLUMNAS[tabla]
+    with tempfile.NamedTemporaryFile("w", suffix=f".{tabla}.tsv", delete=False, encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_NONE, escapechar=None, lineterminator="\n")
+        for fila in filas:
+            w.writerow([_valor_tsv(v) for v in fila])
+        ruta = f.name
+    try:
+        await conn.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{ruta}' INTO TABLE {tabla} "
+            f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(cols)})"
+        )
+    finally:
+        os.unlink(ruta)
+
+
+async def _escribir_lote(engine: AsyncEngine, cfg: Config, filas: Dict[str, List[tuple]]) -> int:
+    if engine.dialect.name == "mysql":
+        filas = {t: [] if t in MANTENIDAS_POR_TRIGGERS else v for t, v in filas.items()}
+    async with engine.begin() as conn:
+        if engine.dialect.name == "mysql":
+            # Los datos generados son consistentes: se evita el chequeo fila a fila en la carga
+            await conn.exec_driver_sql("SET SESSION foreign_key_checks=0, unique_checks=0")
+        for tabla in COLUMNAS:
+            if not filas[tabla]:
+                continue
+            if cfg.modo == "infile" and engine.dialect.name == "mysql":
+                await _escribir_infile(conn, tabla, filas[tabla])
+            else:
+                await _escribir_insert(conn, engine, tabla, filas[tabla], cfg.filas_por_insert)
+        if engine.dialect.name == "mysql":
+            await conn.exec_driver_sql("SET SESSION foreign_key_checks=1, unique_checks=1")
+    return sum(len(v) for v in filas.values())
+
+
+# ==========================
+# Estructura: catálogos, programas, cursos, periodos, tutores
+# ==========================
+async def _max_id(conn, tabla: str, col: str) -> int:
+    return int((await conn.execute(text(f"SELECT COALESCE(MAX({col}), 0) FROM {tabla}"))).scalar_one())
+
+
+async def _mapa(conn, sql: str, params: dict | None = None) -> Dict[str, int]:
+    return {str(r[0]): int(r[1]) for r in (await conn.execute(text(sql), params or {})).fetchall()}
+
+
+async def _estructura(engine: AsyncEngine, cfg: Config, nombres_periodo: List[str], password_hash: str) -> Bases:
+    ignore = _insert_ignore(engine)
+    async with engine.begin() as conn:
+        catalogos: Dict[str, Dict[str, int]] = {}
+        for tabla, (col_id, nombres) in CATALOGOS.items():
+            # Solo los nombres que falten (la BD real puede tenerlos con otros ids)
+            existentes = await _mapa(conn, f"SELECT nombre, {col_id} FROM {tabla}")
+            siguiente = max(existentes.values(), default=0) + 1
+            faltantes = [nom for nom in nombres if nom not in existentes]
+            if faltantes:
+                await conn.execute(
+                    text(f"INSERT INTO {tabla} ({col_id}, nombre) VALUES (:id, :nombre)"),
+                    [{"id": siguiente + i, "nombre": nom} for i, nom in enumerate(faltantes)],
+                )
+            catalogos[tabla] = await _mapa(conn, f"SELECT nombre, {col_id} FROM {tabla}")
+
+        await conn.execute(text(f"{ignore} INTO facultades (codigo, nombre) VALUES ('SIN', 'Facultad Sintética')"))
+        id_fac = (await conn.execute(text("SELECT id_facultad FROM facultades WHERE codigo='SIN'"))).scalar_one()
+        await conn.execute(
+            text(f"{ignore} INTO programas (id_facultad, codigo, nombre) VALUES (:f, :c, :n)"),
+            [{"f": id_fac, "c": f"SIN{p:02d}", "n": f"Programa Sintético {p:02d}"} for p in range(1, cfg.programas + 1)],
+        )
+        programas = await _mapa(conn, "SELECT codigo, id_programa FROM programas WHERE codigo LIKE 'SIN%'")
+        cursos_por_prog = SEMESTRES_CARRERA * cfg.cursos
+        await conn.execute(
+            text(f"{ignore} INTO cursos (codigo, nombre, creditos) VALUES (:c, :n, :cr)"),
+            [
+                {"c": f"SIN{p:02d}{k:03d}", "n": f"Curso {k:03d} - Programa {p:02d}", "cr": 2 + k % 4}
+                for p in range(1, cfg.programas + 1) for k in range(cursos_por_prog)
+            ],
+        )
+        cursos = await _mapa(conn, "SELECT codigo, id_curso FROM cursos WHERE codigo LIKE 'SIN%'")
+        creditos = {
+            int(r[0]): int(r[1])
+            for r in (await conn.execute(text("SELECT id_curso, creditos FROM cursos WHERE codigo LIKE 'SIN%'"))).all()
+        }
+        await conn.execute(
+            text(f"{ignore} INTO periodos_academicos (nombre) VALUES (:n)"), [{"n": n} for n in nombres_periodo]
+        )
+        periodos = await _mapa(conn, "SELECT nombre, id_periodo FROM periodos_academicos")
+
+        b_persona = await _max_id(conn, "personas", "id_persona")
+        b_usuario = await _max_id(conn, "usuarios", "id_usuario")
+        b_tutor = await _max_id(conn, "tutores", "id_tutor")
+
+        # Tutores (personas + usuarios con rol tutor) después del rango de los estudiantes
+        tutores: List[int] = []
+        if cfg.tutores:
+            filas_p, filas_u, filas_r, filas_t = [], [], [], []
+            rng = random.Random(cfg.semilla)
+            for t in range(1, cfg.tutores + 1):
+                pid = b_persona + cfg.estudiantes + t
+                uid = b_usuario + cfg.estudiantes + t
+                filas_p.append({"id": pid, "dni": f"{70000000 + pid}", "ap": rng.choice(APELLIDOS),
+                                "am": rng.choice(APELLIDOS), "no": rng.choice(NOMBRES)})
+                filas_u.append({"id": uid, "pid": pid, "c": correo_tutor(b_tutor + t), "h": password_hash,
+                                "e": catalogos["estados_usuario"]["activo"]})
+                filas_r.append({"u": uid, "r": catalogos["roles"]["tutor"]})
+                filas_t.append({"id": b_tutor + t, "u": uid})
+                tutores.append(b_tutor + t)
+            await conn.execute(text(
+                "INSERT INTO personas (id_persona, dni, apellido_paterno, apellido_materno, nombres) "
+                "VALUES (:id, :dni, :ap, :am, :no)"), filas_p)
+            await conn.execute(text(
+                "INSERT INTO usuarios (id_usuario, id_persona, correo, contrasenia_hash, id_estado_usuario) "
+                "VALUES (:id, :pid, :c, :h, :e)"), filas_u)
+            await conn.execute(text("INSERT INTO usuarios_roles (id_usuario, id_rol) VALUES (:u, :r)"), filas_r)
+            await conn.execute(text("INSERT INTO tutores (id_tutor, id_usuario) VALUES (:id, :u)"), filas_t)
+
+        return Bases(
+            persona=b_persona,
+            usuario=b_usuario,
+            estudiante=await _max_id(conn, "estudiantes", "id_estudiante"),
+            matricula=await _max_id(conn, "matriculas", "id_matricula"),
+            tutor=b_tutor,
+            catalogos=catalogos,
+            periodos=[periodos[n] for n in nombres_periodo],
+            programas=[programas[f"SIN{p:02d}"] for p in range(1, cfg.programas + 1)],
+            cursos={
+                programas[f"SIN{p:02d}"]: [cursos[f"SIN{p:02d}{k:03d}"] for k in range(cursos_por_prog)]
+                for p in range(1, cfg.programas + 1)
+            },
+            creditos=creditos,
+            tutores=tutores,
+        )
+
+
+def estimar_filas(cfg: Config) -> Dict[str, int]:
+    """Orden de magnitud (los desertores cursan menos semestres)."""
+    semestres = min(SEMESTRES_CARRERA, cfg.periodos) * 0.75
+    mat = int(cfg.estudiantes * semestres * cfg.cursos)
+    return {"matriculas": mat, "asistencias": mat * cfg.sesiones}
+
+
+async def generar(engine: AsyncEngine, cfg: Config, password_hash: str) -> dict:
+    """Crea estructura + estudiantes. Devuelve ids base, periodos, programas y filas escritas."""
+    nombres_periodo = [nombre_periodo(i, cfg.periodos) for i in range(cfg.periodos)]
+    b = await _estructura(engine, cfg, nombres_periodo, password_hash)
+
+    loop = asyncio.get_running_loop()
+    pool = (
+        ProcessPoolExecutor(max_workers=cfg.procesos, mp_context=multiprocessing.get_context("spawn"))
+        if cfg.procesos > 0 else None
+    )
+    escritura = asyncio.Semaphore(max(1, cfg.workers))
+    en_vuelo = asyncio.Semaphore(max(1, cfg.workers) * 2)   # acota la memoria de lotes generados
+    lotes = [(d, min(d + cfg.lote, cfg.estudiantes + 1)) for d in range(1, cfg.estudiantes + 1, cfg.lote)]
+    escritas = 0
+    t0 = time.perf_counter()
+
+    async def _lote(i: int, desde: int, hasta: int) -> None:
+        nonlocal escritas
+        async with en_vuelo:
+            args = (cfg, b, nombres_periodo, password_hash, desde, hasta)
+            filas = await loop.run_in_executor(pool, _generar_lote, *args) if pool else _generar_lote(*args)
+            async with escritura:
+                escritas += await _escribir_lote(engine, cfg, filas)
+        dt = time.perf_counter() - t0
+        print(f"[OK] Lote {i + 1}/{len(lotes)} (estudiantes {desde}-{hasta - 1}): "
+              f"{escritas:,} filas, {escritas / dt:,.0f} filas/s")
+
+    try:
+        await asyncio.gather(*(_lote(i, d, h) for i, (d, h) in enumerate(lotes)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "config": asdict(cfg),
+        "bases": {"persona": b.persona, "usuario": b.usuario, "estudiante": b.estudiante,
+                  "matricula": b.matricula, "tutor": b.tutor},
+        "periodos": b.periodos,
+        "programas": b.programas,
+        "tutores": [
+            {"id_tutor": id_tutor, "id_usuario": b.usuario + cfg.estudiantes + t, "correo": correo_tutor(id_tutor)}
+            for t, id_tutor in enumerate(b.tutores, start=1)
+        ],
+        "filas": escritas,
+        "segundos": round(time.perf_counter() - t0, 1),
+    }
+
+
+async def main(args) -> None:
+    from .db import DATABASE_URL
+    from .security import hash_password
+
+    cfg = Config(
+        estudiantes=args.estudiantes, periodos=args.periodos, cursos=args.cursos, sesiones=args.sesiones,
+        tutores=args.tutores, programas=args.programas, semilla=args.semilla, usuarios=args.usuarios,
+        lote=args.lote, workers=args.workers, procesos=args.procesos, modo=args.modo,
+        filas_por_insert=args.filas_por_insert,
+    )
+    url = args.url or DATABASE_URL
+    engine = create_async_engine(
+        url, pool_size=max(1, cfg.workers), max_overflow=2,
+        connect_args={"local_infile": True} if cfg.modo == "infile" else {},
+    )
+    print(f"[OK] Generando {cfg.estudiantes:,} estudiantes × {cfg.periodos} periodos; "
+          f"estimado: {estimar_filas(cfg)}")
+    try:
+        resumen = await generar(engine, cfg, hash_password(args.password))
+    finally:
+        await engine.dispose()
+    print(f"[OK] {resumen['filas']:,} filas en {resumen['segundos']} s "
+          f"(ids desde persona {resumen['bases']['persona'] + 1}, estudiante {resumen['bases']['estudiante'] + 1})")
+
+
+if __name__ == "__main__":
+    defecto = Config()
+    parser = argparse.ArgumentParser(description="Datos sintéticos a escala universitaria (determinista)")
+    parser.add_argument("--url", help="URL SQLAlchemy async (por defecto DATABASE_URL / DB_*)")
+    parser.add_argument("--estudiantes", type=int, default=defecto.estudiantes)
+    parser.add_argument("--periodos", type=int, default=defecto.periodos)
+    parser.add_argument("--cursos", type=int, default=defecto.cursos, help="cursos por estudiante y periodo")
+    parser.add_argument("--sesiones", type=int, default=defecto.sesiones, help="asistencias por matrícula")
+    parser.add_argument("--tutores", type=int, default=defecto.tutores)
+    parser.add_argument("--programas", type=int, default=defecto.programas)
+    parser.add_argument("--semilla", type=int, default=defecto.semilla)
+    parser.add_argument("--usuarios", action="store_true", help="crear cuenta (rol estudiante) por estudiante")
+    parser.add_argument("--password", default=os.getenv("SINTETICO_PASS", "Sintetico#2025"),
+                        help="contraseña de las cuentas creadas")
+    parser.add_argument("--lote", type=int, default=defecto.lote, help="estudiantes por lote")
+    parser.add_argument("--workers", type=int, default=defecto.workers, help="escrituras en paralelo")
+    parser.add_argument("--procesos", type=int, default=defecto.procesos, help="procesos generadores (0 = inline)")
+    parser.add_argument("--modo", choices=("insert", "infile"), default=defecto.modo)
+    parser.add_argument("--filas-por-insert", type=int, default=defecto.filas_por_insert)
+    asyncio.run(main(parser.parse_args()))
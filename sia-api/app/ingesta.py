@@ -0,0 +1,251 @@
+# app/ingesta.py
+"""
+Piezas comunes de las ingestas del SGA (asistencias, calificaciones).
+
+- leer_filas(): CSV con encabezado (',' o ';') o NDJSON, en streaming por bloques.
+- Resolutor: (codigo_alumno, curso, periodo) -> id_matricula con una tabla en
+  memoria que se carga una vez por periodo.
+- Corrida: registro de la corrida en trabajos_sincronizacion (en_proceso ->
+  completado | fallido) con contadores y una muestra de filas rechazadas en
+  `detalles`.
+"""
+
+from __future__ import annotations
+import asyncio, codecs, csv, json, os, time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .queries import consulta
+
+# ==========================
+# CONFIG
+# ==========================
+INGESTA_LOTE = int(os.getenv("INGESTA_LOTE", "2000"))                 # filas por upsert
+INGESTA_LOTE_AGREGADOS = int(os.getenv("INGESTA_LOTE_AGREGADOS", "1000"))  # matrículas por refresco
+INGESTA_MAX_ERRORES = 50          # muestra guardada en detalles
+
+ESTADOS_TRABAJO = ("pendiente", "en_proceso", "completado", "fallido")
+
+# Por nombre: la BD real puede tener estos estados (u otros) con otros ids
+SQL_ESTADO_TRABAJO_INSERT = consulta("ingesta.estado_trabajo_insert", """
+    INSERT IGNORE INTO estados_trabajo (id_estado_trabajo, nombre) VALUES (:id, :nombre)
+""")
+
+SQL_ESTADOS_TRABAJO = consulta("ingesta.estados_trabajo", """
+    SELECT nombre, id_estado_trabajo FROM estados_trabajo
+""")
+
+SQL_FUENTE = consulta("ingesta.fuente", """
+    SELECT id_fuente_asistencia FROM fuentes_asistencia WHERE nombre = :nombre LIMIT 1
+""")
+
+SQL_TRABAJO_INSERT = consulta("ingesta.trabajo_insert", """
+    INSERT INTO trabajos_sincronizacion (id_fuente_datos, id_estado_trabajo, inicio, detalles)
+    VALUES (:fuente, :estado, NOW(), :detalles)
+""")
+
+SQL_TRABAJO_CERRAR = consulta("ingesta.trabajo_cerrar", """
+    UPDATE trabajos_sincronizacion
+    SET id_estado_trabajo = :estado, fin = NOW(), detalles = :detalles
+    WHERE id_trabajo = :id
+""")
+
+SQL_PERIODOS = consulta("ingesta.periodos", """
+    SELECT nombre, id_periodo FROM periodos_academicos
+""")
+
+SQL_MATRICULAS_PERIODO = consulta("ingesta.matriculas_periodo", """
+    SELECT e.codigo_alumno, c.codigo AS curso, m.id_matricula, m.id_estudiante
+    FROM matriculas m
+    JOIN estudiantes e ON e.id_estudiante = m.id_estudiante
+    JOIN cursos c      ON c.id_curso = m.id_curso
+    WHERE m.id_periodo = :per AND e.codigo_alumno IS NOT NULL
+""")
+
+
+class ErrorIngesta(ValueError):
+    """Problema con el archivo o la fuente (no con una fila puntual)."""
+
+
+# ==========================
+# Lectura en streaming
+# ==========================
+async def _lineas(bloques: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Bytes -> líneas de texto sin cargar el archivo completo (tolera BOM y CRLF)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    resto = ""
+    async for bloque in bloques:
+        texto = resto + decoder.decode(bloque)
+        partes = texto.split("\n")
+        resto = partes.pop()
+        for linea in partes:
+            linea = linea.rstrip("\r")
+            if linea.strip():
+                yield linea
+    resto = (resto + decoder.decode(b"", final=True)).rstrip("\r")
+    if resto.strip():
+        yield resto
+
+
+async def leer_filas(bloques: AsyncIterator[bytes], formato: str) -> AsyncIterator[dict]:
+    """Filas crudas (dict) de un CSV con encabezado o de NDJSON (un objeto por línea)."""
+    lineas = _lineas(bloques)
+    if formato == "ndjson":
+        async for linea in lineas:
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                fila = None
+            yield fila if isinstance(fila, dict) else {"_error": "JSON inválido"}
+        return
+    if formato != "csv":
+        raise ErrorIngesta(f"Formato no soportado: {formato}")
+
+    encabezado: Optional[List[str]] = None
+    delimitador = ","
+    async for linea in lineas:
+        if encabezado is None:
+            # Exportaciones del SGA en Excel suelen venir con ';'
+            delimitador = ";" if linea.count(";") > linea.count(",") else ","
+            encabezado = [c.strip().lower() for c in next(csv.reader([linea], delimiter=delimitador))]
+            continue
+        yield dict(zip(encabezado, next(csv.reader([linea], delimiter=delimitador))))
+
+
+def formato_de(nombre: Optional[str], content_type: Optional[str] = None) -> str:
+    """csv | ndjson a partir de la extensión o del Content-Type."""
+    ct = (content_type or "").lower()
+    if "ndjson" in ct or "json" in ct or (nombre or "").lower().endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+async def bloques_archivo(ruta: str, tam: int = 1 << 20) -> AsyncIterator[bytes]:
+    with open(ruta, "rb") as f:
+        while True:
+            bloque = await asyncio.to_thread(f.read, tam)
+            if not bloque:
+                return
+            yield bloque
+
+
+def texto(fila: dict, *claves: str) -> str:
+    """Primer valor no vacío entre `claves` (los feeds usan nombres de columna distintos)."""
+    for clave in claves:
+        valor = fila.get(clave)
+        if valor is not None and str(valor).strip() != "":
+            return str(valor).strip()
+    return ""
+
+
+# ==========================
+# Resolución de matrículas
+# ==========================
+class Resolutor:
+    """(codigo_alumno, curso, periodo) -> (id_matricula, id_estudiante); carga un periodo la primera vez que aparece."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.periodos: Optional[Dict[str, int]] = None
+        self.matriculas: Dict[int, Dict[Tuple[str, str], Tuple[int, int]]] = {}
+
+    async def periodo(self, fila: dict) -> Optional[int]:
+        if self.periodos is None:
+            res = await self.db.execute(SQL_PERIODOS)
+            self.periodos = {str(r[0]): int(r[1]) for r in res.all()}
+        id_periodo = texto(fila, "id_periodo")
+        if id_periodo:
+            return int(id_periodo) if int(id_periodo) in self.periodos.values() else None
+        return self.periodos.get(texto(fila, "periodo"))
+
+    async def matricula(self, id_periodo: int, codigo_alumno: str, curso: str) -> Optional[Tuple[int, int]]:
+        tabla = self.matriculas.get(id_periodo)
+        if tabla is None:
+            res = await self.db.execute(SQL_MATRICULAS_PERIODO, {"per": id_periodo})
+            tabla = self.matriculas[id_periodo] = {
+                (str(r[0]).upper(), str(r[1]).upper()): (int(r[2]), int(r[3])) for r in res.all()
+            }
+            # La carga abre transacción: se cierra para no retener la conexión entre lotes
+            await self.db.commit()
+        return tabla.get((codigo_alumno.upper(), curso.upper()))
+
+
+# ==========================
+# Registro en trabajos_sincronizacion
+# ==========================
+def _detalles(resumen: dict) -> str:
+    return json.dumps(resumen, ensure_ascii=False, default=str)
+
+
+async def _estados_trabajo(db: AsyncSession) -> Dict[str, int]:
+    """nombre -> id de estados_trabajo; crea los de ESTADOS_TRABAJO que falten."""
+    estados = {str(r[0]): int(r[1]) for r in (await db.execute(SQL_ESTADOS_TRABAJO)).all()}
+    faltantes = [nombre for nombre in ESTADOS_TRABAJO if nombre not in estados]
+    if faltantes:
+        siguiente = max(estados.values(), default=0) + 1
+        await db.execute(SQL_ESTADO_TRABAJO_INSERT, [
+            {"id": siguiente + i, "nombre": nombre} for i, nombre in enumerate(faltantes)
+        ])
+        estados = {str(r[0]): int(r[1]) for r in (await db.execute(SQL_ESTADOS_TRABAJO)).all()}
+        faltantes = [nombre for nombre in ESTADOS_TRABAJO if nombre not in estados]
+        if faltantes:
+            raise ErrorIngesta(f"Faltan estados en estados_trabajo: {', '.join(faltantes)}")
+    return estados
+
+
+class Corrida:
+    """
+    Uso:
+        corrida = Corrida(db, "asistencias", fuente, formato, origen, aplicadas=0, ...)
+        await corrida.abrir()
+        try: ... corrida.omitir(...) ...
+        except Exception as exc: await corrida.fallar(exc); raise
+        return await corrida.completar()
+    """
+
+    def __init__(self, db: AsyncSession, tipo: str, fuente: str, formato: str,
+                 origen: Optional[str], **contadores: int):
+        self.db = db
+        self.fuente = fuente
+        self.id_fuente: Optional[int] = None
+        self.id_trabajo: Optional[int] = None
+        self.estados: Dict[str, int] = {}
+        self.resumen: dict = {
+            "tipo": tipo, "origen": origen, "formato": formato, "fuente": fuente,
+            "leidas": 0, "invalidas": 0, "sin_matricula": 0, **contadores, "errores": [],
+        }
+        self._t0 = time.perf_counter()
+
+    async def abrir(self) -> None:
+        self.id_fuente = (await self.db.execute(SQL_FUENTE, {"nombre": self.fuente})).scalar()
+        if self.id_fuente is None:
+            raise ErrorIngesta(f"Fuente desconocida: {self.fuente}")
+        self.estados = await _estados_trabajo(self.db)
+        res = await self.db.execute(SQL_TRABAJO_INSERT, {
+            "fuente": self.id_fuente, "estado": self.estados["en_proceso"], "detalles": _detalles(self.resumen),
+        })
+        self.id_trabajo = res.lastrowid
+        await self.db.commit()
+        self._t0 = time.perf_counter()
+
+    def omitir(self, motivo: str, linea: int, contador: str) -> None:
+        self.resumen[contador] += 1
+        if len(self.resumen["errores"]) < INGESTA_MAX_ERRORES:
+            self.resumen["errores"].append({"linea": linea, "motivo": motivo})
+
+    async def _cerrar(self, estado: str) -> None:
+        self.resumen["segundos"] = round(time.perf_counter() - self._t0, 2)
+        await self.db.execute(SQL_TRABAJO_CERRAR, {
+            "id": self.id_trabajo, "estado": self.estados[estado], "detalles": _detalles(self.resumen),
+        })
+        await self.db.commit()
+
+    async def fallar(self, exc: BaseException) -> None:
+        await self.db.rollback()
+        self.resumen["error"] = str(exc)
+        await self._cerrar("fallido")
+
+    async def completar(self) -> dict:
+        await self._cerrar("completado")
+        return {"id_trabajo": self.id_trabajo, **self.resumen}
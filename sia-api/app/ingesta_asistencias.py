@@ -0,0 +1,179 @@
+# app/ingesta_asistencias.py
+"""
+Ingesta de asistencias diarias del SGA (CSV o NDJSON), en streaming.
+
+- El archivo se lee por bloques (no se carga entero); cada fila se normaliza y
+  se resuelve a su id_matricula (ver app/ingesta.py).
+- Las filas válidas se escriben por lotes de INGESTA_LOTE con un upsert
+  multi-fila sobre uq_asistencia (id_matricula, fecha); cada lote es su propia
+  transacción.
+- Al final se recalculan en asistencias_periodo_curso solo las matrículas
+  tocadas (incremental, por bloques de ids).
+- Cada corrida queda en trabajos_sincronizacion.
+
+Columnas: codigo_alumno, curso (código), periodo (nombre, p. ej. 2025-1) o
+id_periodo, fecha (YYYY-MM-DD o DD/MM/YYYY), presente (1/0, si/no, P/F...).
+
+CLI (cron diario):
+    python -m app.ingesta_asistencias asistencias_2025-05-12.csv --fuente scraping_sga
+"""
+
+from __future__ import annotations
+import argparse, asyncio, os
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .ingesta import (
+    INGESTA_LOTE, INGESTA_LOTE_AGREGADOS, Corrida, Resolutor, bloques_archivo, formato_de, leer_filas, texto,
+)
+from .queries import consulta
+
+_PRESENTE = {"1", "true", "si", "sí", "s", "p", "presente", "x", "t", "tardanza"}
+_FALTA = {"0", "false", "no", "n", "f", "falta", "a", "ausente", "j", "justificada"}
+
+SQL_UPSERT_ASISTENCIA = consulta("ingesta.upsert_asistencia", """
+    INSERT INTO asistencias (id_matricula, fecha, presente, id_fuente_asistencia)
+    VALUES (:mat, :fecha, :presente, :fuente)
+    ON DUPLICATE KEY UPDATE
+      presente             = VALUES(presente),
+      id_fuente_asistencia = VALUES(id_fuente_asistencia)
+""")
+
+# Recalcula el % solo de las matrículas tocadas, desde los contadores que mantienen
+# los triggers de asistencias (migraciones/002): O(1) por matrícula
+SQL_REFRESCAR_AGREGADOS = consulta("ingesta.refrescar_agregados", """
+    INSERT INTO asistencias_periodo_curso (id_estudiante, id_curso, id_periodo, asistencia_pct, fuente)
+    SELECT m.id_estudiante, m.id_curso, m.id_periodo,
+           ROUND(100 * c.presentes / c.sesiones, 2), :fuente
+    FROM matriculas m
+    JOIN contadores_asistencia_matricula c ON c.id_matricula = m.id_matricula
+    WHERE m.id_matricula IN :ids AND c.sesiones > 0
+    ON DUPLICATE KEY UPDATE
+      asistencia_pct = VALUES(asistencia_pct),
+      fuente         = VALUES(fuente)
+""").bindparams(bindparam("ids", expanding=True))
+
+
+# ==========================
+# Normalización
+# ==========================
+def _fecha(valor: str) -> date:
+    if "/" in valor:
+        return datetime.strptime(valor[:10], "%d/%m/%Y").date()
+    return date.fromisoformat(valor[:10])
+
+
+def _presente(valor: str) -> int:
+    v = valor.strip().lower()
+    if v in _PRESENTE:
+        return 1
+    if v in _FALTA:
+        return 0
+    raise ValueError(f"presente inválido: {valor!r}")
+
+
+# ==========================
+# Escritura
+# ==========================
+async def _upsert(db: AsyncSession, lote: Dict[Tuple[int, date], int], id_fuente: int) -> None:
+    # executemany: aiomysql lo reescribe como un INSERT multi-fila
+    await db.execute(SQL_UPSERT_ASISTENCIA, [
+        {"mat": mat, "fecha": fecha, "presente": presente, "fuente": id_fuente}
+        for (mat, fecha), presente in lote.items()
+    ])
+    await db.commit()
+
+
+async def _refrescar_agregados(db: AsyncSession, matriculas: Iterable[int], fuente: str) -> int:
+    ids = sorted(matriculas)
+    for i in range(0, len(ids), INGESTA_LOTE_AGREGADOS):
+        await db.execute(SQL_REFRESCAR_AGREGADOS, {"ids": ids[i:i + INGESTA_LOTE_AGREGADOS], "fuente": fuente})
+        await db.commit()
+    return len(ids)
+
+
+# ==========================
+# Corrida
+# ==========================
+async def ingerir(
+    db: AsyncSession,
+    bloques: AsyncIterator[bytes],
+    formato: str = "csv",
+    fuente: str = "scraping_sga",
+    origen: Optional[str] = None,
+) -> dict:
+    """
+    Procesa un archivo completo y devuelve el resumen (también queda en trabajos_sincronizacion).
+    Las filas inválidas o sin matrícula se cuentan y se omiten; un error de BD marca el trabajo como fallido.
+    """
+    corrida = Corrida(db, "asistencias", fuente, formato, origen, aplicadas=0, matriculas_actualizadas=0)
+    await corrida.abrir()
+    resumen = corrida.resumen
+    resolutor = Resolutor(db)
+    lote: Dict[Tuple[int, date], int] = {}
+    tocadas: Set[int] = set()
+    try:
+        async for fila in leer_filas(bloques, formato):
+            resumen["leidas"] += 1
+            linea = resumen["leidas"]
+            if "_error" in fila:
+                corrida.omitir(fila["_error"], linea, "invalidas")
+                continue
+            codigo, curso = texto(fila, "codigo_alumno", "codigo"), texto(fila, "curso", "codigo_curso")
+            try:
+                fecha = _fecha(texto(fila, "fecha"))
+                presente = _presente(texto(fila, "presente", "estado"))
+                if not codigo or not curso:
+                    raise ValueError("faltan codigo_alumno o curso")
+                id_periodo = await resolutor.periodo(fila)
+            except ValueError as exc:
+                corrida.omitir(str(exc), linea, "invalidas")
+                continue
+            if id_periodo is None:
+                corrida.omitir("periodo desconocido", linea, "sin_matricula")
+                continue
+            matricula = await resolutor.matricula(id_periodo, codigo, curso)
+            if matricula is None:
+                corrida.omitir(f"sin matrícula: {codigo}/{curso}", linea, "sin_matricula")
+                continue
+
+            id_matricula = matricula[0]
+            lote[(id_matricula, fecha)] = presente     # la última fila repetida gana
+            tocadas.add(id_matricula)
+            if len(lote) >= INGESTA_LOTE:
+                await _upsert(db, lote, corrida.id_fuente)
+                resumen["aplicadas"] += len(lote)
+                lote = {}
+        if lote:
+            await _upsert(db, lote, corrida.id_fuente)
+            resumen["aplicadas"] += len(lote)
+        resumen["matriculas_actualizadas"] = await _refrescar_agregados(db, tocadas, fuente)
+    except Exception as exc:
+        await corrida.fallar(exc)
+        raise
+    return await corrida.completar()
+
+
+async def main(args) -> None:
+    from .db import SessionLocal
+
+    async with SessionLocal() as db:
+        resumen = await ingerir(
+            db, bloques_archivo(args.archivo), args.formato or formato_de(args.archivo),
+            fuente=args.fuente, origen=os.path.basename(args.archivo),
+        )
+    print(f"[OK] Trabajo {resumen['id_trabajo']}: {resumen['aplicadas']:,} asistencias aplicadas, "
+          f"{resumen['matriculas_actualizadas']:,} matrículas recalculadas, "
+          f"{resumen['invalidas']:,} inválidas, {resumen['sin_matricula']:,} sin matrícula "
+          f"({resumen['segundos']} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingesta de asistencias del SGA (CSV / NDJSON)")
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=("csv", "ndjson"), help="por defecto, según la extensión")
+    parser.add_argument("--fuente", default="scraping_sga", help="nombre en fuentes_asistencia")
+    asyncio.run(main(parser.parse_args()))
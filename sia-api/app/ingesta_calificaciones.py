@@ -0,0 +1,187 @@
+# app/ingesta_calificaciones.py
+"""
+Carga de calificaciones de un periodo (CSV o NDJSON del SGA) y mantenimiento
+de resumen_calificaciones_periodo (migraciones/003).
+
+- Upsert multi-fila sobre uq_calif_matricula por lotes de INGESTA_LOTE. Una
+  celda vacía NO borra la nota ya cargada (el SGA exporta el parcial antes que
+  el final).
+- El resumen (promedio ponderado por créditos, aprobados >= NOTA_APROBATORIA,
+  desaprobados y pendientes sin nota final) lo mantienen los triggers de
+  migraciones/007 en cada upsert, igual que para cualquier otra escritura:
+  la carga no lo recalcula aparte. Lo leen /academico/{id}/calificaciones,
+  /mi/calificaciones, v_promedio_periodo y el puntaje por lotes.
+- Se invalidan las respuestas cacheadas de /mi de esos estudiantes.
+
+Columnas: codigo_alumno, curso (código), nota_parcial, nota_final. El periodo
+se indica para toda la carga (las filas de otro periodo se rechazan).
+
+CLI:
+    python -m app.ingesta_calificaciones notas_2025-1.csv --periodo 2025-1
+"""
+
+from __future__ import annotations
+import argparse, asyncio, os
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import mi_cache
+from .ingesta import (
+    INGESTA_LOTE, Corrida, ErrorIngesta, Resolutor, bloques_archivo, formato_de, leer_filas, texto,
+)
+from .queries import consulta
+
+NOTA_APROBATORIA = 11
+# Con más estudiantes tocados conviene vaciar la caché /mi completa que versionar uno por uno
+INVALIDAR_TODOS_DESDE = 5000
+
+SQL_UPSERT_CALIFICACION = consulta("ingesta.upsert_calificacion", """
+    INSERT INTO calificaciones (id_matricula, nota_parcial, nota_final)
+    VALUES (:mat, :parcial, :final)
+    ON DUPLICATE KEY UPDATE
+      nota_parcial = COALESCE(VALUES(nota_parcial), nota_parcial),
+      nota_final   = COALESCE(VALUES(nota_final), nota_final)
+""")
+
+def resumen_periodo(notas: Iterable[Tuple[Optional[float], int]]) -> dict:
+    """
+    Misma agregación que sp_refrescar_resumen_calificaciones (migraciones/007) a
+    partir de (nota_final, creditos) por matrícula; la usan los generadores de
+    datos sintéticos y los lectores cuando falta la fila.
+    """
+    fila = {"cursos": 0, "aprobados": 0, "desaprobados": 0, "pendientes": 0,
+            "creditos_calificados": 0, "suma_ponderada": 0.0, "promedio": None}
+    for nota, creditos in notas:
+        fila["cursos"] += 1
+        if nota is None:
+            fila["pendientes"] += 1
+            continue
+        fila["aprobados" if nota >= NOTA_APROBATORIA else "desaprobados"] += 1
+        fila["creditos_calificados"] += creditos
+        fila["suma_ponderada"] += float(nota) * creditos
+    fila["suma_ponderada"] = round(fila["suma_ponderada"], 2)
+    if fila["creditos_calificados"]:
+        fila["promedio"] = round(fila["suma_ponderada"] / fila["creditos_calificados"], 2)
+    return fila
+
+
+def _nota(valor: str) -> Optional[Decimal]:
+    if not valor:
+        return None
+    try:
+        nota = Decimal(valor.replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"nota inválida: {valor!r}")
+    if not (0 <= nota <= 20):
+        raise ValueError(f"nota fuera de rango: {valor!r}")
+    return nota
+
+
+async def _upsert(db: AsyncSession, lote: Dict[int, Tuple[Optional[Decimal], Optional[Decimal]]]) -> None:
+    # executemany: aiomysql lo reescribe como un INSERT multi-fila
+    await db.execute(SQL_UPSERT_CALIFICACION, [
+        {"mat": mat, "parcial": parcial, "final": final} for mat, (parcial, final) in lote.items()
+    ])
+    await db.commit()
+
+
+def _invalidar_cache(estudiantes: Set[int]) -> None:
+    if len(estudiantes) >= INVALIDAR_TODOS_DESDE:
+        mi_cache.invalidar_todos()
+        return
+    for id_estudiante in estudiantes:
+        mi_cache.invalidar_estudiante(id_estudiante)
+
+
+async def ingerir(
+    db: AsyncSession,
+    bloques: AsyncIterator[bytes],
+    periodo: str,
+    formato: str = "csv",
+    fuente: str = "scraping_sga",
+    origen: Optional[str] = None,
+) -> dict:
+    """`periodo`: nombre (2025-1) o id. Devuelve el resumen (también en trabajos_sincronizacion)."""
+    resolutor = Resolutor(db)
+    id_periodo = await resolutor.periodo({"id_periodo": periodo} if periodo.isdigit() else {"periodo": periodo})
+    if id_periodo is None:
+        raise ErrorIngesta(f"Periodo desconocido: {periodo}")
+
+    corrida = Corrida(db, "calificaciones", fuente, formato, origen,
+                      id_periodo=id_periodo, aplicadas=0, estudiantes_actualizados=0)
+    await corrida.abrir()
+    resumen = corrida.resumen
+    lote: Dict[int, Tuple[Optional[Decimal], Optional[Decimal]]] = {}
+    tocados: Set[int] = set()
+    try:
+        async for fila in leer_filas(bloques, formato):
+            resumen["leidas"] += 1
+            linea = resumen["leidas"]
+            if "_error" in fila:
+                corrida.omitir(fila["_error"], linea, "invalidas")
+                continue
+            codigo, curso = texto(fila, "codigo_alumno", "codigo"), texto(fila, "curso", "codigo_curso")
+            try:
+                if not codigo or not curso:
+                    raise ValueError("faltan codigo_alumno o curso")
+                parcial = _nota(texto(fila, "nota_parcial", "parcial"))
+                final = _nota(texto(fila, "nota_final", "final", "nota"))
+                if parcial is None and final is None:
+                    raise ValueError("sin notas")
+                if (texto(fila, "periodo") or texto(fila, "id_periodo")) and await resolutor.periodo(fila) != id_periodo:
+                    raise ValueError("fila de otro periodo")
+            except ValueError as exc:
+                corrida.omitir(str(exc), linea, "invalidas")
+                continue
+            matricula = await resolutor.matricula(id_periodo, codigo, curso)
+            if matricula is None:
+                corrida.omitir(f"sin matrícula: {codigo}/{curso}", linea, "sin_matricula")
+                continue
+
+            id_matricula, id_estudiante = matricula
+            previo = lote.get(id_matricula)
+            if previo is not None:     # misma matrícula repetida en el lote: se combinan las celdas
+                parcial = parcial if parcial is not None else previo[0]
+                final = final if final is not None else previo[1]
+            lote[id_matricula] = (parcial, final)
+            tocados.add(id_estudiante)
+            if len(lote) >= INGESTA_LOTE:
+                await _upsert(db, lote)
+                resumen["aplicadas"] += len(lote)
+                lote = {}
+        if lote:
+            await _upsert(db, lote)
+            resumen["aplicadas"] += len(lote)
+        resumen["estudiantes_actualizados"] = len(tocados)     # resumen ya al día por los triggers
+    except Exception as exc:
+        await corrida.fallar(exc)
+        raise
+    finally:
+        # Lo ya confirmado no debe quedar oculto tras respuestas viejas
+        _invalidar_cache(tocados)
+    return await corrida.completar()
+
+
+async def main(args) -> None:
+    from .db import SessionLocal
+
+    async with SessionLocal() as db:
+        resumen = await ingerir(
+            db, bloques_archivo(args.archivo), args.periodo, args.formato or formato_de(args.archivo),
+            fuente=args.fuente, origen=os.path.basename(args.archivo),
+        )
+    print(f"[OK] Trabajo {resumen['id_trabajo']}: {resumen['aplicadas']:,} calificaciones aplicadas, "
+          f"{resumen['estudiantes_actualizados']:,} estudiantes actualizados, "
+          f"{resumen['invalidas']:,} inválidas, {resumen['sin_matricula']:,} sin matrícula "
+          f"({resumen['segundos']} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga de calificaciones de un periodo (CSV / NDJSON)")
+    parser.add_argument("archivo")
+    parser.add_argument("--periodo", required=True, help="nombre (2025-1) o id_periodo")
+    parser.add_argument("--formato", choices=("csv", "ndjson"), help="por defecto, según la extensión")
+    parser.add_argument("--fuente", default="scraping_sga", help="nombre en fuentes_asistencia")
+    asyncio.run(main(parser.parse_args()))
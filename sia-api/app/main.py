@@ -1,8 +1,17 @@
 # app/main.py
-from fastapi import FastAPI
-from .routes import auth, usuarios, estudiantes, riesgo, alertas, fse, dev, academico, catalogos, tutorias, mi, modelo
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from .routes import auth, usuarios, estudiantes, riesgo, alertas, fse, dev, academico, catalogos, tutorias, mi, modelo, admin, ingesta
 import os
 from fastapi.middleware.cors import CORSMiddleware
+from .security import warmup_password_pool, shutdown_password_pool
+from . import audit_middleware, compresion, metrics, modelo_registro, prediccion_cache, refresh_store
+from .db import engine, read_engine
+from .respuestas import RespuestaJSON
+from .pool_metrics import snapshot
 
 DEV_MODE = os.getenv("DEV_MODE", "false").lower() == "true"
 
@@ -44,12 +53,52 @@ def _cors_config() -> dict:
     return config
 
 
-app = FastAPI(title="SIA-UNASAM API (FastAPI)", version="1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arranque: procesos PBKDF2 listos antes del primer login
+    await warmup_password_pool()
+    tareas: list[asyncio.Task] = []
+    if refresh_store.REFRESH_SWEEP_INTERVAL_S > 0:
+        tareas.append(asyncio.create_task(refresh_store.sweeper_loop()))
+    if audit_middleware.AUDIT_ENABLED:
+        tareas.append(asyncio.create_task(audit_middleware.flusher_loop()))
+    if modelo_registro.MODELO_PRECARGA == "fondo":
+        tareas.append(asyncio.create_task(modelo_registro.precargar()))
+    yield
+    # Apagado
+    for tarea in tareas:
+        tarea.cancel()
+        with suppress(asyncio.CancelledError):
+            await tarea
+    await audit_middleware.flush_pendientes()
+    shutdown_password_pool()
+
+
+# orjson para todo lo que pasa por response_model; los listados grandes usan respuestas.respuesta()
+app = FastAPI(
+    title="SIA-UNASAM API (FastAPI)", version="1.0", lifespan=lifespan, default_response_class=RespuestaJSON,
+)
 
 app.add_middleware(
     CORSMiddleware,
     **_cors_config(),
 )
+app.add_middleware(audit_middleware.AuditMiddleware)
+# Brotli / GZip sobre el cuerpo final; dentro de métricas para que su CPU cuente en la latencia
+app.add_middleware(compresion.CompresionMiddleware)
+# Último en agregarse = más externo: mide también el tiempo de CORS
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    if metrics.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {metrics.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="No autorizado")
+    pools = {"primario": snapshot(engine)}
+    if read_engine is not None:
+        pools["replica"] = snapshot(read_engine)
+    extra = metrics.pool_lines(pools) + prediccion_cache.metric_lines()
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
 
 
 app.include_router(auth.router, prefix="/api")
@@ -63,6 +112,8 @@ app.include_router(catalogos.router, prefix="/api")
 app.include_router(tutorias.router, prefix="/api")
 app.include_router(mi.router, prefix="/api")
 app.include_router(modelo.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+app.include_router(ingesta.router, prefix="/api")
 
 
 if DEV_MODE:
@@ -0,0 +1,223 @@
+# app/metrics.py
+"""
+Métricas HTTP por endpoint (middleware ASGI puro) con exportación Prometheus.
+
+- Histograma de latencia por (método, plantilla de ruta, status) y peticiones en curso.
+  Se usa la plantilla (/api/estudiantes/{id_estudiante}), no la URL real, para
+  acotar la cardinalidad; lo que no coincide con ninguna ruta va a "sin_ruta".
+- Consultas y tiempo de BD por request: un contextvar abierto por el middleware
+  acumula lo que reportan los eventos before/after_cursor_execute del engine.
+- Requests por encima de SLOW_REQUEST_MS se cuentan y se registran en consola.
+"""
+
+from __future__ import annotations
+import os, time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+# ==========================
+# CONFIG
+# ==========================
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))   # 0 = sin registro de lentos
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None              # si existe, /metrics exige Bearer
+
+# Límites superiores (s) de los buckets del histograma de latencia
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SIN_RUTA = "sin_ruta"
+
+
+class _Histograma:
+    __slots__ = ("buckets", "suma", "cuenta")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS_S) + 1)   # último = +Inf
+        self.suma = 0.0
+        self.cuenta = 0
+
+    def observar(self, segundos: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS_S, segundos)] += 1
+        self.suma += segundos
+        self.cuenta += 1
+
+
+class _Acumulador:
+    """Consultas y tiempo de BD del request en curso."""
+    __slots__ = ("consultas", "db_s")
+
+    def __init__(self) -> None:
+        self.consultas = 0
+        self.db_s = 0.0
+
+
+_request_actual: ContextVar[Optional[_Acumulador]] = ContextVar("sia_request_metricas", default=None)
+
+# (método, ruta, status) -> histograma
+_latencias: Dict[Tuple[str, str, int], _Histograma] = {}
+# (método, ruta) -> en curso / consultas BD / segundos BD / lentos
+_en_curso: Dict[Tuple[str, str], int] = {}
+_db_consultas: Dict[Tuple[str, str], int] = {}
+_db_segundos: Dict[Tuple[str, str], float] = {}
+_lentos: Dict[Tuple[str, str], int] = {}
+
+
+# ==========================
+# Eventos de SQLAlchemy
+# ==========================
+def install_db_request_metrics(engine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and _request_actual.get() is not None:
+            context._t0_request = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        acc = _request_actual.get()
+        t0 = getattr(context, "_t0_request", None)
+        if acc is not None and t0 is not None:
+            acc.consultas += 1
+            acc.db_s += time.perf_counter() - t0
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(ctx):
+        acc = _request_actual.get()
+        t0 = getattr(ctx.execution_context, "_t0_request", None)
+        if acc is not None and t0 is not None:
+            acc.consultas += 1
+            acc.db_s += time.perf_counter() - t0
+
+
+# ==========================
+# Middleware
+# ==========================
+def _plantilla(scope) -> str:
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    parcial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", SIN_RUTA)
+        if match == Match.PARTIAL and parcial is None:
+            parcial = getattr(route, "path", None)   # ruta existe pero con otro método (405)
+    return parcial or SIN_RUTA
+
+
+class MetricsMiddleware:
+    def __init__(self, app, slow_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        clave = (scope["method"], _plantilla(scope))
+        status_code = 500
+        acc = _Acumulador()
+        token = _request_actual.set(acc)
+        _en_curso[clave] = _en_curso.get(clave, 0) + 1
+        t0 = time.perf_counter()
+
+        async def _send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            dt = time.perf_counter() - t0
+            _request_actual.reset(token)
+            _en_curso[clave] -= 1
+            h = _latencias.get((*clave, status_code))
+            if h is None:
+                h = _latencias[(*clave, status_code)] = _Histograma()
+            h.observar(dt)
+            if acc.consultas:
+                _db_consultas[clave] = _db_consultas.get(clave, 0) + acc.consultas
+                _db_segundos[clave] = _db_segundos.get(clave, 0.0) + acc.db_s
+            if self.slow_ms and dt * 1000 >= self.slow_ms:
+                _lentos[clave] = _lentos.get(clave, 0) + 1
+                print(
+                    f"[WARN] Request lento: {scope['method']} {scope.get('path')} ({clave[1]}) -> {status_code} "
+                    f"{dt * 1000:.0f} ms; BD: {acc.consultas} consultas, {acc.db_s * 1000:.0f} ms"
+                )
+
+
+# ==========================
+# Exportación Prometheus
+# ==========================
+def _esc(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(metodo: str, ruta: str, **extra) -> str:
+    pares = [f'method="{_esc(metodo)}"', f'route="{_esc(ruta)}"']
+    pares += [f'{k}="{_esc(str(v))}"' for k, v in extra.items()]
+    return "{" + ",".join(pares) + "}"
+
+
+def render(extra: Optional[List[str]] = None) -> str:
+    """Texto en formato de exposición de Prometheus (0.0.4)."""
+    out: List[str] = []
+
+    out.append("# HELP sia_http_request_duration_seconds Latencia de requests HTTP por ruta y status")
+    out.append("# TYPE sia_http_request_duration_seconds histogram")
+    for (metodo, ruta, status), h in sorted(_latencias.items()):
+        acumulado = 0
+        for le, n in zip(LATENCY_BUCKETS_S, h.buckets):
+            acumulado += n
+            out.append(f"sia_http_request_duration_seconds_bucket{_labels(metodo, ruta, status=status, le=le)} {acumulado}")
+        out.append(f"sia_http_request_duration_seconds_bucket{_labels(metodo, ruta, status=status, le='+Inf')} {h.cuenta}")
+        out.append(f"sia_http_request_duration_seconds_sum{_labels(metodo, ruta, status=status)} {h.suma:.6f}")
+        out.append(f"sia_http_request_duration_seconds_count{_labels(metodo, ruta, status=status)} {h.cuenta}")
+
+    out.append("# HELP sia_http_requests_in_flight Requests en curso por ruta")
+    out.append("# TYPE sia_http_requests_in_flight gauge")
+    for (metodo, ruta), n in sorted(_en_curso.items()):
+        out.append(f"sia_http_requests_in_flight{_labels(metodo, ruta)} {n}")
+
+    out.append("# HELP sia_http_db_queries_total Consultas SQL ejecutadas dentro de requests, por ruta")
+    out.append("# TYPE sia_http_db_queries_total counter")
+    for (metodo, ruta), n in sorted(_db_consultas.items()):
+        out.append(f"sia_http_db_queries_total{_labels(metodo, ruta)} {n}")
+
+    out.append("# HELP sia_http_db_seconds_total Tiempo acumulado en BD dentro de requests, por ruta")
+    out.append("# TYPE sia_http_db_seconds_total counter")
+    for (metodo, ruta), s in sorted(_db_segundos.items()):
+        out.append(f"sia_http_db_seconds_total{_labels(metodo, ruta)} {s:.6f}")
+
+    out.append(f"# HELP sia_http_slow_requests_total Requests por encima de {SLOW_REQUEST_MS:.0f} ms")
+    out.append("# TYPE sia_http_slow_requests_total counter")
+    for (metodo, ruta), n in sorted(_lentos.items()):
+        out.append(f"sia_http_slow_requests_total{_labels(metodo, ruta)} {n}")
+
+    if extra:
+        out.extend(extra)
+    return "\n".join(out) + "\n"
+
+
+def pool_lines(snapshots: Dict[str, dict]) -> List[str]:
+    """Métricas de los pools de conexiones ({nombre: pool_metrics.snapshot(engine)})."""
+    lineas: List[str] = []
+    for clave, metrica, tipo in (
+        ("checked_out", "sia_db_pool_checked_out", "gauge"),
+        ("overflow", "sia_db_pool_overflow", "gauge"),
+        ("checkouts", "sia_db_pool_checkouts_total", "counter"),
+        ("esperas", "sia_db_pool_waits_total", "counter"),
+        ("timeouts", "sia_db_pool_timeouts_total", "counter"),
+    ):
+        lineas.append(f"# TYPE {metrica} {tipo}")
+        for nombre, snap in snapshots.items():
+            if snap.get(clave) is not None:
+                lineas.append(f'{metrica}{{pool="{_esc(nombre)}"}} {snap[clave]}')
+    return lineas
@@ -0,0 +1,99 @@
+# app/mi_cache.py
+"""
+Cachés de los endpoints /mi (vista del estudiante).
+
+- usuario -> estudiante: se guarda por lo que le queda de vida al access token,
+  así el join usuarios/personas/estudiantes se hace una vez por sesión.
+- respuestas por estudiante: /mi/resumen y /mi/calificaciones ya armados.
+  La invalidación sube la versión del estudiante (o la generación global), así
+  las entradas viejas quedan inalcanzables sin recorrer la caché; el LRU/TTL
+  las termina de sacar. respuesta() devuelve la clave con la que buscó y se
+  guarda con esa misma: lo armado con datos leídos antes de una invalidación
+  queda bajo la versión vieja y nadie lo vuelve a leer.
+
+Invalidar cuando cambian calificaciones o puntajes_riesgo del estudiante
+(invalidar_estudiante) o en cambios masivos, p. ej. recálculo de un periodo
+(invalidar_todos). Como toda caché en memoria, es por proceso.
+"""
+
+from __future__ import annotations
+import os, time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .cache import TTLCache
+
+# ==========================
+# CONFIG
+# ==========================
+MI_CACHE_TTL_S = float(os.getenv("MI_CACHE_TTL_S", "300"))          # tope ante cambios hechos fuera de la API
+MI_CACHE_MAX = int(os.getenv("MI_CACHE_MAX", "20000"))
+MI_IDENTIDAD_TTL_MAX_S = float(os.getenv("MI_IDENTIDAD_TTL_MAX_S", "43200"))
+
+_estudiante_por_usuario = TTLCache(maxsize=MI_CACHE_MAX, ttl=MI_IDENTIDAD_TTL_MAX_S)
+_respuestas = TTLCache(maxsize=MI_CACHE_MAX, ttl=MI_CACHE_TTL_S)
+# estudiante -> versión; pasado 2 x MI_CACHE_TTL_S ya venció toda respuesta guardada con
+# una versión anterior (incluso la de un request que empezó antes de invalidar)
+_versiones = TTLCache(maxsize=MI_CACHE_MAX, ttl=2 * MI_CACHE_TTL_S)
+_ultima_version = 0         # nunca se reutiliza una versión, aunque la entrada venza
+_generacion = 0
+
+
+# ==========================
+# usuario -> estudiante
+# ==========================
+def estudiante_de_usuario(uid: int) -> Optional[Dict[str, Any]]:
+    return _estudiante_por_usuario.get(uid)
+
+
+def guardar_estudiante(uid: int, estudiante: Dict[str, Any], exp: Optional[int]) -> None:
+    """`exp` es el epoch de expiración del access token (la entrada no lo sobrevive)."""
+    ttl = MI_IDENTIDAD_TTL_MAX_S if exp is None else min(MI_IDENTIDAD_TTL_MAX_S, exp - time.time())
+    _estudiante_por_usuario.set(uid, estudiante, ttl=ttl)
+
+
+def invalidar_usuario(uid: int) -> None:
+    _estudiante_por_usuario.pop(uid)
+
+
+def invalidar_identidades() -> None:
+    """Cuando cambia el enlace persona/estudiante de forma no atribuible a un usuario."""
+    _estudiante_por_usuario.clear()
+
+
+# ==========================
+# Respuestas por estudiante
+# ==========================
+def respuesta(id_estudiante: int, *partes: Hashable) -> Tuple[Hashable, Optional[Dict[str, Any]]]:
+    """(clave, data): la clave se toma al empezar el request y se pasa a guardar_respuesta."""
+    clave = (_generacion, id_estudiante, _versiones.get(id_estudiante, 0), *partes)
+    return clave, _respuestas.get(clave)
+
+
+def guardar_respuesta(clave: Hashable, data: Dict[str, Any]) -> None:
+    _respuestas.set(clave, data)
+
+
+def invalidar_estudiante(id_estudiante: int) -> None:
+    global _ultima_version
+    if id_estudiante not in _versiones and len(_versiones) >= MI_CACHE_MAX:
+        _versiones.purge_expired()
+        if len(_versiones) >= MI_CACHE_MAX:
+            # Sacar por LRU una versión viva devolvería respuestas viejas: se invalida todo
+            invalidar_todos()
+    _ultima_version += 1
+    _versiones.set(id_estudiante, _ultima_version)
+
+
+def invalidar_todos() -> None:
+    global _generacion
+    _generacion += 1
+    _versiones.clear()
+
+
+def stats() -> dict:
+    return {
+        "identidades": _estudiante_por_usuario.stats(),
+        "respuestas": _respuestas.stats(),
+        "versiones": len(_versiones),
+        "generacion": _generacion,
+    }
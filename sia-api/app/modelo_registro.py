@@ -0,0 +1,349 @@
+# app/modelo_registro.py
+"""
+Registro de versiones del modelo de deserción.
+
+Estructura de MODELOS_DIR (por defecto app/modelos):
+    ACTIVO              versión activa (una línea)
+    v1/modelo.pkl       artefacto
+    v1/meta.json        features (en orden), umbrales, métricas, origen, formato
+    v2/modelo.ubj       formato "xgboost": booster nativo (JSON/UBJ)
+
+- El modelo se carga la primera vez que se usa, o en segundo plano al arrancar
+  (MODELO_PRECARGA=fondo), siempre en un hilo: el worker arranca sin esperarlo.
+- activar(version) carga la versión nueva aparte y recién entonces cambia la
+  referencia: cada request usa el ModeloCargado que obtuvo al empezar, así los
+  que están en curso terminan con la versión anterior.
+- ACTIVO se reescribe de forma atómica (os.replace); los demás workers lo
+  revisan cada MODELO_VERIFICAR_S y cambian solos: la versión nueva se carga en
+  una tarea aparte mientras los requests siguen con la anterior. Solo se espera
+  la carga cuando todavía no hay ningún modelo.
+- Formatos: "joblib" (XGBClassifier de sklearn en pickle) o "xgboost" (booster
+  nativo, se puntúa con inplace_predict sin pasar por sklearn ni DMatrix: carga
+  más rápida y menos costo por llamada). Ambos exponen `probabilidades(X)` y,
+  si el modelo es XGBoost, `contribuciones(X)` (app/explicacion.py).
+  De un pickle registrado se obtiene la versión nativa con:
+      python -m app.modelo_registro exportar-nativo v1
+"""
+
+from __future__ import annotations
+import argparse, asyncio, json, os, re, shutil, tempfile, time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from . import features
+
+# ==========================
+# CONFIG
+# ==========================
+MODELOS_DIR = Path(os.getenv("MODELOS_DIR") or Path(__file__).resolve().parent / "modelos")
+MODELO_PRECARGA = os.getenv("MODELO_PRECARGA", "fondo").lower()        # fondo | perezosa
+MODELO_VERIFICAR_S = float(os.getenv("MODELO_VERIFICAR_S", "10"))
+# Hilos de XGBoost por predicción: con filas sueltas, más hilos solo agregan sincronización
+MODELO_HILOS = int(os.getenv("MODELO_HILOS", "1"))
+
+UMBRAL_MEDIO = 0.4
+UMBRAL_ALTO = 0.7
+
+_ARCHIVO_ACTIVO = "ACTIVO"
+_VERSION_VALIDA = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+
+class ModeloNoDisponible(RuntimeError):
+    """No hay versión activa o no se pudo cargar."""
+
+
+@dataclass(frozen=True)
+class ModeloCargado:
+    version: str
+    modelo: Any
+    features: Tuple[str, ...]
+    umbral_medio: float
+    umbral_alto: float
+    meta: Dict[str, Any] = field(repr=False)
+    probabilidades: Callable[[np.ndarray], np.ndarray] = field(repr=False)
+    segundos_carga: float = 0.0
+    cargado_en: float = 0.0
+    # (n, F + 1) aportes en log-odds por feature (+ sesgo); None si el modelo no es XGBoost
+    contribuciones: Optional[Callable[[np.ndarray], np.ndarray]] = field(default=None, repr=False)
+
+    def nivel(self, prob: float) -> str:
+        if prob >= self.umbral_alto:
+            return "ALTO"
+        if prob >= self.umbral_medio:
+            return "MEDIO"
+        return "BAJO"
+
+
+_actual: Optional[ModeloCargado] = None
+_verificado_en = 0.0
+_lock = asyncio.Lock()
+_seguimiento: Optional[asyncio.Task] = None     # revisión de ACTIVO en segundo plano
+
+
+# ==========================
+# Artefactos en disco
+# ==========================
+def _orden(version: str):
+    # v2 < v10
+    return [int(p) if p.isdigit() else p for p in re.split(r"(\d+)", version)]
+
+
+def _directorio(version: str) -> Path:
+    if not _VERSION_VALIDA.match(version):
+        raise ValueError(f"Versión inválida: {version!r}")
+    return MODELOS_DIR / version
+
+
+def leer_meta(version: str) -> Dict[str, Any]:
+    ruta = _directorio(version) / "meta.json"
+    if not ruta.is_file():
+        raise ModeloNoDisponible(f"Versión desconocida: {version}")
+    return json.loads(ruta.read_text(encoding="utf-8"))
+
+
+def version_activa() -> Optional[str]:
+    try:
+        return (MODELOS_DIR / _ARCHIVO_ACTIVO).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def versiones() -> List[Dict[str, Any]]:
+    activa = version_activa()
+    data = []
+    for meta_path in sorted(MODELOS_DIR.glob("*/meta.json"), key=lambda p: _orden(p.parent.name)):
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        version = meta_path.parent.name
+        data.append({**meta, "version": version, "activa": version == activa})
+    return data
+
+
+def _escribir_atomico(ruta: Path, contenido: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=ruta.parent, prefix=f".{ruta.name}.")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(contenido)
+    os.replace(tmp, ruta)
+
+
+def registrar(artefacto: Path, meta: Dict[str, Any], version: Optional[str] = None) -> str:
+    """
+    Copia un artefacto nuevo al registro (sin activarlo) y devuelve su versión.
+    `meta` debe traer al menos `features`; por defecto la versión es la siguiente vN.
+    """
+    if not meta.get("features"):
+        raise ValueError("meta.features es obligatorio")
+    if version is None:
+        numeros = [int(v["version"][1:]) for v in versiones() if re.fullmatch(r"v\d+", v["version"])]
+        version = f"v{max(numeros, default=0) + 1}"
+    destino = _directorio(version)
+    if destino.exists():
+        raise ValueError(f"La versión {version} ya existe")
+
+    artefacto = Path(artefacto)
+    meta = {
+        "creado": date.today().isoformat(),
+        "formato": "joblib",
+        "umbrales": {"medio": UMBRAL_MEDIO, "alto": UMBRAL_ALTO},
+        "metricas": {},
+        **meta,
+        "version": version,
+        "archivo": artefacto.name,
+    }
+    # Se arma en un directorio temporal y se renombra: nunca queda una versión a medias
+    MODELOS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=MODELOS_DIR, prefix=f".{version}."))
+    try:
+        shutil.copy2(artefacto, tmp / artefacto.name)
+        (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.rename(tmp, destino)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return version
+
+
+def _rango(booster) -> Tuple[int, int]:
+    # Con early stopping, el wrapper de sklearn predice hasta best_iteration; se respeta igual
+    mejor = booster.attr("best_iteration")
+    return (0, int(mejor) + 1) if mejor is not None else (0, 0)
+
+
+def cargar_artefacto(ruta: Path, formato: str) -> Tuple[Any, Callable[[np.ndarray], np.ndarray]]:
+    """(modelo, probabilidades): `probabilidades(X)` devuelve P(deserta) por fila de X (2-D, float)."""
+    if formato == "xgboost":
+        import xgboost as xgb
+
+        booster = xgb.Booster(model_file=str(ruta))
+        booster.set_param({"nthread": MODELO_HILOS})
+        rango = _rango(booster)
+        return booster, lambda X: booster.inplace_predict(X, iteration_range=rango)
+    if formato == "joblib":
+        modelo = joblib.load(ruta)
+        return modelo, lambda X: modelo.predict_proba(X)[:, 1]
+    raise ValueError(f"Formato de modelo no soportado: {formato}")
+
+
+def cargar_contribuciones(modelo: Any) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    """
+    `contribuciones(X)` con pred_contribs de XGBoost (TreeSHAP exacto del booster,
+    en C++): una columna por feature más el sesgo, en log-odds; por fila suman el
+    margen, es decir logit(probabilidad). None para modelos que no son XGBoost.
+    """
+    booster = modelo.get_booster() if hasattr(modelo, "get_booster") else modelo
+    if type(booster).__name__ != "Booster":
+        return None
+    import xgboost as xgb
+
+    rango = _rango(booster)
+    # El booster entrenado con el DataFrame de X_train guarda los nombres y predict() los valida
+    # contra la DMatrix: X ya viene en el orden de meta.json (features.validar), se le ponen los mismos
+    nombres = booster.feature_names
+    return lambda X: booster.predict(xgb.DMatrix(X, feature_names=nombres), pred_contribs=True,
+                                     iteration_range=rango)
+
+
+def _cargar(version: str) -> ModeloCargado:
+    meta = leer_meta(version)
+    features.validar(meta["features"])       # otro orden daría probabilidades sin sentido
+    umbrales = meta.get("umbrales") or {}
+    t0 = time.perf_counter()
+    modelo, probabilidades = cargar_artefacto(
+        _directorio(version) / meta.get("archivo", "modelo.pkl"), meta.get("formato", "joblib"),
+    )
+    return ModeloCargado(
+        version=version,
+        modelo=modelo,
+        features=tuple(meta["features"]),
+        umbral_medio=float(umbrales.get("medio", UMBRAL_MEDIO)),
+        umbral_alto=float(umbrales.get("alto", UMBRAL_ALTO)),
+        meta=meta,
+        probabilidades=probabilidades,
+        segundos_carga=round(time.perf_counter() - t0, 3),
+        cargado_en=time.time(),
+        contribuciones=cargar_contribuciones(modelo),
+    )
+
+
+# ==========================
+# Modelo activo (por proceso)
+# ==========================
+async def obtener() -> ModeloCargado:
+    """Modelo activo; lo carga (o sigue un cambio de ACTIVO hecho por otro worker) si hace falta."""
+    global _seguimiento
+    actual = _actual
+    if actual is not None and time.monotonic() - _verificado_en < MODELO_VERIFICAR_S:
+        return actual
+    if actual is not None:
+        # Ya hay un modelo en uso: la revisión (y la carga de una versión nueva) corre aparte
+        # y los requests siguen con el actual hasta que se cambia la referencia
+        if _seguimiento is None or _seguimiento.done():
+            _seguimiento = asyncio.create_task(_seguir_activo())
+        return actual
+    async with _lock:           # sin modelo todavía: no hay con qué responder, se espera la carga
+        return await _sincronizar()
+
+
+async def _seguir_activo() -> None:
+    try:
+        async with _lock:
+            await _sincronizar()
+    except Exception as exc:
+        print(f"[WARN] No se pudo revisar la versión activa del modelo: {exc}")
+
+
+async def _sincronizar() -> ModeloCargado:
+    """Con _lock tomado: lleva _actual a la versión de ACTIVO."""
+    global _actual, _verificado_en
+    if _actual is not None and time.monotonic() - _verificado_en < MODELO_VERIFICAR_S:
+        return _actual
+    version = version_activa()
+    if _actual is not None and _actual.version == version:
+        _verificado_en = time.monotonic()
+        return _actual
+    if version is None:
+        if _actual is not None:
+            return _actual
+        raise ModeloNoDisponible("No hay una versión activa del modelo de deserción")
+    try:
+        cargado = await asyncio.to_thread(_cargar, version)
+    except Exception as exc:
+        if _actual is None:
+            raise ModeloNoDisponible(f"No se pudo cargar el modelo {version}: {exc}") from exc
+        # Se sigue sirviendo la versión anterior; se reintenta en el próximo intervalo
+        print(f"[WARN] No se pudo cargar el modelo {version} (se mantiene {_actual.version}): {exc}")
+    else:
+        _actual = cargado
+        print(f"[OK] Modelo de deserción {version} cargado ({_actual.segundos_carga} s)")
+    _verificado_en = time.monotonic()
+    return _actual
+
+
+async def activar(version: str) -> Tuple[Optional[str], ModeloCargado]:
+    """Carga `version`, la marca como activa y la pone en uso. Devuelve (anterior, nuevo)."""
+    global _actual, _verificado_en
+    async with _lock:
+        anterior = _actual.version if _actual is not None else version_activa()
+        nuevo = await asyncio.to_thread(_cargar, version)     # si falla, no cambia nada
+        _escribir_atomico(MODELOS_DIR / _ARCHIVO_ACTIVO, version + "\n")
+        _actual = nuevo
+        _verificado_en = time.monotonic()
+    print(f"[OK] Modelo de deserción activo: {version} (antes {anterior})")
+    return anterior, nuevo
+
+
+async def precargar() -> None:
+    """Tarea de arranque: deja el modelo listo antes del primer request."""
+    try:
+        await obtener()
+    except ModeloNoDisponible as exc:
+        print(f"[WARN] {exc}")
+
+
+def estado() -> Dict[str, Any]:
+    actual = _actual
+    return {
+        "activa": version_activa(),
+        "cargada": actual.version if actual is not None else None,
+        "segundos_carga": actual.segundos_carga if actual is not None else None,
+        "cargado_en": actual.cargado_en if actual is not None else None,
+    }
+
+
+# ==========================
+# Exportación a formato nativo
+# ==========================
+def exportar_nativo(version: str, extension: str = "ubj") -> str:
+    """Registra una versión nueva con el booster nativo de `version` (pickle de XGBClassifier)."""
+    meta = leer_meta(version)
+    if meta.get("formato", "joblib") != "joblib":
+        raise ValueError(f"La versión {version} ya no es un pickle ({meta.get('formato')})")
+    modelo = joblib.load(_directorio(version) / meta.get("archivo", "modelo.pkl"))
+    with tempfile.TemporaryDirectory() as tmp:
+        destino = Path(tmp) / f"modelo.{extension}"
+        modelo.get_booster().save_model(str(destino))
+        heredado = {k: v for k, v in meta.items() if k not in ("version", "archivo", "creado")}
+        return registrar(destino, {**heredado, "formato": "xgboost", "derivado_de": version})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registro de versiones del modelo de deserción")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("listar")
+    exp = sub.add_parser("exportar-nativo", help="pickle -> booster nativo (nueva versión, sin activar)")
+    exp.add_argument("version")
+    exp.add_argument("--extension", choices=("ubj", "json"), default="ubj")
+    args = parser.parse_args()
+
+    if args.comando == "listar":
+        for v in versiones():
+            print(f"{'*' if v['activa'] else ' '} {v['version']:<8} {v.get('formato', 'joblib'):<8} "
+                  f"{v.get('creado', '')}  {json.dumps(v.get('metricas') or {})}")
+    else:
+        nueva = exportar_nativo(args.version, args.extension)
+        print(f"[OK] Versión {nueva} registrada (formato xgboost, desde {args.version}); "
+              f"activar con POST /api/modelo/versiones/{nueva}/activar")
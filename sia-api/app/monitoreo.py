@@ -0,0 +1,177 @@
+# app/monitoreo.py
+"""
+Monitoreo del modelo de deserción por periodo (después del puntaje por lotes).
+
+- Lee predicciones_desercion del periodo por bloques (keyset) y acumula
+  histogramas de promedio, asistencia, cursos_desaprobados y probabilidad con
+  NumPy (app/drift.py); nunca tiene todo el periodo en memoria.
+- Compara contra el perfil de entrenamiento guardado en el meta.json de la
+  versión del modelo. Si esa versión no lo trae (p. ej. v1), contra el primer
+  periodo monitoreado con la misma versión.
+- Guarda perfil y drift (PSI / KS) en monitoreo_modelo (migraciones/005);
+  GET /api/modelo/monitoreo los expone.
+
+CLI (cron, después de app.prediccion_lotes):
+    python -m app.monitoreo --periodo 2025-1
+    python -m app.monitoreo                  # todos los periodos con predicciones
+"""
+
+from __future__ import annotations
+import argparse, asyncio, json, os, time
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import drift, modelo_registro
+from .modelo_registro import ModeloNoDisponible
+from .queries import consulta
+
+# ==========================
+# CONFIG
+# ==========================
+MONITOREO_LOTE = int(os.getenv("MONITOREO_LOTE", "20000"))
+
+COLUMNAS = ("promedio", "asistencia", "cursos_desaprobados", "probabilidad")
+
+SQL_PERIODOS = consulta("monitoreo.periodos", """
+    SELECT DISTINCT id_periodo FROM predicciones_desercion ORDER BY id_periodo
+""")
+
+SQL_VERSIONES = consulta("monitoreo.versiones", """
+    SELECT version_modelo, COUNT(*) AS n
+    FROM predicciones_desercion
+    WHERE id_periodo = :per
+    GROUP BY version_modelo
+    ORDER BY n DESC
+""")
+
+SQL_PREDICCIONES = consulta("monitoreo.predicciones", """
+    SELECT id_estudiante, promedio, asistencia, cursos_desaprobados, probabilidad
+    FROM predicciones_desercion
+    WHERE id_periodo = :per AND version_modelo = :version AND id_estudiante > :desde
+    ORDER BY id_estudiante
+    LIMIT :lote
+""")
+
+SQL_REFERENCIA_PERIODO = consulta("monitoreo.referencia_periodo", """
+    SELECT id_periodo, perfil_json
+    FROM monitoreo_modelo
+    WHERE version_modelo = :version AND id_periodo < :per
+    ORDER BY id_periodo
+    LIMIT 1
+""")
+
+SQL_UPSERT = consulta("monitoreo.upsert", """
+    INSERT INTO monitoreo_modelo
+      (id_periodo, version_modelo, estudiantes, referencia, psi_max, estado, perfil_json, drift_json)
+    VALUES (:per, :version, :n, :referencia, :psi_max, :estado, :perfil, :drift)
+    ON DUPLICATE KEY UPDATE
+      estudiantes = VALUES(estudiantes),
+      referencia  = VALUES(referencia),
+      psi_max     = VALUES(psi_max),
+      estado      = VALUES(estado),
+      perfil_json = VALUES(perfil_json),
+      drift_json  = VALUES(drift_json)
+""")
+
+
+async def _version(db: AsyncSession, id_periodo: int) -> Optional[str]:
+    """La versión activa si puntuó el periodo; si no, la que más filas tiene en él."""
+    versiones = [str(r[0]) for r in (await db.execute(SQL_VERSIONES, {"per": id_periodo})).all()]
+    activa = modelo_registro.version_activa()
+    if activa in versiones:
+        return activa
+    return versiones[0] if versiones else None
+
+
+async def _perfil_periodo(db: AsyncSession, id_periodo: int, version: str) -> dict:
+    acumulado = {c: np.zeros(len(drift.BORDES[c]) - 1, dtype=np.int64) for c in COLUMNAS}
+    desde, n = 0, 0
+    while True:
+        filas = (await db.execute(SQL_PREDICCIONES, {
+            "per": id_periodo, "version": version, "desde": desde, "lote": MONITOREO_LOTE,
+        })).all()
+        if not filas:
+            break
+        bloque = np.array([f[1:] for f in filas], dtype=np.float64)
+        for i, c in enumerate(COLUMNAS):
+            acumulado[c] += drift.conteos(c, bloque[:, i])
+        n += len(filas)
+        desde = int(filas[-1][0])
+    await db.commit()
+    return {"n": n, "conteos": {c: v.tolist() for c, v in acumulado.items()}}
+
+
+async def _referencia(db: AsyncSession, id_periodo: int, version: str) -> Tuple[Optional[str], Optional[dict]]:
+    try:
+        perfil = modelo_registro.leer_meta(version).get("perfil")
+    except (ValueError, ModeloNoDisponible):
+        perfil = None
+    if perfil:
+        return "entrenamiento", perfil
+    fila = (await db.execute(SQL_REFERENCIA_PERIODO, {"version": version, "per": id_periodo})).first()
+    if fila is None:
+        return None, None
+    perfil = fila[1] if isinstance(fila[1], dict) else json.loads(fila[1])
+    return f"periodo:{fila[0]}", perfil
+
+
+async def monitorear_periodo(db: AsyncSession, id_periodo: int) -> Optional[dict]:
+    """Calcula y guarda el monitoreo del periodo; None si el periodo no tiene predicciones."""
+    t0 = time.perf_counter()
+    version = await _version(db, id_periodo)
+    if version is None:
+        return None
+    actual = await _perfil_periodo(db, id_periodo, version)
+    referencia, perfil_ref = await _referencia(db, id_periodo, version)
+    comparacion = drift.comparar(perfil_ref, actual)
+    psi_max = max((d["psi"] for d in comparacion.values()), default=None)
+
+    resultado = {
+        "id_periodo": id_periodo,
+        "version_modelo": version,
+        "estudiantes": actual["n"],
+        "referencia": referencia,
+        "psi_max": psi_max,
+        "estado": drift.estado(psi_max) if psi_max is not None else None,
+        "drift": comparacion,
+    }
+    await db.execute(SQL_UPSERT, {
+        "per": id_periodo, "version": version, "n": actual["n"], "referencia": referencia,
+        "psi_max": psi_max, "estado": resultado["estado"],
+        "perfil": json.dumps(actual), "drift": json.dumps(comparacion) if comparacion else None,
+    })
+    await db.commit()
+    resultado["segundos"] = round(time.perf_counter() - t0, 2)
+    return resultado
+
+
+async def main(args) -> None:
+    from .db import SessionLocal
+    from .prediccion_lotes import SQL_PERIODO
+
+    async with SessionLocal() as db:
+        if args.periodo:
+            per = (await db.execute(SQL_PERIODO, {"nombre": args.periodo,
+                                                  "id": int(args.periodo) if args.periodo.isdigit() else -1})).scalar()
+            if per is None:
+                raise SystemExit(f"Periodo desconocido: {args.periodo}")
+            periodos = [int(per)]
+        else:
+            periodos = [int(r[0]) for r in (await db.execute(SQL_PERIODOS)).all()]
+        # En orden: un periodo ya monitoreado sirve de referencia a los siguientes
+        for per in periodos:
+            r = await monitorear_periodo(db, per)
+            if r is None:
+                print(f"[WARN] Periodo {per}: sin predicciones (correr antes app.prediccion_lotes)")
+                continue
+            detalle = ", ".join(f"{k} PSI {v['psi']}" for k, v in r["drift"].items()) or "sin referencia"
+            print(f"[OK] Periodo {per} ({r['version_modelo']}, {r['estudiantes']:,} estudiantes): "
+                  f"{r['estado'] or '-'} vs {r['referencia'] or '-'} — {detalle}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitoreo de drift del modelo de deserción")
+    parser.add_argument("--periodo", help="nombre (2025-1) o id_periodo; por defecto todos")
+    asyncio.run(main(parser.parse_args()))
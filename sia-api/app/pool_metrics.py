@@ -0,0 +1,144 @@
+# app/pool_metrics.py
+"""
+Métricas del pool de conexiones de SQLAlchemy.
+
+- MeteredPool: AsyncAdaptedQueuePool que mide la latencia de cada checkout
+  (incluye espera por saturación y el ping, si aplica) en un histograma.
+- install_idle_pre_ping: pre-ping solo para conexiones que estuvieron inactivas
+  más de N segundos (en lugar de un round trip en cada checkout).
+"""
+
+from __future__ import annotations
+import time
+from bisect import bisect_left
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Límites superiores (ms) de los buckets del histograma de checkout
+CHECKOUT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.esperas = 0            # checkouts que llegaron con el pool saturado
+        self.timeouts = 0
+        self.tiempo_total_s = 0.0
+        self.tiempo_espera_s = 0.0
+        self.max_checkout_s = 0.0
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)  # último = +Inf
+        self.conexiones_creadas = 0
+        self.invalidaciones = 0
+        self.pings = 0
+        self.pings_fallidos = 0
+
+    def observar(self, segundos: float, saturado: bool) -> None:
+        self.checkouts += 1
+        self.tiempo_total_s += segundos
+        self.max_checkout_s = max(self.max_checkout_s, segundos)
+        if saturado:
+            self.esperas += 1
+            self.tiempo_espera_s += segundos
+        self.buckets[bisect_left(CHECKOUT_BUCKETS_MS, segundos * 1000)] += 1
+
+    def histograma(self) -> list[dict]:
+        etiquetas = [str(b) for b in CHECKOUT_BUCKETS_MS] + ["+Inf"]
+        acumulado, salida = 0, []
+        for le, n in zip(etiquetas, self.buckets):
+            acumulado += n
+            salida.append({"le_ms": le, "count": acumulado})
+        return salida
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args: Any, **kw: Any) -> None:
+        super().__init__(*args, **kw)
+        self.metricas = PoolMetrics()
+
+    def connect(self):  # type: ignore[override]
+        saturado = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        t0 = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metricas.timeouts += 1
+            raise
+        finally:
+            self.metricas.observar(time.perf_counter() - t0, saturado)
+
+
+def install_pool_listeners(engine) -> None:
+    """Cuenta conexiones creadas e invalidadas (solo si el pool es MeteredPool)."""
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, MeteredPool):
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_conn, rec):
+        engine.sync_engine.pool.metricas.conexiones_creadas += 1
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def _on_invalidate(dbapi_conn, rec, exception):
+        engine.sync_engine.pool.metricas.invalidaciones += 1
+
+
+def install_idle_pre_ping(engine, idle_s: float) -> None:
+    """
+    Pre-ping solo si la conexión estuvo inactiva más de `idle_s` segundos.
+    Si el ping falla se lanza DisconnectionError y el pool reintenta con otra conexión.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_conn, rec):
+        rec.info["ultimo_uso"] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_conn, rec, proxy):
+        ultimo = rec.info.get("ultimo_uso")
+        if ultimo is None or time.monotonic() - ultimo < idle_s:
+            return
+        metricas = getattr(sync_engine.pool, "metricas", None)
+        if metricas:
+            metricas.pings += 1
+        try:
+            sync_engine.dialect.do_ping(dbapi_conn)
+        except Exception as ex:
+            if metricas:
+                metricas.pings_fallidos += 1
+            raise exc.DisconnectionError(f"pre-ping falló: {ex}") from ex
+
+
+def snapshot(engine) -> dict:
+    pool = engine.sync_engine.pool
+    data: dict = {
+        "clase": type(pool).__name__,
+        "estado": pool.status(),
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        data.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout_s": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    m: PoolMetrics | None = getattr(pool, "metricas", None)
+    if m is not None:
+        data.update({
+            "checkouts": m.checkouts,
+            "esperas": m.esperas,
+            "timeouts": m.timeouts,
+            "espera_total_ms": round(m.tiempo_espera_s * 1000, 3),
+            "checkout_promedio_ms": round(m.tiempo_total_s * 1000 / m.checkouts, 3) if m.checkouts else None,
+            "checkout_max_ms": round(m.max_checkout_s * 1000, 3),
+            "checkout_histograma": m.histograma(),
+            "conexiones_creadas": m.conexiones_creadas,
+            "invalidaciones": m.invalidaciones,
+            "pings": m.pings,
+            "pings_fallidos": m.pings_fallidos,
+        })
+    return data
@@ -0,0 +1,195 @@
+# app/prediccion_cache.py
+"""
+Caché de resultados de POST /modelo/modelo-desercion.
+
+Las features (promedio, asistencia, cursos_matriculados, cursos_desaprobados)
+solo cambian cuando cambian notas o asistencias, pero los tableros piden la
+misma predicción en cada refresco. Clave = versión del modelo + features
+cuantizadas (cuantizar(): promedio y asistencia a PREDICCION_CACHE_DECIMALES);
+el modelo se evalúa sobre esos mismos valores cuantizados, así un acierto
+devuelve exactamente lo que daría el modelo.
+
+- Nivel 1: TTLCache en memoria (por proceso).
+- Nivel 2 opcional: archivo SQLite local compartido por todos los workers de
+  uvicorn de la máquina (PREDICCION_CACHE_COMPARTIDA=/ruta/archivo.sqlite), en
+  modo WAL. Si está ocupado o falla, cuenta como fallo de caché: nunca bloquea
+  ni rompe la predicción.
+- Cambio de modelo: la versión es parte de la clave; además, al ver una
+  versión nueva se vacía el nivel 1 e invalidar() borra del nivel 2 las
+  versiones viejas.
+"""
+
+from __future__ import annotations
+import os, sqlite3, threading, time
+from typing import List, Optional, Tuple
+
+from .cache import TTLCache
+
+# ==========================
+# CONFIG
+# ==========================
+PREDICCION_CACHE_MAX = int(os.getenv("PREDICCION_CACHE_MAX", "50000"))
+PREDICCION_CACHE_TTL_S = float(os.getenv("PREDICCION_CACHE_TTL_S", "86400"))
+PREDICCION_CACHE_DECIMALES = int(os.getenv("PREDICCION_CACHE_DECIMALES", "2"))
+PREDICCION_CACHE_COMPARTIDA = os.getenv("PREDICCION_CACHE_COMPARTIDA", "").strip()
+
+Entrada = Tuple[float, float, int, int]
+
+
+def cuantizar(promedio: float, asistencia: float, cursos_matriculados: int, cursos_desaprobados: int) -> Entrada:
+    return (
+        round(float(promedio), PREDICCION_CACHE_DECIMALES),
+        round(float(asistencia), PREDICCION_CACHE_DECIMALES),
+        int(cursos_matriculados),
+        int(cursos_desaprobados),
+    )
+
+
+# ==========================
+# Nivel 2: SQLite compartido
+# ==========================
+class _Compartida:
+    _PURGA_CADA = 1000          # escrituras entre purgas de vencidas
+
+    def __init__(self, ruta: str, ttl: float):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errores = 0
+        self._escrituras = 0
+        self._lock = threading.Lock()
+        # timeout corto: con otro worker escribiendo, mejor un fallo de caché que esperar
+        self._con = sqlite3.connect(ruta, timeout=0.05, isolation_level=None, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=OFF")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS predicciones (
+              version TEXT NOT NULL, clave TEXT NOT NULL, probabilidad REAL NOT NULL, expira REAL NOT NULL,
+              PRIMARY KEY (version, clave)
+            ) WITHOUT ROWID
+        """)
+
+    def get(self, version: str, clave: str) -> Optional[float]:
+        try:
+            with self._lock:
+                fila = self._con.execute(
+                    "SELECT probabilidad FROM predicciones WHERE version=? AND clave=? AND expira>?",
+                    (version, clave, time.time()),
+                ).fetchone()
+        except sqlite3.Error:
+            self.errores += 1
+            return None
+        if fila is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return float(fila[0])
+
+    def set(self, version: str, clave: str, probabilidad: float) -> None:
+        try:
+            with self._lock:
+                self._con.execute(
+                    "INSERT OR REPLACE INTO predicciones VALUES (?, ?, ?, ?)",
+                    (version, clave, probabilidad, time.time() + self.ttl),
+                )
+                self._escrituras += 1
+                if self._escrituras % self._PURGA_CADA == 0:
+                    self._con.execute("DELETE FROM predicciones WHERE expira<=?", (time.time(),))
+        except sqlite3.Error:
+            self.errores += 1
+
+    def invalidar(self, version_vigente: Optional[str]) -> None:
+        try:
+            with self._lock:
+                if version_vigente is None:
+                    self._con.execute("DELETE FROM predicciones")
+                else:
+                    self._con.execute("DELETE FROM predicciones WHERE version<>?", (version_vigente,))
+        except sqlite3.Error:
+            self.errores += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        try:
+            with self._lock:
+                entradas = self._con.execute("SELECT COUNT(*) FROM predicciones").fetchone()[0]
+        except sqlite3.Error:
+            entradas = None
+        return {
+            "ruta": self.ruta,
+            "entradas": entradas,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errores": self.errores,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+_memoria = TTLCache(maxsize=PREDICCION_CACHE_MAX, ttl=PREDICCION_CACHE_TTL_S)
+_compartida: Optional[_Compartida] = None
+if PREDICCION_CACHE_COMPARTIDA:
+    try:
+        _compartida = _Compartida(PREDICCION_CACHE_COMPARTIDA, PREDICCION_CACHE_TTL_S)
+    except sqlite3.Error as exc:
+        print(f"[WARN] Caché de predicciones compartida deshabilitada ({PREDICCION_CACHE_COMPARTIDA}): {exc}")
+_version_vista: Optional[str] = None
+
+
+def _texto(entrada: Entrada) -> str:
+    return "|".join(map(str, entrada))
+
+
+def _ver_version(version: str) -> None:
+    # Este worker pasó a otra versión (activada aquí o por otro worker): lo viejo ya no sirve
+    global _version_vista
+    if version != _version_vista:
+        if _version_vista is not None:
+            _memoria.clear()
+        _version_vista = version
+
+
+# ==========================
+# API
+# ==========================
+def obtener(version: str, entrada: Entrada) -> Optional[float]:
+    _ver_version(version)
+    prob = _memoria.get((version, entrada))
+    if prob is None and _compartida is not None:
+        prob = _compartida.get(version, _texto(entrada))
+        if prob is not None:
+            _memoria.set((version, entrada), prob)
+    return prob
+
+
+def guardar(version: str, entrada: Entrada, probabilidad: float) -> None:
+    _memoria.set((version, entrada), probabilidad)
+    if _compartida is not None:
+        _compartida.set(version, _texto(entrada), probabilidad)
+
+
+def invalidar(version_vigente: Optional[str] = None) -> None:
+    """Tras un cambio de modelo: deja solo las entradas de `version_vigente` (None = todo)."""
+    _memoria.clear()
+    if _compartida is not None:
+        _compartida.invalidar(version_vigente)
+
+
+def stats() -> dict:
+    return {
+        "version": _version_vista,
+        "memoria": _memoria.stats(),
+        "compartida": _compartida.stats() if _compartida is not None else None,
+    }
+
+
+def metric_lines() -> List[str]:
+    """Aciertos / fallos por nivel en formato Prometheus (para GET /metrics)."""
+    lineas = ["# TYPE sia_prediccion_cache_total counter"]
+    niveles = [("memoria", _memoria.hits, _memoria.misses)]
+    if _compartida is not None:
+        niveles.append(("compartida", _compartida.hits, _compartida.misses))
+    for nivel, hits, misses in niveles:
+        lineas.append(f'sia_prediccion_cache_total{{nivel="{nivel}",resultado="hit"}} {hits}')
+        lineas.append(f'sia_prediccion_cache_total{{nivel="{nivel}",resultado="miss"}} {misses}')
+    return lineas
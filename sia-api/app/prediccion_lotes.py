@@ -0,0 +1,145 @@
+# app/prediccion_lotes.py
+"""
+Puntaje por lotes del modelo de deserción (cron nocturno).
+
+- Recorre los estudiantes matriculados del periodo por bloques de
+  PREDICCION_LOTE (keyset sobre id_estudiante), leyendo las features ya
+  agregadas: resumen_calificaciones_periodo (promedio, cursos, desaprobados) y
+  v_asistencia_periodo (contadores de asistencia).
+- Cada bloque se puntúa con una sola llamada vectorizada al modelo activo del
+  registro y se escribe con un upsert multi-fila en predicciones_desercion
+  (migraciones/004); cada bloque es su propia transacción.
+- Con un modelo XGBoost también se guardan los factores de cada estudiante
+  (app/explicacion.py, una llamada a pred_contribs por bloque) en factores_json.
+- resumen_calificaciones_periodo lo mantienen al día los triggers de
+  migraciones/007 (una fila por matriculado, aun sin notas): se lee tal cual.
+
+CLI:
+    python -m app.prediccion_lotes --periodo 2025-1
+"""
+
+from __future__ import annotations
+import argparse, asyncio, json, os, time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import explicacion, features, modelo_registro
+from .modelo_registro import ModeloCargado
+from .queries import consulta
+
+# ==========================
+# CONFIG
+# ==========================
+PREDICCION_LOTE = int(os.getenv("PREDICCION_LOTE", "5000"))        # estudiantes por bloque
+
+SQL_PERIODO = consulta("prediccion.periodo", """
+    SELECT id_periodo FROM periodos_academicos WHERE nombre = :nombre OR id_periodo = :id LIMIT 1
+""")
+
+SQL_NIVELES = consulta("prediccion.niveles", """
+    SELECT LOWER(nombre), id_nivel_riesgo FROM niveles_riesgo
+""")
+
+# Mismos valores por defecto que el dataset de entrenamiento (COALESCE a 0)
+SQL_FEATURES = consulta("prediccion.features", """
+    SELECT r.id_estudiante,
+           COALESCE(r.promedio, 0)         AS promedio,
+           COALESCE(va.asistencia_pct, 0)  AS asistencia,
+           r.cursos                        AS cursos_matriculados,
+           r.desaprobados                  AS cursos_desaprobados
+    FROM resumen_calificaciones_periodo r
+    LEFT JOIN v_asistencia_periodo va
+           ON va.id_estudiante = r.id_estudiante AND va.id_periodo = r.id_periodo
+    WHERE r.id_periodo = :per AND r.id_estudiante > :desde
+    ORDER BY r.id_estudiante
+    LIMIT :lote
+""")
+
+SQL_UPSERT_PREDICCION = consulta("prediccion.upsert", """
+    INSERT INTO predicciones_desercion
+      (id_estudiante, id_periodo, version_modelo, probabilidad, prediccion, id_nivel_riesgo,
+       promedio, asistencia, cursos_matriculados, cursos_desaprobados, factores_json)
+    VALUES (:est, :per, :version, :prob, :pred, :nivel, :promedio, :asistencia, :matric, :desaprob, :factores)
+    ON DUPLICATE KEY UPDATE
+      version_modelo      = VALUES(version_modelo),
+      probabilidad        = VALUES(probabilidad),
+      prediccion          = VALUES(prediccion),
+      id_nivel_riesgo     = VALUES(id_nivel_riesgo),
+      promedio            = VALUES(promedio),
+      asistencia          = VALUES(asistencia),
+      cursos_matriculados = VALUES(cursos_matriculados),
+      cursos_desaprobados = VALUES(cursos_desaprobados),
+      factores_json       = VALUES(factores_json)
+""")
+
+
+# ==========================
+# Puntaje (vectorizado)
+# ==========================
+def _puntuar(modelo: ModeloCargado, filas: List[tuple], id_periodo: int, niveles: Dict[str, int]) -> List[dict]:
+    ids = np.array([f[0] for f in filas], dtype=np.int64)
+    cols = np.array([f[1:] for f in filas], dtype=float)
+    promedio, asistencia, matric, desaprob = cols.T
+    X = features.matriz(promedio, asistencia, matric, desaprob)
+    prob = np.asarray(modelo.probabilidades(X), dtype=float)
+    factores = explicacion.explicar(modelo, X) or [None] * len(filas)
+    nivel = np.where(prob >= modelo.umbral_alto, niveles["alto"],
+                     np.where(prob >= modelo.umbral_medio, niveles["medio"], niveles["bajo"]))
+    pred = (prob >= modelo.umbral_alto).astype(int)
+    return [
+        {"est": int(ids[i]), "per": id_periodo, "version": modelo.version,
+         "prob": round(float(prob[i]), 5), "pred": int(pred[i]), "nivel": int(nivel[i]),
+         "promedio": round(float(promedio[i]), 2), "asistencia": round(float(asistencia[i]), 2),
+         "matric": int(matric[i]), "desaprob": int(desaprob[i]),
+         "factores": json.dumps(factores[i]) if factores[i] is not None else None}
+        for i in range(len(filas))
+    ]
+
+
+# ==========================
+# Corrida
+# ==========================
+async def puntuar_periodo(db: AsyncSession, id_periodo: int, modelo: Optional[ModeloCargado] = None) -> dict:
+    """Puntúa a todos los matriculados del periodo; devuelve un resumen de la corrida."""
+    t0 = time.perf_counter()
+    modelo = modelo or await modelo_registro.obtener()
+    niveles = {str(r[0]): int(r[1]) for r in (await db.execute(SQL_NIVELES)).all()}
+
+    resumen = {"id_periodo": id_periodo, "version_modelo": modelo.version, "estudiantes": 0,
+               "por_nivel": {n: 0 for n in ("bajo", "medio", "alto")}}
+    id_a_nivel = {v: k for k, v in niveles.items()}
+    desde = 0
+    while True:
+        filas = (await db.execute(SQL_FEATURES, {"per": id_periodo, "desde": desde, "lote": PREDICCION_LOTE})).all()
+        if not filas:
+            break
+        registros = _puntuar(modelo, filas, id_periodo, niveles)
+        await db.execute(SQL_UPSERT_PREDICCION, registros)
+        await db.commit()
+        resumen["estudiantes"] += len(registros)
+        for r in registros:
+            resumen["por_nivel"][id_a_nivel[r["nivel"]]] += 1
+        desde = registros[-1]["est"]
+    resumen["segundos"] = round(time.perf_counter() - t0, 2)
+    return resumen
+
+
+async def main(args) -> None:
+    from .db import SessionLocal
+
+    async with SessionLocal() as db:
+        per = (await db.execute(SQL_PERIODO, {"nombre": args.periodo,
+                                              "id": int(args.periodo) if args.periodo.isdigit() else -1})).scalar()
+        if per is None:
+            raise SystemExit(f"Periodo desconocido: {args.periodo}")
+        resumen = await puntuar_periodo(db, int(per))
+    print(f"[OK] Periodo {args.periodo}: {resumen['estudiantes']:,} estudiantes puntuados con el modelo "
+          f"{resumen['version_modelo']} {resumen['por_nivel']} ({resumen['segundos']} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Puntaje por lotes del modelo de deserción")
+    parser.add_argument("--periodo", required=True, help="nombre (2025-1) o id_periodo")
+    asyncio.run(main(parser.parse_args()))
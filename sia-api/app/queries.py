@@ -0,0 +1,143 @@
+# app/queries.py
+"""
+Registro central de sentencias SQL y perfilado de consultas calientes.
+
+- consulta(nombre, sql): crea el text() UNA sola vez al importar y lo etiqueta con
+  un nombre estable (execution_options(query_name=...)).
+- ConsultaFiltrada: sentencia base + filtros opcionales; pre-construye todas las
+  combinaciones al importar, así los routers no concatenan SQL en cada request.
+- install_query_profiling(engine): mide cada ejecución (before/after_cursor_execute)
+  y acumula llamadas/tiempos por nombre. Las sentencias sin nombre se agrupan por
+  el inicio del SQL normalizado.
+"""
+
+from __future__ import annotations
+import time
+from itertools import combinations
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event, text
+from sqlalchemy.sql.elements import TextClause
+
+_registro: Dict[str, TextClause] = {}
+
+
+def consulta(nombre: str, sql: str) -> TextClause:
+    """Registra una sentencia con nombre estable. El nombre debe ser único."""
+    if nombre in _registro:
+        raise ValueError(f"Consulta duplicada en el registro: {nombre}")
+    stmt = text(sql).execution_options(query_name=nombre)
+    _registro[nombre] = stmt
+    return stmt
+
+
+class ConsultaFiltrada:
+    """
+    SQL = base + filtros activos (en el orden declarado) + sufijo.
+    Uso:
+        Q = ConsultaFiltrada("alertas.listar", BASE, {"est": " AND a.id_estudiante=:est"}, " ORDER BY ...")
+        stmt = Q.variante(est=id_estudiante is not None)
+    """
+
+    def __init__(self, nombre: str, base: str, filtros: Dict[str, str], sufijo: str = ""):
+        self.nombre = nombre
+        self.filtros = tuple(filtros)
+        self._variantes: Dict[frozenset, TextClause] = {}
+        for n in range(len(self.filtros) + 1):
+            for activos in combinations(self.filtros, n):
+                etiqueta = f"{nombre}[{','.join(activos)}]" if activos else nombre
+                sql = base + "".join(filtros[f] for f in activos) + sufijo
+                self._variantes[frozenset(activos)] = consulta(etiqueta, sql)
+
+    def variante(self, **activos: bool) -> TextClause:
+        desconocidos = set(activos) - set(self.filtros)
+        if desconocidos:
+            raise KeyError(f"{self.nombre}: filtros desconocidos {sorted(desconocidos)}")
+        return self._variantes[frozenset(k for k, v in activos.items() if v)]
+
+
+def registradas() -> List[str]:
+    return sorted(_registro)
+
+
+# ==========================
+# Perfilado
+# ==========================
+class _Stats:
+    __slots__ = ("llamadas", "total_s", "max_s", "errores")
+
+    def __init__(self) -> None:
+        self.llamadas = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.errores = 0
+
+
+_stats: Dict[str, _Stats] = {}
+
+
+def _nombre(context, statement: str) -> str:
+    nombre = context.execution_options.get("query_name") if context is not None else None
+    if nombre:
+        return nombre
+    return "sql:" + " ".join(statement.split())[:60]
+
+
+def _stats_de(nombre: str) -> _Stats:
+    st = _stats.get(nombre)
+    if st is None:
+        st = _stats[nombre] = _Stats()
+    return st
+
+
+def install_query_profiling(engine) -> None:
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._t0_consulta = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        t0 = getattr(context, "_t0_consulta", None)
+        if t0 is None:
+            return
+        dt = time.perf_counter() - t0
+        st = _stats_de(_nombre(context, statement))
+        st.llamadas += 1
+        st.total_s += dt
+        if dt > st.max_s:
+            st.max_s = dt
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(ctx):
+        _stats_de(_nombre(ctx.execution_context, ctx.statement or "")).errores += 1
+
+
+_ORDENES = {
+    "total": lambda st: st.total_s,
+    "promedio": lambda st: st.total_s / st.llamadas if st.llamadas else 0.0,
+    "max": lambda st: st.max_s,
+    "llamadas": lambda st: st.llamadas,
+}
+
+
+def top(limite: int = 20, orden: str = "total") -> List[dict]:
+    clave = _ORDENES.get(orden, _ORDENES["total"])
+    items: Iterable = sorted(_stats.items(), key=lambda kv: clave(kv[1]), reverse=True)[:limite]
+    return [
+        {
+            "consulta": nombre,
+            "llamadas": st.llamadas,
+            "total_ms": round(st.total_s * 1000, 3),
+            "promedio_ms": round(st.total_s * 1000 / st.llamadas, 3) if st.llamadas else None,
+            "max_ms": round(st.max_s * 1000, 3),
+            "errores": st.errores,
+        }
+        for nombre, st in items
+    ]
+
+
+def reset() -> None:
+    _stats.clear()
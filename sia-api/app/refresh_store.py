@@ -0,0 +1,279 @@
+# app/refresh_store.py
+"""
+Subsistema de refresh tokens:
+- emisión y rotación (revocar + insertar) en UNA sola transacción
+- caché de perfiles (correo, estado, roles, persona) con invalidación explícita
+- conjunto caliente de revocaciones en memoria (rechaza sin ir a BD)
+- barrido en segundo plano de tokens expirados/revocados en lotes pequeños
+
+La BD sigue siendo la fuente de verdad: la rotación solo procede si el UPDATE
+encuentra la fila vigente (revocado=0 y hash coincidente), así que la caché local
+de cada worker solo acelera los rechazos, nunca acepta un token inválido.
+"""
+
+from __future__ import annotations
+import asyncio, os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import TTLCache
+from .db import SessionLocal
+from .queries import consulta
+from .security import REFRESH_EXPIRES_DAYS, create_refresh_token, decode_refresh_token, sha256_hex
+
+# ==========================
+# CONFIG
+# ==========================
+PROFILE_CACHE_TTL_S = float(os.getenv("PROFILE_CACHE_TTL_S", "300"))
+REVOCATION_CACHE_MAX = int(os.getenv("REVOCATION_CACHE_MAX", "50000"))
+REFRESH_SWEEP_INTERVAL_S = float(os.getenv("REFRESH_SWEEP_INTERVAL_S", "600"))  # 0 = deshabilitado
+REFRESH_SWEEP_BATCH = int(os.getenv("REFRESH_SWEEP_BATCH", "500"))
+# Los revocados se conservan unas horas (detección de reuso / auditoría) antes de borrarse
+REFRESH_SWEEP_GRACE_H = int(os.getenv("REFRESH_SWEEP_GRACE_H", "24"))
+
+
+class RefreshInvalido(Exception):
+    """Refresh token rechazado; `detail` es el mensaje para el cliente."""
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+# ==========================
+# SQL
+# ==========================
+SQL_INSERT_REFRESH = consulta("refresh.insert_refresh", """
+    INSERT INTO refresh_tokens (id_usuario, jti, token_hash, user_agent, ip, expiracion)
+    VALUES (:uid, :jti, :th, :ua, :ip, :exp)
+""")
+
+# Rotación atómica: solo revoca si la fila sigue vigente y el hash coincide
+SQL_CONSUME_REFRESH = consulta("refresh.consume_refresh", """
+    UPDATE refresh_tokens SET revocado=1
+    WHERE jti=:jti AND token_hash=:th AND revocado=0
+""")
+
+SQL_GET_REFRESH = consulta("refresh.get_refresh", """
+    SELECT id_refresh, id_usuario, jti, token_hash, expiracion, revocado
+    FROM refresh_tokens
+    WHERE jti=:jti
+    LIMIT 1
+""")
+
+SQL_REVOKE_REFRESH = consulta("refresh.revoke_refresh", """
+    UPDATE refresh_tokens SET revocado=1 WHERE jti=:jti
+""")
+
+SQL_REVOKE_ALL_FOR_USER = consulta("refresh.revoke_all_for_user", """
+    UPDATE refresh_tokens SET revocado=1 WHERE id_usuario=:uid AND revocado=0
+""")
+
+SQL_PERFIL_USUARIO = consulta("refresh.perfil_usuario", """
+    SELECT u.correo,
+           eu.nombre AS estado,
+           p.dni,
+           p.apellido_paterno,
+           p.apellido_materno,
+           p.nombres,
+           COALESCE(GROUP_CONCAT(r.nombre), '') AS roles
+    FROM usuarios u
+    LEFT JOIN estados_usuario eu ON eu.id_estado_usuario = u.id_estado_usuario
+    LEFT JOIN usuarios_roles ur ON ur.id_usuario = u.id_usuario
+    LEFT JOIN roles r ON r.id_rol = ur.id_rol
+    LEFT JOIN personas p ON p.id_persona = u.id_persona
+    WHERE u.id_usuario = :uid
+    GROUP BY u.id_usuario, eu.nombre, p.dni, p.apellido_paterno, p.apellido_materno, p.nombres
+""")
+
+# Barrido por lotes (usan ix_refresh_expiracion / ix_refresh_revocado)
+SQL_SWEEP_EXPIRADOS = consulta("refresh.sweep_expirados", """
+    DELETE FROM refresh_tokens
+    WHERE expiracion < UTC_TIMESTAMP()
+    LIMIT :n
+""")
+
+SQL_SWEEP_REVOCADOS = consulta("refresh.sweep_revocados", """
+    DELETE FROM refresh_tokens
+    WHERE revocado = 1 AND creado_en < (NOW() - INTERVAL :h HOUR)
+    LIMIT :n
+""")
+
+
+# ==========================
+# Cachés en memoria
+# ==========================
+_perfiles = TTLCache(maxsize=10000, ttl=PROFILE_CACHE_TTL_S)
+_revocados = TTLCache(maxsize=REVOCATION_CACHE_MAX, ttl=3600)   # jti -> True
+# uid -> epoch del logout_all; pasado REFRESH_EXPIRES_DAYS todo token anterior ya expiró
+_revocados_usuario = TTLCache(maxsize=REVOCATION_CACHE_MAX, ttl=REFRESH_EXPIRES_DAYS * 86400)
+
+
+def _ahora_ts() -> int:
+    return int(datetime.now(timezone.utc).timestamp())
+
+
+def _datetime_from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def _marcar_revocado(jti: str, exp_ts: int | None) -> None:
+    restante = (exp_ts - _ahora_ts()) if exp_ts else 3600
+    _revocados.set(jti, True, ttl=max(1, restante))
+
+
+def esta_revocado(payload: dict) -> bool:
+    """Chequeo en memoria (sin BD) de revocación por jti o por logout_all del usuario."""
+    if payload.get("jti") in _revocados:
+        return True
+    corte = _revocados_usuario.get(int(payload.get("sub", 0)))
+    # iat y el corte van en segundos enteros: un token emitido en el mismo segundo que el
+    # logout_all (volver a entrar enseguida) no se rechaza aquí; lo decide el UPDATE en BD
+    return corte is not None and int(payload.get("iat", 0)) < corte
+
+
+def perfil_desde_fila(row: Any) -> Dict[str, Any]:
+    return {
+        "correo": row.correo,
+        "estado": row.estado,
+        "roles": [r for r in (row.roles or "").split(",") if r],
+        "persona": {
+            "dni": row.dni,
+            "apellido_paterno": row.apellido_paterno,
+            "apellido_materno": row.apellido_materno,
+            "nombres": row.nombres,
+        },
+    }
+
+
+def cachear_perfil(uid: int, perfil: Dict[str, Any]) -> None:
+    _perfiles.set(uid, perfil)
+
+
+def invalidar_perfil(uid: int) -> None:
+    """Llamar cuando cambian correo, estado, roles o datos de persona del usuario."""
+    _perfiles.pop(uid)
+
+
+async def perfil_usuario(db: AsyncSession, uid: int) -> Optional[Dict[str, Any]]:
+    perfil = _perfiles.get(uid)
+    if perfil is not None:
+        return perfil
+    row = (await db.execute(SQL_PERFIL_USUARIO, {"uid": uid})).fetchone()
+    if not row:
+        return None
+    perfil = perfil_desde_fila(row)
+    _perfiles.set(uid, perfil)
+    return perfil
+
+
+# ==========================
+# Emisión / rotación / revocación
+# ==========================
+async def emitir(db: AsyncSession, uid: int, ua: str, ip: Optional[str]) -> str:
+    """
+    Crea un refresh token y agrega su INSERT a la transacción en curso.
+    El commit queda a cargo del llamador (así login/rotación hacen un solo commit).
+    """
+    token = create_refresh_token(user_id=uid)
+    payload = decode_refresh_token(token)
+    if not payload:
+        raise RefreshInvalido("No se pudo emitir refresh token")
+    await db.execute(SQL_INSERT_REFRESH, {
+        "uid": uid, "jti": payload["jti"], "th": sha256_hex(token),
+        "ua": ua, "ip": ip, "exp": _datetime_from_epoch(payload["exp"]),
+    })
+    return token
+
+
+async def rotar(db: AsyncSession, token: str, ua: str, ip: Optional[str]) -> tuple[int, str]:
+    """
+    Valida el refresh token, lo revoca y emite uno nuevo en una sola transacción.
+    Devuelve (id_usuario, nuevo_refresh_token). Lanza RefreshInvalido si no procede.
+    """
+    rp = decode_refresh_token(token)
+    if not rp:
+        raise RefreshInvalido("Refresh token inválido")
+    if esta_revocado(rp):
+        raise RefreshInvalido("Refresh token revocado")
+    if rp["exp"] <= _ahora_ts():
+        raise RefreshInvalido("Refresh token expirado")
+
+    uid = int(rp["sub"])
+    res = await db.execute(SQL_CONSUME_REFRESH, {"jti": rp["jti"], "th": sha256_hex(token)})
+    if res.rowcount != 1:
+        await db.rollback()
+        # Camino raro: diagnosticar el motivo para conservar los mensajes de error
+        row = (await db.execute(SQL_GET_REFRESH, {"jti": rp["jti"]})).fetchone()
+        if not row:
+            raise RefreshInvalido("Refresh token no reconocido")
+        if row.revocado:
+            _marcar_revocado(rp["jti"], rp["exp"])
+            raise RefreshInvalido("Refresh token revocado")
+        raise RefreshInvalido("Refresh token no coincide")
+
+    nuevo = await emitir(db, uid, ua, ip)
+    await db.commit()
+    _marcar_revocado(rp["jti"], rp["exp"])
+    return uid, nuevo
+
+
+async def revocar(db: AsyncSession, payload: dict) -> None:
+    await db.execute(SQL_REVOKE_REFRESH, {"jti": payload["jti"]})
+    await db.commit()
+    _marcar_revocado(payload["jti"], payload.get("exp"))
+
+
+async def revocar_todos(db: AsyncSession, uid: int) -> None:
+    await db.execute(SQL_REVOKE_ALL_FOR_USER, {"uid": uid})
+    await db.commit()
+    _revocados_usuario.set(uid, _ahora_ts())
+
+
+# ==========================
+# Barrido en segundo plano
+# ==========================
+async def barrer_tokens(batch: int = REFRESH_SWEEP_BATCH, pausa_s: float = 0.05) -> int:
+    """
+    Elimina tokens expirados y revocados antiguos en lotes de `batch` filas, con
+    commit y una pausa breve entre lotes para no retener locks ni saturar la BD.
+    """
+    total = 0
+    async with SessionLocal() as s:
+        for sql, params in (
+            (SQL_SWEEP_EXPIRADOS, {"n": batch}),
+            (SQL_SWEEP_REVOCADOS, {"n": batch, "h": REFRESH_SWEEP_GRACE_H}),
+        ):
+            while True:
+                res = await s.execute(sql, params)
+                await s.commit()
+                total += res.rowcount or 0
+                if (res.rowcount or 0) < batch:
+                    break
+                await asyncio.sleep(pausa_s)
+    _revocados.purge_expired()
+    _revocados_usuario.purge_expired()
+    return total
+
+
+async def sweeper_loop(intervalo_s: float = REFRESH_SWEEP_INTERVAL_S) -> None:
+    while True:
+        await asyncio.sleep(intervalo_s)
+        try:
+            borrados = await barrer_tokens()
+            if borrados:
+                print(f"[OK] refresh_tokens: {borrados} tokens expirados/revocados eliminados")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"[WARN] Barrido de refresh_tokens falló: {exc}")
+
+
+def stats() -> dict:
+    return {
+        "perfiles": _perfiles.stats(),
+        "revocados_en_memoria": len(_revocados),
+        "usuarios_con_logout_all": len(_revocados_usuario),
+    }
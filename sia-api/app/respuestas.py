@@ -0,0 +1,56 @@
+# app/respuestas.py
+"""
+Serialización de respuestas con orjson.
+
+- RespuestaJSON: clase de respuesta por defecto de la app (main.py). Lo que
+  sigue pasando por response_model=ApiResponse se valida igual, pero se
+  renderiza con orjson en vez de json.dumps.
+- respuesta(data): ruta rápida para listados grandes. Devuelve la Response ya
+  renderizada, así FastAPI no valida ni recorre el payload (ApiResponse con
+  data: Any + serialización de pydantic). orjson escribe str/int/float/bool,
+  datetime/date/time, dict/list/tuple y arreglos NumPy en C; solo lo demás
+  (Decimal, filas de SQLAlchemy) pasa por _por_defecto().
+
+Diferencia con la ruta genérica: un Decimal sale como número (12.5) y no como
+texto ("12.50"), igual que los campos que los routers ya convertían a float.
+"""
+
+from __future__ import annotations
+from decimal import Decimal
+from typing import Any, Mapping, Optional
+
+import orjson
+from fastapi.responses import Response
+from sqlalchemy.engine import Row
+
+_OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _por_defecto(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Row):
+        return dict(obj._mapping)
+    if isinstance(obj, Mapping):        # RowMapping
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", "replace")
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def dumps(contenido: Any) -> bytes:
+    return orjson.dumps(contenido, default=_por_defecto, option=_OPCIONES)
+
+
+class RespuestaJSON(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def respuesta(data: Any = None, message: Optional[str] = None, status_code: int = 200) -> RespuestaJSON:
+    """{"ok": true, "data", "message"} como ApiResponse, sin pasar por el encoder de FastAPI."""
+    return RespuestaJSON({"ok": True, "data": data, "message": message}, status_code=status_code)
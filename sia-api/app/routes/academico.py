@@ -2,14 +2,70 @@
 from __future__ import annotations
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 
 from ..db import get_session
 from ..deps import require_roles
+from ..ingesta_calificaciones import resumen_periodo
+from ..queries import consulta
 from ..schemas import ApiResponse
 
 router = APIRouter(prefix="/academico", tags=["evidencia_academica"])
 
+# ==========================
+# SQL
+# ==========================
+SQL_MATRICULAS = consulta("academico.matriculas", """
+    SELECT
+        m.id_matricula,
+        c.nombre AS curso,
+        c.creditos,
+        d.id_docente,
+        CONCAT_WS(' ', pd.apellido_paterno, pd.apellido_materno, pd.nombres) AS docente,
+        em.nombre AS estado_matricula,
+        m.fecha_matricula
+    FROM matriculas m
+    JOIN cursos c               ON c.id_curso = m.id_curso
+    LEFT JOIN docentes d        ON d.id_docente = m.id_docente
+    LEFT JOIN personas pd       ON pd.id_persona = d.id_persona
+    JOIN estados_matricula em   ON em.id_estado_matricula = m.id_estado_matricula
+    WHERE m.id_estudiante = :est AND m.id_periodo = :per
+    ORDER BY c.nombre ASC
+""")
+
+SQL_ASISTENCIAS = consulta("academico.asistencias", """
+    SELECT 
+        c.nombre AS curso,
+        apc.id_periodo,
+        apc.asistencia_pct AS porcentaje_asistencia
+    FROM
+        asistencias_periodo_curso apc
+    JOIN
+        cursos c ON c.id_curso = apc.id_curso
+    WHERE apc.id_estudiante = :est
+        AND apc.id_periodo    = :per
+    GROUP BY c.id_curso, c.nombre
+    ORDER BY c.nombre ASC;
+""")
+
+SQL_CALIFICACIONES = consulta("academico.calificaciones", """
+    SELECT
+        c.nombre        AS curso,
+        c.creditos      AS creditos,
+        cal.nota_final  AS nota_final
+    FROM calificaciones cal
+    JOIN matriculas m ON m.id_matricula = cal.id_matricula
+    JOIN cursos c     ON c.id_curso = m.id_curso
+    WHERE m.id_estudiante = :id_estudiante
+      AND m.id_periodo    = :id_periodo
+""")
+
+# Promedio ponderado por créditos ya calculado (migraciones/003, app/ingesta_calificaciones.py)
+SQL_RESUMEN_CALIFICACIONES = consulta("academico.resumen_calificaciones", """
+    SELECT promedio
+    FROM resumen_calificaciones_periodo
+    WHERE id_estudiante = :id_estudiante AND id_periodo = :id_periodo
+""")
+
 
 # ============================================================
 # MATRÍCULAS — cursos matriculados por estudiante/periodo
@@ -28,25 +84,7 @@ async def matriculas_estudiante(
     Retorna las asignaturas matriculadas por un estudiante en un periodo determinado.
     Incluye: curso, créditos, docente, estado y fecha de matrícula.
     """
-    q = text("""
-        SELECT
-            m.id_matricula,
-            c.nombre AS curso,
-            c.creditos,
-            d.id_docente,
-            CONCAT_WS(' ', pd.apellido_paterno, pd.apellido_materno, pd.nombres) AS docente,
-            em.nombre AS estado_matricula,
-            m.fecha_matricula
-        FROM matriculas m
-        JOIN cursos c               ON c.id_curso = m.id_curso
-        LEFT JOIN docentes d        ON d.id_docente = m.id_docente
-        LEFT JOIN personas pd       ON pd.id_persona = d.id_persona
-        JOIN estados_matricula em   ON em.id_estado_matricula = m.id_estado_matricula
-        WHERE m.id_estudiante = :est AND m.id_periodo = :per
-        ORDER BY c.nombre ASC
-    """)
-
-    res = await db.execute(q, {"est": id_estudiante, "per": id_periodo})
+    res = await db.execute(SQL_MATRICULAS, {"est": id_estudiante, "per": id_periodo})
     rows = res.mappings().all()
 
     if not rows:
@@ -75,21 +113,7 @@ async def asistencias_estudiante(
     Devuelve el resumen de asistencias del estudiante por curso con porcentaje.
     Calcula a partir de la tabla de detalle `asistencias` (presente/falta por sesión).
     """
-    q = text("""
-        SELECT 
-            c.nombre AS curso,
-            apc.id_periodo,
-            apc.asistencia_pct AS porcentaje_asistencia
-        FROM
-            asistencias_periodo_curso apc
-        JOIN
-            cursos c ON c.id_curso = apc.id_curso
-        WHERE apc.id_estudiante = :est
-            AND apc.id_periodo    = :per
-        GROUP BY c.id_curso, c.nombre
-        ORDER BY c.nombre ASC;
-    """)
-    res = await db.execute(q, {"est": id_estudiante, "per": id_periodo})
+    res = await db.execute(SQL_ASISTENCIAS, {"est": id_estudiante, "per": id_periodo})
     rows = res.mappings().all()
 
     if not rows:
@@ -107,21 +131,9 @@ async def calificaciones_estudiante(
     id_periodo: int,
     db: AsyncSession = Depends(get_session),
 ):
-    query = text("""
-        SELECT
-            c.nombre        AS curso,
-            c.creditos      AS creditos,
-            cal.nota_final  AS nota_final
-        FROM calificaciones cal
-        JOIN matriculas m ON m.id_matricula = cal.id_matricula
-        JOIN cursos c     ON c.id_curso = m.id_curso
-        WHERE m.id_estudiante = :id_estudiante
-          AND m.id_periodo    = :id_periodo
-    """)
-
     # 🔹 AQUÍ EL CAMBIO IMPORTANTE
     result = await db.execute(
-        query,
+        SQL_CALIFICACIONES,
         {"id_estudiante": id_estudiante, "id_periodo": id_periodo},
     )
     rows = result.mappings().all()
@@ -135,23 +147,18 @@ async def calificaciones_estudiante(
         for r in rows
     ]
 
-    notas_validas = [
-        r for r in rows
-        if r["nota_final"] is not None and r["creditos"] is not None
-    ]
-
-    if notas_validas:
-        suma_ponderada = sum(
-            float(r["nota_final"]) * float(r["creditos"])
-            for r in notas_validas
-        )
-        suma_creditos = sum(float(r["creditos"]) for r in notas_validas)
-        promedio = round(suma_ponderada / suma_creditos, 2) if suma_creditos > 0 else None
+    fila_resumen = (await db.execute(
+        SQL_RESUMEN_CALIFICACIONES,
+        {"id_estudiante": id_estudiante, "id_periodo": id_periodo},
+    )).first()
+    if fila_resumen is not None:
+        promedio = fila_resumen[0]
     else:
-        promedio = None
+        # Sin fila en el resumen (p. ej. antes de migraciones/007): se agrega el detalle
+        promedio = resumen_periodo((r["nota_final"], r["creditos"] or 0) for r in rows)["promedio"]
 
     return {
         "detalle": detalle,
-        "promedio_general": promedio,
+        "promedio_general": float(promedio) if promedio is not None else None,
     }
 
@@ -0,0 +1,63 @@
+# app/routers/admin.py
+from __future__ import annotations
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+
+from ..db import engine, read_engine, read_routing_stats
+from ..deps import require_roles
+from .. import audit_middleware, mi_cache, prediccion_cache, queries, refresh_store
+from ..pool_metrics import snapshot
+from ..schemas import ApiResponse
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+# ==========================
+# GET /admin/pool — estado y métricas de los pools (primario y réplica)
+# ==========================
+@router.get("/pool", response_model=ApiResponse, dependencies=[Depends(require_roles("admin"))])
+async def pool_stats():
+    return {"ok": True, "data": {
+        "primario": snapshot(engine),
+        "replica": snapshot(read_engine) if read_engine is not None else None,
+        "lecturas": read_routing_stats(),
+    }}
+
+
+# ==========================
+# GET /admin/queries — consultas más costosas (por nombre del registro)
+# ==========================
+@router.get("/queries", response_model=ApiResponse, dependencies=[Depends(require_roles("admin"))])
+async def queries_stats(
+    orden: Literal["total", "promedio", "max", "llamadas"] = Query("total"),
+    limite: int = Query(20, ge=1, le=200),
+    reset: bool = Query(False, description="Reinicia los contadores después de leerlos"),
+):
+    data = {
+        "registradas": len(queries.registradas()),
+        "top": queries.top(limite, orden),
+    }
+    if reset:
+        queries.reset()
+    return {"ok": True, "data": data}
+
+
+# ==========================
+# GET /admin/auditoria — estado de la cola de auditoría
+# ==========================
+@router.get("/auditoria", response_model=ApiResponse, dependencies=[Depends(require_roles("admin"))])
+async def auditoria_stats():
+    return {"ok": True, "data": audit_middleware.stats()}
+
+
+# ==========================
+# GET /admin/cache — cachés en memoria de este proceso
+# ==========================
+@router.get("/cache", response_model=ApiResponse, dependencies=[Depends(require_roles("admin"))])
+async def cache_stats():
+    return {"ok": True, "data": {
+        "refresh": refresh_store.stats(),
+        "mi": mi_cache.stats(),
+        "prediccion": prediccion_cache.stats(),
+    }}
@@ -5,10 +5,11 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 
-from ..db import get_session
+from ..db import get_read_session, get_session
 from ..deps import require_roles
+from ..queries import ConsultaFiltrada, consulta
+from ..respuestas import respuesta
 from ..schemas import ApiResponse
 
 router = APIRouter(prefix="/alertas", tags=["alertas"])
@@ -23,6 +24,57 @@ class AlertaUpdate(BaseModel):
     observacion: Optional[str] = Field(None, max_length=300, description="Comentario o seguimiento de la alerta")
 
 
+# =========================
+# SQL
+# =========================
+Q_LISTAR = ConsultaFiltrada(
+    "alertas.listar",
+    """
+    SELECT 
+        a.id_alerta,
+        e.id_estudiante,
+        p.dni,
+        CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS estudiante,
+        pa.nombre AS periodo,
+        ta.nombre AS tipo_alerta,
+        s.nombre AS severidad,
+        a.descripcion,
+        a.leida,
+        a.observacion,
+        DATE_FORMAT(a.creado_en, '%Y-%m-%d %H:%i') AS fecha_creacion
+    FROM alertas a
+    JOIN estudiantes e       ON e.id_estudiante = a.id_estudiante
+    LEFT JOIN personas p     ON p.id_persona    = e.id_persona
+    LEFT JOIN periodos_academicos pa ON pa.id_periodo = a.id_periodo
+    LEFT JOIN tipos_alerta ta ON ta.id_tipo_alerta = a.id_tipo_alerta
+    LEFT JOIN severidades s   ON s.id_severidad = a.id_severidad
+    WHERE 1=1
+    """,
+    {
+        "est": " AND a.id_estudiante = :est",
+        "per": " AND a.id_periodo = :per",
+        "lei": " AND a.leida = :lei",
+    },
+    " ORDER BY a.creado_en DESC",
+)
+
+SQL_EXISTE_ALERTA = consulta("alertas.existe", "SELECT id_alerta FROM alertas WHERE id_alerta=:id LIMIT 1")
+
+# NULL = sin cambio en esa columna
+SQL_ACTUALIZAR_ALERTA = consulta("alertas.actualizar", """
+    UPDATE alertas
+    SET leida = COALESCE(:leida, leida),
+        observacion = COALESCE(:obs, observacion)
+    WHERE id_alerta=:id
+""")
+
+SQL_ALERTA_ACTUALIZADA = consulta("alertas.actualizada", """
+    SELECT a.id_alerta, a.id_estudiante, a.leida, a.observacion,
+           DATE_FORMAT(a.creado_en, '%Y-%m-%d %H:%i') AS fecha_creacion
+    FROM alertas a WHERE a.id_alerta=:id
+""")
+
+
 # =========================
 # GET: Listar alertas
 # =========================
@@ -32,7 +84,7 @@ async def listar_alertas(
     id_estudiante: Optional[int] = Query(None, description="Filtrar por estudiante"),
     id_periodo: Optional[int] = Query(None, description="Filtrar por periodo académico"),
     leida: Optional[bool] = Query(None, description="Filtrar por estado de lectura"),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
     """
     Lista las alertas generadas por el sistema, con filtros opcionales:
@@ -41,43 +93,17 @@ async def listar_alertas(
       - estado de lectura (leida)
     Devuelve el nombre del estudiante, tipo, severidad, descripción y fecha.
     """
-    sql = """
-        SELECT 
-            a.id_alerta,
-            e.id_estudiante,
-            p.dni,
-            CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS estudiante,
-            pa.nombre AS periodo,
-            ta.nombre AS tipo_alerta,
-            s.nombre AS severidad,
-            a.descripcion,
-            a.leida,
-            a.observacion,
-            DATE_FORMAT(a.creado_en, '%Y-%m-%d %H:%i') AS fecha_creacion
-        FROM alertas a
-        JOIN estudiantes e       ON e.id_estudiante = a.id_estudiante
-        LEFT JOIN personas p     ON p.id_persona    = e.id_persona
-        LEFT JOIN periodos_academicos pa ON pa.id_periodo = a.id_periodo
-        LEFT JOIN tipos_alerta ta ON ta.id_tipo_alerta = a.id_tipo_alerta
-        LEFT JOIN severidades s   ON s.id_severidad = a.id_severidad
-        WHERE 1=1
-    """
     params = {}
     if id_estudiante:
-        sql += " AND a.id_estudiante = :est"
         params["est"] = id_estudiante
     if id_periodo:
-        sql += " AND a.id_periodo = :per"
         params["per"] = id_periodo
     if leida is not None:
-        sql += " AND a.leida = :lei"
         params["lei"] = 1 if leida else 0
 
-    sql += " ORDER BY a.creado_en DESC"
-
-    res = await db.execute(text(sql), params)
-    data = [dict(r._mapping) for r in res.fetchall()]
-    return {"ok": True, "data": data}
+    stmt = Q_LISTAR.variante(est=bool(id_estudiante), per=bool(id_periodo), lei=leida is not None)
+    res = await db.execute(stmt, params)
+    return respuesta(res.mappings().all())
 
 
 # =========================
@@ -95,36 +121,26 @@ async def actualizar_alerta(
     No permite modificar campos estructurales (tipo, severidad, estudiante, etc.).
     """
     # Verificar existencia
-    q = text("SELECT id_alerta FROM alertas WHERE id_alerta=:id LIMIT 1")
-    ex = (await db.execute(q, {"id": id_alerta})).fetchone()
+    ex = (await db.execute(SQL_EXISTE_ALERTA, {"id": id_alerta})).fetchone()
     if not ex:
         raise HTTPException(status_code=404, detail="Alerta no encontrada")
 
-    updates = []
-    params = {"id": id_alerta}
-
-    if payload.leida is not None:
-        updates.append("leida = :leida")
-        params["leida"] = 1 if payload.leida else 0
-    if payload.observacion is not None:
-        updates.append("observacion = :obs")
-        params["obs"] = payload.observacion.strip()
-
-    if not updates:
+    if payload.leida is None and payload.observacion is None:
         raise HTTPException(status_code=400, detail="No hay cambios para aplicar")
 
+    params = {
+        "id": id_alerta,
+        "leida": None if payload.leida is None else (1 if payload.leida else 0),
+        "obs": None if payload.observacion is None else payload.observacion.strip(),
+    }
+
     try:
-        await db.execute(text(f"UPDATE alertas SET {', '.join(updates)} WHERE id_alerta=:id"), params)
+        await db.execute(SQL_ACTUALIZAR_ALERTA, params)
         await db.commit()
     except Exception as ex:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"No se pudo actualizar la alerta: {ex}")
 
     # Retornar alerta actualizada
-    q_final = text("""
-        SELECT a.id_alerta, a.id_estudiante, a.leida, a.observacion,
-               DATE_FORMAT(a.creado_en, '%Y-%m-%d %H:%i') AS fecha_creacion
-        FROM alertas a WHERE a.id_alerta=:id
-    """)
-    row = (await db.execute(q_final, {"id": id_alerta})).fetchone()
+    row = (await db.execute(SQL_ALERTA_ACTUALIZADA, {"id": id_alerta})).fetchone()
     return {"ok": True, "message": "Alerta actualizada", "data": dict(row._mapping)}
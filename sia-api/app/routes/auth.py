@@ -4,16 +4,18 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
 from ..security import (
-    verify_password, hash_password,
-    create_access_token, create_refresh_token,
-    decode_refresh_token, sha256_hex, extract_user_identity
+    verify_and_update_password_async, login_limiter,
+    create_access_token, decode_refresh_token,
 )
 from ..deps import get_current_user  # usa access token
+from ..queries import consulta
+from .. import refresh_store
+from ..audit_middleware import anotar
+from ..refresh_store import RefreshInvalido
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -40,7 +42,7 @@ class LogoutIn(BaseModel):
 # ==========================
 # Helpers SQL
 # ==========================
-SQL_USER_BY_EMAIL = text("""
+SQL_USER_BY_EMAIL = consulta("auth.user_by_email", """
     SELECT u.id_usuario,
            u.contrasenia_hash,
            u.correo,
@@ -60,25 +62,19 @@ SQL_USER_BY_EMAIL = text("""
     LIMIT 1
 """)
 
-SQL_INSERT_REFRESH = text("""
-    INSERT INTO refresh_tokens (id_usuario, jti, token_hash, user_agent, ip, expiracion)
-    VALUES (:uid, :jti, :th, :ua, :ip, :exp)
+SQL_UPDATE_PASSWORD_HASH = consulta("auth.update_password_hash", """
+    UPDATE usuarios SET contrasenia_hash=:h WHERE id_usuario=:uid
 """)
 
-SQL_GET_REFRESH = text("""
-    SELECT id_refresh, id_usuario, jti, token_hash, expiracion, revocado
-    FROM refresh_tokens
-    WHERE jti=:jti
-    LIMIT 1
-""")
 
-SQL_REVOKE_REFRESH = text("""
-    UPDATE refresh_tokens SET revocado=1 WHERE jti=:jti
-""")
+def _client_info(request: Request) -> tuple[str, Optional[str]]:
+    ua = request.headers.get("user-agent", "")[:255]
+    ip = request.client.host if request.client else None
+    return ua, ip
 
-SQL_REVOKE_ALL_FOR_USER = text("""
-    UPDATE refresh_tokens SET revocado=1 WHERE id_usuario=:uid AND revocado=0
-""")
+
+def _user_payload(uid: int, perfil: dict) -> dict:
+    return {"id_usuario": uid, **perfil}
 
 
 # ==========================
@@ -86,52 +82,51 @@ SQL_REVOKE_ALL_FOR_USER = text("""
 # ==========================
 @router.post("/login", response_model=TokenOut)
 async def login(payload: LoginIn, request: Request, db: AsyncSession = Depends(get_session)):
-    dump = payload.model_dump()
-    dump["correo"] = str(payload.correo)
+    ip = request.client.host if request.client else None
+    correo = str(payload.correo)
+    anotar(request, correo=correo)
+    # 0) limitar logins simultáneos por IP/correo (cada uno ocupa un proceso PBKDF2)
+    if not login_limiter.acquire(ip, correo):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiados intentos de inicio de sesión en curso. Intente nuevamente en unos segundos.",
+        )
+    try:
+        return await _login(payload, request, db)
+    finally:
+        login_limiter.release(ip, correo)
+
+
+async def _login(payload: LoginIn, request: Request, db: AsyncSession) -> TokenOut:
     # 1) buscar usuario
     row = (await db.execute(SQL_USER_BY_EMAIL, {"c": payload.correo})).fetchone()
     if not row:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
-    # 2) validar password
-    if not verify_password(payload.contrasenia, row.contrasenia_hash):
+    # 2) validar password (en el pool de procesos); si el hash usa parámetros antiguos, se regenera
+    ok, nuevo_hash = await verify_and_update_password_async(payload.contrasenia, row.contrasenia_hash)
+    if not ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciales inválidas")
 
-    roles = [r for r in (row.roles or "").split(",") if r]
     uid = int(row.id_usuario)
+    anotar(request, id_usuario=uid)
+    perfil = refresh_store.perfil_desde_fila(row)
+    refresh_store.cachear_perfil(uid, perfil)
 
     # 3) crear access token
-    access = create_access_token(user_id=uid, email=row.correo, roles=roles)
-
-    # 4) crear refresh token (JWT con jti) y almacenar su hash
-    refresh = create_refresh_token(user_id=uid)
-    refresh_payload = decode_refresh_token(refresh)
-    if not refresh_payload:
-        raise HTTPException(500, detail="No se pudo emitir refresh token")
-
-    ua = request.headers.get("user-agent", "")[:255]
-    ip = request.client.host if request.client else None
-    th = sha256_hex(refresh)
-    exp_dt = datetime_from_epoch(refresh_payload["exp"])
-
-    await db.execute(SQL_INSERT_REFRESH, {
-        "uid": uid, "jti": refresh_payload["jti"], "th": th, "ua": ua, "ip": ip, "exp": exp_dt
-    })
+    access = create_access_token(user_id=uid, email=row.correo, roles=perfil["roles"])
+
+    # 4) crear refresh token (JWT con jti) y almacenar su hash — un solo commit
+    ua, ip = _client_info(request)
+    try:
+        refresh = await refresh_store.emitir(db, uid, ua, ip)
+    except RefreshInvalido as exc:
+        raise HTTPException(500, detail=exc.detail)
+    if nuevo_hash:
+        # rehash transparente hacia los parámetros actuales (misma transacción)
+        await db.execute(SQL_UPDATE_PASSWORD_HASH, {"h": nuevo_hash, "uid": uid})
     await db.commit()
 
-    user_payload = {
-        "id_usuario": uid,
-        "correo": row.correo,
-        "estado": row.estado,
-        "roles": roles,
-        "persona": {
-            "dni": row.dni,
-            "apellido_paterno": row.apellido_paterno,
-            "apellido_materno": row.apellido_materno,
-            "nombres": row.nombres,
-        },
-    }
-
-    return TokenOut(access_token=access, refresh_token=refresh, user=user_payload)
+    return TokenOut(access_token=access, refresh_token=refresh, user=_user_payload(uid, perfil))
 
 
 # ==========================
@@ -139,81 +134,21 @@ async def login(payload: LoginIn, request: Request, db: AsyncSession = Depends(g
 # ==========================
 @router.post("/refresh", response_model=TokenOut)
 async def refresh_token(payload: RefreshIn, request: Request, db: AsyncSession = Depends(get_session)):
-    # 1) decodificar JWT refresh
-    rp = decode_refresh_token(payload.refresh_token)
-    if not rp:
-        raise HTTPException(status_code=401, detail="Refresh token inválido")
-
-    # 2) recuperar registro en BD por jti
-    row = (await db.execute(SQL_GET_REFRESH, {"jti": rp["jti"]})).fetchone()
-    if not row:
-        raise HTTPException(status_code=401, detail="Refresh token no reconocido")
-    if row.revocado:
-        raise HTTPException(status_code=401, detail="Refresh token revocado")
-    if datetime_from_epoch(rp["exp"]) <= now():
-        # expira por payload — seguridad extra: revocar el registro
-        await db.execute(SQL_REVOKE_REFRESH, {"jti": rp["jti"]})
-        await db.commit()
-        raise HTTPException(status_code=401, detail="Refresh token expirado")
-    # comparar hash
-    if sha256_hex(payload.refresh_token) != row.token_hash:
-        raise HTTPException(status_code=401, detail="Refresh token no coincide")
-
-    uid = int(row.id_usuario)
-
-    # 3) ROTAR: revocar viejo y emitir par nuevo
-    await db.execute(SQL_REVOKE_REFRESH, {"jti": rp["jti"]})
-    await db.commit()
-
-    # obtener email y roles para el nuevo access
-    uinfo = (await db.execute(text("""
-        SELECT u.correo,
-               eu.nombre AS estado,
-               p.dni,
-               p.apellido_paterno,
-               p.apellido_materno,
-               p.nombres,
-               COALESCE(GROUP_CONCAT(r.nombre), '') AS roles
-        FROM usuarios u
-        LEFT JOIN estados_usuario eu ON eu.id_estado_usuario = u.id_estado_usuario
-        LEFT JOIN usuarios_roles ur ON ur.id_usuario = u.id_usuario
-        LEFT JOIN roles r ON r.id_rol = ur.id_rol
-        LEFT JOIN personas p ON p.id_persona = u.id_persona
-        WHERE u.id_usuario = :uid
-        GROUP BY u.id_usuario, eu.nombre, p.dni, p.apellido_paterno, p.apellido_materno, p.nombres
-        """), {"uid": uid})).fetchone()
-    if not uinfo:
+    # 1) validar + ROTAR (revocar viejo e insertar nuevo en una sola transacción)
+    ua, ip = _client_info(request)
+    try:
+        uid, new_refresh = await refresh_store.rotar(db, payload.refresh_token, ua, ip)
+    except RefreshInvalido as exc:
+        raise HTTPException(status_code=401, detail=exc.detail)
+    anotar(request, id_usuario=uid)
+
+    # 2) correo y roles para el nuevo access (caché de perfiles)
+    perfil = await refresh_store.perfil_usuario(db, uid)
+    if not perfil:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    email = uinfo.correo
-    roles = [r for r in (uinfo.roles or "").split(",") if r]
 
-    new_access = create_access_token(user_id=uid, email=email, roles=roles)
-    new_refresh = create_refresh_token(user_id=uid)
-    nrp = decode_refresh_token(new_refresh)
-    ua = request.headers.get("user-agent", "")[:255]
-    ip = request.client.host if request.client else None
-    th = sha256_hex(new_refresh)
-    exp_dt = datetime_from_epoch(nrp["exp"])
-
-    await db.execute(SQL_INSERT_REFRESH, {
-        "uid": uid, "jti": nrp["jti"], "th": th, "ua": ua, "ip": ip, "exp": exp_dt
-    })
-    await db.commit()
-
-    user_payload = {
-        "id_usuario": uid,
-        "correo": email,
-        "estado": uinfo.estado,
-        "roles": roles,
-        "persona": {
-            "dni": uinfo.dni,
-            "apellido_paterno": uinfo.apellido_paterno,
-            "apellido_materno": uinfo.apellido_materno,
-            "nombres": uinfo.nombres,
-        },
-    }
-
-    return TokenOut(access_token=new_access, refresh_token=new_refresh, user=user_payload)
+    new_access = create_access_token(user_id=uid, email=perfil["correo"], roles=perfil["roles"])
+    return TokenOut(access_token=new_access, refresh_token=new_refresh, user=_user_payload(uid, perfil))
 
 
 # ==========================
@@ -224,8 +159,7 @@ async def logout(payload: LogoutIn, db: AsyncSession = Depends(get_session)):
     rp = decode_refresh_token(payload.refresh_token)
     if not rp:
         raise HTTPException(status_code=400, detail="Refresh token inválido")
-    await db.execute(SQL_REVOKE_REFRESH, {"jti": rp["jti"]})
-    await db.commit()
+    await refresh_store.revocar(db, rp)
     return {"ok": True, "message": "Sesión cerrada (refresh revocado)."}
 
 
@@ -234,16 +168,5 @@ async def logout(payload: LogoutIn, db: AsyncSession = Depends(get_session)):
 # ==========================
 @router.post("/logout_all")
 async def logout_all(user=Depends(get_current_user), db: AsyncSession = Depends(get_session)):
-    await db.execute(SQL_REVOKE_ALL_FOR_USER, {"uid": user["id_usuario"]})
-    await db.commit()
+    await refresh_store.revocar_todos(db, int(user["id_usuario"]))
     return {"ok": True, "message": "Todas las sesiones cerradas para el usuario."}
-
-
-# ==========================
-# Utils locales
-# ==========================
-from datetime import datetime, timezone
-def now() -> datetime:                                                          
-    return datetime.now(timezone.utc)
-def datetime_from_epoch(ts: int) -> datetime:
-    return datetime.fromtimestamp(ts, tz=timezone.utc)
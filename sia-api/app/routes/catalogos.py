@@ -2,30 +2,35 @@
 from __future__ import annotations
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 
 from ..db import get_session
 from ..deps import require_roles
+from ..queries import consulta
 from ..schemas import ApiResponse
 
 router = APIRouter(prefix="/catalogos", tags=["catalogos"])
 
+SQL_PERIODOS = consulta("catalogos.periodos", "SELECT * FROM periodos_academicos ORDER BY id_periodo DESC")
+SQL_PROGRAMAS = consulta("catalogos.programas", "SELECT id_programa, nombre FROM programas ORDER BY nombre ASC")
+SQL_FACULTADES = consulta("catalogos.facultades", "SELECT id_facultad, nombre FROM facultades ORDER BY nombre ASC")
+SQL_NIVELES_RIESGO = consulta("catalogos.niveles_riesgo", "SELECT * FROM niveles_riesgo ORDER BY id_nivel_riesgo ASC")
+
 @router.get("/periodos", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor","docente"))])
 async def periodos(db: AsyncSession = Depends(get_session)):
-    res = await db.execute(text("SELECT * FROM periodos_academicos ORDER BY id_periodo DESC"))
+    res = await db.execute(SQL_PERIODOS)
     return {"ok": True, "data": [dict(r._mapping) for r in res.fetchall()]}
 
 @router.get("/programas", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor","docente"))])
 async def programas(db: AsyncSession = Depends(get_session)):
-    res = await db.execute(text("SELECT id_programa, nombre FROM programas ORDER BY nombre ASC"))
+    res = await db.execute(SQL_PROGRAMAS)
     return {"ok": True, "data": [dict(r._mapping) for r in res.fetchall()]}
 
 @router.get("/facultades", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor","docente"))])
 async def facultades(db: AsyncSession = Depends(get_session)):
-    res = await db.execute(text("SELECT id_facultad, nombre FROM facultades ORDER BY nombre ASC"))
+    res = await db.execute(SQL_FACULTADES)
     return {"ok": True, "data": [dict(r._mapping) for r in res.fetchall()]}
 
 @router.get("/niveles-riesgo", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor","docente"))])
 async def niveles_riesgo(db: AsyncSession = Depends(get_session)):
-    res = await db.execute(text("SELECT * FROM niveles_riesgo ORDER BY id_nivel_riesgo ASC"))
+    res = await db.execute(SQL_NIVELES_RIESGO)
     return {"ok": True, "data": [dict(r._mapping) for r in res.fetchall()]}
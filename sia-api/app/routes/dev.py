@@ -20,7 +20,9 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
-from ..security import hash_password, password_is_strong, password_strength_hint
+from ..security import hash_password_async, password_is_strong, password_strength_hint
+from .. import mi_cache
+from ..refresh_store import invalidar_perfil
 
 router = APIRouter(prefix="/dev", tags=["dev"])
 
@@ -173,6 +175,8 @@ async def _ensure_roles_exist(db: AsyncSession, roles: List[str]) -> None:
         )
 
 async def _set_user_roles(db: AsyncSession, id_usuario: int, roles: List[str]) -> None:
+    invalidar_perfil(id_usuario)
+    mi_cache.invalidar_usuario(id_usuario)
     await db.execute(text("DELETE FROM usuarios_roles WHERE id_usuario=:u"), {"u": id_usuario})
     if not roles:
         return
@@ -307,7 +311,7 @@ async def actualizar_usuario(id_usuario: int, payload: UsuarioUpdate, db: AsyncS
     if payload.contrasenia is not None:
         if not password_is_strong(payload.contrasenia):
             raise HTTPException(400, detail=password_strength_hint())
-        sets.append("contrasenia_hash=:h"); params["h"] = hash_password(payload.contrasenia)
+        sets.append("contrasenia_hash=:h"); params["h"] = await hash_password_async(payload.contrasenia)
     if payload.estado is not None:
         id_estado = await _estado_to_id(db, payload.estado)
         sets.append("id_estado_usuario=:e"); params["e"] = id_estado
@@ -324,6 +328,9 @@ async def actualizar_usuario(id_usuario: int, payload: UsuarioUpdate, db: AsyncS
         await _set_user_roles(db, id_usuario, payload.roles)
         await db.commit()
 
+    invalidar_perfil(id_usuario)
+    mi_cache.invalidar_usuario(id_usuario)
+
     row = (await db.execute(text("""
         SELECT u.id_usuario, u.correo, eu.nombre AS estado,
                COALESCE(GROUP_CONCAT(r.nombre), '') AS roles,
@@ -357,6 +364,8 @@ async def eliminar_usuario(id_usuario: int, db: AsyncSession = Depends(get_sessi
     await db.execute(text("DELETE FROM usuarios_roles WHERE id_usuario=:id"), {"id": id_usuario})
     res = await db.execute(text("DELETE FROM usuarios WHERE id_usuario=:id"), {"id": id_usuario})
     await db.commit()
+    invalidar_perfil(id_usuario)
+    mi_cache.invalidar_usuario(id_usuario)
     if res.rowcount == 0:
         raise HTTPException(404, detail="Usuario no encontrado")
     return {"ok": True}
@@ -423,6 +432,8 @@ async def actualizar_estudiante(id_estudiante: int, payload: EstudianteUpdate, d
             await db.rollback()
             raise HTTPException(400, detail=f"No se pudo actualizar estudiante: {ex}")
 
+    mi_cache.invalidar_identidades()
+    mi_cache.invalidar_estudiante(id_estudiante)
     row = (await db.execute(text("""
         SELECT e.id_estudiante, e.codigo_alumno,
                p.dni, p.apellido_paterno, p.apellido_materno, p.nombres,
@@ -439,6 +450,7 @@ async def actualizar_estudiante(id_estudiante: int, payload: EstudianteUpdate, d
 async def eliminar_estudiante(id_estudiante: int, db: AsyncSession = Depends(get_session), _=Depends(ensure_dev)):
     res = await db.execute(text("DELETE FROM estudiantes WHERE id_estudiante=:id"), {"id": id_estudiante})
     await db.commit()
+    mi_cache.invalidar_identidades()
     if res.rowcount == 0:
         raise HTTPException(404, detail="Estudiante no encontrado")
     return {"ok": True}
@@ -454,7 +466,7 @@ async def crear_usuario(payload: UsuarioCreate, db: AsyncSession = Depends(get_s
 
     # 2) estado de usuario
     id_estado = await _estado_to_id(db, payload.estado)
-    hashed = hash_password(payload.contrasenia)
+    hashed = await hash_password_async(payload.contrasenia)
 
     try:
         # 3) crear usuario
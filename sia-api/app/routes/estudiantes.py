@@ -2,10 +2,11 @@
 from __future__ import annotations
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 
-from ..db import get_session
+from ..db import get_read_session
 from ..deps import require_roles
+from ..queries import ConsultaFiltrada, consulta
+from ..respuestas import respuesta
 from ..schemas import ApiResponse
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
@@ -39,6 +40,88 @@ class ApiResponse(BaseModel):
 
 router = APIRouter(prefix="/estudiantes", tags=["estudiantes"])
 
+# ==========================
+# SQL
+# ==========================
+_LISTAR_FROM = """
+  FROM estudiantes e
+  LEFT JOIN personas p ON p.id_persona=e.id_persona
+  LEFT JOIN programas prog ON prog.id_programa=e.id_programa
+  LEFT JOIN puntajes_riesgo pr ON pr.id_estudiante=e.id_estudiante
+  LEFT JOIN niveles_riesgo nr ON nr.id_nivel_riesgo=pr.id_nivel_riesgo
+  WHERE 1=1
+"""
+
+_LISTAR_FILTROS = {
+    "prog": " AND e.id_programa=:prog",
+    "per": " AND pr.id_periodo=:per",
+    "niv": " AND nr.nombre=:niv",
+    # :term ya incluye los comodines (%...%)
+    "term": " AND (p.dni LIKE :term OR CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, p.nombres) LIKE :term)",
+}
+
+Q_LISTAR = ConsultaFiltrada(
+    "estudiantes.listar",
+    """
+  SELECT e.id_estudiante, e.codigo_alumno,
+         p.dni, p.apellido_paterno, p.apellido_materno, p.nombres,
+         prog.nombre AS programa,
+         pr.puntaje, nr.nombre AS nivel
+""" + _LISTAR_FROM,
+    _LISTAR_FILTROS,
+    " ORDER BY pr.puntaje IS NULL, pr.puntaje ASC, p.apellido_paterno ASC, p.apellido_materno ASC, p.nombres ASC"
+    " LIMIT :limit OFFSET :offset",
+)
+
+Q_CONTAR = ConsultaFiltrada(
+    "estudiantes.contar",
+    "SELECT COUNT(DISTINCT e.id_estudiante) " + _LISTAR_FROM,
+    _LISTAR_FILTROS,
+)
+
+SQL_DETALLE_ESTUDIANTE = consulta("estudiantes.detalle", """
+    SELECT e.id_estudiante, e.codigo_alumno, e.id_programa, e.anio_ingreso, e.id_estado_academico,
+           p.dni, p.apellido_paterno, p.apellido_materno, p.nombres,
+           prog.nombre AS programa
+    FROM estudiantes e
+    LEFT JOIN personas p ON p.id_persona=e.id_persona
+    LEFT JOIN programas prog ON prog.id_programa=e.id_programa
+    WHERE e.id_estudiante=:id
+""")
+
+SQL_DETALLE_RIESGOS = consulta("estudiantes.detalle_riesgos", """
+    SELECT pr.*, nr.nombre AS nivel
+    FROM puntajes_riesgo pr JOIN niveles_riesgo nr ON nr.id_nivel_riesgo=pr.id_nivel_riesgo
+    WHERE pr.id_estudiante=:id ORDER BY pr.creado_en DESC
+""")
+
+SQL_DETALLE_ALERTAS = consulta("estudiantes.detalle_alertas", """
+    SELECT a.*, ta.nombre AS tipo, s.nombre AS severidad
+    FROM alertas a JOIN tipos_alerta ta ON ta.id_tipo_alerta=a.id_tipo_alerta
+                   JOIN severidades s ON s.id_severidad=a.id_severidad
+    WHERE a.id_estudiante=:id ORDER BY a.creado_en DESC
+""")
+
+SQL_BUSCAR_POR_CODIGO = consulta("estudiantes.por_codigo", """
+    SELECT e.id_estudiante,
+           e.codigo_alumno,
+           e.id_programa,
+           e.anio_ingreso,
+           e.id_estado_academico,
+           p.dni,
+           p.apellido_paterno,
+           p.apellido_materno,
+           p.nombres,
+           prog.nombre AS programa
+    FROM estudiantes e
+    LEFT JOIN personas p ON p.id_persona = e.id_persona
+    LEFT JOIN programas prog ON prog.id_programa = e.id_programa
+    WHERE e.codigo_alumno LIKE :cod OR p.dni LIKE :cod OR p.apellido_paterno LIKE :cod
+    ORDER BY e.codigo_alumno
+    LIMIT :limit
+""")
+
+
 @router.get("/", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor","docente"))])
 async def listar(
     programa: int | None = Query(None),
@@ -51,89 +134,41 @@ async def listar(
     ),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=10, le=40, description="Cantidad de estudiantes por página"),
-    db: AsyncSession = Depends(get_session)
+    db: AsyncSession = Depends(get_read_session)
 ):
     if page_size not in {10, 20, 30, 40}:
         page_size = 20
 
-    sql_from = """
-      FROM estudiantes e
-      LEFT JOIN personas p ON p.id_persona=e.id_persona
-      LEFT JOIN programas prog ON prog.id_programa=e.id_programa
-      LEFT JOIN puntajes_riesgo pr ON pr.id_estudiante=e.id_estudiante
-      LEFT JOIN niveles_riesgo nr ON nr.id_nivel_riesgo=pr.id_nivel_riesgo
-      WHERE 1=1
-    """
-    filters_sql = ""
     params: dict[str, int | str] = {}
     if programa:
-        filters_sql += " AND e.id_programa=:prog"
         params["prog"] = programa
     if periodo:
-        filters_sql += " AND pr.id_periodo=:per"
         params["per"] = periodo
     if riesgo:
-        filters_sql += " AND nr.nombre=:niv"
         params["niv"] = riesgo
     if termino:
-        filters_sql += " AND (p.dni LIKE '%:term%' OR CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, p.nombres) LIKE '%:term%')"
         params["term"] = f"%{termino.strip()}%"
-    
+    activos = {"prog": bool(programa), "per": bool(periodo), "niv": bool(riesgo), "term": bool(termino)}
+
     offset = (page - 1) * page_size
-    data_query = text(
-        """
-      SELECT e.id_estudiante, e.codigo_alumno,
-             p.dni, p.apellido_paterno, p.apellido_materno, p.nombres,
-             prog.nombre AS programa,
-             pr.puntaje, nr.nombre AS nivel
-    """
-        + sql_from
-        + filters_sql
-        + " ORDER BY pr.puntaje IS NULL, pr.puntaje ASC, p.apellido_paterno ASC, p.apellido_materno ASC, p.nombres ASC"
-        + " LIMIT :limit OFFSET :offset"
-    )
     data_params = {**params, "limit": page_size, "offset": offset}
-    res = await db.execute(data_query, data_params)
-    rows = [dict(r._mapping) for r in res.fetchall()]
+    res = await db.execute(Q_LISTAR.variante(**activos), data_params)
+    rows = res.mappings().all()
 
-    count_query = text("SELECT COUNT(DISTINCT e.id_estudiante) " + sql_from + filters_sql)
-    total = (await db.execute(count_query, params)).scalar_one()
+    total = (await db.execute(Q_CONTAR.variante(**activos), params)).scalar_one()
 
-    return {
-        "ok": True,
-        "data": {
-            "items": rows,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-        },
-    }
+    return respuesta({
+        "items": rows,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+    })
 
 @router.get("/{id_estudiante}", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor"))])
-async def detalle(id_estudiante: int, db: AsyncSession = Depends(get_session)):
-    q1 = text("""
-      SELECT e.id_estudiante, e.codigo_alumno, e.id_programa, e.anio_ingreso, e.id_estado_academico,
-             p.dni, p.apellido_paterno, p.apellido_materno, p.nombres,
-             prog.nombre AS programa
-      FROM estudiantes e
-      LEFT JOIN personas p ON p.id_persona=e.id_persona
-      LEFT JOIN programas prog ON prog.id_programa=e.id_programa
-      WHERE e.id_estudiante=:id
-    """)
-    q2 = text("""
-      SELECT pr.*, nr.nombre AS nivel
-      FROM puntajes_riesgo pr JOIN niveles_riesgo nr ON nr.id_nivel_riesgo=pr.id_nivel_riesgo
-      WHERE pr.id_estudiante=:id ORDER BY pr.creado_en DESC
-    """)
-    q3 = text("""
-      SELECT a.*, ta.nombre AS tipo, s.nombre AS severidad
-      FROM alertas a JOIN tipos_alerta ta ON ta.id_tipo_alerta=a.id_tipo_alerta
-                     JOIN severidades s ON s.id_severidad=a.id_severidad
-      WHERE a.id_estudiante=:id ORDER BY a.creado_en DESC
-    """)
-    est = (await db.execute(q1, {"id": id_estudiante})).fetchone()
-    riesgos = (await db.execute(q2, {"id": id_estudiante})).fetchall()
-    alertas = (await db.execute(q3, {"id": id_estudiante})).fetchall()
+async def detalle(id_estudiante: int, db: AsyncSession = Depends(get_read_session)):
+    est = (await db.execute(SQL_DETALLE_ESTUDIANTE, {"id": id_estudiante})).fetchone()
+    riesgos = (await db.execute(SQL_DETALLE_RIESGOS, {"id": id_estudiante})).fetchall()
+    alertas = (await db.execute(SQL_DETALLE_ALERTAS, {"id": id_estudiante})).fetchall()
     return {"ok": True, "data": {
         "estudiante": dict(est._mapping) if est else None,
         "riesgos": [dict(r._mapping) for r in riesgos],
@@ -156,30 +191,12 @@ async def detalle_por_codigo(
         le=50,
         description="Maximo de alumnos a devolver (por defecto 20, maximo 50)",
     ),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
     busq_cod = f"%{codigo}%"
 
-    q1 = text("""
-      SELECT e.id_estudiante,
-             e.codigo_alumno,
-             e.id_programa,
-             e.anio_ingreso,
-             e.id_estado_academico,
-             p.dni,
-             p.apellido_paterno,
-             p.apellido_materno,
-             p.nombres,
-             prog.nombre AS programa
-      FROM estudiantes e
-      LEFT JOIN personas p ON p.id_persona = e.id_persona
-      LEFT JOIN programas prog ON prog.id_programa = e.id_programa
-      WHERE e.codigo_alumno LIKE :cod OR p.dni LIKE :cod OR p.apellido_paterno LIKE :cod
-      ORDER BY e.codigo_alumno
-      LIMIT :limit
-    """)
-
-    res = await db.execute(q1, {"cod": busq_cod, "limit": max_alumnos})
+
+    res = await db.execute(SQL_BUSCAR_POR_CODIGO, {"cod": busq_cod, "limit": max_alumnos})
     filas = res.fetchall()
 
     estudiantes = [dict(f._mapping) for f in filas]
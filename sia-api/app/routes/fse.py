@@ -1,34 +1,20 @@
 # app/routers/fse.py
 from __future__ import annotations
-from typing import Optional, List, Any, Mapping
+from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field, validator
-from sqlalchemy import text
-from sqlalchemy.engine import Row, RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..audit_middleware import anotar
 from ..db import get_session
 from ..deps import require_roles
+from ..queries import consulta
+from ..respuestas import respuesta
 from ..schemas import ApiResponse
 
 router = APIRouter(prefix="/fse", tags=["ficha_socioeconomica"])
 
-# ---------------------------
-# Utils: coerción a tipos JSON
-# ---------------------------
-def _coerce(obj: Any) -> Any:
-    """Convierte Row/RowMapping/listas anidadas a dict/list para que Pydantic pueda serializar."""
-    if obj is None:
-        return None
-    if isinstance(obj, (str, int, float, bool)):
-        return obj
-    if isinstance(obj, (Row, RowMapping, Mapping)):
-        return {k: _coerce(v) for k, v in dict(obj).items()}
-    if isinstance(obj, (list, tuple, set)):
-        return [_coerce(x) for x in obj]
-    return obj  # fallback (ya debe ser serializable)
-
 # ---------------------------
 # Schemas
 # ---------------------------
@@ -54,21 +40,21 @@ class RespuestasIn(BaseModel):
 # ---------------------------
 # SQL Snippets
 # ---------------------------
-SQL_EXISTE_ESTUDIANTE = text("SELECT 1 FROM estudiantes WHERE id_estudiante=:id LIMIT 1")
-SQL_EXISTE_PERIODO   = text("SELECT 1 FROM periodos_academicos WHERE id_periodo=:id LIMIT 1")
+SQL_EXISTE_ESTUDIANTE = consulta("fse.existe_estudiante", "SELECT 1 FROM estudiantes WHERE id_estudiante=:id LIMIT 1")
+SQL_EXISTE_PERIODO   = consulta("fse.existe_periodo", "SELECT 1 FROM periodos_academicos WHERE id_periodo=:id LIMIT 1")
 
-SQL_EXISTE_FICHA = text("""
+SQL_EXISTE_FICHA = consulta("fse.existe_ficha", """
 SELECT id_ficha FROM fichas_socioeconomicas
 WHERE id_estudiante=:est AND id_periodo=:per
 LIMIT 1
 """)
 
-SQL_INSERT_FICHA = text("""
+SQL_INSERT_FICHA = consulta("fse.insert_ficha", """
 INSERT INTO fichas_socioeconomicas (id_estudiante, id_periodo, observaciones)
 VALUES (:est, :per, :obs)
 """)
 
-SQL_SELECT_ID_FICHA_RECIENTE = text("""
+SQL_SELECT_ID_FICHA_RECIENTE = consulta("fse.select_id_ficha_reciente", """
 SELECT id_ficha
 FROM fichas_socioeconomicas
 WHERE id_estudiante=:est AND id_periodo=:per
@@ -76,34 +62,34 @@ ORDER BY id_ficha DESC
 LIMIT 1
 """)
 
-SQL_SELECT_FICHA = text("""
+SQL_SELECT_FICHA = consulta("fse.select_ficha", """
 SELECT id_ficha, id_estudiante, id_periodo
 FROM fichas_socioeconomicas
 WHERE id_ficha=:idf
 LIMIT 1
 """)
 
-SQL_LIST_ITEMS = text("""
+SQL_LIST_ITEMS = consulta("fse.list_items", """
 SELECT id_item, codigo, nombre, id_tipo_item, obligatorio, peso_puntos
 FROM items_fse
 ORDER BY id_item
 """)
 
-SQL_ITEM_BY_COD = text("""
+SQL_ITEM_BY_COD = consulta("fse.item_by_cod", """
 SELECT i.id_item, i.codigo, i.id_tipo_item, i.peso_puntos
 FROM items_fse i
 WHERE i.codigo=:cod
 LIMIT 1
 """)
 
-SQL_OPCION_BY_ID = text("""
+SQL_OPCION_BY_ID = consulta("fse.opcion_by_id", """
 SELECT id_opcion, id_item, etiqueta, valor_catalogo, puntos
 FROM opciones_item_fse
 WHERE id_opcion=:idop
 LIMIT 1
 """)
 
-SQL_OPCIONES_BY_COD = text("""
+SQL_OPCIONES_BY_COD = consulta("fse.opciones_by_cod", """
 SELECT o.id_opcion, o.id_item, o.etiqueta, o.valor_catalogo, o.puntos
 FROM opciones_item_fse o
 JOIN items_fse i ON i.id_item=o.id_item
@@ -112,7 +98,7 @@ ORDER BY o.id_opcion
 """)
 
 # UNIQUE (id_ficha, id_item) requerido en respuestas_fse
-SQL_UPSERT_RESP = text("""
+SQL_UPSERT_RESP = consulta("fse.upsert_resp", """
 INSERT INTO respuestas_fse (id_ficha, id_item, id_opcion, valor_numero, valor_texto, puntos)
 VALUES (:idf, :idi, :idop, :vnum, :vtxt, :pts)
 ON DUPLICATE KEY UPDATE
@@ -123,7 +109,7 @@ ON DUPLICATE KEY UPDATE
 """)
 
 # Recalcular en la misma transacción (sin SP)
-SQL_UPDATE_TOTAL = text("""
+SQL_UPDATE_TOTAL = consulta("fse.update_total", """
 UPDATE fichas_socioeconomicas f
 SET f.total_puntos = (
   SELECT COALESCE(SUM(r.puntos), 0)
@@ -133,7 +119,7 @@ SET f.total_puntos = (
 WHERE f.id_ficha=:idf
 """)
 
-SQL_UPDATE_CLAS = text("""
+SQL_UPDATE_CLAS = consulta("fse.update_clas", """
 UPDATE fichas_socioeconomicas f
 JOIN clasificaciones_fse c
   ON f.total_puntos BETWEEN c.puntos_min AND c.puntos_max
@@ -141,7 +127,7 @@ SET f.id_clasificacion=c.id_clasificacion
 WHERE f.id_ficha=:idf
 """)
 
-SQL_RESUMEN_FICHA = text("SELECT * FROM v_resumen_ficha WHERE id_ficha=:idf LIMIT 1")
+SQL_RESUMEN_FICHA = consulta("fse.resumen_ficha", "SELECT * FROM v_resumen_ficha WHERE id_ficha=:idf LIMIT 1")
 
 # ============================================================
 # Endpoints
@@ -155,7 +141,7 @@ SQL_RESUMEN_FICHA = text("SELECT * FROM v_resumen_ficha WHERE id_ficha=:idf LIMI
 )
 async def listar_items(db: AsyncSession = Depends(get_session)):
     rows = (await db.execute(SQL_LIST_ITEMS)).mappings().all()
-    return {"ok": True, "data": _coerce(rows)}
+    return respuesta(rows)
 
 @router.get(
     "/items/{codigo}/opciones",
@@ -170,7 +156,7 @@ async def opciones_por_codigo(codigo: str, db: AsyncSession = Depends(get_sessio
     if int(it["id_tipo_item"]) != 1:
         raise HTTPException(status_code=400, detail=f"El ítem {codigo} no es de tipo catálogo")
     rows = (await db.execute(SQL_OPCIONES_BY_COD, {"cod": it["codigo"]})).mappings().all()
-    return {"ok": True, "data": _coerce(rows)}
+    return respuesta(rows)
 
 @router.post(
     "/{id_estudiante}/nueva",
@@ -182,6 +168,7 @@ async def opciones_por_codigo(codigo: str, db: AsyncSession = Depends(get_sessio
 async def crear_ficha(
     id_estudiante: int,
     payload: FichaNuevaIn,
+    request: Request,
     db: AsyncSession = Depends(get_session),
 ):
     # Validaciones
@@ -205,6 +192,7 @@ async def crear_ficha(
 
     row = (await db.execute(SQL_SELECT_ID_FICHA_RECIENTE, {"est": id_estudiante, "per": payload.id_periodo})).fetchone()
     id_ficha = int(row.id_ficha)
+    anotar(request, id_entidad=id_ficha, id_estudiante=id_estudiante, id_periodo=payload.id_periodo)
 
     return {"ok": True, "message": "Ficha creada", "data": {"id_ficha": id_ficha, "id_estudiante": id_estudiante, "id_periodo": payload.id_periodo}}
 
@@ -293,4 +281,4 @@ async def resumen_ficha(id_ficha: int, db: AsyncSession = Depends(get_session)):
     row = (await db.execute(SQL_RESUMEN_FICHA, {"idf": id_ficha})).mappings().first()
     if not row:
         raise HTTPException(status_code=404, detail="Resumen no disponible (ficha inexistente o sin datos)")
-    return {"ok": True, "data": _coerce(row)}
+    return respuesta(row)
@@ -0,0 +1,87 @@
+# app/routers/ingesta.py
+from __future__ import annotations
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..audit_middleware import anotar
+from ..db import get_read_session, get_session
+from ..deps import require_roles
+from ..ingesta import ErrorIngesta, formato_de
+from .. import ingesta_asistencias, ingesta_calificaciones
+from ..queries import consulta
+from ..schemas import ApiResponse
+
+router = APIRouter(prefix="/ingesta", tags=["ingesta"])
+
+SQL_TRABAJOS = consulta("ingesta.trabajos", """
+    SELECT t.id_trabajo, fa.nombre AS fuente, et.nombre AS estado, t.inicio, t.fin, t.detalles
+    FROM trabajos_sincronizacion t
+    JOIN fuentes_asistencia fa ON fa.id_fuente_asistencia = t.id_fuente_datos
+    JOIN estados_trabajo et    ON et.id_estado_trabajo = t.id_estado_trabajo
+    ORDER BY t.id_trabajo DESC
+    LIMIT :limite
+""")
+
+
+# ==========================
+# POST /ingesta/asistencias — archivo del SGA en el cuerpo (CSV o NDJSON)
+# ==========================
+@router.post("/asistencias", response_model=ApiResponse, dependencies=[Depends(require_roles("admin"))])
+async def ingerir_asistencias(
+    request: Request,
+    fuente: str = Query("scraping_sga", description="Nombre en fuentes_asistencia"),
+    formato: Optional[Literal["csv", "ndjson"]] = Query(None, description="Por defecto, según Content-Type"),
+    archivo: Optional[str] = Query(None, description="Nombre del archivo de origen (solo para el registro)"),
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    El cuerpo se procesa en streaming (sin multipart): p. ej.
+    curl --data-binary @asistencias.csv -H 'Content-Type: text/csv' .../api/ingesta/asistencias
+    """
+    try:
+        resumen = await ingesta_asistencias.ingerir(
+            db, request.stream(), formato or formato_de(archivo, request.headers.get("content-type")),
+            fuente=fuente, origen=archivo,
+        )
+    except ErrorIngesta as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    anotar(request, id_entidad=resumen["id_trabajo"], aplicadas=resumen["aplicadas"], fuente=fuente)
+    return {"ok": True, "data": resumen}
+
+
+# ==========================
+# POST /ingesta/calificaciones — notas de un periodo (CSV o NDJSON)
+# ==========================
+@router.post("/calificaciones", response_model=ApiResponse, dependencies=[Depends(require_roles("admin"))])
+async def ingerir_calificaciones(
+    request: Request,
+    periodo: str = Query(..., description="Nombre (2025-1) o id del periodo"),
+    fuente: str = Query("scraping_sga", description="Nombre en fuentes_asistencia"),
+    formato: Optional[Literal["csv", "ndjson"]] = Query(None, description="Por defecto, según Content-Type"),
+    archivo: Optional[str] = Query(None, description="Nombre del archivo de origen (solo para el registro)"),
+    db: AsyncSession = Depends(get_session),
+):
+    """Columnas: codigo_alumno, curso, nota_parcial, nota_final. Mantiene resumen_calificaciones_periodo."""
+    try:
+        resumen = await ingesta_calificaciones.ingerir(
+            db, request.stream(), periodo, formato or formato_de(archivo, request.headers.get("content-type")),
+            fuente=fuente, origen=archivo,
+        )
+    except ErrorIngesta as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    anotar(request, id_entidad=resumen["id_trabajo"], aplicadas=resumen["aplicadas"], periodo=periodo)
+    return {"ok": True, "data": resumen}
+
+
+# ==========================
+# GET /ingesta/trabajos — últimas corridas
+# ==========================
+@router.get("/trabajos", response_model=ApiResponse, dependencies=[Depends(require_roles("admin", "autoridad"))])
+async def listar_trabajos(
+    limite: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_session),
+):
+    res = await db.execute(SQL_TRABAJOS, {"limite": limite})
+    return {"ok": True, "data": [dict(r) for r in res.mappings().all()]}
@@ -1,20 +1,24 @@
 # app/routers/mi.py
 from __future__ import annotations
 
+import asyncio
 from decimal import Decimal
 from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
+from .. import mi_cache
+from ..db import SessionLocal, get_session
+from ..ingesta_calificaciones import resumen_periodo
 from ..deps import require_roles
+from ..queries import consulta
 from ..schemas import ApiResponse
 
 router = APIRouter(prefix="/mi", tags=["resumen_notas"])
 
-SQL_ESTUDIANTE_DESDE_USUARIO = text(
+SQL_ESTUDIANTE_DESDE_USUARIO = consulta(
+    "mi.estudiante_desde_usuario",
     """
     SELECT
         e.id_estudiante,
@@ -34,7 +38,8 @@ SQL_ESTUDIANTE_DESDE_USUARIO = text(
     """
 )
 
-SQL_RIESGO_RECIENTE = text(
+SQL_RIESGO_RECIENTE = consulta(
+    "mi.riesgo_reciente",
     """
     SELECT
         pr.id_periodo,
@@ -52,7 +57,8 @@ SQL_RIESGO_RECIENTE = text(
     """
 )
 
-SQL_PERIODOS_DISPONIBLES = text(
+SQL_PERIODOS_DISPONIBLES = consulta(
+    "mi.periodos_disponibles",
     """
     SELECT DISTINCT
         pa.id_periodo,
@@ -65,7 +71,8 @@ SQL_PERIODOS_DISPONIBLES = text(
     """
 )
 
-SQL_CALIFICACIONES = text(
+SQL_CALIFICACIONES = consulta(
+    "mi.calificaciones",
     """
     SELECT
         c.nombre AS curso,
@@ -86,6 +93,17 @@ SQL_CALIFICACIONES = text(
 )
 
 
+# Promedio ponderado por créditos y conteos ya calculados (migraciones/003)
+SQL_RESUMEN_CALIFICACIONES = consulta(
+    "mi.resumen_calificaciones",
+    """
+    SELECT promedio, aprobados, desaprobados, pendientes
+    FROM resumen_calificaciones_periodo
+    WHERE id_estudiante = :est AND id_periodo = :per
+    """
+)
+
+
 def _as_float(value: Any) -> Optional[float]:
     if value is None:
         return None
@@ -99,11 +117,15 @@ def _as_float(value: Any) -> Optional[float]:
         return None
 
 
-async def _student_from_user(db: AsyncSession, user_id: int) -> Dict[str, Any]:
+async def _student_from_user(db: AsyncSession, user: Dict[str, Any]) -> Dict[str, Any]:
+    user_id = int(user["id_usuario"])
+    cacheado = mi_cache.estudiante_de_usuario(user_id)
+    if cacheado is not None:
+        return cacheado
     row = (await db.execute(SQL_ESTUDIANTE_DESDE_USUARIO, {"uid": user_id})).mappings().first()
     if not row:
         raise HTTPException(status_code=404, detail="No se encontró un estudiante asociado a su cuenta")
-    return {
+    estudiante = {
         "id_estudiante": int(row["id_estudiante"]),
         "codigo_alumno": row["codigo_alumno"],
         "id_programa": row["id_programa"],
@@ -113,6 +135,28 @@ async def _student_from_user(db: AsyncSession, user_id: int) -> Dict[str, Any]:
         "apellido_materno": row["apellido_materno"],
         "nombres": row["nombres"],
     }
+    mi_cache.guardar_estudiante(user_id, estudiante, user.get("exp"))
+    return estudiante
+
+
+async def _consulta_corta(stmt, params: Dict[str, Any]):
+    async with SessionLocal() as s:
+        return (await s.execute(stmt, params)).mappings().all()
+
+
+async def _riesgo_y_periodos(db: AsyncSession, id_estudiante: int, limite_periodos: int):
+    """
+    Ambas consultas en paralelo, cada una en su propia sesión corta (una AsyncSession
+    no admite ejecuciones concurrentes). Antes se devuelve la conexión de `db` al pool:
+    así ninguna tarea retiene una conexión mientras espera otra y el pool no se
+    bloquea con muchos estudiantes a la vez.
+    """
+    await db.rollback()
+    riesgo_rows, periodos_rows = await asyncio.gather(
+        _consulta_corta(SQL_RIESGO_RECIENTE, {"est": id_estudiante}),
+        _consulta_corta(SQL_PERIODOS_DISPONIBLES, {"est": id_estudiante, "limit": limite_periodos}),
+    )
+    return (riesgo_rows[0] if riesgo_rows else None), periodos_rows
 
 
 @router.get("/resumen", response_model=ApiResponse)
@@ -126,8 +170,13 @@ async def mi_resumen(
     user=Depends(require_roles("estudiante")),
     db: AsyncSession = Depends(get_session),
 ):
-    estudiante = await _student_from_user(db, int(user["id_usuario"]))
-    riesgo_row = (await db.execute(SQL_RIESGO_RECIENTE, {"est": estudiante["id_estudiante"]})).mappings().first()
+    estudiante = await _student_from_user(db, user)
+    id_estudiante = estudiante["id_estudiante"]
+    clave_cache, cacheado = mi_cache.respuesta(id_estudiante, "resumen", limite_periodos)
+    if cacheado is not None:
+        return {"ok": True, "data": cacheado}
+
+    riesgo_row, period_rows = await _riesgo_y_periodos(db, id_estudiante, limite_periodos)
     riesgo_actual = None
     if riesgo_row:
         riesgo_actual = {
@@ -139,12 +188,6 @@ async def mi_resumen(
             "actualizado_en": riesgo_row["actualizado_en"],
         }
 
-    period_rows = (
-        await db.execute(
-            SQL_PERIODOS_DISPONIBLES,
-            {"est": estudiante["id_estudiante"], "limit": limite_periodos},
-        )
-    ).mappings().all()
     periodos = [
         {"id_periodo": int(row["id_periodo"]), "nombre": row["nombre"]}
         for row in period_rows
@@ -155,15 +198,14 @@ async def mi_resumen(
     if sugerido is None and periodos:
         sugerido = periodos[0]["id_periodo"]
 
-    return {
-        "ok": True,
-        "data": {
-            "estudiante": estudiante,
-            "riesgo_actual": riesgo_actual,
-            "periodos_disponibles": periodos,
-            "periodo_sugerido": sugerido,
-        },
+    data = {
+        "estudiante": estudiante,
+        "riesgo_actual": riesgo_actual,
+        "periodos_disponibles": periodos,
+        "periodo_sugerido": sugerido,
     }
+    mi_cache.guardar_respuesta(clave_cache, data)
+    return {"ok": True, "data": data}
 
 
 @router.get("/calificaciones", response_model=ApiResponse)
@@ -178,11 +220,16 @@ async def mis_calificaciones(
     user=Depends(require_roles("estudiante")),
     db: AsyncSession = Depends(get_session),
 ):
-    estudiante = await _student_from_user(db, int(user["id_usuario"]))
+    estudiante = await _student_from_user(db, user)
+    id_estudiante = estudiante["id_estudiante"]
+    clave_cache, cacheado = mi_cache.respuesta(id_estudiante, "calificaciones", id_periodo, limite)
+    if cacheado is not None:
+        return {"ok": True, "data": cacheado}
+
     rows = (
         await db.execute(
             SQL_CALIFICACIONES,
-            {"est": estudiante["id_estudiante"], "per": id_periodo, "limit": limite},
+            {"est": id_estudiante, "per": id_periodo, "limit": limite},
         )
     ).mappings().all()
 
@@ -195,26 +242,22 @@ async def mis_calificaciones(
         }
         for row in rows
     ]
-    notas_validas = [nota for nota in (item["nota_final"] for item in detalle) if nota is not None]
-    promedio = round(sum(notas_validas) / len(notas_validas), 2) if notas_validas else None
-
-    resumen = {"aprobados": 0, "desaprobados": 0, "pendientes": 0}
-    for item in detalle:
-        estado = (item["estado"] or "").lower()
-        if "desaprob" in estado:
-            resumen["desaprobados"] += 1
-        elif "pend" in estado:
-            resumen["pendientes"] += 1
-        elif "aprob" in estado:
-            resumen["aprobados"] += 1
-        else:
-            resumen["desaprobados"] += 1
-
-    return {
-        "ok": True,
-        "data": {
-            "detalle": detalle,
-            "promedio_general": promedio,
-            "resumen": resumen,
-        },
+    fila_resumen = (
+        await db.execute(SQL_RESUMEN_CALIFICACIONES, {"est": id_estudiante, "per": id_periodo})
+    ).mappings().first()
+    if fila_resumen is None and detalle:
+        # Sin fila en el resumen (p. ej. antes de migraciones/007): se agrega el detalle listado
+        fila_resumen = resumen_periodo((d["nota_final"], d["creditos"] or 0) for d in detalle)
+    promedio = _as_float(fila_resumen["promedio"]) if fila_resumen else None
+    resumen = {
+        clave: int(fila_resumen[clave]) if fila_resumen else 0
+        for clave in ("aprobados", "desaprobados", "pendientes")
+    }
+
+    data = {
+        "detalle": detalle,
+        "promedio_general": promedio,
+        "resumen": resumen,
     }
+    mi_cache.guardar_respuesta(clave_cache, data)
+    return {"ok": True, "data": data}
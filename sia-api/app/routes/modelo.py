@@ -1,94 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pathlib import Path
-import joblib
+import asyncio, json
+from typing import Literal, Optional
+
 import numpy as np
 
-from ..deps import require_roles
-from ..schemas import ApiResponse, DesercionRequest, DesercionResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..audit_middleware import anotar
+from ..db import get_read_session, get_session
+from ..deps import get_current_user, require_roles
+from .. import drift, explicacion, features, modelo_registro, prediccion_cache, prediccion_lotes, simulacion
+from ..modelo_registro import ModeloCargado, ModeloNoDisponible
+from ..queries import ConsultaFiltrada
+from ..respuestas import respuesta
+from ..schemas import ApiResponse, DesercionRequest, DesercionResponse, SimulacionRequest
+from .tutorias import _autoriza_gestion_tutorias
 
 router = APIRouter(prefix="/modelo", tags=["modelos"])
 
-# === CARGA DEL MODELO ===
-MODEL_PATH = (
-    Path(__file__).resolve().parent.parent
-    / "modelos"
-    / "modelo_desercion_optimizado.pkl"
+Q_PREDICCIONES = ConsultaFiltrada(
+    "modelo.predicciones",
+    """
+      SELECT pd.id_estudiante,
+             e.codigo_alumno,
+             CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS nombre_visible,
+             e.id_programa, prog.nombre AS programa,
+             pd.probabilidad, pd.prediccion, nr.nombre AS nivel, pd.version_modelo,
+             pd.promedio, pd.asistencia, pd.cursos_matriculados, pd.cursos_desaprobados, pd.factores_json,
+             pd.calculado_en
+      FROM predicciones_desercion pd
+      JOIN estudiantes e ON e.id_estudiante=pd.id_estudiante
+      LEFT JOIN personas p ON p.id_persona=e.id_persona
+      LEFT JOIN programas prog ON prog.id_programa=e.id_programa
+      JOIN niveles_riesgo nr ON nr.id_nivel_riesgo=pd.id_nivel_riesgo
+      WHERE pd.id_periodo=:per
+    """,
+    {"prog": " AND e.id_programa=:prog", "nivel": " AND LOWER(nr.nombre)=:nivel", "est": " AND pd.id_estudiante=:est"},
+    " ORDER BY pd.probabilidad DESC, pd.id_estudiante LIMIT :limite",
+)
+
+# Features de la cohorte con los mismos valores por defecto que el puntaje por lotes
+Q_COHORTE = ConsultaFiltrada(
+    "modelo.simulacion_cohorte",
+    """
+      SELECT DISTINCT a.id_estudiante, e.codigo_alumno,
+             CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS nombre_visible,
+             COALESCE(r.promedio, 0)         AS promedio,
+             COALESCE(va.asistencia_pct, 0)  AS asistencia,
+             COALESCE(r.cursos, 0)           AS cursos_matriculados,
+             COALESCE(r.desaprobados, 0)     AS cursos_desaprobados
+      FROM asignaciones_tutoria a
+      JOIN estudiantes e ON e.id_estudiante=a.id_estudiante
+      LEFT JOIN personas p ON p.id_persona=e.id_persona
+      LEFT JOIN resumen_calificaciones_periodo r
+             ON r.id_estudiante=a.id_estudiante AND r.id_periodo=a.id_periodo
+      LEFT JOIN v_asistencia_periodo va
+             ON va.id_estudiante=a.id_estudiante AND va.id_periodo=a.id_periodo
+      WHERE a.id_periodo=:per
+    """,
+    {"tutor": " AND a.id_tutor=:tutor"},
+    " ORDER BY a.id_estudiante LIMIT :limite",
 )
 
-try:
-    model_desercion = joblib.load(MODEL_PATH)
-    print("[OK] Modelo de deserción cargado correctamente")
-except Exception as exc:
-    print(f"[WARN] No se pudo cargar el modelo de deserción: {exc}")
-    model_desercion = None
+Q_MONITOREO = ConsultaFiltrada(
+    "modelo.monitoreo",
+    """
+      SELECT mm.id_periodo, pa.nombre AS periodo, mm.version_modelo, mm.estudiantes, mm.referencia,
+             mm.psi_max, mm.estado, mm.perfil_json, mm.drift_json, mm.calculado_en
+      FROM monitoreo_modelo mm
+      JOIN periodos_academicos pa ON pa.id_periodo=mm.id_periodo
+      WHERE 1=1
+    """,
+    {"per": " AND mm.id_periodo=:per"},
+    " ORDER BY mm.id_periodo, mm.version_modelo",
+)
 
 
 def _predecir_desercion(
+    modelo: ModeloCargado,
     promedio: float,
     asistencia: float,
     cursos_matriculados: int,
     cursos_desaprobados: int,
 ):
-    
-    carga_baja = 1 if cursos_matriculados <= 2 else 0
-    cursos_aprobados = cursos_matriculados - cursos_desaprobados
-
-    tasa_desaprob = cursos_desaprobados / (cursos_matriculados if cursos_matriculados > 0 else 1)
-    tasa_desaprob = max(0, min(1, tasa_desaprob))
-
-    sin_desaprob = 1 if cursos_desaprobados == 0 else 0
-    rendimiento_global = promedio * (asistencia / 100.0)
-    carga_x_rend = cursos_matriculados * promedio
-
-    X_nuevo = np.array([[
-        promedio,
-        asistencia,
-        cursos_matriculados,
-        cursos_desaprobados,
-        carga_baja,
-        cursos_aprobados,
-        tasa_desaprob,
-        sin_desaprob,
-        rendimiento_global,
-        carga_x_rend,
-    ]])
-
-    prob = float(model_desercion.predict_proba(X_nuevo)[0, 1])
-    pred = int(prob >= 0.7)
-
-    if prob >= 0.7:
-        nivel = "ALTO"
-    elif prob >= 0.4:
-        nivel = "MEDIO"
-    else:
-        nivel = "BAJO"
+    X_nuevo = features.fila(promedio, asistencia, cursos_matriculados, cursos_desaprobados)
+
+    prob = float(modelo.probabilidades(X_nuevo)[0])
+    pred = int(prob >= modelo.umbral_alto)
 
-    return pred, prob, nivel
+    return pred, prob, modelo.nivel(prob)
 
 @router.post(
     "/modelo-desercion",
     response_model=ApiResponse,  # o ApiResponse[DesercionResponse] si usas genéricos
     dependencies=[Depends(require_roles("admin", "autoridad", "tutor"))],
 )
-async def predecir_desercion_endpoint(payload: DesercionRequest):
+async def predecir_desercion_endpoint(payload: DesercionRequest, explicar: bool = False):
     
-    if model_desercion is None:
+    try:
+        # Referencia propia: un cambio de versión en curso no afecta este request
+        modelo = await modelo_registro.obtener()
+    except ModeloNoDisponible:
         raise HTTPException(
             status_code=500,
             detail="El modelo de deserción no está disponible en el servidor.",
         )
 
-    pred, prob, nivel = _predecir_desercion(
-        promedio=payload.promedio,
-        asistencia=payload.asistencia,
-        cursos_matriculados=payload.cursos_matriculados,
-        cursos_desaprobados=payload.cursos_desaprobados,
+    # El modelo se evalúa sobre las features cuantizadas: un acierto de caché da el mismo resultado
+    entrada = prediccion_cache.cuantizar(
+        payload.promedio, payload.asistencia, payload.cursos_matriculados, payload.cursos_desaprobados,
     )
+    prob = prediccion_cache.obtener(modelo.version, entrada)
+    if prob is None:
+        pred, prob, nivel = _predecir_desercion(modelo, *entrada)
+        prediccion_cache.guardar(modelo.version, entrada, prob)
+    else:
+        pred, nivel = int(prob >= modelo.umbral_alto), modelo.nivel(prob)
+
+    # Los factores no pasan por la caché: se piden al abrir el detalle, no en cada consulta
+    factores = None
+    if explicar:
+        factores = (explicacion.explicar(modelo, features.fila(*entrada)) or [None])[0]
 
     data = DesercionResponse(
         prediccion=pred,
         probabilidad=prob,
         nivel=nivel,
+        version=modelo.version,
+        factores=factores,
     )
 
     return {
@@ -96,3 +135,188 @@ async def predecir_desercion_endpoint(payload: DesercionRequest):
         "data": data.model_dump(),
         "message": None,
     }
+
+
+# ==========================
+# GET /modelo/versiones — registro de versiones y la activa en este proceso
+# ==========================
+@router.get("/versiones", response_model=ApiResponse, dependencies=[Depends(require_roles("admin"))])
+async def listar_versiones():
+    return {"ok": True, "data": {"estado": modelo_registro.estado(), "versiones": modelo_registro.versiones()}}
+
+
+# ==========================
+# POST /modelo/versiones/{version}/activar — cambio en caliente
+# ==========================
+@router.post(
+    "/versiones/{version}/activar",
+    response_model=ApiResponse,
+    dependencies=[Depends(require_roles("admin"))],
+)
+async def activar_version(version: str, request: Request):
+    try:
+        modelo_registro.leer_meta(version)
+    except (ValueError, ModeloNoDisponible) as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    try:
+        anterior, nuevo = await modelo_registro.activar(version)
+    except Exception as exc:
+        raise HTTPException(status_code=422, detail=f"No se pudo cargar la versión {version}: {exc}")
+    prediccion_cache.invalidar(nuevo.version)
+    anotar(request, version=version, anterior=anterior)
+    return {"ok": True, "data": {
+        "version": nuevo.version,
+        "anterior": anterior,
+        "segundos_carga": nuevo.segundos_carga,
+        "meta": nuevo.meta,
+    }}
+
+
+# ==========================
+# GET /modelo/predicciones — probabilidades guardadas por el puntaje por lotes
+# ==========================
+@router.get(
+    "/predicciones",
+    response_model=ApiResponse,
+    dependencies=[Depends(require_roles("admin", "autoridad", "tutor"))],
+)
+async def listar_predicciones(
+    id_periodo: int,
+    id_programa: Optional[int] = None,
+    nivel: Optional[Literal["bajo", "medio", "alto"]] = None,
+    id_estudiante: Optional[int] = None,
+    limite: int = Query(500, ge=1, le=20000),
+    db: AsyncSession = Depends(get_read_session),
+):
+    params = {"per": id_periodo, "limite": limite}
+    if id_programa:
+        params["prog"] = id_programa
+    if nivel:
+        params["nivel"] = nivel
+    if id_estudiante:
+        params["est"] = id_estudiante
+    res = await db.execute(
+        Q_PREDICCIONES.variante(prog=bool(id_programa), nivel=bool(nivel), est=bool(id_estudiante)), params,
+    )
+    registros = [dict(r._mapping) for r in res.fetchall()]
+    for registro in registros:
+        # Factores guardados por el puntaje por lotes (app/explicacion.py)
+        factores = registro.pop("factores_json")
+        registro["factores"] = json.loads(factores) if isinstance(factores, (str, bytes)) else factores
+    # Decimal (probabilidad, promedio, asistencia) -> número en orjson
+    return respuesta(registros)
+
+
+# ==========================
+# POST /modelo/predicciones/recalcular — puntaje por lotes de un periodo
+# ==========================
+@router.post(
+    "/predicciones/recalcular",
+    response_model=ApiResponse,
+    dependencies=[Depends(require_roles("admin", "autoridad"))],
+)
+async def recalcular_predicciones(id_periodo: int, request: Request, db: AsyncSession = Depends(get_session)):
+    """Lo mismo que el cron (python -m app.prediccion_lotes); útil tras publicar notas."""
+    try:
+        resumen = await prediccion_lotes.puntuar_periodo(db, id_periodo)
+    except ModeloNoDisponible as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+    anotar(request, id_periodo=id_periodo, version=resumen["version_modelo"], estudiantes=resumen["estudiantes"])
+    return {"ok": True, "data": resumen}
+
+
+# ==========================
+# GET /modelo/monitoreo — distribuciones y drift por periodo (python -m app.monitoreo)
+# ==========================
+@router.get(
+    "/monitoreo",
+    response_model=ApiResponse,
+    dependencies=[Depends(require_roles("admin", "autoridad"))],
+)
+async def listar_monitoreo(id_periodo: Optional[int] = None, db: AsyncSession = Depends(get_read_session)):
+    params = {"per": id_periodo} if id_periodo else {}
+    res = await db.execute(Q_MONITOREO.variante(per=bool(id_periodo)), params)
+    registros = []
+    for r in res.fetchall():
+        registro = dict(r._mapping)
+        perfil = registro.pop("perfil_json")
+        detalle = registro.pop("drift_json")
+        registro["perfil"] = json.loads(perfil) if isinstance(perfil, (str, bytes)) else perfil
+        registro["drift"] = (json.loads(detalle) if isinstance(detalle, (str, bytes)) else detalle) or {}
+        if registro["psi_max"] is not None:
+            registro["psi_max"] = float(registro["psi_max"])
+        registros.append(registro)
+    umbrales = {"psi_moderado": drift.PSI_MODERADO, "psi_significativo": drift.PSI_SIGNIFICATIVO}
+    bordes = {k: v.tolist() for k, v in drift.BORDES.items()}
+    return {"ok": True, "data": {"umbrales": umbrales, "bordes": bordes, "periodos": registros}}
+
+
+# ==========================
+# POST /modelo/simulacion — "qué pasaría si" sobre la cohorte de un tutor
+# ==========================
+@router.post("/simulacion", response_model=ApiResponse)
+async def simular_cohorte(
+    payload: SimulacionRequest,
+    db: AsyncSession = Depends(get_session),
+    rdb: AsyncSession = Depends(get_read_session),
+    user=Depends(get_current_user),
+):
+    """
+    Escenarios sobre los asignados (asignaciones_tutoria) del periodo: todas las
+    filas perturbadas se puntúan en una sola llamada al modelo (app/simulacion.py).
+    """
+    auth = await _autoriza_gestion_tutorias(db, user)
+    id_tutor = payload.id_tutor
+    if not auth["is_adminlike"]:
+        if id_tutor not in (None, auth["id_tutor_tabla"]):
+            raise HTTPException(status_code=403, detail="Solo puede simular sobre su propia cohorte.")
+        id_tutor = auth["id_tutor_tabla"]
+
+    try:
+        modelo = await modelo_registro.obtener()
+    except ModeloNoDisponible:
+        raise HTTPException(status_code=500, detail="El modelo de deserción no está disponible en el servidor.")
+
+    escenarios = [e.model_dump() for e in payload.escenarios]
+    max_estudiantes = simulacion.SIMULACION_MAX_FILAS // (len(escenarios) + 1)
+    params = {"per": payload.id_periodo, "limite": max_estudiantes + 1}
+    if id_tutor:
+        params["tutor"] = id_tutor
+    filas = (await rdb.execute(Q_COHORTE.variante(tutor=bool(id_tutor)), params)).fetchall()
+    if len(filas) > max_estudiantes:
+        raise HTTPException(
+            status_code=422,
+            detail=f"La cohorte supera {max_estudiantes} estudiantes para {len(escenarios)} escenarios; "
+                   "filtre por tutor o use menos escenarios.",
+        )
+
+    data = {"id_periodo": payload.id_periodo, "id_tutor": id_tutor, "version": modelo.version,
+            "estudiantes": len(filas), "base": None, "escenarios": [], "detalle": []}
+    if not filas:
+        return {"ok": True, "data": data}
+
+    base = np.array([f[3:7] for f in filas], dtype=np.float64)
+    # Miles de filas: fuera del event loop
+    prob = await asyncio.to_thread(simulacion.simular, modelo, base, escenarios)
+
+    agregados = simulacion.resumen(modelo, prob)
+
+    def fila_agregada(i: int) -> dict:
+        return {
+            "probabilidad_media": round(float(agregados["probabilidad_media"][i]), 5),
+            "niveles": {n: int(agregados[n][i]) for n in ("bajo", "medio", "alto")},
+        }
+
+    data["base"] = fila_agregada(0)
+    data["escenarios"] = [
+        {"nombre": e["nombre"], "cambios": e["cambios"], **fila_agregada(i),
+         "delta_medio": round(float(agregados["delta_medio"][i]), 5),
+         "mejoran": int(agregados["mejoran"][i]), "empeoran": int(agregados["empeoran"][i])}
+        for i, e in enumerate(escenarios, start=1)
+    ]
+    if payload.detalle:
+        data["detalle"] = [
+            {"id_estudiante": f[0], "codigo_alumno": f[1], "nombre_visible": f[2], **d}
+            for f, d in zip(filas, simulacion.detalle(modelo, prob))
+        ]
+    return {"ok": True, "data": data}
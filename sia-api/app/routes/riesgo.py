@@ -1,52 +1,72 @@
 # app/routers/riesgo.py
 from __future__ import annotations
+import json
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 
-from ..db import get_session
+from .. import mi_cache
+from ..db import get_read_session, get_session
 from ..deps import require_roles
+from ..queries import ConsultaFiltrada, consulta
+from ..respuestas import respuesta
 from ..schemas import ApiResponse
 
 router = APIRouter(prefix="/riesgo", tags=["riesgo"])
 
-@router.post("/recalcular", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad"))])
-async def recalcular(id_periodo: int, db: AsyncSession = Depends(get_session)):
-    await db.execute(text("CALL sp_recalcular_riesgo_periodo(:p)"), {"p": id_periodo})
-    await db.commit()
-    return {"ok": True, "message": "Riesgo recalculado"}
-
-@router.post("/alertas", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad"))])
-async def generar_alertas(id_periodo: int, db: AsyncSession = Depends(get_session)):
-    await db.execute(text("CALL sp_generar_alertas_periodo(:p)"), {"p": id_periodo})
-    await db.commit()
-    return {"ok": True, "message": "Alertas generadas"}
+# ==========================
+# SQL
+# ==========================
+SQL_RECALCULAR = consulta("riesgo.recalcular", "CALL sp_recalcular_riesgo_periodo(:p)")
+SQL_GENERAR_ALERTAS = consulta("riesgo.generar_alertas", "CALL sp_generar_alertas_periodo(:p)")
 
-@router.get("/resumen", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor"))])
-async def resumen(id_periodo: int, id_programa: int | None = None, db: AsyncSession = Depends(get_session)):
-    sql = """
+Q_RESUMEN = ConsultaFiltrada(
+    "riesgo.resumen",
+    """
       SELECT pr.id_estudiante,
              p.dni,
              CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS nombre_visible,
              e.id_programa, prog.nombre AS programa,
-             pr.puntaje, nr.nombre AS nivel, pr.factores_json, pr.creado_en
+             pr.puntaje, nr.nombre AS nivel, pr.factores_json, pr.creado_en,
+             pd.probabilidad AS probabilidad_modelo, nrm.nombre AS nivel_modelo, pd.version_modelo,
+             pd.factores_json AS factores_modelo_json
       FROM puntajes_riesgo pr
       JOIN estudiantes e ON e.id_estudiante=pr.id_estudiante
       LEFT JOIN personas p ON p.id_persona=e.id_persona
       LEFT JOIN programas prog ON prog.id_programa=e.id_programa
       JOIN niveles_riesgo nr ON nr.id_nivel_riesgo=pr.id_nivel_riesgo
+      LEFT JOIN predicciones_desercion pd ON pd.id_estudiante=pr.id_estudiante AND pd.id_periodo=pr.id_periodo
+      LEFT JOIN niveles_riesgo nrm ON nrm.id_nivel_riesgo=pd.id_nivel_riesgo
       WHERE pr.id_periodo=:per
-    """
+    """,
+    {"prog": " AND e.id_programa=:prog"},
+    " ORDER BY pr.puntaje ASC, p.apellido_paterno ASC, p.apellido_materno ASC, p.nombres ASC",
+)
+
+
+@router.post("/recalcular", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad"))])
+async def recalcular(id_periodo: int, db: AsyncSession = Depends(get_session)):
+    await db.execute(SQL_RECALCULAR, {"p": id_periodo})
+    await db.commit()
+    mi_cache.invalidar_todos()   # cambia puntajes_riesgo de todo el periodo
+    return {"ok": True, "message": "Riesgo recalculado"}
+
+@router.post("/alertas", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad"))])
+async def generar_alertas(id_periodo: int, db: AsyncSession = Depends(get_session)):
+    await db.execute(SQL_GENERAR_ALERTAS, {"p": id_periodo})
+    await db.commit()
+    return {"ok": True, "message": "Alertas generadas"}
+
+@router.get("/resumen", response_model=ApiResponse, dependencies=[Depends(require_roles("admin","autoridad","tutor"))])
+async def resumen(id_periodo: int, id_programa: int | None = None, db: AsyncSession = Depends(get_read_session)):
     params = {"per": id_periodo}
     if id_programa:
-        sql += " AND e.id_programa=:prog"
         params["prog"] = id_programa
-    sql += " ORDER BY pr.puntaje ASC, p.apellido_paterno ASC, p.apellido_materno ASC, p.nombres ASC"
-    res = await db.execute(text(sql), params)
+    res = await db.execute(Q_RESUMEN.variante(prog=bool(id_programa)), params)
     registros = [dict(r._mapping) for r in res.fetchall()]
-
     for registro in registros:
-        if registro.get("puntaje") is not None:
-            registro["puntaje"] = float(registro["puntaje"])
-
-    return {"ok": True, "data": registros}
\ No newline at end of file
+        # Mismo objeto que GET /modelo/predicciones (factores del modelo, app/explicacion.py)
+        factores = registro.pop("factores_modelo_json")
+        registro["factores_modelo"] = json.loads(factores) if isinstance(factores, (str, bytes)) else factores
+    # Directo a orjson (puntaje y probabilidad_modelo: Decimal -> número)
+    return respuesta(registros)
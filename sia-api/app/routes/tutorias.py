@@ -3,13 +3,15 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, Field
-from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import get_session
+from ..audit_middleware import anotar
+from ..db import get_read_session, get_session
 from ..deps import get_current_user
+from ..queries import ConsultaFiltrada, consulta
+from ..respuestas import respuesta
 from ..schemas import ApiResponse
 
 router = APIRouter(prefix="/tutorias", tags=["tutorias"])
@@ -35,6 +37,147 @@ class AsignarTutorIn(BaseModel):
     id_tutor: int = Field(..., ge=1)
 
 
+# =========================
+# SQL
+# =========================
+SQL_TUTOR_DE_USUARIO = consulta("tutorias.tutor_de_usuario", "SELECT t.id_tutor FROM tutores t WHERE t.id_usuario = :u LIMIT 1")
+SQL_INSERT_TUTOR = consulta("tutorias.insert_tutor", "INSERT INTO tutores (id_usuario) VALUES (:u)")
+SQL_EXISTE_ESTUDIANTE = consulta("tutorias.existe_estudiante", "SELECT 1 FROM estudiantes WHERE id_estudiante=:id LIMIT 1")
+SQL_EXISTE_PERIODO = consulta("tutorias.existe_periodo", "SELECT 1 FROM periodos_academicos WHERE id_periodo=:id LIMIT 1")
+SQL_EXISTE_TUTOR = consulta("tutorias.existe_tutor", "SELECT 1 FROM tutores WHERE id_tutor=:id LIMIT 1")
+
+SQL_TUTOR_ASIGNADO = consulta("tutorias.tutor_asignado", """
+    SELECT a.id_tutor
+    FROM asignaciones_tutoria a
+    WHERE a.id_estudiante = :est AND a.id_periodo = :per
+    ORDER BY a.id_asignacion DESC
+    LIMIT 1
+""")
+
+SQL_ASIGNACION_VIGENTE = consulta("tutorias.asignacion_vigente", """
+    SELECT id_asignacion, id_tutor
+    FROM asignaciones_tutoria
+    WHERE id_estudiante=:est AND id_periodo=:per
+    ORDER BY id_asignacion DESC
+    LIMIT 1
+""")
+
+SQL_ACTUALIZAR_ASIGNACION = consulta(
+    "tutorias.actualizar_asignacion",
+    "UPDATE asignaciones_tutoria SET id_tutor=:tutor WHERE id_asignacion=:id",
+)
+SQL_INSERT_ASIGNACION = consulta(
+    "tutorias.insert_asignacion",
+    "INSERT INTO asignaciones_tutoria (id_tutor, id_estudiante, id_periodo) VALUES (:tutor, :est, :per)",
+)
+
+SQL_INSERT_TUTORIA = consulta("tutorias.insert", """
+    INSERT INTO tutorias
+        (id_tutor, id_estudiante, id_periodo, id_modalidad_tutoria, tema, observaciones, seguimiento)
+    VALUES
+        (:tutor, :est, :per, :mod, :tem, :obs, :seg)
+""")
+
+SQL_INSERT_TUTORIA_CON_FECHA = consulta("tutorias.insert_con_fecha", """
+    INSERT INTO tutorias
+        (id_tutor, id_estudiante, id_periodo, fecha_hora, id_modalidad_tutoria, tema, observaciones, seguimiento)
+    VALUES
+        (:tutor, :est, :per, :fec, :mod, :tem, :obs, :seg)
+""")
+
+SQL_ULTIMA_TUTORIA = consulta("tutorias.ultima", """
+    SELECT 
+        t.id_tutoria,
+        t.id_estudiante,
+        t.id_periodo,
+        t.fecha_hora,
+        t.tema,
+        t.observaciones,
+        t.seguimiento
+    FROM tutorias t
+    WHERE t.id_estudiante=:est AND t.id_periodo=:per
+    ORDER BY t.id_tutoria DESC
+    LIMIT 1
+""")
+
+Q_MIS_ESTUDIANTES = ConsultaFiltrada(
+    "tutorias.mis_estudiantes",
+    """
+    SELECT 
+        e.id_estudiante,
+        p.dni,
+        CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS estudiante,
+        prog.nombre AS programa,
+        pa.nombre   AS periodo,
+        a.id_tutor,
+        CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, ',', pt.nombres) AS tutor,
+        pt.dni AS tutor_dni,
+        ut.correo AS tutor_correo
+    FROM asignaciones_tutoria a
+    JOIN estudiantes e        ON e.id_estudiante = a.id_estudiante
+    LEFT JOIN personas p      ON p.id_persona = e.id_persona
+    LEFT JOIN programas prog  ON prog.id_programa = e.id_programa
+    LEFT JOIN periodos_academicos pa ON pa.id_periodo = a.id_periodo
+    JOIN tutores tt           ON tt.id_tutor = a.id_tutor
+    JOIN usuarios ut          ON ut.id_usuario = tt.id_usuario
+    LEFT JOIN personas pt     ON pt.id_persona = ut.id_persona
+    WHERE 1=1
+    """,
+    {"tutor": " AND a.id_tutor = :tutor", "per": " AND a.id_periodo = :per"},
+    " ORDER BY p.apellido_paterno, p.apellido_materno, p.nombres",
+)
+
+Q_CATALOGO_TUTORES = ConsultaFiltrada(
+    "tutorias.catalogo_tutores",
+    """
+    SELECT 
+        t.id_tutor,
+        u.id_usuario,
+        pt.dni,
+        CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, ',', pt.nombres) AS nombre,
+        u.correo
+    FROM tutores t
+    JOIN usuarios u      ON u.id_usuario = t.id_usuario
+    LEFT JOIN personas pt ON pt.id_persona = u.id_persona
+    WHERE 1=1
+    """,
+    {"term": " AND (pt.dni LIKE :term OR CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, pt.nombres) LIKE :term)"},
+    " ORDER BY pt.apellido_paterno, pt.apellido_materno, pt.nombres LIMIT :limit",
+)
+
+Q_LISTAR_TUTORIAS = ConsultaFiltrada(
+    "tutorias.listar",
+    """
+    SELECT 
+        t.id_tutoria,
+        t.id_estudiante,
+        p.dni,
+        CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS estudiante,
+        pa.nombre      AS periodo,
+        t.fecha_hora,
+        t.tema,
+        t.observaciones,
+        t.seguimiento,
+        CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, ',', pt.nombres) AS tutor
+    FROM tutorias t
+    JOIN estudiantes e  ON e.id_estudiante = t.id_estudiante
+    LEFT JOIN personas p ON p.id_persona   = e.id_persona
+    JOIN periodos_academicos pa ON pa.id_periodo = t.id_periodo
+    JOIN tutores tt ON tt.id_tutor = t.id_tutor
+    JOIN usuarios ut ON ut.id_usuario = tt.id_usuario
+    JOIN personas pt ON pt.id_persona = ut.id_persona
+    WHERE 1=1
+    """,
+    {
+        "tutor": " AND t.id_tutor = :tutor",
+        "est": " AND t.id_estudiante = :est",
+        "per": " AND t.id_periodo = :per",
+    },
+    " ORDER BY t.fecha_hora DESC, t.id_tutoria DESC",
+)
+
+
+
 # =========================
 # Helpers de autorización
 # =========================
@@ -49,7 +192,7 @@ async def _get_tutor_id_tabla(db: AsyncSession, id_usuario: int, create_if_missi
     Si el usuario no está registrado como tutor en la tabla 'tutores', retorna None.
     """
     row = (await db.execute(
-        text("SELECT t.id_tutor FROM tutores t WHERE t.id_usuario = :u LIMIT 1"),
+        SQL_TUTOR_DE_USUARIO,
         {"u": id_usuario}
     )).fetchone()
     if row:
@@ -59,13 +202,13 @@ async def _get_tutor_id_tabla(db: AsyncSession, id_usuario: int, create_if_missi
         return None
 
     try:
-        await db.execute(text("INSERT INTO tutores (id_usuario) VALUES (:u)"), {"u": id_usuario})
+        await db.execute(SQL_INSERT_TUTOR, {"u": id_usuario})
         await db.commit()
     except Exception:
         await db.rollback()
 
     row = (await db.execute(
-        text("SELECT t.id_tutor FROM tutores t WHERE t.id_usuario = :u LIMIT 1"),
+        SQL_TUTOR_DE_USUARIO,
         {"u": id_usuario}
     )).fetchone()
     return int(row[0]) if row else None
@@ -73,13 +216,7 @@ async def _get_tutor_id_tabla(db: AsyncSession, id_usuario: int, create_if_missi
 
 async def _get_tutor_from_assignment(db: AsyncSession, id_estudiante: int, id_periodo: int) -> Optional[int]:
     row = (await db.execute(
-        text("""
-            SELECT a.id_tutor
-            FROM asignaciones_tutoria a
-            WHERE a.id_estudiante = :est AND a.id_periodo = :per
-            ORDER BY a.id_asignacion DESC
-            LIMIT 1
-        """),
+        SQL_TUTOR_ASIGNADO,
         {"est": id_estudiante, "per": id_periodo}
     )).fetchone()
     return int(row[0]) if row else None
@@ -98,6 +235,7 @@ async def _autoriza_gestion_tutorias(db: AsyncSession, user: dict) -> dict:
         "id_tutor_tabla": Optional[int],  # tutores.id_tutor si aplica
         "id_usuario": int
       }
+    Usar siempre con la sesión del primario: puede registrar al tutor (INSERT).
     """
     roles = {
         str(role).strip().lower()
@@ -132,6 +270,7 @@ async def _autoriza_gestion_tutorias(db: AsyncSession, user: dict) -> dict:
 async def mis_estudiantes(
     id_periodo: Optional[int] = Query(None, ge=1),
     db: AsyncSession = Depends(get_session),
+    rdb: AsyncSession = Depends(get_read_session),
     user=Depends(get_current_user),
 ):
     """
@@ -141,45 +280,16 @@ async def mis_estudiantes(
     """
     auth = await _autoriza_gestion_tutorias(db, user)
 
-    base_sql = """
-        SELECT 
-            e.id_estudiante,
-            p.dni,
-            CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS estudiante,
-            prog.nombre AS programa,
-            pa.nombre   AS periodo,
-            a.id_tutor,
-            CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, ',', pt.nombres) AS tutor,
-            pt.dni AS tutor_dni,
-            ut.correo AS tutor_correo
-        FROM asignaciones_tutoria a
-        JOIN estudiantes e        ON e.id_estudiante = a.id_estudiante
-        LEFT JOIN personas p      ON p.id_persona = e.id_persona
-        LEFT JOIN programas prog  ON prog.id_programa = e.id_programa
-        LEFT JOIN periodos_academicos pa ON pa.id_periodo = a.id_periodo
-        JOIN tutores tt           ON tt.id_tutor = a.id_tutor
-        JOIN usuarios ut          ON ut.id_usuario = tt.id_usuario
-        LEFT JOIN personas pt     ON pt.id_persona = ut.id_persona
-        WHERE 1=1
-    """
-
     params = {}
-    where_extra = ""
-
     if id_periodo:
-        where_extra += " AND a.id_periodo = :per"
         params["per"] = id_periodo
-
-    if auth["is_adminlike"]:
-        sql = base_sql + where_extra + " ORDER BY p.apellido_paterno, p.apellido_materno, p.nombres"
-    else:
+    if not auth["is_adminlike"]:
         # Filtrar por su id_tutor (tutores.id_tutor)
-        sql = base_sql + " AND a.id_tutor = :tutor" + where_extra + " ORDER BY p.apellido_paterno, p.apellido_materno, p.nombres"
         params["tutor"] = auth["id_tutor_tabla"]
 
-    res = await db.execute(text(sql), params)
-    data = [dict(r._mapping) for r in res.fetchall()]
-    return {"ok": True, "data": data}
+    stmt = Q_MIS_ESTUDIANTES.variante(tutor=not auth["is_adminlike"], per=bool(id_periodo))
+    res = await rdb.execute(stmt, params)
+    return respuesta(res.mappings().all())
 
 
 # =========================
@@ -193,34 +303,19 @@ async def catalogo_tutores(
     termino: Optional[str] = Query(None, min_length=2),
     limit: int = Query(20, ge=1, le=50),
     db: AsyncSession = Depends(get_session),
+    rdb: AsyncSession = Depends(get_read_session),
     user=Depends(get_current_user),
 ):
     auth = await _autoriza_gestion_tutorias(db, user)
     if not auth["is_adminlike"]:
         raise HTTPException(status_code=403, detail="Solo admin o autoridad pueden consultar tutores.")
 
-    base_sql = """
-        SELECT 
-            t.id_tutor,
-            u.id_usuario,
-            pt.dni,
-            CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, ',', pt.nombres) AS nombre,
-            u.correo
-        FROM tutores t
-        JOIN usuarios u      ON u.id_usuario = t.id_usuario
-        LEFT JOIN personas pt ON pt.id_persona = u.id_persona
-        WHERE 1=1
-    """
-    where_extra = ""
     params = {"limit": limit}
     if termino:
-        where_extra += " AND (pt.dni LIKE :term OR CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, pt.nombres) LIKE :term)"
         params["term"] = f"%{termino.strip()}%"
 
-    sql = base_sql + where_extra + " ORDER BY pt.apellido_paterno, pt.apellido_materno, pt.nombres LIMIT :limit"
-    res = await db.execute(text(sql), params)
-    data = [dict(r._mapping) for r in res.fetchall()]
-    return {"ok": True, "data": data}
+    res = await rdb.execute(Q_CATALOGO_TUTORES.variante(term=bool(termino)), params)
+    return respuesta(res.mappings().all())
 
 
 @router.post(
@@ -229,6 +324,7 @@ async def catalogo_tutores(
 )
 async def asignar_tutor(
     payload: AsignarTutorIn,
+    request: Request,
     db: AsyncSession = Depends(get_session),
     user=Depends(get_current_user),
 ):
@@ -237,47 +333,41 @@ async def asignar_tutor(
         raise HTTPException(status_code=403, detail="Solo admin o autoridad pueden asignar tutores.")
 
     chk_est = (await db.execute(
-        text("SELECT 1 FROM estudiantes WHERE id_estudiante=:id LIMIT 1"),
+        SQL_EXISTE_ESTUDIANTE,
         {"id": payload.id_estudiante}
     )).fetchone()
     if not chk_est:
         raise HTTPException(status_code=404, detail="Estudiante no encontrado")
 
     chk_per = (await db.execute(
-        text("SELECT 1 FROM periodos_academicos WHERE id_periodo=:id LIMIT 1"),
+        SQL_EXISTE_PERIODO,
         {"id": payload.id_periodo}
     )).fetchone()
     if not chk_per:
         raise HTTPException(status_code=404, detail="Periodo no encontrado")
 
     chk_tutor = (await db.execute(
-        text("SELECT 1 FROM tutores WHERE id_tutor=:id LIMIT 1"),
+        SQL_EXISTE_TUTOR,
         {"id": payload.id_tutor}
     )).fetchone()
     if not chk_tutor:
         raise HTTPException(status_code=404, detail="Tutor no encontrado")
 
-    existing = (await db.execute(text("""
-        SELECT id_asignacion, id_tutor
-        FROM asignaciones_tutoria
-        WHERE id_estudiante=:est AND id_periodo=:per
-        ORDER BY id_asignacion DESC
-        LIMIT 1
-    """), {"est": payload.id_estudiante, "per": payload.id_periodo})).fetchone()
+    existing = (await db.execute(SQL_ASIGNACION_VIGENTE, {"est": payload.id_estudiante, "per": payload.id_periodo})).fetchone()
 
     try:
         if existing and int(existing.id_tutor) == payload.id_tutor:
             message = "El estudiante ya está asignado a este tutor."
         elif existing:
             await db.execute(
-                text("UPDATE asignaciones_tutoria SET id_tutor=:tutor WHERE id_asignacion=:id"),
+                SQL_ACTUALIZAR_ASIGNACION,
                 {"tutor": payload.id_tutor, "id": int(existing.id_asignacion)}
             )
             await db.commit()
             message = "Asignación actualizada."
         else:
             await db.execute(
-                text("INSERT INTO asignaciones_tutoria (id_tutor, id_estudiante, id_periodo) VALUES (:tutor, :est, :per)"),
+                SQL_INSERT_ASIGNACION,
                 {"tutor": payload.id_tutor, "est": payload.id_estudiante, "per": payload.id_periodo}
             )
             await db.commit()
@@ -286,6 +376,7 @@ async def asignar_tutor(
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"No se pudo registrar la asignación: {exc}")
 
+    anotar(request, id_estudiante=payload.id_estudiante, id_periodo=payload.id_periodo, id_tutor=payload.id_tutor)
     return {"ok": True, "message": message}
 
 
@@ -300,6 +391,7 @@ async def listar_tutorias(
     id_estudiante: Optional[int] = Query(None, ge=1),
     id_periodo: Optional[int] = Query(None, ge=1),
     db: AsyncSession = Depends(get_session),
+    rdb: AsyncSession = Depends(get_read_session),
     user=Depends(get_current_user)
 ):
     """
@@ -310,49 +402,18 @@ async def listar_tutorias(
     """
     auth = await _autoriza_gestion_tutorias(db, user)
 
-    base_sql = """
-        SELECT 
-            t.id_tutoria,
-            t.id_estudiante,
-            p.dni,
-            CONCAT_WS(' ', p.apellido_paterno, p.apellido_materno, ',', p.nombres) AS estudiante,
-            pa.nombre      AS periodo,
-            t.fecha_hora,
-            t.tema,
-            t.observaciones,
-            t.seguimiento,
-            CONCAT_WS(' ', pt.apellido_paterno, pt.apellido_materno, ',', pt.nombres) AS tutor
-        FROM tutorias t
-        JOIN estudiantes e  ON e.id_estudiante = t.id_estudiante
-        LEFT JOIN personas p ON p.id_persona   = e.id_persona
-        JOIN periodos_academicos pa ON pa.id_periodo = t.id_periodo
-        JOIN tutores tt ON tt.id_tutor = t.id_tutor
-        JOIN usuarios ut ON ut.id_usuario = tt.id_usuario
-        JOIN personas pt ON pt.id_persona = ut.id_persona
-        WHERE 1=1
-    """
-
     params = {}
-    where_extra = ""
-
     if id_estudiante:
-        where_extra += " AND t.id_estudiante = :est"
         params["est"] = id_estudiante
-
     if id_periodo:
-        where_extra += " AND t.id_periodo = :per"
         params["per"] = id_periodo
-
-    if auth["is_adminlike"]:
-        sql = base_sql + where_extra + " ORDER BY t.fecha_hora DESC, t.id_tutoria DESC"
-    else:
+    if not auth["is_adminlike"]:
         # Restringir a las tutorías del propio tutor
-        sql = base_sql + " AND t.id_tutor = :tutor" + where_extra + " ORDER BY t.fecha_hora DESC, t.id_tutoria DESC"
         params["tutor"] = auth["id_tutor_tabla"]
 
-    res = await db.execute(text(sql), params)   
-    data = [dict(r._mapping) for r in res.fetchall()]
-    return {"ok": True, "data": data}
+    stmt = Q_LISTAR_TUTORIAS.variante(tutor=not auth["is_adminlike"], est=bool(id_estudiante), per=bool(id_periodo))
+    res = await rdb.execute(stmt, params)
+    return respuesta(res.mappings().all())
 
 
 # =========================
@@ -361,6 +422,7 @@ async def listar_tutorias(
 @router.post("/", response_model=ApiResponse, status_code=status.HTTP_201_CREATED)
 async def registrar_tutoria(
     payload: TutoriaIn,
+    request: Request,
     db: AsyncSession = Depends(get_session),
     user = Depends(get_current_user)
 ):
@@ -368,14 +430,14 @@ async def registrar_tutoria(
 
     # Validaciones básicas
     chk_est = (await db.execute(
-        text("SELECT 1 FROM estudiantes WHERE id_estudiante=:id LIMIT 1"),
+        SQL_EXISTE_ESTUDIANTE,
         {"id": payload.id_estudiante}
     )).fetchone()
     if not chk_est:
         raise HTTPException(status_code=404, detail="Estudiante no encontrado")
 
     chk_per = (await db.execute(
-        text("SELECT 1 FROM periodos_academicos WHERE id_periodo=:id LIMIT 1"),
+        SQL_EXISTE_PERIODO,
         {"id": payload.id_periodo}
     )).fetchone()
     if not chk_per:
@@ -448,12 +510,7 @@ async def registrar_tutoria(
     try:
         if payload.fecha_hora is None:
             # sin fecha_hora -> deja que la columna utilice CURRENT_TIMESTAMP
-            await db.execute(text("""
-                INSERT INTO tutorias
-                    (id_tutor, id_estudiante, id_periodo, id_modalidad_tutoria, tema, observaciones, seguimiento)
-                VALUES
-                    (:tutor, :est, :per, :mod, :tem, :obs, :seg)
-            """), {
+            await db.execute(SQL_INSERT_TUTORIA, {
                 "tutor": id_tutor_final,
                 "est": payload.id_estudiante,
                 "per": payload.id_periodo,
@@ -464,12 +521,7 @@ async def registrar_tutoria(
             })
         else:
             # con fecha_hora proporcionada
-            await db.execute(text("""
-                INSERT INTO tutorias
-                    (id_tutor, id_estudiante, id_periodo, fecha_hora, id_modalidad_tutoria, tema, observaciones, seguimiento)
-                VALUES
-                    (:tutor, :est, :per, :fec, :mod, :tem, :obs, :seg)
-            """), {
+            await db.execute(SQL_INSERT_TUTORIA_CON_FECHA, {
                 "tutor": id_tutor_final,
                 "est": payload.id_estudiante,
                 "per": payload.id_periodo,
@@ -485,19 +537,8 @@ async def registrar_tutoria(
         raise HTTPException(status_code=400, detail=f"No se pudo registrar la tutoría: {ex}")
 
     # Devolver la última insertada (requiere PK autoincremental id_tutoria)
-    row = (await db.execute(text("""
-        SELECT 
-            t.id_tutoria,
-            t.id_estudiante,
-            t.id_periodo,
-            t.fecha_hora,
-            t.tema,
-            t.observaciones,
-            t.seguimiento
-        FROM tutorias t
-        WHERE t.id_estudiante=:est AND t.id_periodo=:per
-        ORDER BY t.id_tutoria DESC
-        LIMIT 1
-    """), {"est": payload.id_estudiante, "per": payload.id_periodo})).fetchone()
+    row = (await db.execute(SQL_ULTIMA_TUTORIA, {"est": payload.id_estudiante, "per": payload.id_periodo})).fetchone()
 
+    if row:
+        anotar(request, id_entidad=int(row.id_tutoria), id_estudiante=payload.id_estudiante, id_periodo=payload.id_periodo)
     return {"ok": True, "message": "Tutoría registrada", "data": dict(row._mapping) if row else None}
@@ -1,6 +1,6 @@
 # app/schemas.py
-from pydantic import BaseModel, EmailStr
-from typing import Optional, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, Any, List, Literal
 
 from pydantic import BaseModel
 
@@ -15,6 +15,24 @@ class DesercionResponse(BaseModel):
     prediccion: int             # 0 = no deserter, 1 = deserter
     probabilidad: float         # probabilidad de deserción (0–1)
     nivel: str                  # "BAJO", "MEDIO", "ALTO"
+    version: str                # versión del modelo que respondió (app/modelos/ACTIVO)
+    factores: Optional[dict] = None   # con ?explicar=true: features que suben / bajan el riesgo
+
+
+class CambioSimulado(BaseModel):
+    feature: Literal["promedio", "asistencia", "cursos_matriculados", "cursos_desaprobados"]
+    operacion: Literal["fijar", "sumar", "al_menos", "a_lo_sumo"] = "fijar"
+    valor: float
+
+class EscenarioSimulado(BaseModel):
+    nombre: str = Field(..., min_length=1, max_length=60)     # "asistencia >= 80%"
+    cambios: List[CambioSimulado] = Field(..., min_length=1, max_length=4)
+
+class SimulacionRequest(BaseModel):
+    id_periodo: int = Field(..., ge=1)
+    id_tutor: Optional[int] = None      # admin / autoridad; un tutor siempre simula su propia cohorte
+    escenarios: List[EscenarioSimulado] = Field(..., min_length=1, max_length=20)
+    detalle: bool = True                # False = solo agregados
 
 class LoginIn(BaseModel):
     correo: EmailStr
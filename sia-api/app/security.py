@@ -1,9 +1,11 @@
 # app/security.py
 from __future__ import annotations
-import os, re, hashlib, secrets, uuid
+import asyncio, os, re, hashlib, secrets, threading, uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
-from passlib.hash import pbkdf2_sha256  # elegimos PBKDF2 para evitar backends nativas
+from passlib.context import CryptContext  # elegimos PBKDF2 para evitar backends nativas
 
 # ==========================
 # CONFIG
@@ -15,6 +17,15 @@ JWT_EXPIRES_MIN = int(os.getenv("JWT_EXPIRES_MIN", "720"))  # access token
 # Refresh tokens (JWT + registro en BD)
 REFRESH_EXPIRES_DAYS = int(os.getenv("REFRESH_EXPIRES_DAYS", "30"))
 
+# PBKDF2: rondas objetivo. Los hashes con menos rondas se regeneran en el siguiente login.
+PBKDF2_ROUNDS = int(os.getenv("PBKDF2_ROUNDS", "29000"))
+# Procesos dedicados al hashing (0 = ejecutar en el mismo proceso, útil en desarrollo)
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Límites de logins simultáneos (en curso) por IP y por correo
+LOGIN_MAX_CONCURRENT_IP = int(os.getenv("LOGIN_MAX_CONCURRENT_IP", "8"))
+LOGIN_MAX_CONCURRENT_EMAIL = int(os.getenv("LOGIN_MAX_CONCURRENT_EMAIL", "2"))
+
 # ==========================
 # POLÍTICA DE CONTRASEÑAS
 # ==========================
@@ -30,13 +41,122 @@ def password_strength_hint() -> str:
 # ==========================
 # HASH & VERIFY (PBKDF2)
 # ==========================
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=PBKDF2_ROUNDS,
+)
+
 def hash_password(plain_password: str) -> str:
-    return pbkdf2_sha256.hash(plain_password)
+    return pwd_context.hash(plain_password)
 def verify_password(plain_password: str, password_hash: str) -> bool:
     try:
-        return pbkdf2_sha256.verify(plain_password, password_hash)
+        return pwd_context.verify(plain_password, password_hash)
     except Exception:
         return False
+def verify_and_update_password(plain_password: str, password_hash: str) -> tuple[bool, str | None]:
+    """
+    Verifica la contraseña y, si el hash almacenado usa parámetros antiguos
+    (menos rondas que PBKDF2_ROUNDS), devuelve además el hash regenerado.
+    """
+    try:
+        return pwd_context.verify_and_update(plain_password, password_hash)
+    except Exception:
+        return False, None
+
+# ==========================
+# POOL DE PROCESOS PARA PBKDF2
+# ==========================
+# PBKDF2 es CPU puro: ejecutarlo dentro de un handler async congela el event loop
+# durante decenas de ms por login. Se delega a procesos dedicados (spawn, para no
+# heredar el loop ni los hilos del servidor).
+_password_pool: ProcessPoolExecutor | None = None
+_password_pool_lock = threading.Lock()
+
+def _get_password_pool() -> ProcessPoolExecutor | None:
+    global _password_pool
+    if PASSWORD_WORKERS <= 0:
+        return None
+    if _password_pool is None:
+        with _password_pool_lock:
+            if _password_pool is None:
+                _password_pool = ProcessPoolExecutor(
+                    max_workers=PASSWORD_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _password_pool
+
+async def _run_in_password_pool(fn, *args):
+    pool = _get_password_pool()
+    if pool is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+async def hash_password_async(plain_password: str) -> str:
+    return await _run_in_password_pool(hash_password, plain_password)
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    return await _run_in_password_pool(verify_password, plain_password, password_hash)
+
+async def verify_and_update_password_async(plain_password: str, password_hash: str) -> tuple[bool, str | None]:
+    return await _run_in_password_pool(verify_and_update_password, plain_password, password_hash)
+
+def _noop() -> None:
+    return None
+
+async def warmup_password_pool() -> None:
+    """Arranca los procesos del pool antes del primer login (evita pagar el spawn en caliente)."""
+    pool = _get_password_pool()
+    if pool is None:
+        return
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(PASSWORD_WORKERS)))
+
+def shutdown_password_pool() -> None:
+    global _password_pool
+    with _password_pool_lock:
+        if _password_pool is not None:
+            _password_pool.shutdown(wait=False, cancel_futures=True)
+            _password_pool = None
+
+# ==========================
+# LÍMITES DE CONCURRENCIA (LOGIN)
+# ==========================
+class LoginLimiter:
+    """
+    Cuenta los logins en curso por IP y por correo. Si alguno supera su límite,
+    el intento se rechaza de inmediato en lugar de encolar más trabajo PBKDF2.
+    """
+
+    def __init__(self, max_por_ip: int, max_por_correo: int):
+        self.max_por_ip = max_por_ip
+        self.max_por_correo = max_por_correo
+        self._por_ip: dict[str, int] = {}
+        self._por_correo: dict[str, int] = {}
+        self.rechazados = 0
+
+    def acquire(self, ip: str | None, correo: str) -> bool:
+        ip_key = ip or "-"
+        correo_key = correo.strip().lower()
+        if (
+            self._por_ip.get(ip_key, 0) >= self.max_por_ip
+            or self._por_correo.get(correo_key, 0) >= self.max_por_correo
+        ):
+            self.rechazados += 1
+            return False
+        self._por_ip[ip_key] = self._por_ip.get(ip_key, 0) + 1
+        self._por_correo[correo_key] = self._por_correo.get(correo_key, 0) + 1
+        return True
+
+    def release(self, ip: str | None, correo: str) -> None:
+        for store, key in ((self._por_ip, ip or "-"), (self._por_correo, correo.strip().lower())):
+            restante = store.get(key, 0) - 1
+            if restante > 0:
+                store[key] = restante
+            else:
+                store.pop(key, None)
+
+login_limiter = LoginLimiter(LOGIN_MAX_CONCURRENT_IP, LOGIN_MAX_CONCURRENT_EMAIL)
 
 # ==========================
 # JWT: ACCESS
@@ -67,6 +187,7 @@ def extract_user_identity(payload: dict) -> dict:
         "id_usuario": int(payload.get("sub")),
         "email": payload.get("email"),
         "roles": payload.get("roles", []),
+        "exp": payload.get("exp"),
     }
 
 # ==========================
@@ -0,0 +1,109 @@
+# app/simulacion.py
+"""
+Simulación "qué pasaría si" del modelo de deserción sobre una cohorte.
+
+- perturbar(): a partir de las features base (n, 4) arma en un solo paso
+  (s, n, 4) con los cambios de cada escenario aplicados por columna
+  (fijar, sumar, al_menos, a_lo_sumo) y los mismos límites que el formulario.
+- simular(): base + escenarios pasan por features.matriz() y por UNA llamada
+  al modelo ((s + 1) * n filas); devuelve probabilidades (s + 1, n), fila 0 = base.
+- resumen(): agregados por escenario (probabilidad media, delta, niveles,
+  cuántos mejoran / empeoran) vectorizados sobre la matriz de probabilidades;
+  detalle(): lo mismo por estudiante.
+"""
+
+from __future__ import annotations
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from . import features
+from .modelo_registro import ModeloCargado
+
+# ==========================
+# CONFIG
+# ==========================
+# Tope de filas puntuadas por request: estudiantes x (escenarios + 1)
+SIMULACION_MAX_FILAS = int(os.getenv("SIMULACION_MAX_FILAS", "200000"))
+
+_NIVELES = np.array(["BAJO", "MEDIO", "ALTO"])
+
+# Rango válido de cada feature base (None = sin tope)
+LIMITES = {
+    "promedio": (0.0, 20.0),
+    "asistencia": (0.0, 100.0),
+    "cursos_matriculados": (0.0, None),
+    "cursos_desaprobados": (0.0, None),
+}
+_ENTEROS = (features.BASE.index("cursos_matriculados"), features.BASE.index("cursos_desaprobados"))
+
+
+def perturbar(base: np.ndarray, escenarios: Sequence[dict]) -> np.ndarray:
+    """(s, n, 4) a partir de base (n, 4); cada escenario es {"cambios": [{feature, operacion, valor}]}."""
+    base = np.asarray(base, dtype=np.float64)
+    X = np.repeat(base[None, :, :], len(escenarios), axis=0)
+    for i, escenario in enumerate(escenarios):
+        for cambio in escenario["cambios"]:
+            col = features.BASE.index(cambio["feature"])
+            valor, actual = float(cambio["valor"]), X[i, :, col]
+            op = cambio.get("operacion", "fijar")
+            if op == "fijar":
+                actual[:] = valor
+            elif op == "sumar":
+                actual += valor
+            elif op == "al_menos":
+                np.maximum(actual, valor, out=actual)
+            elif op == "a_lo_sumo":
+                np.minimum(actual, valor, out=actual)
+            else:
+                raise ValueError(f"Operación desconocida: {op}")
+
+    for col, nombre in enumerate(features.BASE):
+        minimo, maximo = LIMITES[nombre]
+        np.clip(X[:, :, col], minimo, maximo, out=X[:, :, col])
+    for col in _ENTEROS:
+        np.rint(X[:, :, col], out=X[:, :, col])
+    # No puede haber más desaprobados que matriculados
+    np.minimum(X[:, :, 3], X[:, :, 2], out=X[:, :, 3])
+    return X
+
+
+def simular(modelo: ModeloCargado, base: np.ndarray, escenarios: Sequence[dict]) -> np.ndarray:
+    """Probabilidades (len(escenarios) + 1, n): fila 0 = sin cambios, luego un escenario por fila."""
+    base = np.asarray(base, dtype=np.float64)
+    todo = np.concatenate([base[None, :, :], perturbar(base, escenarios)]).reshape(-1, len(features.BASE))
+    prob = np.asarray(modelo.probabilidades(features.matriz(*todo.T)), dtype=np.float64)
+    return prob.reshape(len(escenarios) + 1, base.shape[0])
+
+
+def niveles(modelo: ModeloCargado, prob: np.ndarray) -> np.ndarray:
+    """0 = bajo, 1 = medio, 2 = alto (mismos umbrales que ModeloCargado.nivel)."""
+    return (prob >= modelo.umbral_medio).astype(np.int8) + (prob >= modelo.umbral_alto)
+
+
+def resumen(modelo: ModeloCargado, prob: np.ndarray) -> Dict[str, np.ndarray]:
+    """Agregados por fila de `prob` (base y escenarios), como arreglos de largo s + 1."""
+    nivel = niveles(modelo, prob)
+    return {
+        "probabilidad_media": prob.mean(axis=1),
+        "delta_medio": (prob - prob[0]).mean(axis=1),
+        "bajo": (nivel == 0).sum(axis=1),
+        "medio": (nivel == 1).sum(axis=1),
+        "alto": (nivel == 2).sum(axis=1),
+        "mejoran": (nivel < nivel[0]).sum(axis=1),
+        "empeoran": (nivel > nivel[0]).sum(axis=1),
+    }
+
+
+def detalle(modelo: ModeloCargado, prob: np.ndarray) -> List[dict]:
+    """Por estudiante (columna de `prob`): base y, por escenario, probabilidad, nivel y delta."""
+    etiquetas = _NIVELES[niveles(modelo, prob)].T.tolist()
+    probs = np.round(prob, 5).T.tolist()
+    deltas = np.round(prob - prob[0], 5).T.tolist()
+    return [
+        {"probabilidad": p[0], "nivel": n[0],
+         "escenarios": [{"probabilidad": pe, "nivel": ne, "delta": de}
+                        for pe, ne, de in zip(p[1:], n[1:], d[1:])]}
+        for p, n, d in zip(probs, etiquetas, deltas)
+    ]
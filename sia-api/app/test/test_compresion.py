@@ -0,0 +1,58 @@
+import zlib
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.compresion import CompresionMiddleware, _Compresor, elegir_codificacion
+
+
+async def _grande(request):
+    return JSONResponse([{"programa": "Ingeniería de Sistemas", "i": i} for i in range(500)])
+
+
+async def _chica(request):
+    return JSONResponse({"ok": True})
+
+
+async def _stream(request):
+    async def partes():
+        for i in range(3):
+            yield f'{{"parte": {i}}}\n'.encode()
+    return StreamingResponse(partes(), media_type="text/plain")
+
+
+def _cliente():
+    app = Starlette(routes=[Route("/grande", _grande), Route("/chica", _chica), Route("/stream", _stream)])
+    return TestClient(CompresionMiddleware(app, minimo=1024, gzip_nivel=6, brotli_nivel=4))
+
+
+def test_comprime_sobre_el_umbral():
+    c = _cliente()
+    r = c.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["vary"]
+    assert int(r.headers["content-length"]) < len(r.content)
+    assert r.json()[499]["i"] == 499
+
+    r = c.get("/chica", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+
+def test_streaming_por_bloques():
+    r = _cliente().get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "content-length" not in r.headers
+    assert r.text.splitlines() == ['{"parte": 0}', '{"parte": 1}', '{"parte": 2}']
+
+
+def test_elegir_codificacion():
+    assert elegir_codificacion("gzip;q=0, deflate") is None
+    assert elegir_codificacion("deflate, gzip;q=0.5") == "gzip"
+
+
+def test_cada_bloque_se_puede_descomprimir_al_llegar():
+    compresor, d = _Compresor("gzip", 6, 4), zlib.decompressobj(31)
+    assert d.decompress(compresor.agregar(b'{"a": 1}', final=False)) == b'{"a": 1}'
+    assert d.decompress(compresor.agregar(b'{"b": 2}', final=True)) == b'{"b": 2}'
@@ -0,0 +1,23 @@
+import numpy as np
+
+from app import drift
+
+
+def test_perfil_por_bloques_igual_al_completo():
+    rng = np.random.default_rng(3)
+    promedio = rng.uniform(0, 20, 1000)
+    completo = drift.conteos("promedio", promedio)
+    por_bloques = sum(drift.conteos("promedio", b) for b in np.array_split(promedio, 7))
+    np.testing.assert_array_equal(completo, por_bloques)
+    assert completo.sum() == 1000
+
+
+def test_comparar_detecta_cambio():
+    rng = np.random.default_rng(5)
+    referencia = drift.perfil({"promedio": rng.normal(13, 2, 5000)})
+    igual = drift.perfil({"promedio": rng.normal(13, 2, 5000)})
+    corrido = drift.perfil({"promedio": rng.normal(9, 2, 5000)})
+
+    assert drift.comparar(referencia, igual)["promedio"]["estado"] == "estable"
+    assert drift.comparar(referencia, corrido)["promedio"]["estado"] == "significativo"
+    assert drift.comparar(None, corrido) == {}
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from app.explicacion import factores
+from app.features import FEATURES, matriz
+
+
+def test_factores_ordenados_por_aporte():
+    X = matriz([8, 16], [60, 95], [5, 4], [3, 0])
+    aportes = np.zeros((2, len(FEATURES) + 1))
+    aportes[0, FEATURES.index("promedio")] = 0.9
+    aportes[0, FEATURES.index("tasa_desaprob")] = 0.4
+    aportes[0, FEATURES.index("asistencia")] = -0.2
+    aportes[:, -1] = -1.5
+
+    f = factores(X, aportes, k=3)
+    assert [x["feature"] for x in f[0]["suben"]] == ["promedio", "tasa_desaprob"]
+    assert f[0]["suben"][0]["valor"] == 8
+    assert [x["feature"] for x in f[0]["bajan"]] == ["asistencia"]
+    assert f[1] == {"base": -1.5, "suben": [], "bajan": []}
+
+
+def test_contribuciones_de_booster_con_nombres():
+    # Como el v1 y lo que entrena el CLI (X_train es un DataFrame): el booster trae feature_names
+    xgb = pytest.importorskip("xgboost")
+    from app.modelo_registro import cargar_contribuciones
+
+    rng = np.random.default_rng(0)
+    X = rng.random((64, len(FEATURES)))
+    y = (X[:, FEATURES.index("promedio")] < 0.5).astype(int)
+    booster = xgb.train({"objective": "binary:logistic", "max_depth": 2},
+                        xgb.DMatrix(X, label=y, feature_names=list(FEATURES)), num_boost_round=5)
+
+    contrib = cargar_contribuciones(booster)(X[:3])
+    assert contrib.shape == (3, len(FEATURES) + 1)
+    margen = booster.predict(xgb.DMatrix(X[:3], feature_names=list(FEATURES)), output_margin=True)
+    assert np.allclose(contrib.sum(axis=1), margen, atol=1e-5)
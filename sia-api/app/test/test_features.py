@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from app.features import FEATURES, fila, matriz, validar
+
+
+def test_fila_igual_a_matriz():
+    casos = [(5, 5, 6, 6), (18, 90, 6, 0), (12.5, 70, 2, 1), (0, 0, 0, 0)]
+    X = matriz(*zip(*casos))
+    assert X.shape == (len(casos), len(FEATURES))
+    for i, caso in enumerate(casos):
+        np.testing.assert_array_equal(fila(*caso)[0], X[i])
+    # cursos_matriculados = 0 no divide por cero
+    assert X[3, FEATURES.index("tasa_desaprob")] == 0
+
+
+def test_validar_orden():
+    validar(list(FEATURES))
+    with pytest.raises(ValueError):
+        validar(list(reversed(FEATURES)))
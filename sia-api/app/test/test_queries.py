@@ -0,0 +1,10 @@
+from app.queries import ConsultaFiltrada, registradas
+
+
+def test_variantes_precompiladas():
+    q = ConsultaFiltrada("test.variantes", "SELECT 1 FROM t WHERE 1=1", {"a": " AND a=:a", "b": " AND b=:b"}, " ORDER BY a")
+    assert {"test.variantes", "test.variantes[a]", "test.variantes[b]", "test.variantes[a,b]"} <= set(registradas())
+    stmt = q.variante(a=True, b=False)
+    assert str(stmt) == "SELECT 1 FROM t WHERE 1=1 AND a=:a ORDER BY a"
+    assert stmt.get_execution_options()["query_name"] == "test.variantes[a]"
+    assert q.variante(b=True, a=True) is q.variante(a=True, b=True)
@@ -0,0 +1,20 @@
+from passlib.hash import pbkdf2_sha256
+
+from app.security import LoginLimiter, PBKDF2_ROUNDS, verify_and_update_password
+
+
+def test_rehash_hash_antiguo():
+    viejo = pbkdf2_sha256.using(rounds=max(1000, PBKDF2_ROUNDS // 2)).hash("Clave#123")
+    ok, nuevo = verify_and_update_password("Clave#123", viejo)
+    assert ok and nuevo and f"${PBKDF2_ROUNDS}$" in nuevo
+    assert verify_and_update_password("Clave#123", nuevo) == (True, None)
+    assert verify_and_update_password("otra", viejo) == (False, None)
+
+
+def test_login_limiter_por_correo():
+    lim = LoginLimiter(max_por_ip=10, max_por_correo=1)
+    assert lim.acquire("1.1.1.1", "a@unasam.edu.pe")
+    assert not lim.acquire("2.2.2.2", "A@unasam.edu.pe ")
+    lim.release("1.1.1.1", "a@unasam.edu.pe")
+    assert lim.acquire("2.2.2.2", "a@unasam.edu.pe")
+    assert lim.rechazados == 1
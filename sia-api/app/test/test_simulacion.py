@@ -0,0 +1,17 @@
+import numpy as np
+
+from app.simulacion import perturbar
+
+
+def test_perturbar_aplica_cambios_y_limites():
+    base = np.array([[12.0, 60.0, 5, 2], [15.0, 90.0, 2, 0]])
+    X = perturbar(base, [
+        {"cambios": [{"feature": "asistencia", "operacion": "al_menos", "valor": 80}]},
+        {"cambios": [{"feature": "promedio", "operacion": "sumar", "valor": 7},
+                     {"feature": "cursos_desaprobados", "operacion": "fijar", "valor": 4}]},
+    ])
+    assert X.shape == (2, 2, 4)
+    np.testing.assert_array_equal(X[0, :, 1], [80, 90])
+    np.testing.assert_array_equal(X[1, :, 0], [19, 20])       # tope de 20
+    np.testing.assert_array_equal(X[1, :, 3], [4, 2])         # no más que matriculados
+    np.testing.assert_array_equal(base[:, 1], [60, 90])       # la base no cambia
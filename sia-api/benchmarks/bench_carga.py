@@ -0,0 +1,341 @@
+# benchmarks/bench_carga.py
+"""
+Benchmark de carga "publicación de notas": levanta la app en el mismo proceso
+(httpx + ASGI, con lifespan) contra una BD sembrada y reproduce mezclas realistas.
+
+Escenarios:
+- login:     tormenta de logins de estudiantes (PBKDF2 + refresh token + auditoría)
+- mi:        pico de /mi/resumen + /mi/calificaciones tras publicar notas
+- tutor:     dashboard del tutor (mis estudiantes, tutorías, alertas del periodo)
+- desercion: dashboard de deserción (resumen de riesgo, listado paginado, alertas)
+
+Por escenario reporta p50/p95/p99, throughput, status HTTP y consultas SQL
+(total, por request y las más costosas, vía app.queries). La salida es JSON con
+el commit actual para comparar entre versiones (--comparar base.json).
+
+Uso (desde sia-api/):
+    python -m benchmarks.bench_carga --sqlite /tmp/bench.db --estudiantes 2000
+    python -m benchmarks.bench_carga --sqlite /tmp/bench.db --escenarios mi,tutor --concurrencia 100
+    python -m benchmarks.bench_carga --url mysql+aiomysql://u:p@host/sia_bench --sembrar --salida hoy.json
+Con --url se espera una BD con BD_Final.sql cargado; --sembrar la llena (tablas vacías).
+Los datos sembrados (credenciales, ids) se guardan en --datos para reutilizarlos.
+"""
+
+from __future__ import annotations
+import argparse, asyncio, json, os, random, subprocess, time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (método, ruta, params/json) — se arma a partir del actor y los datos sembrados
+Peticion = Tuple[str, str, dict]
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p / 100 * (len(orden) - 1))))]
+
+
+def _resumen_latencias(latencias: List[float]) -> dict:
+    return {
+        "n": len(latencias),
+        "p50_ms": round(_percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(_percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(_percentil(latencias, 99) * 1000, 2),
+    }
+
+
+def _commit_actual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# ==========================
+# Escenarios
+# ==========================
+@dataclass
+class Escenario:
+    descripcion: str
+    actores: str                                   # estudiantes | tutores | admin
+    pasos: List[Tuple[float, str, Callable[[dict, dict, random.Random], Peticion]]] = field(default_factory=list)
+    con_token: bool = True
+
+
+def _login(actor: dict, datos: dict, rng: random.Random) -> Peticion:
+    return "POST", "/api/auth/login", {"json": {"correo": actor["correo"], "contrasenia": datos["password"]}}
+
+
+ESCENARIOS: Dict[str, Escenario] = {
+    "login": Escenario(
+        "Tormenta de logins de estudiantes",
+        "estudiantes",
+        [(1.0, "auth.login", _login)],
+        con_token=False,
+    ),
+    "mi": Escenario(
+        "Pico de /mi tras publicar calificaciones",
+        "estudiantes",
+        [
+            (0.35, "mi.resumen", lambda a, d, r: ("GET", "/api/mi/resumen", {})),
+            (0.50, "mi.calificaciones.actual", lambda a, d, r: (
+                "GET", "/api/mi/calificaciones", {"params": {"id_periodo": d["periodo_actual"]}})),
+            (0.15, "mi.calificaciones.historico", lambda a, d, r: (
+                "GET", "/api/mi/calificaciones", {"params": {"id_periodo": r.choice(d["periodos"])}})),
+        ],
+    ),
+    "tutor": Escenario(
+        "Dashboard del tutor",
+        "tutores",
+        [
+            (0.45, "tutorias.mis_estudiantes", lambda a, d, r: (
+                "GET", "/api/tutorias/tutores/mis-estudiantes", {"params": {"id_periodo": d["periodo_actual"]}})),
+            (0.30, "tutorias.listar", lambda a, d, r: (
+                "GET", "/api/tutorias/", {"params": {"id_periodo": d["periodo_actual"]}})),
+            (0.25, "alertas.listar", lambda a, d, r: (
+                "GET", "/api/alertas/", {"params": {"id_periodo": d["periodo_actual"], "leida": False}})),
+        ],
+    ),
+    "desercion": Escenario(
+        "Dashboard de deserción (autoridades)",
+        "admin",
+        [
+            (0.30, "riesgo.resumen", lambda a, d, r: (
+                "GET", "/api/riesgo/resumen", {"params": {"id_periodo": d["periodo_actual"]}})),
+            (0.20, "riesgo.resumen.programa", lambda a, d, r: (
+                "GET", "/api/riesgo/resumen",
+                {"params": {"id_periodo": d["periodo_actual"], "id_programa": r.choice(d["programas"])}})),
+            (0.35, "estudiantes.listar", lambda a, d, r: (
+                "GET", "/api/estudiantes/",
+                {"params": {"periodo": d["periodo_actual"], "riesgo": "alto", "page": r.randint(1, 5)}})),
+            (0.15, "alertas.listar", lambda a, d, r: (
+                "GET", "/api/alertas/", {"params": {"id_periodo": d["periodo_actual"]}})),
+        ],
+    ),
+}
+
+
+def _actores(datos: dict, tipo: str) -> List[dict]:
+    if tipo == "admin":
+        return [{**datos["admin"], "roles": ["admin", "autoridad"]}]
+    if tipo == "tutores":
+        return [{**t, "roles": ["tutor"]} for t in datos["tutores"]]
+    return [{**e, "roles": ["estudiante"]} for e in datos["estudiantes"]]
+
+
+def _con_ip_cliente(app):
+    """Cada actor entra con su propia IP (X-Bench-IP), como en producción; evita que el
+    limitador de logins por IP convierta la tormenta en 429."""
+
+    async def _app(scope, receive, send):
+        if scope["type"] == "http":
+            for nombre, valor in scope.get("headers") or ():
+                if nombre == b"x-bench-ip":
+                    scope = {**scope, "client": (valor.decode(), 0)}
+                    break
+        await app(scope, receive, send)
+
+    return _app
+
+
+async def _correr(cliente, escenario: Escenario, datos: dict, peticiones: int,
+                  concurrencia: int, semilla: int) -> dict:
+    from app import queries
+    from app.security import create_access_token
+
+    rng = random.Random(semilla)
+    actores = _actores(datos, escenario.actores)
+    tokens: Dict[int, str] = {}
+    pesos = [p for p, _, _ in escenario.pasos]
+
+    plan = []
+    for i in range(peticiones):
+        actor = actores[i % len(actores)] if escenario.actores != "admin" else actores[0]
+        _, nombre, armar = rng.choices(escenario.pasos, weights=pesos)[0]
+        plan.append((actor, nombre, armar(actor, datos, rng)))
+
+    latencias: List[float] = []
+    por_paso: Dict[str, List[float]] = {}
+    status: Dict[int, int] = {}
+    errores = 0
+    sem = asyncio.Semaphore(concurrencia)
+
+    async def _una(actor: dict, nombre: str, pet: Peticion) -> None:
+        nonlocal errores
+        metodo, ruta, kw = pet
+        headers = {"x-bench-ip": f"10.{actor['id_usuario'] // 65536 % 256}."
+                                 f"{actor['id_usuario'] // 256 % 256}.{actor['id_usuario'] % 256}"}
+        if escenario.con_token:
+            token = tokens.get(actor["id_usuario"])
+            if token is None:
+                token = tokens[actor["id_usuario"]] = create_access_token(
+                    actor["id_usuario"], actor["correo"], actor["roles"])
+            headers["authorization"] = f"Bearer {token}"
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                r = await cliente.request(metodo, ruta, headers=headers, **kw)
+                codigo = r.status_code
+            except Exception:
+                codigo = 0
+            dt = time.perf_counter() - t0
+        latencias.append(dt)
+        por_paso.setdefault(nombre, []).append(dt)
+        status[codigo] = status.get(codigo, 0) + 1
+        if codigo == 0 or codigo >= 500:
+            errores += 1
+
+    queries.reset()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_una(*p) for p in plan))
+    total = time.perf_counter() - t0
+
+    top = queries.top(limite=1000)
+    consultas = sum(q["llamadas"] for q in top)
+    return {
+        "descripcion": escenario.descripcion,
+        "peticiones": peticiones,
+        "concurrencia": concurrencia,
+        "duracion_s": round(total, 3),
+        "req_s": round(peticiones / total, 1) if total else None,
+        **_resumen_latencias(latencias),
+        "status": {str(k): v for k, v in sorted(status.items())},
+        "errores": errores,
+        "por_endpoint": {nombre: _resumen_latencias(v) for nombre, v in sorted(por_paso.items())},
+        "db": {
+            "consultas": consultas,
+            "consultas_por_request": round(consultas / peticiones, 2) if peticiones else None,
+            "tiempo_ms": round(sum(q["total_ms"] for q in top), 2),
+            "top": top[:5],
+        },
+    }
+
+
+# ==========================
+# Preparación de la BD
+# ==========================
+async def _preparar(args) -> dict:
+    from sqlalchemy import text
+    from app.db import engine
+    from . import datos_sinteticos
+
+    ruta_datos = Path(args.datos)
+    async with engine.connect() as conn:
+        try:
+            hay_datos = (await conn.execute(text("SELECT COUNT(*) FROM estudiantes"))).scalar_one() > 0
+        except Exception:
+            hay_datos = False
+
+    if hay_datos and ruta_datos.exists():
+        return json.loads(ruta_datos.read_text(encoding="utf-8"))
+    if hay_datos:
+        raise SystemExit(f"La BD ya tiene datos pero no existe {ruta_datos}; usa una BD vacía o pasa --datos")
+    if not (args.sqlite or args.sembrar):
+        raise SystemExit("BD vacía: usa --sembrar para llenarla")
+
+    if args.sqlite:
+        await datos_sinteticos.crear_esquema_sqlite(engine)
+    t0 = time.perf_counter()
+    datos = await datos_sinteticos.sembrar(
+        engine, estudiantes=args.estudiantes, periodos=args.periodos,
+        cursos_por_periodo=args.cursos, sesiones=args.sesiones, tutores=args.tutores, semilla=args.semilla,
+    )
+    datos["siembra_s"] = round(time.perf_counter() - t0, 1)
+    ruta_datos.write_text(json.dumps(datos), encoding="utf-8")
+    print(f"[OK] BD sembrada en {datos['siembra_s']} s: {datos['filas']}")
+    return datos
+
+
+def _comparar(base: dict, actual: dict) -> None:
+    print(f"\nComparación {base.get('commit')} -> {actual.get('commit')}")
+    for nombre, res in actual["escenarios"].items():
+        previo = base.get("escenarios", {}).get(nombre)
+        if not previo:
+            continue
+        partes = []
+        for clave in ("p50_ms", "p95_ms", "p99_ms", "req_s"):
+            a, b = previo.get(clave), res.get(clave)
+            if a and b is not None:
+                partes.append(f"{clave} {a} -> {b} ({(b - a) / a * 100:+.1f}%)")
+        cb, ca = previo["db"]["consultas_por_request"], res["db"]["consultas_por_request"]
+        partes.append(f"consultas/req {cb} -> {ca}")
+        print(f"  {nombre:10s} " + " | ".join(partes))
+
+
+async def main(args) -> None:
+    # La app lee DATABASE_URL al importarse: configurar antes de importar app.*
+    if args.sqlite:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(args.sqlite).resolve()}"
+    elif args.url:
+        os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("SLOW_REQUEST_MS", "0")
+
+    import httpx
+    from app.db import engine
+    from app.main import app
+
+    if args.sqlite:
+        from .datos_sinteticos import instalar_funciones_sqlite
+        instalar_funciones_sqlite(engine)
+
+    datos = await _preparar(args)
+    resultados: dict = {
+        "commit": _commit_actual(),
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "bd": engine.dialect.name,
+        "cpu_count": os.cpu_count(),
+        "datos": datos.get("filas"),
+        "escenarios": {},
+    }
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(app=_con_ip_cliente(app), base_url="http://bench", timeout=120) as cliente:
+            for nombre in args.escenarios:
+                escenario = ESCENARIOS[nombre]
+                if args.calentamiento:
+                    await _correr(cliente, escenario, datos, args.calentamiento, args.concurrencia, args.semilla + 1)
+                res = await _correr(cliente, escenario, datos, args.peticiones, args.concurrencia, args.semilla)
+                resultados["escenarios"][nombre] = res
+                print(f"[OK] {nombre}: {res['req_s']} req/s, p95 {res['p95_ms']} ms, "
+                      f"{res['db']['consultas_por_request']} consultas/req, status {res['status']}")
+    await engine.dispose()
+
+    salida = json.dumps(resultados, indent=2, ensure_ascii=False, default=str)
+    if args.salida:
+        Path(args.salida).write_text(salida, encoding="utf-8")
+    else:
+        print(salida)
+    if args.comparar:
+        _comparar(json.loads(Path(args.comparar).read_text(encoding="utf-8")), resultados)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de carga por escenarios (publicación de notas)")
+    bd = parser.add_mutually_exclusive_group()
+    bd.add_argument("--sqlite", help="archivo SQLite stand-in (se crea y siembra si no existe)")
+    bd.add_argument("--url", help="URL SQLAlchemy async de la BD (por defecto DATABASE_URL / DB_*)")
+    parser.add_argument("--sembrar", action="store_true", help="sembrar datos sintéticos si la BD está vacía")
+    parser.add_argument("--datos", default="bench_carga_datos.json", help="JSON con los datos sembrados")
+    parser.add_argument("--estudiantes", type=int, default=2000)
+    parser.add_argument("--periodos", type=int, default=3)
+    parser.add_argument("--cursos", type=int, default=5, help="cursos por estudiante y periodo")
+    parser.add_argument("--sesiones", type=int, default=6, help="asistencias por matrícula")
+    parser.add_argument("--tutores", type=int, default=40)
+    parser.add_argument("--escenarios", type=lambda s: [x for x in s.split(",") if x],
+                        default=list(ESCENARIOS))
+    parser.add_argument("--peticiones", type=int, default=500, help="peticiones por escenario")
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--calentamiento", type=int, default=20, help="peticiones previas no medidas")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para mostrar diferencias")
+    args = parser.parse_args()
+    desconocidos = set(args.escenarios) - set(ESCENARIOS)
+    if desconocidos:
+        parser.error(f"escenarios desconocidos: {sorted(desconocidos)}")
+    asyncio.run(main(args))
@@ -0,0 +1,85 @@
+# benchmarks/bench_compresion.py
+"""
+Bytes en la red vs CPU de la compresión de respuestas (app/compresion.py) — no requiere BD.
+
+Sobre el JSON de N filas con la forma de /riesgo/resumen (el mismo de
+bench_serializacion), para cada codificación y nivel mide:
+- bytes comprimidos y razón contra el JSON plano
+- ms de CPU para comprimir (p50) y MB/s
+- tiempo estimado de transferencia a --mbps (Wi-Fi del campus) + CPU
+- en streaming: el mismo cuerpo en bloques de --bloque bytes con flush por
+  bloque (el costo extra de enviar cada parte apenas está lista)
+
+Brotli se mide solo si el paquete está instalado.
+
+Uso (desde sia-api/):
+    python -m benchmarks.bench_compresion --filas 10000 --mbps 2
+"""
+
+from __future__ import annotations
+import argparse, json, statistics, time
+
+from app import compresion
+from app.compresion import _Compresor
+from app.respuestas import dumps
+from benchmarks.bench_serializacion import _filas
+
+NIVELES = {"gzip": (1, 6, 9), "br": (1, 4, 6, 11)}
+
+
+def _p50(fn, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    return statistics.median(tiempos)
+
+
+def _por_bloques(datos: bytes, codificacion: str, nivel: int, bloque: int) -> bytes:
+    c = _Compresor(codificacion, nivel, nivel)
+    partes = [datos[i:i + bloque] for i in range(0, len(datos), bloque)]
+    return b"".join(c.agregar(p, final=i == len(partes) - 1) for i, p in enumerate(partes))
+
+
+def main(args) -> None:
+    cuerpo = dumps({"ok": True, "data": _filas(args.filas), "message": None})
+    bytes_s = args.mbps * 1_000_000 / 8
+    plano_ms = len(cuerpo) / bytes_s * 1000
+    print(f"[OK] JSON plano: {len(cuerpo):,} bytes, {plano_ms:.0f} ms a {args.mbps} Mbit/s")
+
+    codificaciones = ["gzip"] + (["br"] if compresion.brotli is not None else [])
+    resultados = {"plano": {"bytes": len(cuerpo), "transferencia_ms": round(plano_ms, 1)}}
+    for cod in codificaciones:
+        for nivel in NIVELES[cod]:
+            kw = {"gzip_nivel": nivel, "brotli_nivel": nivel}
+            comprimido = compresion.comprimir(cuerpo, cod, **kw)
+            cpu = _p50(lambda: compresion.comprimir(cuerpo, cod, **kw), args.repeticiones)
+            stream = _por_bloques(cuerpo, cod, nivel, args.bloque)
+            cpu_stream = _p50(lambda: _por_bloques(cuerpo, cod, nivel, args.bloque), args.repeticiones)
+            red_ms = len(comprimido) / bytes_s * 1000
+            r = resultados[f"{cod}-{nivel}"] = {
+                "bytes": len(comprimido),
+                "razon": round(len(cuerpo) / len(comprimido), 1),
+                "cpu_ms": round(cpu * 1000, 2),
+                "mb_s": round(len(cuerpo) / cpu / 1e6, 1),
+                "transferencia_ms": round(red_ms, 1),
+                "total_ms": round(red_ms + cpu * 1000, 1),
+                "stream_bytes": len(stream),
+                "stream_cpu_ms": round(cpu_stream * 1000, 2),
+            }
+            print(f"[OK] {cod}-{nivel}: {r['bytes']:,} bytes (x{r['razon']}), CPU {r['cpu_ms']} ms, "
+                  f"total {r['total_ms']} ms; streaming {r['stream_bytes']:,} bytes, CPU {r['stream_cpu_ms']} ms")
+    if "br" not in codificaciones:
+        print("[WARN] Paquete brotli no instalado: solo gzip")
+    print(json.dumps({"filas": args.filas, "mbps": args.mbps, "bloque": args.bloque,
+                      "resultados": resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compresión de respuestas: bytes vs CPU por nivel")
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--mbps", type=float, default=2.0, help="ancho de banda del cliente (Mbit/s)")
+    parser.add_argument("--bloque", type=int, default=16384, help="bytes por bloque en streaming")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    main(parser.parse_args())
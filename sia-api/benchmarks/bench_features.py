@@ -0,0 +1,102 @@
+# benchmarks/bench_features.py
+"""
+Micro-benchmark de la derivación de features (app/features.py) — no requiere BD ni modelo.
+
+Compara, para 1, 100 y 100k filas:
+- fila():      aritmética de Python (ruta de una predicción en la API)
+- matriz():    NumPy vectorizado (puntaje por lotes, simulaciones)
+- escalar:     la versión anterior de la API (una fila por vez, en un bucle)
+- pandas:      la versión anterior del entrenamiento (si pandas está instalado)
+
+Uso (desde sia-api/):
+    python -m benchmarks.bench_features --filas 1,100,100000
+"""
+
+from __future__ import annotations
+import argparse, json, time
+
+import numpy as np
+
+from app.features import FEATURES, fila, matriz
+
+
+def _escalar(promedio, asistencia, cursos_matriculados, cursos_desaprobados) -> np.ndarray:
+    carga_baja = 1 if cursos_matriculados <= 2 else 0
+    cursos_aprobados = cursos_matriculados - cursos_desaprobados
+    tasa_desaprob = cursos_desaprobados / (cursos_matriculados if cursos_matriculados > 0 else 1)
+    tasa_desaprob = max(0, min(1, tasa_desaprob))
+    sin_desaprob = 1 if cursos_desaprobados == 0 else 0
+    rendimiento_global = promedio * (asistencia / 100.0)
+    carga_x_rend = cursos_matriculados * promedio
+    return np.array([[promedio, asistencia, cursos_matriculados, cursos_desaprobados, carga_baja,
+                      cursos_aprobados, tasa_desaprob, sin_desaprob, rendimiento_global, carga_x_rend]])
+
+
+def _pandas(pd, promedio, asistencia, matric, desaprob) -> np.ndarray:
+    df = pd.DataFrame({"promedio": promedio, "asistencia": asistencia,
+                       "cursos_matriculados": matric, "cursos_desaprobados": desaprob})
+    df["carga_baja"] = (df["cursos_matriculados"] <= 2).astype(int)
+    df["cursos_aprobados"] = df["cursos_matriculados"] - df["cursos_desaprobados"]
+    df["tasa_desaprob"] = df["cursos_desaprobados"] / df["cursos_matriculados"].replace(0, 1)
+    df["tasa_desaprob"] = df["tasa_desaprob"].clip(0, 1)
+    df["sin_desaprob"] = (df["cursos_desaprobados"] == 0).astype(int)
+    df["rendimiento_global"] = df["promedio"] * (df["asistencia"] / 100.0)
+    df["carga_x_rend"] = df["cursos_matriculados"] * df["promedio"]
+    return df[list(FEATURES)].to_numpy(dtype=np.float64)
+
+
+def _medir(fn, repeticiones: int) -> float:
+    """Mejor promedio por llamada (us) de 5 rondas."""
+    mejor = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            fn()
+        mejor = min(mejor, (time.perf_counter() - t0) / repeticiones)
+    return mejor * 1e6
+
+
+def main(args) -> None:
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    rng = np.random.default_rng(args.semilla)
+    resultados = []
+    for n in args.filas:
+        promedio = rng.uniform(0, 20, n)
+        asistencia = rng.uniform(0, 100, n)
+        matric = rng.integers(0, 8, n).astype(float)
+        desaprob = np.minimum(rng.integers(0, 8, n), matric)
+        filas_py = list(zip(promedio.tolist(), asistencia.tolist(), matric.tolist(), desaprob.tolist()))
+        repeticiones = max(1, args.presupuesto // n)
+
+        variantes = {
+            "matriz": lambda: matriz(promedio, asistencia, matric, desaprob),
+            "escalar": lambda: np.vstack([_escalar(*f) for f in filas_py]),
+        }
+        if n == 1:
+            variantes["fila"] = lambda: fila(*filas_py[0])
+        if pd is not None:
+            variantes["pandas"] = lambda: _pandas(pd, promedio, asistencia, matric, desaprob)
+
+        referencia = matriz(promedio, asistencia, matric, desaprob)
+        fila_resultado = {"filas": n}
+        for nombre, fn in variantes.items():
+            dif = float(np.max(np.abs(fn() - referencia)))
+            us = _medir(fn, repeticiones)
+            fila_resultado[nombre] = {"us": round(us, 2), "filas_s": round(n / us * 1e6), "max_dif": dif}
+        resultados.append(fila_resultado)
+        print(f"[OK] {n:>7,} filas: " + ", ".join(f"{k} {v['us']:.1f} us" for k, v in fila_resultado.items()
+                                                   if isinstance(v, dict)))
+
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Costo de derivar las features del modelo de deserción")
+    parser.add_argument("--filas", type=lambda s: [int(x) for x in s.split(",") if x], default=[1, 100, 100_000])
+    parser.add_argument("--presupuesto", type=int, default=200_000, help="filas procesadas por ronda")
+    parser.add_argument("--semilla", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+# benchmarks/bench_login.py
+"""
+Benchmark del costo de login (PBKDF2) — no requiere BD.
+
+Mide:
+- throughput de verificación en línea (un solo núcleo, bloqueando el event loop)
+- throughput con el pool de procesos de app.security para distintos tamaños de pool
+- retraso máximo del event loop mientras se procesan los logins
+
+Uso (desde sia-api/):
+    python -m benchmarks.bench_login --logins 200 --workers 1,2,4
+"""
+
+from __future__ import annotations
+import argparse, asyncio, json, os, time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from app import security
+from app.security import hash_password, verify_and_update_password
+
+
+async def _medir_lag(stop: asyncio.Event, intervalo: float = 0.005) -> float:
+    """Retraso máximo observado del event loop (segundos)."""
+    peor = 0.0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        peor = max(peor, time.perf_counter() - t0 - intervalo)
+    return peor
+
+
+async def _ronda_inline(pw: str, h: str, n: int) -> dict:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_medir_lag(stop))
+    await asyncio.sleep(0)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        verify_and_update_password(pw, h)
+        await asyncio.sleep(0)
+    total = time.perf_counter() - t0
+    stop.set()
+    lag = await lag_task
+    return {"modo": "inline", "workers": 1, "logins_s": n / total, "logins_s_por_nucleo": n / total,
+            "lag_max_ms": lag * 1000}
+
+
+async def _ronda_pool(pw: str, h: str, n: int, workers: int) -> dict:
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    loop = asyncio.get_running_loop()
+    # calentar procesos
+    await asyncio.gather(*(loop.run_in_executor(pool, hash_password, "warmup") for _ in range(workers)))
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_medir_lag(stop))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(loop.run_in_executor(pool, verify_and_update_password, pw, h) for _ in range(n)))
+    total = time.perf_counter() - t0
+    stop.set()
+    lag = await lag_task
+    pool.shutdown()
+    return {"modo": "pool", "workers": workers, "logins_s": n / total,
+            "logins_s_por_nucleo": n / total / workers, "lag_max_ms": lag * 1000}
+
+
+async def main(args) -> None:
+    pw = "Clave-Segura#2025"
+    h = hash_password(pw)
+    resultados = [await _ronda_inline(pw, h, args.logins)]
+    for w in args.workers:
+        resultados.append(await _ronda_pool(pw, h, args.logins, w))
+    print(json.dumps({
+        "pbkdf2_rounds": security.PBKDF2_ROUNDS,
+        "cpu_count": os.cpu_count(),
+        "logins": args.logins,
+        "resultados": resultados,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput de login (PBKDF2) por núcleo")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",") if x],
+                        default=[1, 2, max(1, os.cpu_count() or 1)])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,116 @@
+# benchmarks/bench_modelo.py
+"""
+Pickle (XGBClassifier vía joblib) vs booster nativo de XGBoost (UBJ / JSON) — no requiere BD.
+
+Mide, por formato:
+- carga en un proceso nuevo (import + lectura del artefacto) y RSS agregado
+- latencia de una fila (p50 / p99), como en POST /modelo/modelo-desercion
+- filas/s en lotes grandes (puntaje por periodo) y de pred_contribs (factores)
+- diferencia máxima de probabilidad contra el pickle (deben coincidir)
+
+El booster nativo se exporta del pickle a un directorio temporal; el registro no cambia.
+
+Uso (desde sia-api/):
+    python -m benchmarks.bench_modelo --version v1 --lotes 1000,100000
+"""
+
+from __future__ import annotations
+import argparse, json, multiprocessing, resource, statistics, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from app import features, modelo_registro
+
+
+def _matriz(n: int, semilla: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(semilla)
+    matric = rng.integers(1, 8, n)
+    return features.matriz(rng.uniform(0, 20, n), rng.uniform(0, 100, n), matric,
+                           np.minimum(rng.integers(0, 8, n), matric))
+
+
+def _rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _carga_en_proceso_nuevo(ruta: str, formato: str) -> dict:
+    """Se corre en un proceso spawn: incluye el costo de importar sklearn / xgboost."""
+    rss0 = _rss_kb()
+    t0 = time.perf_counter()
+    from app.modelo_registro import cargar_artefacto
+
+    _, probabilidades = cargar_artefacto(Path(ruta), formato)
+    probabilidades(_matriz(1))
+    return {"carga_ms": round((time.perf_counter() - t0) * 1000, 1), "rss_mb": round((_rss_kb() - rss0) / 1024, 1)}
+
+
+def _latencias(probabilidades, repeticiones: int) -> dict:
+    filas = _matriz(repeticiones)
+    tiempos = []
+    for i in range(repeticiones):
+        X = filas[i:i + 1]
+        t0 = time.perf_counter()
+        probabilidades(X)
+        tiempos.append(time.perf_counter() - t0)
+    tiempos.sort()
+    return {
+        "p50_us": round(statistics.median(tiempos) * 1e6, 1),
+        "p99_us": round(tiempos[int(len(tiempos) * 0.99) - 1] * 1e6, 1),
+    }
+
+
+def _lote(probabilidades, n: int) -> dict:
+    X = _matriz(n)
+    probabilidades(X[:10])
+    t0 = time.perf_counter()
+    probabilidades(X)
+    total = time.perf_counter() - t0
+    return {"filas": n, "ms": round(total * 1000, 2), "filas_s": round(n / total)}
+
+
+def main(args) -> None:
+    meta = modelo_registro.leer_meta(args.version)
+    pickle = modelo_registro.MODELOS_DIR / args.version / meta.get("archivo", "modelo.pkl")
+    modelo, _ = modelo_registro.cargar_artefacto(pickle, "joblib")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artefactos = {"joblib": (pickle, "joblib")}
+        for ext in ("ubj", "json"):
+            ruta = Path(tmp) / f"modelo.{ext}"
+            modelo.get_booster().save_model(str(ruta))
+            artefactos[f"xgboost-{ext}"] = (ruta, "xgboost")
+
+        X = _matriz(10_000)
+        referencia = None
+        resultados = {}
+        ctx = multiprocessing.get_context("spawn")
+        for nombre, (ruta, formato) in artefactos.items():
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                carga = pool.submit(_carga_en_proceso_nuevo, str(ruta), formato).result()
+            cargado, probabilidades = modelo_registro.cargar_artefacto(ruta, formato)
+            contribuciones = modelo_registro.cargar_contribuciones(cargado)
+            p = np.asarray(probabilidades(X), dtype=float)
+            referencia = p if referencia is None else referencia
+            resultados[nombre] = {
+                "bytes": ruta.stat().st_size,
+                **carga,
+                "una_fila": _latencias(probabilidades, args.repeticiones),
+                "lotes": [_lote(probabilidades, n) for n in args.lotes],
+                "factores_lotes": [_lote(contribuciones, n) for n in args.lotes],
+                "max_dif_vs_pickle": float(np.max(np.abs(p - referencia))),
+            }
+            print(f"[OK] {nombre}: carga {carga['carga_ms']} ms, "
+                  f"1 fila p50 {resultados[nombre]['una_fila']['p50_us']} us")
+
+    print(json.dumps({"version": args.version, "hilos": modelo_registro.MODELO_HILOS,
+                      "resultados": resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga y latencia: pickle vs booster nativo")
+    parser.add_argument("--version", default="v1", help="versión del registro con el pickle")
+    parser.add_argument("--repeticiones", type=int, default=2000, help="predicciones de una fila")
+    parser.add_argument("--lotes", type=lambda s: [int(x) for x in s.split(",") if x], default=[1000, 100000])
+    main(parser.parse_args())
@@ -0,0 +1,106 @@
+# benchmarks/bench_pool.py
+"""
+Benchmark del pool de conexiones: compara combinaciones de pool_size,
+max_overflow y modo de pre-ping bajo carga concurrente.
+
+Cada petición simulada hace checkout, ejecuta una consulta corta y devuelve
+la conexión. Se reporta throughput, p50/p95 de la petición completa y las
+métricas del pool (esperas, latencia de checkout, pings).
+
+Uso (desde sia-api/):
+    python -m benchmarks.bench_pool --concurrencia 50 --peticiones 2000
+    python -m benchmarks.bench_pool --url sqlite+aiosqlite:///bench.db --sleep-ms 0
+Sin --url se usa DATABASE_URL / DB_* del .env.
+"""
+
+from __future__ import annotations
+import argparse, asyncio, json, statistics, time
+
+from sqlalchemy import text
+
+from app.db import DATABASE_URL, crear_engine
+from app.pool_metrics import snapshot
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p / 100 * (len(orden) - 1))))]
+
+
+async def _ronda(url: str, pool_size: int, max_overflow: int, pre_ping: str,
+                 concurrencia: int, peticiones: int, sleep_ms: float) -> dict:
+    eng = crear_engine(url, pool_size=pool_size, max_overflow=max_overflow,
+                       pool_timeout=60, pre_ping=pre_ping, pre_ping_idle_s=0.5)
+    es_mysql = eng.dialect.name == "mysql"
+    consulta = text("SELECT SLEEP(:s)") if es_mysql and sleep_ms else text("SELECT 1")
+    params = {"s": sleep_ms / 1000} if es_mysql else {}
+
+    latencias: list[float] = []
+    sem = asyncio.Semaphore(concurrencia)
+
+    async def _peticion() -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            async with eng.connect() as conn:
+                await conn.execute(consulta, params)
+                if sleep_ms and not es_mysql:
+                    await asyncio.sleep(sleep_ms / 1000)   # simula trabajo con la conexión tomada
+            latencias.append(time.perf_counter() - t0)
+
+    # calentamiento: abre las conexiones base
+    await asyncio.gather(*(_peticion() for _ in range(pool_size)))
+    latencias.clear()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_peticion() for _ in range(peticiones)))
+    total = time.perf_counter() - t0
+
+    snap = snapshot(eng)
+    await eng.dispose()
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pre_ping": pre_ping,
+        "req_s": round(peticiones / total, 1),
+        "p50_ms": round(statistics.median(latencias) * 1000, 2),
+        "p95_ms": round(_percentil(latencias, 95) * 1000, 2),
+        "checkout_promedio_ms": snap.get("checkout_promedio_ms"),
+        "checkout_max_ms": snap.get("checkout_max_ms"),
+        "esperas": snap.get("esperas"),
+        "pings": snap.get("pings"),
+        "conexiones_creadas": snap.get("conexiones_creadas"),
+    }
+
+
+async def main(args) -> None:
+    resultados = []
+    for size in args.pool_size:
+        for overflow in args.max_overflow:
+            for pre_ping in args.pre_ping:
+                resultados.append(await _ronda(args.url, size, overflow, pre_ping,
+                                               args.concurrencia, args.peticiones, args.sleep_ms))
+    print(json.dumps({
+        "concurrencia": args.concurrencia,
+        "peticiones": args.peticiones,
+        "sleep_ms": args.sleep_ms,
+        "resultados": resultados,
+    }, indent=2))
+
+
+def _lista_int(s: str) -> list[int]:
+    return [int(x) for x in s.split(",") if x]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Efecto de la configuración del pool bajo carga")
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--sleep-ms", type=float, default=5.0, help="tiempo con la conexión tomada")
+    parser.add_argument("--pool-size", type=_lista_int, default=[5, 10, 20])
+    parser.add_argument("--max-overflow", type=_lista_int, default=[0, 10])
+    parser.add_argument("--pre-ping", type=lambda s: [x for x in s.split(",") if x],
+                        default=["always", "idle", "never"])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+# benchmarks/bench_serializacion.py
+"""
+Serialización de listados grandes (app/respuestas.py) — no requiere BD.
+
+Filas con la forma de /riesgo/resumen (enteros, textos, Decimal, datetime,
+JSON en texto) servidas por una app FastAPI mínima, de punta a punta con
+TestClient, en tres variantes:
+- generica:  response_model=ApiResponse + JSONResponse (como antes)
+- orjson:    response_model=ApiResponse + RespuestaJSON (clase por defecto de la app)
+- directa:   respuestas.respuesta(filas), sin validación ni encoder de FastAPI
+
+Uso (desde sia-api/):
+    python -m benchmarks.bench_serializacion --filas 1000,10000 --repeticiones 20
+"""
+
+from __future__ import annotations
+import argparse, json, statistics, time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.respuestas import RespuestaJSON, respuesta
+from app.schemas import ApiResponse
+
+
+def _filas(n: int) -> list:
+    t0 = datetime(2025, 3, 1, 8, 0, 0)
+    return [
+        {
+            "id_estudiante": i,
+            "dni": f"{70000000 + i}",
+            "nombre_visible": f"APELLIDO{i % 97} MATERNO{i % 89} , NOMBRE{i % 53}",
+            "id_programa": i % 12,
+            "programa": f"Programa {i % 12}",
+            "puntaje": Decimal(f"{(i * 37) % 10000 / 100:.2f}"),
+            "nivel": ("BAJO", "MEDIO", "ALTO")[i % 3],
+            "factores_json": '{"asistencia": 0.4, "promedio": 0.35}',
+            "creado_en": t0 + timedelta(minutes=i),
+            "probabilidad_modelo": Decimal(f"{(i * 7919) % 100000 / 100000:.5f}"),
+            "nivel_modelo": ("BAJO", "MEDIO", "ALTO")[(i + 1) % 3],
+            "version_modelo": "v2",
+        }
+        for i in range(n)
+    ]
+
+
+def _app(filas: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/generica", response_model=ApiResponse, response_class=JSONResponse)
+    async def generica():
+        return {"ok": True, "data": filas}
+
+    @app.get("/orjson", response_model=ApiResponse, response_class=RespuestaJSON)
+    async def con_orjson():
+        return {"ok": True, "data": filas}
+
+    @app.get("/directa", response_model=ApiResponse)
+    async def directa():
+        return respuesta(filas)
+
+    return app
+
+
+def _medir(cliente: TestClient, ruta: str, repeticiones: int) -> dict:
+    cliente.get(ruta)
+    tiempos, tam = [], 0
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        r = cliente.get(ruta)
+        tiempos.append(time.perf_counter() - t0)
+        tam = len(r.content)
+    return {"p50_ms": round(statistics.median(tiempos) * 1000, 2), "bytes": tam}
+
+
+def main(args) -> None:
+    resultados = {}
+    for n in args.filas:
+        cliente = TestClient(_app(_filas(n)))
+        fila = {ruta: _medir(cliente, f"/{ruta}", args.repeticiones) for ruta in ("generica", "orjson", "directa")}
+        base = fila["generica"]["p50_ms"]
+        for ruta, r in fila.items():
+            r["aceleracion"] = round(base / r["p50_ms"], 1)
+        resultados[n] = fila
+        print(f"[OK] {n:,} filas: genérica {base} ms, orjson {fila['orjson']['p50_ms']} ms, "
+              f"directa {fila['directa']['p50_ms']} ms")
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serialización de listados: encoder de FastAPI vs orjson")
+    parser.add_argument("--filas", type=lambda s: [int(x) for x in s.split(",") if x], default=[1000, 10000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    main(parser.parse_args())
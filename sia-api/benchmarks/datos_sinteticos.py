@@ -0,0 +1,198 @@
+# benchmarks/datos_sinteticos.py
+"""
+Datos sintéticos para los benchmarks de carga (ver bench_carga.py).
+
+- esquema_sqlite(): traduce las tablas de BD_Final.sql y de migraciones/*.sql a
+  SQLite para usarlo como stand-in local cuando no hay MySQL (sin vistas, SPs ni
+  triggers: /riesgo/recalcular y /riesgo/alertas no aplican).
+- instalar_funciones_sqlite(engine): CONCAT_WS, DATE_FORMAT, NOW y UTC_TIMESTAMP
+  para que las consultas de los routers corran sin cambios.
+- sembrar(engine, ...): app.generar_datos.generar() en escala chica (catálogos,
+  estudiantes con matrículas, calificaciones, asistencias, fichas, puntajes,
+  alertas, tutores y asignaciones) más un admin. Determinista a partir de la
+  semilla; espera las tablas vacías.
+"""
+
+from __future__ import annotations
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List
+
+from sqlalchemy import event, text
+
+BD_FINAL = Path(__file__).resolve().parents[2] / "BD_Final.sql"
+MIGRACIONES = Path(__file__).resolve().parents[2] / "migraciones"
+
+PASSWORD = "Bench#2025"
+
+
+# ==========================
+# Esquema SQLite
+# ==========================
+_RE_TABLA = re.compile(r"CREATE TABLE (?:IF NOT EXISTS )?`(\w+)` \((.*?)\n\) ENGINE", re.S)
+_RE_COLUMNA = re.compile(r"ALTER TABLE `(\w+)`\s+ADD COLUMN (.+?);", re.S)
+
+
+def _columna(linea: str) -> str:
+    linea = re.sub(r" (CHARACTER SET|COLLATE) \w+", "", linea)
+    linea = re.sub(r" ON UPDATE CURRENT_TIMESTAMP", "", linea)
+    linea = linea.replace("DEFAULT (curdate())", "DEFAULT CURRENT_DATE").replace(" unsigned", "")
+    return re.sub(r" json\b", " TEXT", linea)
+
+
+def esquema_sqlite(rutas: Iterable[Path] | None = None) -> List[str]:
+    """Sentencias CREATE TABLE / CREATE INDEX / ADD COLUMN equivalentes en SQLite (BD_Final + migraciones)."""
+    if rutas is None:
+        rutas = [BD_FINAL, *sorted(MIGRACIONES.glob("*.sql"))]
+    sql = "\n".join(r.read_text(encoding="utf-8") for r in rutas)
+    sentencias: List[str] = []
+    for tabla, cuerpo in _RE_TABLA.findall(sql):
+        columnas: List[str] = []
+        indices: List[str] = []
+        autoinc = None
+        for linea in (l.strip().rstrip(",") for l in cuerpo.strip().splitlines()):
+            linea = linea.replace("`", "")
+            if linea.startswith(("CONSTRAINT", "FOREIGN KEY")):
+                continue
+            m = re.match(r"(UNIQUE )?KEY (\w+) \((.+)\)", linea)
+            if m:
+                unico, nombre, cols = m.groups()
+                tipo = "UNIQUE INDEX" if unico else "INDEX"
+                indices.append(f"CREATE {tipo} IF NOT EXISTS {tabla}__{nombre} ON {tabla} ({cols})")
+                continue
+            if linea.startswith("PRIMARY KEY"):
+                if autoinc is None:
+                    columnas.append(linea)
+                continue
+            linea = _columna(linea)
+            if "AUTO_INCREMENT" in linea:
+                autoinc = linea.split()[0]
+                linea = f"{autoinc} INTEGER PRIMARY KEY AUTOINCREMENT"
+            columnas.append(linea)
+        sentencias.append(f"CREATE TABLE IF NOT EXISTS {tabla} (\n  " + ",\n  ".join(columnas) + "\n)")
+        sentencias.extend(indices)
+    # Columnas agregadas por migraciones (una por ALTER)
+    for tabla, columna in _RE_COLUMNA.findall(sql):
+        sentencias.append(f"ALTER TABLE {tabla} ADD COLUMN {_columna(columna.replace('`', '').strip())}")
+    return sentencias
+
+
+_FORMATOS_MYSQL = {"%Y": "%Y", "%m": "%m", "%d": "%d", "%H": "%H", "%i": "%M", "%s": "%S"}
+
+
+def _date_format(valor, formato):
+    if valor is None:
+        return None
+    fmt = re.sub(r"%[a-zA-Z]", lambda m: _FORMATOS_MYSQL.get(m.group(0), m.group(0)), formato)
+    return datetime.fromisoformat(str(valor)).strftime(fmt)
+
+
+def _concat_ws(sep, *partes):
+    return sep.join(str(p) for p in partes if p is not None)
+
+
+def instalar_funciones_sqlite(engine) -> None:
+    """Funciones MySQL usadas por los routers + WAL/busy_timeout para escrituras concurrentes."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_conn, rec):
+        dbapi_conn.create_function("CONCAT_WS", -1, _concat_ws)
+        dbapi_conn.create_function("DATE_FORMAT", 2, _date_format)
+        dbapi_conn.create_function("NOW", 0, lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        dbapi_conn.create_function(
+            "UTC_TIMESTAMP", 0, lambda: datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        )
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA busy_timeout=10000")
+        cur.close()
+
+
+async def crear_esquema_sqlite(engine) -> None:
+    async with engine.begin() as conn:
+        for sentencia in esquema_sqlite():
+            m = re.match(r"ALTER TABLE (\w+) ADD COLUMN (\w+)", sentencia)
+            if m:    # SQLite no tiene ADD COLUMN IF NOT EXISTS
+                existentes = {r[1] for r in (await conn.execute(text(f"PRAGMA table_info({m.group(1)})"))).all()}
+                if m.group(2) in existentes:
+                    continue
+            await conn.execute(text(sentencia))
+
+
+# ==========================
+# Siembra
+# ==========================
+async def sembrar(
+    engine,
+    estudiantes: int = 2000,
+    periodos: int = 3,
+    cursos_por_periodo: int = 5,
+    sesiones: int = 6,
+    tutores: int = 40,
+    semilla: int = 42,
+    password_hash: str | None = None,
+) -> dict:
+    """
+    Inserta los datos con app.generar_datos (mismo generador que las pruebas de
+    volumen, en escala chica y en el mismo proceso) más un admin, y devuelve lo
+    necesario para generar carga: credenciales, ids de usuario por rol y periodos.
+    """
+    from app.generar_datos import Config, correo_estudiante, generar
+    from app.security import hash_password
+
+    cfg = Config(
+        estudiantes=estudiantes, periodos=periodos, cursos=cursos_por_periodo, sesiones=sesiones,
+        tutores=tutores, programas=max(1, min(12, estudiantes // 200)), semilla=semilla, usuarios=True,
+        workers=1, procesos=0,      # SQLite: un solo escritor; lotes chicos, sin procesos aparte
+    )
+    h = password_hash or hash_password(PASSWORD)
+    generado = await generar(engine, cfg, h)
+    bases = generado["bases"]
+
+    async with engine.begin() as conn:
+        roles = {
+            r[0]: int(r[1])
+            for r in (await conn.execute(text("SELECT nombre, id_rol FROM roles"))).all()
+        }
+        activo = (await conn.execute(
+            text("SELECT id_estado_usuario FROM estados_usuario WHERE nombre = 'activo'")
+        )).scalar_one()
+        admin_pid = int((await conn.execute(text("SELECT COALESCE(MAX(id_persona), 0) + 1 FROM personas"))).scalar_one())
+        admin_uid = int((await conn.execute(text("SELECT COALESCE(MAX(id_usuario), 0) + 1 FROM usuarios"))).scalar_one())
+        await conn.execute(
+            text("INSERT INTO personas (id_persona, dni, apellido_paterno, apellido_materno, nombres) "
+                 "VALUES (:id, :dni, 'BENCH', 'BENCH', 'ADMIN')"),
+            {"id": admin_pid, "dni": f"{40000000 + admin_pid}"},
+        )
+        await conn.execute(
+            text("INSERT INTO usuarios (id_usuario, id_persona, correo, contrasenia_hash, id_estado_usuario) "
+                 "VALUES (:id, :pid, 'admin@bench.unasam.edu.pe', :h, :e)"),
+            {"id": admin_uid, "pid": admin_pid, "h": h, "e": activo},
+        )
+        await conn.execute(
+            text("INSERT INTO usuarios_roles (id_usuario, id_rol) VALUES (:u, :r)"),
+            [{"u": admin_uid, "r": roles[r]} for r in ("admin", "autoridad")],
+        )
+        filas = {
+            tabla: int((await conn.execute(text(f"SELECT COUNT(*) FROM {tabla}"))).scalar_one())
+            for tabla in ("estudiantes", "matriculas", "asistencias", "alertas", "tutorias")
+        }
+
+    return {
+        "password": PASSWORD,
+        "estudiantes": [
+            {"id_usuario": bases["usuario"] + n, "correo": correo_estudiante(bases["estudiante"] + n),
+             "id_estudiante": bases["estudiante"] + n}
+            for n in range(1, estudiantes + 1)
+        ],
+        "tutores": [
+            {"id_usuario": t["id_usuario"], "correo": t["correo"], "id_tutor": t["id_tutor"]}
+            for t in generado["tutores"]
+        ],
+        "admin": {"id_usuario": admin_uid, "correo": "admin@bench.unasam.edu.pe"},
+        "periodos": generado["periodos"],
+        "periodo_actual": generado["periodos"][-1],
+        "programas": generado["programas"],
+        "filas": filas,
+    }